@@ -27,6 +27,7 @@ export async function GET(req: NextRequest) {
       sampleSize: result.sampleSize,
       retrainTriggered: result.retrainTriggered,
       retrainError: result.retrainError,
+      retrainJobId: result.retrainJobId,
       tagsAdded: result.tagsAdded,
       highValueSubIndustries: result.highValueSubIndustries,
     });
@@ -1,7 +1,9 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { auth } from '@clerk/nextjs/server';
+import { mlDeadlineHeaders } from '@/lib/ml-deadline';
 
 const ML_SERVICE_URL = process.env.ML_SERVICE_URL || 'http://localhost:8000';
+const RANK_TIMEOUT_MS = 15_000;
 
 export async function POST(req: NextRequest) {
   const { userId } = await auth();
@@ -20,21 +22,23 @@ export async function POST(req: NextRequest) {
   const { mlRankBodySchema } = await import('@/lib/schemas/api');
   const parsed = parseBody(mlRankBodySchema, rawBody);
   if (!parsed.success) return parsed.response;
-  const { project_id } = parsed.data;
+  const { project_id, cursor, page_size } = parsed.data;
 
   try {
     const res = await fetch(`${ML_SERVICE_URL}/rank`, {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ project_id }),
-      signal: AbortSignal.timeout(15_000),
+      headers: { 'Content-Type': 'application/json', ...mlDeadlineHeaders(RANK_TIMEOUT_MS) },
+      body: JSON.stringify({ project_id, cursor, page_size }),
+      signal: AbortSignal.timeout(RANK_TIMEOUT_MS),
     });
 
     if (!res.ok) {
       const err = await res.text();
+      // 429 / 503 from admission control: tell the client when to retry
+      const retryAfter = res.headers.get('Retry-After');
       return NextResponse.json(
         { error: 'ML service error', details: err },
-        { status: res.status }
+        { status: res.status, headers: retryAfter ? { 'Retry-After': retryAfter } : undefined }
       );
     }
 
@@ -14,6 +14,10 @@ interface GraphNode {
   group: string;
   val: number;
   community?: number;
+  /** Precomputed layout position (ml-service graph_layout) */
+  x?: number;
+  y?: number;
+  z?: number;
 }
 
 interface GraphLink {
@@ -102,6 +106,8 @@ export default function KnowledgeGraphClient() {
     .filter(Boolean) as { source: GraphNode; target: GraphNode; type: string }[];
 
   const graphData = { nodes: data.nodes, links };
+  // Server-side layout: render the settled positions instead of simulating
+  const hasLayout = data.nodes.every((n) => n.x !== undefined);
 
   const getNodeColor = (node: { group?: string }) => {
     switch (node.group) {
@@ -126,6 +132,7 @@ export default function KnowledgeGraphClient() {
         linkColor={() => 'rgba(100,100,100,0.4)'}
         linkWidth={1}
         backgroundColor="#0f172a"
+        cooldownTicks={hasLayout ? 0 : Infinity}
       />
       <div
         style={{
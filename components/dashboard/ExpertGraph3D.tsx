@@ -40,6 +40,8 @@ function ExpertGraph3DInner() {
       .filter(Boolean) as { source: GraphNode; target: GraphNode; type: string }[];
     return { nodes: data.nodes, links };
   }, [data]);
+  // Server-side layout: render the settled positions instead of simulating
+  const hasLayout = !!graphData?.nodes.every((n) => n.x !== undefined);
 
   const getNodeColor = useCallback((node: { group?: string }) => {
     switch (node.group) {
@@ -104,6 +106,7 @@ function ExpertGraph3DInner() {
         linkColor={() => 'rgba(100,100,100,0.4)'}
         linkWidth={1}
         backgroundColor="#0f172a"
+        cooldownTicks={hasLayout ? 0 : Infinity}
         onNodeClick={(n) => handleNodeClick(n as GraphNode)}
         onNodeHover={(n) => {
           setHoveredNode(n as GraphNode);
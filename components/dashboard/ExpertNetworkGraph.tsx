@@ -14,6 +14,10 @@ interface GraphNode {
   group: string;
   val: number;
   community?: number;
+  /** Precomputed layout position (ml-service graph_layout) */
+  x?: number;
+  y?: number;
+  z?: number;
 }
 
 interface GraphLink {
@@ -78,6 +82,8 @@ export function ExpertNetworkGraph({ focusExpertId }: { focusExpertId: string |
     : [];
 
   const graphData = { nodes: data?.nodes ?? [], links: linksWithObjects };
+  // Server-side layout: render the settled positions instead of simulating
+  const hasLayout = graphData.nodes.length > 0 && graphData.nodes.every((n) => n.x !== undefined);
 
   const getNodeColor = useCallback((node: GraphNode) => {
     if (focusExpertId && node.id === focusExpertId) return '#38bdf8';
@@ -134,6 +140,7 @@ export function ExpertNetworkGraph({ focusExpertId }: { focusExpertId: string |
         linkWidth={1}
         onLinkHover={(l) => setHoveredLink(l as GraphLink | null)}
         backgroundColor="rgba(15, 23, 42, 0.6)"
+        cooldownTicks={hasLayout ? 0 : Infinity}
       />
       {hoveredLink && (
         <div className="absolute bottom-2 left-2 right-2 py-1.5 px-2 rounded bg-slate-800/95 text-slate-300 text-xs border border-slate-600/50">
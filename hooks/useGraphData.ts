@@ -8,12 +8,18 @@ export interface GraphNode {
   group: string;
   val: number;
   community?: number;
+  /** Precomputed layout position (ml-service graph_layout) */
+  x?: number;
+  y?: number;
+  z?: number;
 }
 
 export interface GraphLink {
   source: string;
   target: string;
   type: string;
+  /** Relationships behind the link (e.g. shared employers) */
+  weight?: number;
 }
 
 export interface GraphData {
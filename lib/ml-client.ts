@@ -3,6 +3,8 @@
  * Features: 10s timeout, circuit breaker, embedding cache, fallback to basic search.
  */
 
+import { mlDeadlineHeaders } from '@/lib/ml-deadline';
+
 const ML_SERVICE_URL =
   process.env.ML_SERVICE_URL?.replace(/\/$/, '') || 'http://localhost:8000';
 const TIMEOUT_MS = 10_000;
@@ -57,6 +59,7 @@ async function fetchWithTimeout(
   try {
     const res = await fetch(url, {
       ...options,
+      headers: { ...(options.headers as Record<string, string>), ...mlDeadlineHeaders(timeoutMs) },
       signal: controller.signal,
     });
     return res;
@@ -119,30 +122,50 @@ export interface RankResponse {
     confidence_score?: number;
     reasoning?: string;
   }>;
+  /** Pass back as `cursor` for the next page; null on the last page. */
+  next_cursor?: string | null;
+  /** Candidates recalled for this ranking (all pages). */
+  total?: number;
 }
 
 /**
  * Rank experts for a project. Falls back to null if ML is down.
+ * Throws ML_CURSOR_EXPIRED when the ranking behind `cursor` has expired; the
+ * caller should restart from the first page.
  */
-export async function rankExperts(projectId: string): Promise<RankResponse | null> {
+export async function rankExperts(
+  projectId: string,
+  page: { cursor?: string; pageSize?: number } = {}
+): Promise<RankResponse | null> {
   if (isCircuitOpen()) return null;
 
+  let res: Response;
   try {
-    const res = await fetchWithTimeout(
+    res = await fetchWithTimeout(
       `${ML_SERVICE_URL}/rank`,
       {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ project_id: projectId }),
+        body: JSON.stringify({
+          project_id: projectId,
+          ...(page.cursor ? { cursor: page.cursor } : {}),
+          ...(page.pageSize ? { page_size: page.pageSize } : {}),
+        }),
       },
       TIMEOUT_MS
     );
+  } catch {
+    openCircuit();
+    return null;
+  }
 
-    if (!res.ok) {
-      openCircuit();
-      return null;
-    }
-
+  // An expired cursor is not an outage: leave the circuit closed
+  if (res.status === 410) throw new Error('ML_CURSOR_EXPIRED');
+  if (!res.ok) {
+    openCircuit();
+    return null;
+  }
+  try {
     return (await res.json()) as RankResponse;
   } catch {
     openCircuit();
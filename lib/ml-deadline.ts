@@ -0,0 +1,12 @@
+/**
+ * Deadline propagation to the ML service. Requests carry X-Request-Timeout-Ms, a little
+ * under the caller's own timeout, so the service sheds work it cannot finish in time
+ * (503 with Retry-After) and stops work whose caller has already given up.
+ */
+
+/** Left for the network and response parsing after the service's deadline. */
+const DEADLINE_MARGIN_MS = 250;
+
+export function mlDeadlineHeaders(timeoutMs: number): Record<string, string> {
+  return { 'X-Request-Timeout-Ms': String(Math.max(timeoutMs - DEADLINE_MARGIN_MS, 0)) };
+}
@@ -3,7 +3,10 @@
  * XGBoost rate prediction, NetworkX graph generation, and ranking.
  */
 
+import { mlDeadlineHeaders } from '@/lib/ml-deadline';
+
 const ML_BASE = process.env.ML_SERVICE_URL || 'http://localhost:8000';
+const ML_TIMEOUT_MS = 30000;
 
 async function fetchML<T>(
   path: string,
@@ -12,9 +15,9 @@ async function fetchML<T>(
   const { method = 'GET', body } = options;
   const res = await fetch(`${ML_BASE}${path}`, {
     method,
-    headers: { 'Content-Type': 'application/json' },
+    headers: { 'Content-Type': 'application/json', ...mlDeadlineHeaders(ML_TIMEOUT_MS) },
     ...(body !== undefined && { body: JSON.stringify(body) }),
-    signal: AbortSignal.timeout(30000),
+    signal: AbortSignal.timeout(ML_TIMEOUT_MS),
   });
   if (!res.ok) {
     const text = await res.text();
@@ -51,6 +54,89 @@ export async function getGraphData(limit: number = 200): Promise<{
 export async function rankExperts(projectId: string): Promise<{
   project_id: string;
   ranked_experts: Array<{ expert_id: string; name: string; industry: string; confidence_score: number; reasoning: string }>;
+  next_cursor: string | null;
+  total: number;
 }> {
   return fetchML('/rank', { method: 'POST', body: { project_id: projectId } });
 }
+
+type GraphNode = {
+  id: string;
+  label: string;
+  group: string;
+  val?: number;
+  community?: number;
+  x?: number;
+  y?: number;
+  z?: number;
+};
+type GraphLink = { source: string; target: string; type?: string; weight?: number };
+
+/** k-hop neighbourhood of a node ("expert_<id>", "company_<name>", ...) within node/edge budgets */
+export async function getEgoNetwork(
+  nodeId: string,
+  options: { hops?: number; maxNodes?: number; maxEdges?: number } = {}
+): Promise<{ nodes: GraphNode[]; links: GraphLink[]; truncated: boolean }> {
+  return fetchML('/graph/ego', {
+    method: 'POST',
+    body: {
+      node_id: nodeId,
+      hops: options.hops,
+      max_nodes: options.maxNodes,
+      max_edges: options.maxEdges,
+    },
+  });
+}
+
+/** Shortest warm-intro chain (colleagues and employers) from an expert to a company */
+export async function getWarmIntroPath(
+  expertId: string,
+  company: string,
+  maxHops?: number
+): Promise<{ nodes: GraphNode[]; links: GraphLink[]; hops: number | null }> {
+  return fetchML('/graph/path', {
+    method: 'POST',
+    body: { expert_id: expertId, company, max_hops: maxHops },
+  });
+}
+
+/** Subgraph of one industry or one Louvain community */
+export async function getSubgraph(
+  selector: { industry: string } | { community: number },
+  options: { maxNodes?: number; maxEdges?: number } = {}
+): Promise<{ nodes: GraphNode[]; links: GraphLink[]; truncated: boolean }> {
+  return fetchML('/graph/subgraph', {
+    method: 'POST',
+    body: { ...selector, max_nodes: options.maxNodes, max_edges: options.maxEdges },
+  });
+}
+
+type CommunityNode = GraphNode & {
+  size: number;
+  groups: Record<string, number>;
+  internal_edges: number;
+};
+type AggregateLink = GraphLink & { weight?: number };
+
+/** Level-of-detail top level: one super-node ("community_<id>") per Louvain community */
+export async function getGraphOverview(
+  limit: number = 500
+): Promise<{ nodes: CommunityNode[]; links: AggregateLink[]; level: 'communities' }> {
+  return fetchML('/insights/graph', { method: 'POST', body: { limit, level: 'communities' } });
+}
+
+/** Members of one community, with AGGREGATE links to the other super-nodes */
+export async function expandCommunity(
+  community: number,
+  options: { limit?: number; maxNodes?: number; maxEdges?: number } = {}
+): Promise<{ nodes: GraphNode[]; links: AggregateLink[]; community: number; truncated: boolean }> {
+  return fetchML('/insights/graph', {
+    method: 'POST',
+    body: {
+      limit: options.limit ?? 500,
+      expand: community,
+      max_nodes: options.maxNodes,
+      max_edges: options.maxEdges,
+    },
+  });
+}
@@ -16,6 +16,7 @@ export interface OptimizeIqResult {
   sampleSize: number;
   retrainTriggered: boolean;
   retrainError?: string;
+  retrainJobId?: string;
   tagsAdded: string[];
   highValueSubIndustries: string[];
 }
@@ -57,7 +58,8 @@ export async function runOptimizeIq(): Promise<OptimizeIqResult> {
     if (maePct > MAE_THRESHOLD_PCT) {
       const base = process.env.ML_SERVICE_URL || 'http://localhost:8000';
       try {
-        const res = await fetch(`${base}/insights/train-rate-model`, {
+        // Queues a background job (202) instead of holding the request open while training
+        const res = await fetch(`${base}/jobs/train-rate-model`, {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
           body: JSON.stringify({
@@ -66,10 +68,13 @@ export async function runOptimizeIq(): Promise<OptimizeIqResult> {
             mae_pct: maePct,
             use_engagements: true,
           }),
-          signal: AbortSignal.timeout(60000),
+          signal: AbortSignal.timeout(10000),
         });
         result.retrainTriggered = res.ok;
-        if (!res.ok) {
+        if (res.ok) {
+          const job = (await res.json()) as { id?: string };
+          result.retrainJobId = job.id;
+        } else {
           result.retrainError = await res.text();
         }
       } catch (err) {
@@ -105,6 +105,8 @@ export const mlEmbeddingBodySchema = z.object({
 // --- ML rank proxy ---
 export const mlRankBodySchema = z.object({
   project_id: commonSchemas.cuid,
+  cursor: z.string().max(200).optional(),
+  page_size: z.number().int().min(1).max(200).optional(),
 });
 
 // --- ML predict-rate proxy ---
@@ -0,0 +1,336 @@
+"""
+Admission control, request deadlines and cancellation.
+Each endpoint class (fast lookups, /rank, batch ranking, graph builds, training) runs at most
+`concurrency` requests at once and queues at most `queue` more, first come first served.
+A request is shed before doing any work: with 429 when its class's queue is full, and
+with 503 when its deadline cannot be met (judged from the queue ahead of it and the
+class's recent service time) or passes while it waits. Under overload callers get a fast
+answer they can retry instead of all timing out.
+
+The deadline comes from the caller's X-Request-Timeout-Ms header (capped at the class
+default) and travels with the request in a context variable, together with a flag set
+when the client disconnects. Long-running code calls checkpoint() between steps, which
+raises once the client has gone or the deadline has passed. Shared single-flight
+computations run under a context of their own, cancelled once every caller has gone,
+since until then other callers still want their result.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Generator, MutableMapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+
+import metrics
+
+DEADLINE_HEADER = b"x-request-timeout-ms"
+# nginx's "client closed request": logged for work abandoned after a disconnect
+CLIENT_CLOSED_REQUEST = 499
+# Weight of the newest request in each class's service-time average
+SERVICE_TIME_ALPHA = 0.2
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class ClassLimits:
+    concurrency: int
+    queue: int
+    # Deadline for requests that do not send one, and the cap for those that do
+    timeout_seconds: float
+
+
+# Defaults keep the sum of concurrency limits under the 40 threads Starlette runs sync
+# endpoints on; override per class with ML_ADMISSION_<CLASS>_CONCURRENCY / _QUEUE /
+# _TIMEOUT_SECONDS.
+DEFAULT_LIMITS = {
+    "fast": ClassLimits(concurrency=24, queue=256, timeout_seconds=10.0),
+    "rank": ClassLimits(concurrency=8, queue=32, timeout_seconds=15.0),
+    "batch": ClassLimits(concurrency=2, queue=8, timeout_seconds=300.0),
+    "graph": ClassLimits(concurrency=2, queue=16, timeout_seconds=30.0),
+    "training": ClassLimits(concurrency=1, queue=2, timeout_seconds=600.0),
+}
+
+
+def class_limits(name: str) -> ClassLimits:
+    default = DEFAULT_LIMITS[name]
+    prefix = f"ML_ADMISSION_{name.upper()}_"
+    return ClassLimits(
+        concurrency=int(os.getenv(prefix + "CONCURRENCY") or default.concurrency),
+        queue=int(os.getenv(prefix + "QUEUE") or default.queue),
+        timeout_seconds=float(os.getenv(prefix + "TIMEOUT_SECONDS") or default.timeout_seconds),
+    )
+
+
+class RequestCancelledError(Exception):
+    """The client disconnected; nobody is waiting for the result."""
+
+
+class DeadlineExceededError(Exception):
+    """The request's deadline passed before its work finished."""
+
+
+class RequestContext:
+    """Deadline (time.monotonic() seconds) and cancellation flag of one request."""
+
+    __slots__ = ("deadline", "cancelled")
+
+    def __init__(self, deadline: float) -> None:
+        self.deadline = deadline
+        self.cancelled = threading.Event()
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def check(self) -> None:
+        if self.cancelled.is_set():
+            raise RequestCancelledError("Client disconnected")
+        if self.remaining() <= 0:
+            raise DeadlineExceededError("Request deadline exceeded")
+
+
+_current: ContextVar[RequestContext | None] = ContextVar("request_context", default=None)
+
+
+def current() -> RequestContext | None:
+    return _current.get()
+
+
+def checkpoint() -> None:
+    """Raise if the current request was abandoned or is out of time (no-op outside one)."""
+    ctx = _current.get()
+    if ctx is not None:
+        ctx.check()
+
+
+def remaining_seconds() -> float | None:
+    """Time left before the current request's deadline, or None outside a request."""
+    ctx = _current.get()
+    return None if ctx is None else ctx.remaining()
+
+
+@contextmanager
+def attached(ctx: RequestContext | None) -> Generator[None, None, None]:
+    """Run a block under `ctx`'s deadline and cancellation instead of the current request's."""
+    token = _current.set(ctx)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def detached() -> Generator[None, None, None]:
+    """Run a block outside the current request's deadline and cancellation."""
+    with attached(None):
+        yield
+
+
+class RejectedError(Exception):
+    def __init__(self, status: int, reason: str, detail: str, retry_after: float) -> None:
+        super().__init__(detail)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Limiter:
+    """
+    Concurrency slots plus a bounded FIFO queue for one endpoint class. Lives on the
+    event loop: acquire() and release() are only called from async code.
+    """
+
+    def __init__(self, name: str, limits: ClassLimits) -> None:
+        self.name = name
+        self.limits = limits
+        self.active = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._service_seconds: float | None = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def estimated_wait(self) -> float:
+        """Queueing delay for a request arriving now (0 until service times are known)."""
+        if self.active < self.limits.concurrency or self._service_seconds is None:
+            return 0.0
+        return self._service_seconds * (self.queued + 1) / self.limits.concurrency
+
+    def _retry_after(self) -> float:
+        return max(1.0, self.estimated_wait())
+
+    async def acquire(self, ctx: RequestContext, gone: asyncio.Event) -> float:
+        """
+        Take a slot, waiting in line if all are busy; returns seconds spent queued.
+        Raises RejectedError to shed the request, and RequestCancelledError if the
+        client disconnects while queued.
+        """
+        expected = self.estimated_wait() + (self._service_seconds or 0.0)
+        if expected > ctx.remaining():
+            raise RejectedError(
+                503, "deadline", "Cannot finish before the request deadline", self._retry_after()
+            )
+        if self.active < self.limits.concurrency and not self._waiters:
+            self.active += 1
+            self._observe()
+            return 0.0
+        if self.queued >= self.limits.queue:
+            raise RejectedError(429, "queue_full", "Server busy, retry later", self._retry_after())
+
+        start = time.monotonic()
+        slot: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(slot)
+        self._observe()
+        disconnect = asyncio.ensure_future(gone.wait())
+        try:
+            await asyncio.wait(
+                (slot, disconnect),
+                timeout=max(ctx.remaining(), 0.0),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        except BaseException:
+            self._abandon(slot)
+            raise
+        finally:
+            disconnect.cancel()
+        if slot.done() and not gone.is_set():
+            return time.monotonic() - start
+        self._abandon(slot)
+        if gone.is_set():
+            raise RequestCancelledError("Client disconnected while queued")
+        raise RejectedError(
+            503, "expired", "Request deadline passed while queued", self._retry_after()
+        )
+
+    def _abandon(self, slot: asyncio.Future[None]) -> None:
+        if slot.done():
+            self.release(None)  # handed a slot as the request gave up: pass it on
+        else:
+            slot.cancel()
+            self._waiters.remove(slot)
+            self._observe()
+
+    def release(self, service_seconds: float | None) -> None:
+        """Free a slot (handing it straight to the next queued request, if any)."""
+        if service_seconds is not None:
+            prev = self._service_seconds
+            self._service_seconds = (
+                service_seconds
+                if prev is None
+                else prev + SERVICE_TIME_ALPHA * (service_seconds - prev)
+            )
+        while self._waiters:
+            slot = self._waiters.popleft()
+            if not slot.done():
+                slot.set_result(None)
+                self._observe()
+                return
+        self.active -= 1
+        self._observe()
+
+    def _observe(self) -> None:
+        metrics.observe_admission(self.name, self.active, self.queued)
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying a Limiter per endpoint class to the routes in `classes`
+    (route path template -> class name); other routes pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp, classes: dict[str, str]) -> None:
+        self.app = app
+        self.classes = classes
+        self.limiters = {name: Limiter(name, class_limits(name)) for name in set(classes.values())}
+
+    def _limiter(self, scope: Scope) -> Limiter | None:
+        for route in scope["app"].routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                name = self.classes.get(getattr(route, "path", ""))
+                if name is not None:
+                    # Lets outer middleware label requests this one answers itself
+                    scope["route"] = route
+                    return self.limiters[name]
+                return None
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = self._limiter(scope) if scope["type"] == "http" else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        timeout = limiter.limits.timeout_seconds
+        for key, value in scope.get("headers") or ():
+            if key == DEADLINE_HEADER:
+                try:
+                    timeout = min(timeout, max(int(value) / 1000.0, 0.0))
+                except ValueError:
+                    pass
+        ctx = RequestContext(time.monotonic() + timeout)
+
+        # Read the (small, JSON) body up front so the disconnect can be watched for
+        # while the request is queued or running; the app gets the body replayed.
+        body: deque[Message] = deque()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body.append(message)
+            if not message.get("more_body"):
+                break
+        gone = asyncio.Event()
+
+        async def watch() -> None:
+            if (await receive())["type"] == "http.disconnect":
+                ctx.cancelled.set()
+                gone.set()
+
+        async def replay() -> Message:
+            if body:
+                return body.popleft()
+            await gone.wait()
+            return {"type": "http.disconnect"}
+
+        watcher = asyncio.ensure_future(watch())
+        try:
+            try:
+                waited = await limiter.acquire(ctx, gone)
+            except RejectedError as exc:
+                metrics.observe_admission_rejected(limiter.name, exc.reason)
+                response = JSONResponse(
+                    {"detail": str(exc)},
+                    status_code=exc.status,
+                    headers={"Retry-After": str(math.ceil(exc.retry_after))},
+                )
+                await response(scope, replay, send)
+                return
+            except RequestCancelledError:
+                metrics.observe_admission_rejected(limiter.name, "disconnected")
+                return
+            metrics.observe_admission_wait(limiter.name, waited)
+
+            start = time.monotonic()
+            token = _current.set(ctx)
+            try:
+                await self.app(scope, replay, send)
+            finally:
+                _current.reset(token)
+                limiter.release(time.monotonic() - start)
+        finally:
+            watcher.cancel()
@@ -0,0 +1,95 @@
+"""
+Multi-project ranking for /rank/batch.
+Each project gets what the first page of /rank would show: the same recall (pgvector
+pool plus BM25 hits, rank_sessions.recall) and the same scoring of its first
+SCORING_SLICE candidates. The batch shares what it can across projects: one query for
+all projects, one embeddings API call for the distinct briefs and one graph snapshot.
+Projects with the same filters and brief are recalled and scored once.
+"""
+
+import json
+from collections.abc import Iterator
+from typing import Any
+
+from loguru import logger
+
+import admission
+from database import fetch_projects
+from embeddings import get_embeddings
+from graph_engine import GraphEngine, get_graph_snapshot
+from rank_sessions import SCORING_SLICE, format_ranked_experts, project_query_text, recall
+from scoring import ExpertRanker, run_xgboost_ranker
+
+
+def score_candidates(
+    filters: dict[str, Any],
+    experts: list[dict[str, Any]],
+    semantic_map: dict[str, float],
+    graph_engine: GraphEngine | None,
+) -> list[dict[str, Any]]:
+    """Composite scoring followed by the XGBoost re-rank, as in /rank."""
+    ranker = ExpertRanker(filters, graph_engine=graph_engine)
+    return run_xgboost_ranker(ranker.rank_experts(experts, semantic_map))
+
+
+def _embed(texts: list[str]) -> dict[str, list[float] | None]:
+    """Embeddings for the distinct non-empty texts in one API call; None for all on failure."""
+    distinct = [t for t in dict.fromkeys(texts) if t]
+    if not distinct:
+        return {}
+    try:
+        return dict(zip(distinct, get_embeddings(distinct), strict=True))
+    except Exception as exc:
+        logger.warning("Semantic similarity fallback: {}", exc)
+        return dict.fromkeys(distinct)
+
+
+def rank_projects(project_ids: list[str], graph_limit: int) -> Iterator[dict[str, Any]]:
+    """
+    Yield one result per requested project id, in request order:
+    {"project_id", "ranked_experts"} or {"project_id", "error"}.
+    """
+    projects = fetch_projects(list(dict.fromkeys(project_ids)))
+    found = [projects[pid] for pid in dict.fromkeys(project_ids) if pid in projects]
+
+    # Projects with identical filter_criteria and brief produce identical rankings
+    work_keys = {
+        p["id"]: (
+            json.dumps(p.get("filter_criteria") or {}, sort_keys=True, default=str),
+            project_query_text(p),
+        )
+        for p in found
+    }
+    embeddings = _embed([text for _, text in work_keys.values()])
+
+    graph_engine = None
+    try:
+        graph_engine = get_graph_snapshot(limit=graph_limit)
+    except Exception as exc:
+        logger.debug("Graph engine unavailable: {}", exc)
+
+    done: dict[tuple[str, str], list[dict[str, Any]]] = {}
+    for pid in project_ids:
+        admission.checkpoint()
+        project = projects.get(pid)
+        if project is None:
+            yield {"project_id": pid, "error": "Project not found"}
+            continue
+        work = work_keys[pid]
+        try:
+            if work not in done:
+                filters = project.get("filter_criteria") or {}
+                pool, semantic_map = recall(filters, work[1], embeddings.get(work[1]))
+                experts = pool[:SCORING_SLICE]
+                done[work] = (
+                    format_ranked_experts(
+                        score_candidates(filters, experts, semantic_map, graph_engine)
+                    )
+                    if experts
+                    else []
+                )
+        except Exception as exc:
+            logger.exception("Batch ranking failed for project {}", pid)
+            yield {"project_id": pid, "error": str(exc) or type(exc).__name__}
+            continue
+        yield {"project_id": pid, "ranked_experts": done[work]}
@@ -0,0 +1 @@
+"""Micro-benchmarks for the ML service hot paths (no database or network required)."""
@@ -0,0 +1,169 @@
+"""
+Seeded synthetic data generators for benchmarks and load tests.
+Shapes match what database.py returns, so generated rows can be fed straight
+into GraphEngine, ExpertRanker and the rate estimator with fetches stubbed.
+"""
+
+import random
+from typing import Any
+
+import numpy as np
+
+INDUSTRIES = {
+    "Finance": ["M&A", "Private Equity", "Asset Management", "Banking", "Insurance"],
+    "Healthcare": ["Pharma", "Oncology", "Medical Devices", "Biotech", "Payers"],
+    "Technology": ["SaaS", "Semiconductors", "Cybersecurity", "AI/ML", "Cloud"],
+    "Energy": ["Oil & Gas", "Renewables", "Utilities", "Mining"],
+    "Consumer": ["Retail", "CPG", "E-commerce", "Luxury"],
+    "Industrials": ["Aerospace", "Automotive", "Logistics", "Chemicals"],
+}
+
+REGIONS = {
+    "North America": ["USA", "Canada"],
+    "EMEA": ["United Kingdom", "Germany", "France", "UAE", "Switzerland"],
+    "APAC": ["Singapore", "India", "Australia", "Japan", "Philippines"],
+    "LATAM": ["Brazil", "Mexico", "Chile"],
+}
+
+_EMPLOYER_STEMS = [
+    "Goldman Sachs",
+    "McKinsey",
+    "Pfizer",
+    "Google",
+    "Shell",
+    "Unilever",
+    "Siemens",
+    "JPMorgan",
+    "BCG",
+    "Novartis",
+    "Microsoft",
+    "BP",
+    "Nestle",
+    "Boeing",
+    "Deloitte",
+]
+
+_SKILL_STEMS = [
+    "Strategy",
+    "Pricing",
+    "Due Diligence",
+    "Regulatory",
+    "Supply Chain",
+    "Market Access",
+    "Valuation",
+    "Go-to-Market",
+    "Procurement",
+    "Operations",
+    "Product",
+    "Data Science",
+]
+
+_FIRST_NAMES = ["Jane", "John", "Amira", "Kenji", "Lucia", "Oliver", "Priya", "Tomas", "Wei", "Zoe"]
+_LAST_NAMES = ["Smith", "Doe", "Haddad", "Sato", "Garcia", "Brown", "Patel", "Novak", "Chen", "Kim"]
+
+
+def make_employers(n: int, seed: int = 0) -> list[str]:
+    """Employer vocabulary of size n (stems plus numbered subsidiaries)."""
+    rng = random.Random(seed)
+    names = list(_EMPLOYER_STEMS)
+    i = 0
+    while len(names) < n:
+        names.append(f"{rng.choice(_EMPLOYER_STEMS)} Unit {i}")
+        i += 1
+    return names[:n]
+
+
+def make_skills(n: int, seed: int = 0) -> list[str]:
+    """Skill vocabulary of size n."""
+    rng = random.Random(seed)
+    names = list(_SKILL_STEMS)
+    i = 0
+    while len(names) < n:
+        names.append(f"{rng.choice(_SKILL_STEMS)} {i}")
+        i += 1
+    return names[:n]
+
+
+def make_experts(
+    n: int,
+    seed: int = 42,
+    n_employers: int | None = None,
+    n_skills: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Generate n expert rows carrying both the graph columns (past_employers, skills)
+    and the ranking columns (seniority_score, years_experience, predicted_rate, ...).
+    Employer and skill vocabularies scale with n so graph density stays realistic.
+    """
+    rng = random.Random(seed)
+    employers = make_employers(n_employers or max(20, n // 10), seed=seed)
+    skills = make_skills(n_skills or max(15, n // 20), seed=seed + 1)
+    industries = list(INDUSTRIES)
+    regions = list(REGIONS)
+
+    experts: list[dict[str, Any]] = []
+    for i in range(n):
+        industry = rng.choice(industries)
+        region = rng.choice(regions)
+        seniority = rng.randint(20, 100)
+        years = rng.randint(1, 35)
+        experts.append(
+            {
+                "id": f"exp{i:07d}",
+                "name": f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}",
+                "industry": industry,
+                "sub_industry": rng.choice(INDUSTRIES[industry]),
+                "region": region,
+                "country": rng.choice(REGIONS[region]),
+                "seniority_score": seniority,
+                "years_experience": years,
+                "predicted_rate": round(80 + years * 12 + seniority * 1.5 + rng.gauss(0, 40), 2),
+                "past_employers": rng.sample(employers, k=rng.randint(0, 4)),
+                "skills": rng.sample(skills, k=rng.randint(0, 5)),
+            }
+        )
+    return experts
+
+
+def make_embeddings(n: int, dim: int = 1536, seed: int = 42) -> np.ndarray:
+    """Unit-normalised float32 embedding matrix of shape (n, dim)."""
+    rng = np.random.default_rng(seed)
+    mat = rng.standard_normal((n, dim), dtype=np.float32)
+    mat /= np.linalg.norm(mat, axis=1, keepdims=True)
+    return mat
+
+
+def make_semantic_map(experts: list[dict[str, Any]], seed: int = 42) -> dict[str, float]:
+    """expert_id -> cosine similarity in [0, 1], as fetch_recall_pool returns."""
+    rng = random.Random(seed)
+    return {e["id"]: round(rng.random(), 4) for e in experts}
+
+
+def make_rate_training_rows(n: int, seed: int = 42) -> list[tuple[Any, ...]]:
+    """
+    Feature and target columns of the rate-estimator training queries:
+    (seniority_score, years_experience, region, country, industry, rate).
+    """
+    return [
+        (
+            e["seniority_score"],
+            e["years_experience"],
+            e["region"],
+            e["country"],
+            e["industry"],
+            max(1.0, min(1999.0, e["predicted_rate"])),
+        )
+        for e in make_experts(n, seed=seed, n_employers=20, n_skills=15)
+    ]
+
+
+def make_project_filters(seed: int = 42) -> dict[str, Any]:
+    """A project filter_criteria dict in the shape stored on research_projects."""
+    rng = random.Random(seed)
+    industry = rng.choice(list(INDUSTRIES))
+    return {
+        "industry": industry,
+        "sub_industry": rng.choice(INDUSTRIES[industry]),
+        "region": rng.choice(list(REGIONS)),
+        "brief": f"{industry} pricing and market access expert",
+    }
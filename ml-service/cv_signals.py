@@ -0,0 +1,100 @@
+"""
+CV / LinkedIn text signals for /predict-rate.
+The seniority and geography keyword tables are compiled once into an Aho-Corasick
+automaton (pyahocorasick), which reports every keyword occurrence, overlaps included, in
+a single pass over the lowercased text. That matches the per-keyword `in` checks it
+replaces while scanning long CVs once instead of once per keyword. Without
+pyahocorasick installed, the `in` checks are used.
+"""
+
+import importlib.util
+import re
+from dataclasses import dataclass
+from typing import Any
+
+# (score, keywords), highest tier first; the first tier with any keyword in the text wins.
+SENIORITY_TIERS: tuple[tuple[int, tuple[str, ...]], ...] = (
+    (90, ("c-level", "ceo", "cto", "cfo", "chief", "vp", "vice president")),
+    (75, ("director", "head of", "senior director")),
+    (65, ("senior", "lead", "principal", "manager")),
+    (35, ("junior", "associate", "analyst")),
+)
+DEFAULT_SENIORITY = 50
+
+# (rate multiplier, keywords), checked in order like SENIORITY_TIERS.
+GEO_TIERS: tuple[tuple[float, tuple[str, ...]], ...] = (
+    (1.2, ("usa", "united states", "san francisco", "new york", "london", "uk")),
+    (0.6, ("india", "pakistan", "philippines")),
+)
+DEFAULT_GEO_MULTIPLIER = 1.0
+
+DEFAULT_YEARS = 5
+YEARS_RE = re.compile(r"(\d+)\s*(?:years?|yrs?|y\.?)\s*(?:of\s+)?(?:experience|exp\.?)")
+
+HAS_AHOCORASICK = importlib.util.find_spec("ahocorasick") is not None
+
+SENIORITY = 0
+GEO = 1
+_TABLES: tuple[tuple[tuple[Any, tuple[str, ...]], ...], ...] = (SENIORITY_TIERS, GEO_TIERS)
+
+
+@dataclass(frozen=True)
+class CvSignals:
+    years: int
+    years_found: bool
+    seniority: int
+    geo_multiplier: float
+
+
+def _build_automaton() -> Any:
+    import ahocorasick
+
+    automaton = ahocorasick.Automaton()
+    for kind, tiers in enumerate(_TABLES):
+        for tier, (_, keywords) in enumerate(tiers):
+            for keyword in keywords:
+                # A keyword listed in two tiers keeps its best (first) tier
+                if keyword not in automaton:
+                    automaton.add_word(keyword, (kind, tier))
+    automaton.make_automaton()
+    return automaton
+
+
+_automaton = _build_automaton() if HAS_AHOCORASICK else None
+
+
+def _best_tiers(text: str) -> list[int]:
+    """Index of the best matching tier per table; len(table) when nothing matched."""
+    best = [len(table) for table in _TABLES]
+    if _automaton is None:
+        for kind, table in enumerate(_TABLES):
+            best[kind] = next(
+                (i for i, (_, keywords) in enumerate(table) if any(w in text for w in keywords)),
+                len(table),
+            )
+        return best
+    for _end, (kind, tier) in _automaton.iter(text):
+        if tier < best[kind]:
+            best[kind] = tier
+            if best[SENIORITY] == 0 and best[GEO] == 0:
+                break
+    return best
+
+
+def extract_signals(text: str) -> CvSignals:
+    """Years of experience, seniority score and geography multiplier. `text` must be lowercased."""
+    # Every years match contains "exp"; texts without it skip the regex
+    years_match = YEARS_RE.search(text) if "exp" in text else None
+    seniority_tier, geo_tier = _best_tiers(text)
+    return CvSignals(
+        years=int(years_match.group(1)) if years_match else DEFAULT_YEARS,
+        years_found=years_match is not None,
+        seniority=(
+            SENIORITY_TIERS[seniority_tier][0]
+            if seniority_tier < len(SENIORITY_TIERS)
+            else DEFAULT_SENIORITY
+        ),
+        geo_multiplier=(
+            GEO_TIERS[geo_tier][0] if geo_tier < len(GEO_TIERS) else DEFAULT_GEO_MULTIPLIER
+        ),
+    )
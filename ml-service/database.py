@@ -4,6 +4,7 @@ Uses connection pooling for efficient reuse.
 """
 
 import os
+import threading
 from collections.abc import Generator
 from contextlib import contextmanager
 from typing import Any
@@ -14,24 +15,36 @@ from psycopg2 import pool
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL must be set in .env")
 
-# Connection pool: min 1, max 10 connections
+# Connection pool: min 1, max 10 connections. Created on first use so that importing
+# this module (and main.py) never needs the database or DATABASE_URL.
 _connection_pool: pool.ThreadedConnectionPool | None = None
+_pool_lock = threading.Lock()
 
 
 def get_pool() -> pool.ThreadedConnectionPool:
     global _connection_pool
     if _connection_pool is None:
-        _connection_pool = pool.ThreadedConnectionPool(
-            minconn=1,
-            maxconn=10,
-            dsn=DATABASE_URL,
-        )
+        with _pool_lock:
+            if _connection_pool is None:
+                if not DATABASE_URL:
+                    raise ValueError("DATABASE_URL must be set in .env")
+                _connection_pool = pool.ThreadedConnectionPool(
+                    minconn=1,
+                    maxconn=10,
+                    dsn=DATABASE_URL,
+                )
     return _connection_pool
 
 
+def warm_pool() -> None:
+    """Open the pool and round-trip one connection (readiness warm-up)."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+            cur.fetchone()
+
+
 @contextmanager
 def get_connection() -> Generator[Any, None, None]:
     """Yield a connection from the pool. Auto-returns on exit."""
@@ -70,6 +83,36 @@ def fetch_project(project_id: str) -> dict[str, Any] | None:
             }
 
 
+def fetch_projects(project_ids: list[str]) -> dict[str, dict[str, Any]]:
+    """Fetch many research projects in one query; returns id -> project (missing ids omitted)."""
+    if not project_ids:
+        return {}
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id, creator_id, title, status, filter_criteria, deadline
+                FROM research_projects WHERE id = ANY(%s)
+                """,
+                (list(project_ids),),
+            )
+            return {
+                row[0]: {
+                    "id": row[0],
+                    "creator_id": row[1],
+                    "title": row[2],
+                    "status": row[3],
+                    "filter_criteria": row[4],
+                    "deadline": row[5],
+                }
+                for row in cur.fetchall()
+            }
+
+
+# Filter keys fetch_experts_for_project matches on (ILIKE substring).
+EXPERT_FILTER_KEYS = ("industry", "sub_industry", "region", "country")
+
+
 def fetch_experts_for_project(
     filter_criteria: dict[str, Any] | None,
     limit: int = 100,
@@ -129,6 +172,181 @@ def fetch_experts_for_project(
             ]
 
 
+def _recall_conditions(filter_criteria: dict[str, Any] | None) -> tuple[list[str], list[Any]]:
+    """WHERE conditions (and their parameters) shared by the recall queries."""
+    filters = filter_criteria or {}
+    conditions = ["e.visibility_status = 'GLOBAL_POOL'"]
+    params: list[Any] = []
+    for key in EXPERT_FILTER_KEYS:
+        if filters.get(key):
+            conditions.append(f"e.{key} ILIKE %s")
+            params.append(f"%{filters[key]}%")
+    return conditions, params
+
+
+def _fetch_recall_rows(
+    conditions: list[str], params: list[Any], query_embedding: list[float] | None, tail: str
+) -> tuple[list[dict[str, Any]], dict[str, float]]:
+    vector_str = "[" + ",".join(str(x) for x in query_embedding) + "]" if query_embedding else None
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(  # nosec B608 - column names come from EXPERT_FILTER_KEYS
+                f"""
+                WITH q AS (SELECT %s::vector AS embedding)
+                SELECT e.id, e.name, e.industry, e.sub_industry, e.country, e.region,
+                       e.seniority_score, e.years_experience, e.predicted_rate,
+                       1 - (ev.embedding <=> q.embedding) AS similarity
+                FROM experts e
+                CROSS JOIN q
+                LEFT JOIN expert_vectors ev ON ev.expert_id = e.id
+                WHERE {" AND ".join(conditions)}
+                {tail}
+                """,
+                [vector_str, *params],
+            )
+            rows = cur.fetchall()
+
+    experts = [_recall_expert(r) for r in rows]
+    return experts, {r[0]: float(r[9]) for r in rows if r[9] is not None}
+
+
+def _recall_expert(r: tuple[Any, ...]) -> dict[str, Any]:
+    return {
+        "id": r[0],
+        "name": r[1],
+        "industry": r[2],
+        "sub_industry": r[3],
+        "country": r[4],
+        "region": r[5],
+        "seniority_score": r[6],
+        "years_experience": r[7],
+        "predicted_rate": float(r[8]),
+    }
+
+
+# pgvector release whose HNSW scans keep going until enough rows pass the filters
+ITERATIVE_SCAN_VERSION = (0, 8)
+# ef_search range pgvector accepts, and the index tuples one filtered recall may visit
+HNSW_EF_SEARCH_MIN, HNSW_EF_SEARCH_MAX = 40, 1000
+RECALL_MAX_SCAN_TUPLES = 200_000
+_pgvector_version: tuple[int, ...] | None = None
+
+
+def _iterative_scan_available(cur: Any) -> bool:
+    """Whether the installed pgvector supports hnsw.iterative_scan (checked once)."""
+    global _pgvector_version
+    if _pgvector_version is None:
+        cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        row = cur.fetchone()
+        version = str(row[0]) if row else "0"
+        _pgvector_version = tuple(int(p) for p in version.split(".") if p.isdigit())
+    return _pgvector_version >= ITERATIVE_SCAN_VERSION
+
+
+def fetch_recall_pool(
+    filter_criteria: dict[str, Any] | None,
+    query_embedding: list[float] | None,
+    limit: int = 5000,
+) -> tuple[list[dict[str, Any]], dict[str, float]]:
+    """
+    First-stage recall for /rank: up to `limit` experts matching the filters, most similar
+    to `query_embedding` first (experts without a vector last, newest first), plus their
+    similarities (expert_id -> 1 - cosine distance). Without an embedding, the pool is the
+    newest `limit` matching experts and the similarity map is empty.
+
+    The nearest experts come from the HNSW index: an iterative scan (pgvector 0.8+) keeps
+    reading the index until `limit` rows pass the filters or RECALL_MAX_SCAN_TUPLES have
+    been visited, so cost follows the pool size rather than the number of filtered
+    experts. Older pgvector stops at ef_search (at most 1000) candidates before filtering,
+    which would silently cap the pool; there the distance is computed exactly instead.
+    """
+    conditions, params = _recall_conditions(filter_criteria)
+    if query_embedding is None:
+        return _fetch_recall_rows(
+            conditions, [*params, limit], None, "ORDER BY e.created_at DESC, e.id LIMIT %s"
+        )
+    nearest = _fetch_nearest_rows(conditions, params, query_embedding, limit)
+    if nearest is None:
+        return _fetch_recall_rows(
+            conditions,
+            [*params, limit],
+            query_embedding,
+            "ORDER BY ev.embedding <=> q.embedding NULLS LAST, e.created_at DESC, e.id LIMIT %s",
+        )
+    pool, similarity = nearest
+    if len(pool) < limit:
+        unembedded, _ = _fetch_recall_rows(
+            [*conditions, "ev.expert_id IS NULL"],
+            [*params, limit - len(pool)],
+            None,
+            "ORDER BY e.created_at DESC, e.id LIMIT %s",
+        )
+        pool += unembedded
+    return pool, similarity
+
+
+def _fetch_nearest_rows(
+    conditions: list[str], params: list[Any], query_embedding: list[float], limit: int
+) -> tuple[list[dict[str, Any]], dict[str, float]] | None:
+    """
+    Index-ordered nearest experts matching `conditions`, or None where pgvector cannot
+    scan iteratively. The ORDER BY must compare against the query vector itself (not a
+    column) and nothing else, or the planner sorts every filtered row instead.
+    """
+    vector_str = "[" + ",".join(str(x) for x in query_embedding) + "]"
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            if not _iterative_scan_available(cur):
+                return None
+            # Relaxed order lets the scan pass filtered-out rows; the outer sort restores it
+            cur.execute(
+                """
+                SELECT set_config('hnsw.iterative_scan', 'relaxed_order', true),
+                       set_config('hnsw.ef_search', %s, true),
+                       set_config('hnsw.max_scan_tuples', %s, true)
+                """,
+                (
+                    str(min(max(limit, HNSW_EF_SEARCH_MIN), HNSW_EF_SEARCH_MAX)),
+                    str(max(RECALL_MAX_SCAN_TUPLES, limit)),
+                ),
+            )
+            cur.execute(  # nosec B608 - column names come from EXPERT_FILTER_KEYS
+                f"""
+                SELECT * FROM (
+                    SELECT e.id, e.name, e.industry, e.sub_industry, e.country, e.region,
+                           e.seniority_score, e.years_experience, e.predicted_rate,
+                           ev.embedding <=> %s::vector AS distance
+                    FROM expert_vectors ev
+                    JOIN experts e ON e.id = ev.expert_id
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY ev.embedding <=> %s::vector
+                    LIMIT %s
+                ) nearest
+                ORDER BY distance, id
+                """,
+                [vector_str, *params, vector_str, limit],
+            )
+            rows = cur.fetchall()
+    return [_recall_expert(r) for r in rows], {r[0]: 1 - float(r[9]) for r in rows}
+
+
+def fetch_recall_experts(
+    expert_ids: list[str],
+    filter_criteria: dict[str, Any] | None,
+    query_embedding: list[float] | None,
+) -> tuple[list[dict[str, Any]], dict[str, float]]:
+    """
+    The experts among `expert_ids` that are visible and match the filters, in the shape
+    fetch_recall_pool returns (rows in no particular order). Used for candidates recalled
+    by keyword outside the vector pool.
+    """
+    if not expert_ids:
+        return [], {}
+    conditions, params = _recall_conditions(filter_criteria)
+    conditions.append("e.id = ANY(%s)")
+    return _fetch_recall_rows(conditions, [*params, list(expert_ids)], query_embedding, "")
+
+
 def fetch_experts_for_graph(limit: int = 500) -> list[dict[str, Any]]:
     """
     Fetch all experts with past_employers and skills for graph building.
@@ -186,31 +404,84 @@ def fetch_experts_for_graph(limit: int = 500) -> list[dict[str, Any]]:
         return []
 
 
-def fetch_semantic_similarities(
-    expert_ids: list[str],
-    query_embedding: list[float],
-    limit: int = 50,
-) -> dict[str, float]:
+# Channel the ml_change_log triggers NOTIFY on (prisma migration ml_change_notifications)
+CHANGE_CHANNEL = "ml_changes"
+
+
+def open_listen_connection(channel: str = CHANGE_CHANNEL) -> Any:
     """
-    Get cosine similarity (1 - distance) for experts against a query embedding.
-    Returns dict of expert_id -> similarity score.
+    A dedicated autocommit connection LISTENing on `channel`. It is kept open for as long
+    as notifications are wanted, so it is opened outside the pool; the caller closes it.
     """
-    if not expert_ids or not query_embedding:
-        return {}
+    import psycopg2
+    from psycopg2 import sql
+
+    if not DATABASE_URL:
+        raise ValueError("DATABASE_URL must be set in .env")
+    conn = psycopg2.connect(DATABASE_URL)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+    return conn
 
-    vector_str = "[" + ",".join(str(x) for x in query_embedding) + "]"
-    ids_placeholder = ",".join(["%s"] * len(expert_ids))
 
+def change_log_horizon() -> int:
+    """
+    xmin of a fresh snapshot: every transaction with a lower id has finished, so the
+    ml_change_log rows they wrote are already visible. Where a new listener starts reading.
+    """
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(  # nosec B608
-                f"""
-                SELECT expert_id, 1 - (embedding <=> %s::vector) AS similarity
-                FROM expert_vectors
-                WHERE expert_id IN ({ids_placeholder})
-                ORDER BY similarity DESC
+            cur.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+            row = cur.fetchone()
+            return int(row[0]) if row else 0
+
+
+def fetch_changes_since(
+    horizon: int, after_id: int = 0, limit: int = 1000
+) -> tuple[list[dict[str, Any]], int]:
+    """
+    ml_change_log rows written by transactions from `horizon` on, with ids above
+    `after_id`, in id order; and the horizon for the next read (change_log_horizon(),
+    taken before the rows are). Ids are assigned before commit, so the rows of a
+    transaction that commits late appear below ids already read: only the horizon
+    guarantees nothing is skipped, and rows past it are read again until it moves on.
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+            row = cur.fetchone()
+            next_horizon = int(row[0]) if row else horizon
+            cur.execute(
+                """
+                SELECT id, txid, table_name, op, expert_ids, project_ids
+                FROM ml_change_log
+                WHERE txid >= %s AND id > %s
+                ORDER BY id
                 LIMIT %s
                 """,
-                [vector_str] + expert_ids + [limit],
+                (horizon, after_id, limit),
+            )
+            rows = [
+                {
+                    "id": r[0],
+                    "txid": r[1],
+                    "table": r[2],
+                    "op": r[3],
+                    "expert_ids": list(r[4] or []),
+                    "project_ids": list(r[5] or []),
+                }
+                for r in cur.fetchall()
+            ]
+    return rows, next_horizon
+
+
+def prune_change_log(max_age_seconds: float) -> int:
+    """Delete ml_change_log rows older than `max_age_seconds`; returns the number deleted."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "DELETE FROM ml_change_log WHERE changed_at < now() - make_interval(secs => %s)",
+                (max_age_seconds,),
             )
-            return {row[0]: float(row[1]) for row in cur.fetchall()}
+            return int(cur.rowcount or 0)
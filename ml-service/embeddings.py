@@ -1,12 +1,31 @@
 """
 Generate 1536-dim embeddings for semantic similarity.
 Supports OpenRouter, OpenAI, or xAI (Grok). Set EMBEDDING_PROVIDER=openrouter|openai|xai.
+EMBEDDING_BASE_URL overrides the provider's endpoint (e.g. the load-test fake server).
+
+Provider calls go through an EmbeddingClient: one keep-alive connection pool, a deadline
+per call (EMBEDDING_TIMEOUT_SECONDS, or less if the request has less time left), a hedged
+second request once the first outlives the recent p95 latency (or a retry if it fails),
+and a circuit breaker that fails fast while the provider is unhealthy. Every failure is
+an EmbeddingUnavailableError, which /rank turns into its similarity fallback.
 """
 
 import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING
 
+import numpy as np
 from dotenv import load_dotenv
-from openai import OpenAI
+
+import admission
+import metrics
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 load_dotenv()
 
@@ -17,33 +36,319 @@ _api_key = (
     if _use_openrouter
     else (os.getenv("OPENAI_API_KEY") or os.getenv("XAI_API_KEY"))
 )
-_base_url = (
+_base_url = os.getenv("EMBEDDING_BASE_URL") or (
     "https://openrouter.ai/api/v1"
     if _use_openrouter
     else ("https://api.x.ai/v1" if os.getenv("XAI_API_KEY") else None)
 )
-_embedding_model = (
-    "openai/text-embedding-3-small"
-    if _use_openrouter
-    else "text-embedding-3-small"
-)
+_embedding_model = "openai/text-embedding-3-small" if _use_openrouter else "text-embedding-3-small"
 
-_client = OpenAI(api_key=_api_key, base_url=_base_url) if _api_key else None
 EMBEDDING_DIM = 1536
+# Deadline of one embedding call, hedge and retry included
+EMBEDDING_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_TIMEOUT_SECONDS") or 5.0)
+EMBEDDING_CONNECT_TIMEOUT_SECONDS = 2.0
+# Pooled keep-alive connections (also the most requests in flight to the provider)
+EMBEDDING_MAX_CONNECTIONS = int(os.getenv("EMBEDDING_MAX_CONNECTIONS") or 32)
+EMBEDDING_KEEPALIVE_SECONDS = 120.0
+# Hedge at this percentile of recent successful attempts, once there are enough of them
+EMBEDDING_HEDGE = (os.getenv("EMBEDDING_HEDGE") or "true").lower() != "false"
+HEDGE_PERCENTILE = 95.0
+HEDGE_MIN_DELAY_SECONDS = 0.01
+LATENCY_WINDOW = 256
+LATENCY_MIN_SAMPLES = 20
+# Second requests (hedges and retries) are capped at this share of calls, with a small
+# burst, so a struggling provider is not sent twice the traffic
+EXTRA_ATTEMPT_RATIO = 0.1
+EXTRA_ATTEMPT_BURST = 10.0
+# Consecutive failed calls that open the circuit, and how long it stays open
+BREAKER_FAILURES = int(os.getenv("EMBEDDING_BREAKER_FAILURES") or 5)
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("EMBEDDING_BREAKER_COOLDOWN_SECONDS") or 30.0)
 
+Inputs = str | list[str]
+# (input, timeout seconds) -> one embedding per input, in input order
+Send = Callable[[Inputs, float], list[list[float]]]
 
-def get_embedding(text: str) -> list[float]:
-    """Generate 1536-dim embedding. Requires OPENROUTER_API_KEY, OPENAI_API_KEY, or XAI_API_KEY."""
-    if not _client:
+
+class EmbeddingUnavailableError(Exception):
+    """No embedding within the deadline: provider failing, slow, or circuit open."""
+
+    def __init__(self, message: str, retry_after: float = 1.0) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class EmbeddingTimeoutError(EmbeddingUnavailableError):
+    """The call's deadline passed before any attempt returned an embedding."""
+
+
+def _retryable(exc: BaseException) -> bool:
+    """False for provider answers that another attempt cannot change (4xx bar 408/429)."""
+    status = getattr(exc, "status_code", None)
+    return not (isinstance(status, int) and 400 <= status < 500 and status not in (408, 429))
+
+
+class LatencyWindow:
+    """Latencies of the most recent successful attempts."""
+
+    def __init__(self, size: int = LATENCY_WINDOW) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        with self._lock:
+            if len(self._samples) < LATENCY_MIN_SAMPLES:
+                return None
+            samples = np.fromiter(self._samples, dtype=np.float64)
+        return float(np.percentile(samples, q))
+
+
+class CircuitBreaker:
+    """
+    Closed until `failures` calls in a row fail, then open (calls fail fast) for
+    `cooldown_seconds`. After that one probe call is let through (half-open): success
+    closes the circuit, failure opens it again.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(
+        self, failures: int = BREAKER_FAILURES, cooldown_seconds: float = BREAKER_COOLDOWN_SECONDS
+    ) -> None:
+        self.failures = failures
+        self.cooldown_seconds = cooldown_seconds
+        self.state = self.CLOSED
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown_seconds:
+                    return False
+                self._set(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            self._probing = False
+            if ok:
+                self._consecutive = 0
+                self._set(self.CLOSED)
+                return
+            self._consecutive += 1
+            if self.state == self.HALF_OPEN or self._consecutive >= self.failures:
+                self._opened_at = time.monotonic()
+                self._set(self.OPEN)
+
+    def retry_after(self) -> float:
+        if self.state != self.OPEN:
+            return 1.0
+        return max(1.0, self.cooldown_seconds - (time.monotonic() - self._opened_at))
+
+    def _set(self, state: int) -> None:
+        self.state = state
+        metrics.observe_embedding_circuit(state)
+
+
+class EmbeddingClient:
+    """
+    Deadlines, hedging and circuit breaking around `send`, one provider request. Attempts
+    run on a thread pool so the caller can stop waiting at its deadline; an attempt that
+    loses a hedge or outlives the deadline finishes in the background (its own timeout
+    is the remaining deadline) and its connection returns to the pool.
+    """
+
+    def __init__(
+        self,
+        send: Send,
+        timeout_seconds: float = EMBEDDING_TIMEOUT_SECONDS,
+        hedge: bool = EMBEDDING_HEDGE,
+        breaker: CircuitBreaker | None = None,
+        max_workers: int = EMBEDDING_MAX_CONNECTIONS,
+    ) -> None:
+        self._send = send
+        self.timeout_seconds = timeout_seconds
+        self.hedge = hedge
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyWindow()
+        self._extra_tokens = 1.0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="embedding")
+
+    def hedge_delay(self) -> float | None:
+        """Seconds after which a slow first attempt is hedged (None: not hedging yet)."""
+        if not self.hedge:
+            return None
+        p95 = self.latency.percentile(HEDGE_PERCENTILE)
+        metrics.observe_embedding_hedge_delay(p95 or 0.0)
+        return None if p95 is None else max(p95, HEDGE_MIN_DELAY_SECONDS)
+
+    def embed(self, inputs: Inputs) -> list[list[float]]:
+        timeout = self.timeout_seconds
+        remaining = admission.remaining_seconds()
+        if remaining is not None:
+            timeout = min(timeout, remaining)
+        if timeout <= 0:
+            metrics.observe_embedding_call("timeout")
+            raise EmbeddingTimeoutError("No time left for the embedding call")
+        if not self.breaker.allow():
+            metrics.observe_embedding_call("circuit_open")
+            raise EmbeddingUnavailableError(
+                "Embedding provider circuit open", self.breaker.retry_after()
+            )
+        with self._lock:
+            self._extra_tokens = min(self._extra_tokens + EXTRA_ATTEMPT_RATIO, EXTRA_ATTEMPT_BURST)
+        try:
+            result = self._call(inputs, time.monotonic() + timeout)
+        except EmbeddingUnavailableError as exc:
+            self.breaker.record(False)
+            timed_out = isinstance(exc, EmbeddingTimeoutError)
+            metrics.observe_embedding_call("timeout" if timed_out else "error")
+            raise
+        except Exception:
+            # The provider answered, so it is healthy; the request itself was refused
+            self.breaker.record(True)
+            metrics.observe_embedding_call("rejected")
+            raise
+        self.breaker.record(True)
+        metrics.observe_embedding_call("ok")
+        return result
+
+    def _call(self, inputs: Inputs, deadline: float) -> list[list[float]]:
+        delay = self.hedge_delay()
+        hedge_at = None if delay is None else time.monotonic() + delay
+        first = self._submit(inputs, deadline)
+        pending = {first}
+        second: Future[list[list[float]]] | None = None
+        error: BaseException | None = None
+        while True:
+            now = time.monotonic()
+            until = hedge_at if second is None and hedge_at is not None else deadline
+            done, pending = wait(
+                pending, timeout=max(min(until, deadline) - now, 0.0), return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                exc = future.exception()
+                if exc is None:
+                    if future is second:
+                        metrics.observe_embedding_hedge_win()
+                    return future.result()
+                if not _retryable(exc):
+                    raise exc
+                error = exc
+            if time.monotonic() >= deadline:
+                raise EmbeddingTimeoutError("Embedding request timed out") from error
+            slow = hedge_at is not None and time.monotonic() >= hedge_at
+            if second is None and (error is not None or slow) and self._take_extra_attempt():
+                metrics.observe_embedding_extra_attempt("retry" if error is not None else "hedge")
+                second = self._submit(inputs, deadline)
+                pending.add(second)
+            elif not pending:
+                raise EmbeddingUnavailableError("Embedding request failed") from error
+            elif second is None:
+                hedge_at = None  # no budget for a hedge: wait out the first attempt
+
+    def _take_extra_attempt(self) -> bool:
+        with self._lock:
+            if self._extra_tokens < 1.0:
+                return False
+            self._extra_tokens -= 1.0
+            return True
+
+    def _submit(self, inputs: Inputs, deadline: float) -> Future[list[list[float]]]:
+        return self._pool.submit(self._attempt, inputs, deadline)
+
+    def _attempt(self, inputs: Inputs, deadline: float) -> list[list[float]]:
+        start = time.monotonic()
+        try:
+            result = self._send(inputs, max(deadline - start, 0.001))
+        except Exception:
+            metrics.observe_embedding_attempt(False, time.monotonic() - start)
+            raise
+        seconds = time.monotonic() - start
+        metrics.observe_embedding_attempt(True, seconds)
+        self.latency.add(seconds)
+        return result
+
+
+def _openai_send(client: "OpenAI") -> Send:
+    def send(inputs: Inputs, timeout: float) -> list[list[float]]:
+        r = client.embeddings.create(
+            model=_embedding_model,
+            input=inputs,
+            dimensions=EMBEDDING_DIM,
+            timeout=timeout,
+        )
+        return [d.embedding for d in sorted(r.data, key=lambda d: d.index)]
+
+    return send
+
+
+# The OpenAI SDK is slow to import; the client is created on the first embedding call.
+_client: EmbeddingClient | None = None
+_client_lock = threading.Lock()
+
+
+def _get_client() -> EmbeddingClient | None:
+    global _client
+    if _client is None and _api_key:
+        with _client_lock:
+            if _client is None:
+                from openai import DEFAULT_CONNECTION_LIMITS, DefaultHttpxClient, OpenAI, Timeout
+
+                # Built with the SDK's own HTTP library (httpx, or httpx2 in newer releases)
+                limits = type(DEFAULT_CONNECTION_LIMITS)(
+                    max_connections=EMBEDDING_MAX_CONNECTIONS,
+                    max_keepalive_connections=EMBEDDING_MAX_CONNECTIONS,
+                    keepalive_expiry=EMBEDDING_KEEPALIVE_SECONDS,
+                )
+                http_client = DefaultHttpxClient(
+                    limits=limits,
+                    timeout=Timeout(
+                        EMBEDDING_TIMEOUT_SECONDS, connect=EMBEDDING_CONNECT_TIMEOUT_SECONDS
+                    ),
+                )
+                # Retries are the EmbeddingClient's (within the call's deadline), not the SDK's
+                openai_client = OpenAI(
+                    api_key=_api_key, base_url=_base_url, http_client=http_client, max_retries=0
+                )
+                _client = EmbeddingClient(_openai_send(openai_client))
+    return _client
+
+
+def _require_client() -> EmbeddingClient:
+    client = _get_client()
+    if not client:
         raise ValueError(
             "Set EMBEDDING_PROVIDER=openrouter + OPENROUTER_API_KEY, or OPENAI_API_KEY, or XAI_API_KEY"
         )
-    r = _client.embeddings.create(
-        model=_embedding_model,
-        input=text,
-        dimensions=EMBEDDING_DIM,
-    )
-    emb = r.data[0].embedding
+    return client
+
+
+def get_embedding(text: str) -> list[float]:
+    """Generate 1536-dim embedding. Requires OPENROUTER_API_KEY, OPENAI_API_KEY, or XAI_API_KEY."""
+    emb = _require_client().embed(text)[0]
     if len(emb) != EMBEDDING_DIM:
         raise ValueError(f"Expected {EMBEDDING_DIM} dims, got {len(emb)}")
     return emb
+
+
+def get_embeddings(texts: list[str]) -> list[list[float]]:
+    """Embed many texts in one API call; results follow input order."""
+    if not texts:
+        return []
+    embeddings = _require_client().embed(texts)
+    for emb in embeddings:
+        if len(emb) != EMBEDDING_DIM:
+            raise ValueError(f"Expected {EMBEDDING_DIM} dims, got {len(emb)}")
+    return embeddings
@@ -3,12 +3,28 @@ Graph Intelligence Engine for Expert–Company–Skill relationship mapping.
 Powers 3D Knowledge Graph visualization.
 """
 
-from typing import Any
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
 
-import networkx as nx
+import numpy as np
 import rustworkx as rx
 
+import graph_layout
+import invalidation
+import metrics
+import process_pool
+import shared_store
 from database import fetch_experts_for_graph
+from pagerank import TransitionMatrix, pagerank
+from singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from graph_queries import GraphIndex
 
 # Node types for react-force-graph
 NODE_GROUP_EXPERT = "expert"
@@ -22,193 +38,312 @@ EDGE_ALUMNI = "ALUMNI"  # Expert–Company (same as WORKED_AT for visualization)
 EDGE_SHARED_EMPLOYER = "SHARED_EMPLOYER"
 EDGE_SAME_SUBINDUSTRY = "SAME_SUBINDUSTRY"
 NODE_GROUP_INDUSTRY = "industry"
+EDGE_IN_INDUSTRY = "IN_INDUSTRY"
+
+# Integer codes used by the array (shared-memory) representation; append-only.
+NODE_GROUP_CODES = (NODE_GROUP_EXPERT, NODE_GROUP_COMPANY, NODE_GROUP_SKILL, NODE_GROUP_INDUSTRY)
+EDGE_TYPE_CODES = (
+    EDGE_WORKED_AT,
+    EDGE_HAS_SKILL,
+    EDGE_IN_INDUSTRY,
+    EDGE_SHARED_EMPLOYER,
+    EDGE_SAME_SUBINDUSTRY,
+)
+EXPERT_NODE_PREFIX = "expert_"
+# Each edge carries a bitmask of the relationship types joining its two nodes
+EDGE_TYPE_BITS = {t: 1 << i for i, t in enumerate(EDGE_TYPE_CODES)}
+
+
+def link_type(edge_type: str) -> str:
+    """Frontend link type: HAS_SKILL is kept; WORKED_AT and expert–expert edges are ALUMNI."""
+    return edge_type if edge_type == EDGE_HAS_SKILL else EDGE_ALUMNI
+
+
+def primary_edge_type(mask: int) -> str:
+    """The first type (in EDGE_TYPE_CODES order) set in an edge's type bitmask."""
+    return EDGE_TYPE_CODES[(mask & -mask).bit_length() - 1] if mask else EDGE_WORKED_AT
+
+
+def combine_edges(
+    src: np.ndarray, dst: np.ndarray, weight: np.ndarray, mask: np.ndarray, n: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    One edge per unordered node pair: weights add up, type bitmasks are OR-ed, and each
+    edge keeps the direction of its first occurrence. Edges come out sorted by pair.
+    """
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    if len(src) == 0:
+        empty = np.zeros(0, dtype=np.int32)
+        return empty, empty, empty, np.zeros(0, dtype=np.uint8)
+    keys = np.minimum(src, dst) * max(n, 1) + np.maximum(src, dst)
+    order = np.argsort(keys, kind="stable")
+    ordered = keys[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    first = order[starts]
+    return (
+        src[first].astype(np.int32),
+        dst[first].astype(np.int32),
+        np.add.reduceat(np.asarray(weight, dtype=np.int32)[order], starts).astype(np.int32),
+        np.bitwise_or.reduceat(np.asarray(mask, dtype=np.uint8)[order], starts).astype(np.uint8),
+    )
+
+
+def _group_pairs(
+    groups: list[set[int]], keep: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Every pair (lower index first) within each group of node indices; with `keep` (bool
+    per node), only the pairs including a kept node.
+    """
+    src: list[np.ndarray] = []
+    dst: list[np.ndarray] = []
+    for members in groups:
+        if len(members) < 2:
+            continue
+        nodes = np.array(sorted(members), dtype=np.int64)
+        if keep is None:
+            i, j = np.triu_indices(len(nodes), 1)
+            src.append(nodes[i])
+            dst.append(nodes[j])
+            continue
+        # Each kept node with every other member, once per pair of kept nodes
+        kept = nodes[keep[nodes]]
+        a, b = np.repeat(kept, len(nodes)), np.tile(nodes, len(kept))
+        pair = (a != b) & (~keep[b] | (b > a))
+        src.append(np.minimum(a, b)[pair])
+        dst.append(np.maximum(a, b)[pair])
+    if not src:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(src), np.concatenate(dst)
+
+
+def expert_links(expert: dict[str, Any]) -> list[tuple[str, str, str, str]]:
+    """
+    (node id, label, group, edge type) of each node a fetch_experts_for_graph() row links
+    to: its companies, its skills (industry and sub-industry stand in when it lists
+    none), then its industries.
+    """
+    links: list[tuple[str, str, str, str]] = []
+    for company in expert.get("past_employers") or []:
+        if company and str(company).strip():
+            name = str(company).strip()
+            links.append(
+                (f"company_{name.replace(' ', '_')}", name, NODE_GROUP_COMPANY, EDGE_WORKED_AT)
+            )
+    for skill in expert.get("skills") or []:
+        if skill and str(skill).strip():
+            name = str(skill).strip()
+            links.append(
+                (f"skill_{name.replace(' ', '_')}", name, NODE_GROUP_SKILL, EDGE_HAS_SKILL)
+            )
+    if not expert.get("skills"):
+        for industry in [expert.get("industry"), expert.get("sub_industry")]:
+            if industry and industry.strip():
+                links.append(
+                    (
+                        f"skill_{industry.replace(' ', '_')}",
+                        industry,
+                        NODE_GROUP_SKILL,
+                        EDGE_HAS_SKILL,
+                    )
+                )
+    for industry in [expert.get("industry"), expert.get("sub_industry")]:
+        if industry and str(industry).strip():
+            name = str(industry).strip()
+            links.append(
+                (f"industry_{name.replace(' ', '_')}", name, NODE_GROUP_INDUSTRY, EDGE_IN_INDUSTRY)
+            )
+    return links
+
+
+def expert_groups(expert: dict[str, Any]) -> list[tuple[str, str]]:
+    """
+    (edge type, key) of each group whose experts are linked pairwise: one per employer
+    (SHARED_EMPLOYER) and one for the sub-industry (SAME_SUBINDUSTRY), lowercased.
+    """
+    groups = [
+        (EDGE_SHARED_EMPLOYER, name)
+        for name in (str(c or "").strip().lower() for c in expert.get("past_employers") or [])
+        if name
+    ]
+    sub = (expert.get("sub_industry") or "").strip().lower()
+    if sub:
+        groups.append((EDGE_SAME_SUBINDUSTRY, sub))
+    return groups
+
+
+# Shared graph snapshots: rebuilt at most once per TTL per `limit`.
+GRAPH_SNAPSHOT_TTL_SECONDS = float(os.getenv("GRAPH_SNAPSHOT_TTL_SECONDS") or 300)
+GRAPH_SNAPSHOT_MAX_ENTRIES = 8
+
+# Personalized influence vectors kept per (graph version, seed nodes).
+PPR_CACHE_MAX_ENTRIES = 256
+# Filter keys whose values seed personalized PageRank at industry and skill nodes.
+SEED_FILTER_KEYS = ("industry", "sub_industry", "subIndustry")
+_NON_WORD_RE = re.compile(r"[^a-z0-9&+#/.-]+")
 
 
 class GraphEngine:
     """
-    Manages a directed knowledge graph of Experts, Companies, and Skills.
-    Uses rustworkx.PyDiGraph for storage and centrality computation.
+    Manages a knowledge graph of Experts, Companies, Skills and Industries.
+    Nodes live in a rustworkx.PyGraph with one undirected edge per related pair; each
+    edge's integer weight and type bitmask are kept in numpy arrays aligned with the
+    edge indices. Centrality is weighted PageRank (pagerank.py).
     """
 
     def __init__(self) -> None:
-        self.graph: rx.PyDiGraph = rx.PyDiGraph()
+        self.graph: rx.PyGraph = rx.PyGraph(multigraph=False)
         self._node_id_to_index: dict[str, int] = {}
         self._index_to_node: dict[int, dict[str, Any]] = {}
         self._centrality: dict[int, float] = {}
         self._communities: dict[str, int] = {}
+        # Edge columns: first-seen direction (experts point at their companies, skills and
+        # industries), weight (e.g. shared employers) and EDGE_TYPE_BITS mask
+        self._edge_src: np.ndarray = np.zeros(0, dtype=np.int32)
+        self._edge_dst: np.ndarray = np.zeros(0, dtype=np.int32)
+        self._edge_weight: np.ndarray = np.zeros(0, dtype=np.int32)
+        self._edge_mask: np.ndarray = np.zeros(0, dtype=np.uint8)
+        # Sorted expert ids and their normalized influence, for O(log n) lookups
+        self._influence_ids: np.ndarray = np.array([], dtype=str)
+        self._influence: np.ndarray = np.array([], dtype=np.float64)
+        # Node index of each entry of _influence_ids (personalized influence lookups)
+        self._influence_nodes: np.ndarray = np.array([], dtype=np.int32)
+        # Set when built from shared arrays; the rx graph is materialized on demand
+        self._arrays: dict[str, np.ndarray] | None = None
+        # Snapshot engines are shared across request threads: guards the on-demand rx
+        # graph and query index, so each is built once and only seen when complete
+        self._lazy_lock = threading.RLock()
+        # Identifies this graph in the personalized PageRank cache
+        self.version: str = uuid.uuid4().hex
+        self._walk: TransitionMatrix | None = None
+        self._seed_labels: list[tuple[int, str, str]] | None = None
+        self._query_index: GraphIndex | None = None
+        # (n, 3) precomputed positions, aligned with node indices
+        self._layout: np.ndarray | None = None
 
     def build_knowledge_graph(self, limit: int = 500) -> None:
         """
         Pull experts and past employers from DB, build graph.
-        Nodes: Expert, Company, Skill
-        Edges: Worked_At, Has_Skill
+        Nodes: Expert, Company, Skill, Industry
+        Edges: one per related pair. Memberships (WORKED_AT, HAS_SKILL, IN_INDUSTRY) have
+        weight 1 however often they are listed; expert pairs get one unit of weight per
+        shared employer (SHARED_EMPLOYER) plus one for a shared sub-industry
+        (SAME_SUBINDUSTRY).
+        """
+        self.build_from_experts(fetch_experts_for_graph(limit=limit))
+
+    def build_from_experts(self, experts: list[dict[str, Any]]) -> None:
+        """Build the graph from fetch_experts_for_graph() rows (see build_knowledge_graph)."""
+        self.build_structure(experts)
+        process_pool.checkpoint()
+        self._compute_centrality()
+        process_pool.checkpoint()
+        self._compute_communities()
+        self._build_influence_index()
+        metrics.observe_graph(self.graph.num_nodes(), self.graph.num_edges())
+
+    def build_structure(self, experts: list[dict[str, Any]], keep: set[str] | None = None) -> None:
+        """
+        Nodes and weighted edges only: no PageRank, communities or influence index. With
+        `keep` (node ids), only edges touching one of those nodes are built.
         """
-        self.graph = rx.PyDiGraph()
+        self.graph = rx.PyGraph(multigraph=False)
         self._node_id_to_index.clear()
         self._index_to_node.clear()
+        self.version = uuid.uuid4().hex
+        self._walk = None
+        self._seed_labels = None
+        self._query_index = None
+        self._layout = None
 
-        experts = fetch_experts_for_graph(limit=limit)
+        # (expert index, node index, edge type) of each distinct membership
+        memberships: set[tuple[int, int, str]] = set()
 
-        for ex in experts:
-            expert_id = f"expert_{ex['id']}"
-            if expert_id not in self._node_id_to_index:
+        def add_node(node_id: str, label: str, group: str) -> int:
+            idx = self._node_id_to_index.get(node_id)
+            if idx is None:
+                data = {"id": node_id, "label": label, "group": group}
+                extra = {"expert_id": node_id[len(EXPERT_NODE_PREFIX) :]}
                 idx = self.graph.add_node(
-                    {
-                        "id": expert_id,
-                        "label": ex["name"],
-                        "group": NODE_GROUP_EXPERT,
-                        "expert_id": ex["id"],
-                    }
+                    {**data, **extra} if group == NODE_GROUP_EXPERT else dict(data)
                 )
-                self._node_id_to_index[expert_id] = idx
-                self._index_to_node[idx] = {
-                    "id": expert_id,
-                    "label": ex["name"],
-                    "group": NODE_GROUP_EXPERT,
-                }
+                self._node_id_to_index[node_id] = idx
+                self._index_to_node[idx] = data
+            return idx
 
-            expert_idx = self._node_id_to_index[expert_id]
-
-            # Past employers -> Company nodes, WORKED_AT edges
-            for company in ex.get("past_employers") or []:
-                if not company or not str(company).strip():
-                    continue
-                company_name = str(company).strip()
-                company_id = f"company_{company_name.replace(' ', '_')}"
-                if company_id not in self._node_id_to_index:
-                    idx = self.graph.add_node(
-                        {
-                            "id": company_id,
-                            "label": company_name,
-                            "group": NODE_GROUP_COMPANY,
-                        }
-                    )
-                    self._node_id_to_index[company_id] = idx
-                    self._index_to_node[idx] = {
-                        "id": company_id,
-                        "label": company_name,
-                        "group": NODE_GROUP_COMPANY,
-                    }
-                company_idx = self._node_id_to_index[company_id]
-                self.graph.add_edge(expert_idx, company_idx, EDGE_WORKED_AT)
-
-            # Skills -> Skill nodes, HAS_SKILL edges
-            for skill in ex.get("skills") or []:
-                if not skill or not str(skill).strip():
-                    continue
-                skill_name = str(skill).strip()
-                skill_id = f"skill_{skill_name.replace(' ', '_')}"
-                if skill_id not in self._node_id_to_index:
-                    idx = self.graph.add_node(
-                        {
-                            "id": skill_id,
-                            "label": skill_name,
-                            "group": NODE_GROUP_SKILL,
-                        }
-                    )
-                    self._node_id_to_index[skill_id] = idx
-                    self._index_to_node[idx] = {
-                        "id": skill_id,
-                        "label": skill_name,
-                        "group": NODE_GROUP_SKILL,
-                    }
-                skill_idx = self._node_id_to_index[skill_id]
-                self.graph.add_edge(expert_idx, skill_idx, EDGE_HAS_SKILL)
-
-            # Also use industry/sub_industry as implicit skills if no explicit skills
-            if not ex.get("skills"):
-                for industry in [ex.get("industry"), ex.get("sub_industry")]:
-                    if industry and industry.strip():
-                        skill_id = f"skill_{industry.replace(' ', '_')}"
-                        if skill_id not in self._node_id_to_index:
-                            idx = self.graph.add_node(
-                                {
-                                    "id": skill_id,
-                                    "label": industry,
-                                    "group": NODE_GROUP_SKILL,
-                                }
-                            )
-                            self._node_id_to_index[skill_id] = idx
-                            self._index_to_node[idx] = {
-                                "id": skill_id,
-                                "label": industry,
-                                "group": NODE_GROUP_SKILL,
-                            }
-                        skill_idx = self._node_id_to_index[skill_id]
-                        self.graph.add_edge(expert_idx, skill_idx, EDGE_HAS_SKILL)
-
-        # Industry nodes: one per distinct industry/sub_industry
+        # Experts with their companies and skills first, industry nodes after
         for ex in experts:
-            expert_id = f"expert_{ex['id']}"
-            expert_idx_maybe = self._node_id_to_index.get(expert_id)
-            if expert_idx_maybe is None:
-                continue
-            expert_idx = expert_idx_maybe
-            for ind_name in [ex.get("industry"), ex.get("sub_industry")]:
-                if not ind_name or not str(ind_name).strip():
-                    continue
-                ind_name = str(ind_name).strip()
-                ind_id = f"industry_{ind_name.replace(' ', '_')}"
-                if ind_id not in self._node_id_to_index:
-                    idx = self.graph.add_node(
-                        {
-                            "id": ind_id,
-                            "label": ind_name,
-                            "group": NODE_GROUP_INDUSTRY,
-                        }
-                    )
-                    self._node_id_to_index[ind_id] = idx
-                    self._index_to_node[idx] = {
-                        "id": ind_id,
-                        "label": ind_name,
-                        "group": NODE_GROUP_INDUSTRY,
-                    }
-                self.graph.add_edge(expert_idx, self._node_id_to_index[ind_id], "IN_INDUSTRY")
-
-        # Expert–Expert edges: shared employer, same sub-industry
-        expert_ids = [e["id"] for e in experts]
-        employers_by_expert: dict[str, set[str]] = {}
-        subind_by_expert: dict[str, str] = {}
+            expert_idx = add_node(f"{EXPERT_NODE_PREFIX}{ex['id']}", ex["name"], NODE_GROUP_EXPERT)
+            for node_id, label, group, edge_type in expert_links(ex):
+                if group != NODE_GROUP_INDUSTRY:
+                    memberships.add((expert_idx, add_node(node_id, label, group), edge_type))
         for ex in experts:
-            employers_by_expert[ex["id"]] = {
-                str(c).strip().lower() for c in (ex.get("past_employers") or []) if c
-            }
-            subind_by_expert[ex["id"]] = (ex.get("sub_industry") or "").strip().lower()
+            expert_idx = self._node_id_to_index[f"{EXPERT_NODE_PREFIX}{ex['id']}"]
+            for node_id, label, group, edge_type in expert_links(ex):
+                if group == NODE_GROUP_INDUSTRY:
+                    memberships.add((expert_idx, add_node(node_id, label, group), edge_type))
+        process_pool.checkpoint()
 
-        for i, eid1 in enumerate(expert_ids):
-            idx1 = self._node_id_to_index.get(f"expert_{eid1}")
-            if idx1 is None:
-                continue
-            emp1 = employers_by_expert.get(eid1, set())
-            sub1 = subind_by_expert.get(eid1)
-            for eid2 in expert_ids[i + 1 :]:
-                idx2 = self._node_id_to_index.get(f"expert_{eid2}")
-                if idx2 is None:
-                    continue
-                if (
-                    emp1
-                    and employers_by_expert.get(eid2)
-                    and emp1 & employers_by_expert.get(eid2, set())
-                ):
-                    self.graph.add_edge(idx1, idx2, EDGE_SHARED_EMPLOYER)
-                    self.graph.add_edge(idx2, idx1, EDGE_SHARED_EMPLOYER)
-                if sub1 and sub1 == subind_by_expert.get(eid2):
-                    self.graph.add_edge(idx1, idx2, EDGE_SAME_SUBINDUSTRY)
-                    self.graph.add_edge(idx2, idx1, EDGE_SAME_SUBINDUSTRY)
+        # Expert–Expert edges from inverted indexes: every pair of experts listed under
+        # the same employer, and under the same sub-industry
+        groups: dict[str, dict[str, set[int]]] = {
+            EDGE_SHARED_EMPLOYER: {},
+            EDGE_SAME_SUBINDUSTRY: {},
+        }
+        for ex in experts:
+            expert_idx = self._node_id_to_index[f"{EXPERT_NODE_PREFIX}{ex['id']}"]
+            for edge_type, key in expert_groups(ex):
+                groups[edge_type].setdefault(key, set()).add(expert_idx)
+        kept = None
+        if keep is not None:
+            kept = np.zeros(self.graph.num_nodes(), dtype=bool)
+            kept[[i for nid, i in self._node_id_to_index.items() if nid in keep]] = True
+            memberships = {m for m in memberships if kept[m[0]] or kept[m[1]]}
+        employer_src, employer_dst = _group_pairs(list(groups[EDGE_SHARED_EMPLOYER].values()), kept)
+        sub_src, sub_dst = _group_pairs(list(groups[EDGE_SAME_SUBINDUSTRY].values()), kept)
 
-        self._compute_centrality()
-        self._compute_communities()
+        ordered = sorted(memberships)
+        member_src = np.array([m[0] for m in ordered], dtype=np.int64)
+        member_dst = np.array([m[1] for m in ordered], dtype=np.int64)
+        member_mask = np.array([EDGE_TYPE_BITS[m[2]] for m in ordered], dtype=np.uint8)
+        self._set_edges(
+            *combine_edges(
+                np.concatenate([member_src, employer_src, sub_src]),
+                np.concatenate([member_dst, employer_dst, sub_dst]),
+                np.ones(len(ordered) + len(employer_src) + len(sub_src), dtype=np.int32),
+                np.concatenate(
+                    [
+                        member_mask,
+                        np.full(len(employer_src), EDGE_TYPE_BITS[EDGE_SHARED_EMPLOYER], np.uint8),
+                        np.full(len(sub_src), EDGE_TYPE_BITS[EDGE_SAME_SUBINDUSTRY], np.uint8),
+                    ]
+                ),
+                self.graph.num_nodes(),
+            )
+        )
+
+    def _set_edges(
+        self, src: np.ndarray, dst: np.ndarray, weight: np.ndarray, mask: np.ndarray
+    ) -> None:
+        """Install deduplicated edge columns and mirror them into the rx graph."""
+        self._edge_src, self._edge_dst = src, dst
+        self._edge_weight, self._edge_mask = weight, mask
+        self.graph.add_edges_from_no_data(list(zip(src.tolist(), dst.tolist(), strict=True)))
+
+    def _edges(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(src, dst, weight, type mask) columns, from shared arrays when attached."""
+        if self._arrays is not None:
+            a = self._arrays
+            return a["edge_src"], a["edge_dst"], a["edge_weight"], a["edge_mask"]
+        return self._edge_src, self._edge_dst, self._edge_weight, self._edge_mask
 
     def _compute_centrality(self) -> None:
-        """Compute PageRank for network influence score."""
+        """Weighted PageRank (edges walked both ways) for network influence score."""
         if self.graph.num_nodes() == 0:
             self._centrality = {}
             return
-        try:
-            scores = rx.pagerank(self.graph, alpha=0.85)
-            self._centrality = dict(scores)
-        except Exception:
-            self._centrality = dict.fromkeys(range(self.graph.num_nodes()), 0.0)
+        self._centrality = dict(enumerate(pagerank(self._transition_matrix()).tolist()))
 
     def _compute_communities(self) -> None:
         """Detect industry clusters using Louvain community detection."""
@@ -216,13 +351,16 @@ class GraphEngine:
             self._communities = {}
             return
         try:
-            # Convert to undirected NetworkX for Louvain
+            import networkx as nx  # deferred: only needed once a graph is built
+
+            # Weighted undirected NetworkX copy for Louvain
+            src, dst, weight, _ = self._edges()
             g_undir = nx.Graph()
-            for i in range(self.graph.num_nodes()):
-                g_undir.add_node(i)
-            for e in self.graph.edge_list():
-                g_undir.add_edge(e[0], e[1])
-            partition = nx.community.louvain_communities(g_undir, seed=42)
+            g_undir.add_nodes_from(range(self.graph.num_nodes()))
+            g_undir.add_weighted_edges_from(
+                zip(src.tolist(), dst.tolist(), weight.tolist(), strict=True)
+            )
+            partition = nx.community.louvain_communities(g_undir, weight="weight", seed=42)
             self._communities = {}
             for cid, community in enumerate(partition):
                 for n in community:
@@ -233,29 +371,334 @@ class GraphEngine:
         except Exception:
             self._communities = {}
 
-    def get_network_influence(self, expert_id: str) -> float:
+    def _build_influence_index(self) -> None:
+        """Precompute max-normalized centrality per expert, sorted by expert id."""
+        triples: list[tuple[str, float, int]] = []
+        max_val = max(self._centrality.values(), default=0.0) or 1.0
+        for node_id, idx in self._node_id_to_index.items():
+            if node_id.startswith(EXPERT_NODE_PREFIX):
+                score = self._centrality.get(idx, 0.0) / max_val
+                triples.append((node_id[len(EXPERT_NODE_PREFIX) :], score, idx))
+        triples.sort()
+        self._influence_ids = np.array([t[0] for t in triples], dtype=str)
+        self._influence = np.array([t[1] for t in triples], dtype=np.float64)
+        self._influence_nodes = np.array([t[2] for t in triples], dtype=np.int32)
+
+    def get_network_influence(self, expert_id: str, influence: np.ndarray | None = None) -> float:
         """
         Get centrality score for an expert (0–1 normalized).
-        Used as Network Influence Score in ExpertRanker.
+        Used as Network Influence Score in ExpertRanker. `influence` is a vector from
+        personalized_influence(); by default the global PageRank is used.
         """
-        node_id = f"expert_{expert_id}"
-        idx = self._node_id_to_index.get(node_id)
-        if idx is None:
+        ids = self._influence_ids
+        pos = int(np.searchsorted(ids, expert_id))
+        if pos >= len(ids) or ids[pos] != expert_id:
             return 0.0
-        score = self._centrality.get(idx, 0.0)
-        if not self._centrality:
-            return 0.0
-        max_val = max(self._centrality.values()) or 1.0
-        return round(float(score / max_val), 4)
+        scores = self._influence if influence is None else influence
+        return round(float(scores[pos]), 4)
+
+    # ---- personalized PageRank ----
+
+    def _num_nodes(self) -> int:
+        if self._arrays is not None:
+            return len(self._arrays["node_id"])
+        return int(self.graph.num_nodes())
+
+    def _transition_matrix(self) -> TransitionMatrix:
+        """
+        CSR random-walk matrix, built once per graph. Edges are walked in both directions
+        (a walk seeded at an industry must reach its experts) in proportion to weight.
+        """
+        if self._walk is None:
+            src, dst, weight, _ = self._edges()
+            self._walk = TransitionMatrix.from_edges(src, dst, self._num_nodes(), weight=weight)
+        return self._walk
+
+    def _seed_candidates(self) -> list[tuple[int, str, str]]:
+        """(node index, group, lowercased label) of every industry and skill node."""
+        if self._seed_labels is None:
+            if self._arrays is not None:
+                labels = self._arrays["node_label"].tolist()
+                groups = [NODE_GROUP_CODES[g] for g in self._arrays["node_group"].tolist()]
+                nodes = list(enumerate(zip(groups, labels, strict=True)))
+            else:
+                nodes = [
+                    (idx, (d.get("group", ""), str(d.get("label", ""))))
+                    for idx, d in self._index_to_node.items()
+                ]
+            self._seed_labels = [
+                (idx, group, label.strip().lower())
+                for idx, (group, label) in nodes
+                if group in (NODE_GROUP_INDUSTRY, NODE_GROUP_SKILL) and label.strip()
+            ]
+        return self._seed_labels
+
+    def seed_nodes(self, filters: dict[str, Any]) -> tuple[int, ...]:
+        """
+        Personalization seeds for a project: industry and skill nodes whose label contains
+        the industry or sub-industry filter (ILIKE semantics, as candidate fetching), skill
+        nodes named in `skills`, and skill nodes mentioned as whole words in the brief.
+        """
+        return match_seed_nodes(self._seed_candidates(), filters)
+
+    def _expert_nodes(self) -> np.ndarray:
+        """Node index of each entry of _influence_ids."""
+        if len(self._influence_nodes) != len(self._influence_ids):
+            if self._arrays is not None and "influence_nodes" in self._arrays:
+                self._influence_nodes = self._arrays["influence_nodes"]
+            else:
+                node_ids = (
+                    self._arrays["node_id"].tolist()
+                    if self._arrays is not None
+                    else [self._index_to_node[i]["id"] for i in range(self._num_nodes())]
+                )
+                index = {nid: i for i, nid in enumerate(node_ids)}
+                self._influence_nodes = np.array(
+                    [index[EXPERT_NODE_PREFIX + eid] for eid in self._influence_ids.tolist()],
+                    dtype=np.int32,
+                )
+        return self._influence_nodes
+
+    def personalized_influence(self, seeds: tuple[int, ...]) -> np.ndarray:
+        """
+        Max-normalized personalized PageRank of every expert (aligned with the influence
+        index; pass to get_network_influence), teleporting to `seeds` instead of to all
+        nodes. Cached per (graph version, seeds).
+        """
+        key = (self.version, seeds)
+        with _ppr_lock:
+            cached = _ppr_cache.get(key)
+            if cached is not None:
+                _ppr_cache.move_to_end(key)
+                return cached
+        walk = self._transition_matrix()
+        personalization = np.zeros(walk.n)
+        personalization[list(seeds)] = 1.0
+        scores = pagerank(walk, personalization)[self._expert_nodes()]
+        top = float(scores.max(initial=0.0))
+        influence: np.ndarray = scores / top if top > 0 else scores
+        influence.setflags(write=False)
+        with _ppr_lock:
+            _ppr_cache[key] = influence
+            while len(_ppr_cache) > PPR_CACHE_MAX_ENTRIES:
+                _ppr_cache.popitem(last=False)
+        return influence
+
+    def project_influence(self, filters: dict[str, Any]) -> np.ndarray | None:
+        """Personalized influence for a project's filters, or None when nothing seeds it."""
+        seeds = self.seed_nodes(filters)
+        return self.personalized_influence(seeds) if seeds else None
+
+    # ---- bounded queries (graph_queries.py) ----
+
+    def query_index(self) -> "GraphIndex":
+        """CSR adjacency for neighbourhood queries, built once per graph."""
+        index = self._query_index
+        if index is not None:
+            return index
+        with self._lazy_lock:
+            if self._query_index is None:
+                from graph_queries import GraphIndex
+
+                arrays = self._graph_arrays()
+                self._query_index = GraphIndex.from_arrays(
+                    {**arrays, "layout": self._layout_from(arrays)}
+                )
+            return self._query_index
+
+    def layout(self) -> np.ndarray:
+        """
+        (n, 3) force-directed node positions, computed once per graph (or read from
+        shared arrays) and warm-started from the previous snapshot's layout.
+        """
+        if self._layout is not None:
+            return self._layout
+        return self._layout_from(self._graph_arrays())
+
+    def _layout_from(self, arrays: dict[str, np.ndarray]) -> np.ndarray:
+        if self._layout is None:
+            stored = arrays.get("layout")
+            if stored is not None:
+                graph_layout.remember(arrays["node_id"].tolist(), stored)
+                self._layout = stored
+            else:
+                self._layout = graph_layout.compute_layout(
+                    arrays["node_id"].tolist(),
+                    arrays["edge_src"],
+                    arrays["edge_dst"],
+                    arrays["edge_weight"],
+                )
+        return self._layout
+
+    def _graph_arrays(self) -> dict[str, np.ndarray]:
+        return self._arrays if self._arrays is not None else self._base_arrays()
+
+    def ego_network(
+        self, node_id: str, hops: int, max_nodes: int, max_edges: int
+    ) -> dict[str, Any] | None:
+        """k-hop neighbourhood of a node (e.g. "expert_<id>", "company_<name>"); None if unknown."""
+        index = self.query_index()
+        center = index.find(node_id)
+        if center is None:
+            return None
+        return index.ego_network(center, hops, max_nodes, max_edges)
+
+    def warm_intro_path(self, expert_id: str, company: str, max_hops: int) -> dict[str, Any] | None:
+        """
+        Shortest chain of colleagues and employers from an expert to a company (node id
+        or name). None if either end is unknown; empty nodes/links if no path is short
+        enough.
+        """
+        index = self.query_index()
+        source = index.find(f"{EXPERT_NODE_PREFIX}{expert_id}")
+        target = index.find(company, NODE_GROUP_COMPANY)
+        if target is None:
+            target = index.find(f"company_{company.strip().replace(' ', '_')}")
+        if source is None or target is None:
+            return None
+        path = index.warm_intro_path(source, target, max_hops)
+        if path is None:
+            return {"nodes": [], "links": [], "hops": None}
+        return index.path_graph(path)
+
+    def industry_subgraph(
+        self, industry: str, max_nodes: int, max_edges: int
+    ) -> dict[str, Any] | None:
+        return self.query_index().industry_subgraph(industry, max_nodes, max_edges)
+
+    def community_subgraph(
+        self, community: int, max_nodes: int, max_edges: int
+    ) -> dict[str, Any] | None:
+        return self.query_index().community_subgraph(community, max_nodes, max_edges)
+
+    def community_overview(self) -> dict[str, Any]:
+        """Top level-of-detail view: one super-node per Louvain community."""
+        return self.query_index().community_overview()
+
+    def expand_community(
+        self, community: int, max_nodes: int, max_edges: int
+    ) -> dict[str, Any] | None:
+        """One community's members, linked to the other communities' super-nodes."""
+        return self.query_index().expand_community(community, max_nodes, max_edges)
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """
+        Flat array form of the graph for the shared store: node columns, edge list,
+        per-node centrality/community, the expert influence index and the layout.
+        """
+        if self._arrays is not None and "layout" in self._arrays:
+            return dict(self._arrays)
+        arrays = self._base_arrays()
+        arrays["layout"] = self._layout_from(arrays)
+        return arrays
+
+    def structure_arrays(self) -> dict[str, np.ndarray]:
+        """Node columns (id, label, group code) and edge columns, without analytics."""
+        self._ensure_materialized()
+        n = self.graph.num_nodes()
+        nodes = [self._index_to_node.get(i, {}) for i in range(n)]
+        group_codes = {g: i for i, g in enumerate(NODE_GROUP_CODES)}
+        return {
+            "node_id": np.array([d.get("id", str(i)) for i, d in enumerate(nodes)], dtype=str),
+            "node_label": np.array([str(d.get("label", "")) for d in nodes], dtype=str),
+            "node_group": np.array(
+                [group_codes.get(d.get("group", ""), 0) for d in nodes], dtype=np.uint8
+            ),
+            "edge_src": self._edge_src,
+            "edge_dst": self._edge_dst,
+            "edge_weight": self._edge_weight,
+            "edge_mask": self._edge_mask,
+        }
+
+    def _base_arrays(self) -> dict[str, np.ndarray]:
+        arrays = self.structure_arrays()
+        node_ids = arrays["node_id"].tolist()
+        return {
+            **arrays,
+            "centrality": np.array([self._centrality.get(i, 0.0) for i in range(len(node_ids))]),
+            "community": np.array(
+                [self._communities.get(node_id, -1) for node_id in node_ids], dtype=np.int32
+            ),
+            "influence_ids": self._influence_ids,
+            "influence": self._influence,
+            "influence_nodes": self._expert_nodes(),
+        }
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: dict[str, np.ndarray], version: str | None = None
+    ) -> "GraphEngine":
+        """
+        Wrap arrays produced by to_arrays() (typically read-only memory maps shared by
+        all workers). Influence lookups read the arrays directly; the rx graph is only
+        rebuilt if an export needs it. `version` (the shared store version) lets workers
+        attached to the same publication share personalized PageRank cache keys.
+        """
+        engine = cls()
+        if version is not None:
+            engine.version = version
+        engine._arrays = arrays
+        engine._influence_ids = arrays["influence_ids"]
+        engine._influence = arrays["influence"]
+        return engine
+
+    def _ensure_materialized(self) -> None:
+        """
+        Rebuild the rx graph and lookup dicts from shared arrays (once). They are built
+        aside and installed before _arrays is cleared: a reader that finds _arrays unset
+        sees the finished graph, and any other waits here for it.
+        """
+        if self._arrays is None:
+            return
+        with self._lazy_lock:
+            arrays = self._arrays
+            if arrays is None:
+                return
+            node_ids = arrays["node_id"].tolist()
+            labels = arrays["node_label"].tolist()
+            groups = [NODE_GROUP_CODES[g] for g in arrays["node_group"].tolist()]
+            graph = rx.PyGraph(multigraph=False)
+            node_id_to_index: dict[str, int] = {}
+            index_to_node: dict[int, dict[str, Any]] = {}
+            for node_id, label, group in zip(node_ids, labels, groups, strict=True):
+                data: dict[str, Any] = {"id": node_id, "label": label, "group": group}
+                idx = graph.add_node(
+                    {**data, "expert_id": node_id[len(EXPERT_NODE_PREFIX) :]}
+                    if group == NODE_GROUP_EXPERT
+                    else dict(data)
+                )
+                node_id_to_index[node_id] = idx
+                index_to_node[idx] = data
+            src, dst = arrays["edge_src"], arrays["edge_dst"]
+            graph.add_edges_from_no_data(list(zip(src.tolist(), dst.tolist(), strict=True)))
+            communities = {
+                node_id: cid
+                for node_id, cid in zip(node_ids, arrays["community"].tolist(), strict=True)
+                if cid >= 0
+            }
+
+            self.graph = graph
+            self._node_id_to_index, self._index_to_node = node_id_to_index, index_to_node
+            self._edge_src, self._edge_dst = src, dst
+            self._edge_weight, self._edge_mask = arrays["edge_weight"], arrays["edge_mask"]
+            self._centrality = dict(enumerate(arrays["centrality"].tolist()))
+            self._communities = communities
+            if self._layout is None and "layout" in arrays:
+                self._layout = arrays["layout"]
+            # Publishes the structures above
+            self._arrays = None
 
     def to_react_force_graph_format(self) -> dict[str, Any]:
         """
         Export graph as JSON for react-force-graph 3D.
-        Nodes: id, label, group, val (size from centrality)
-        Links: source, target, type
+        Nodes: id, label, group, val (size from centrality), community, x/y/z (layout)
+        Links: source, target, type, weight
         """
+        self._ensure_materialized()
+        coords = graph_layout.coordinates(self.layout())
         nodes = []
         for idx in range(self.graph.num_nodes()):
+            x, y, z = coords[idx]
             data = self._index_to_node.get(idx, {})
             centrality = self._centrality.get(idx, 0.0)
             val = max(1, int(centrality * 50) + 1)  # size 1–50
@@ -266,35 +709,262 @@ class GraphEngine:
                     "group": data.get("group", "unknown"),
                     "val": val,
                     "community": self._communities.get(data.get("id", str(idx)), -1),
+                    "x": x,
+                    "y": y,
+                    "z": z,
                 }
             )
 
+        ids = [node["id"] for node in nodes]
+        types: dict[int, str] = {}
         links = []
-        for edge in self.graph.weighted_edge_list():
-            src, tgt = edge[0], edge[1]
-            edge_data = edge[2] if len(edge) > 2 else EDGE_WORKED_AT
-            edge_type = edge_data if isinstance(edge_data, str) else "WORKED_AT"
-            src_id = self._index_to_node.get(src, {}).get("id", str(src))
-            tgt_id = self._index_to_node.get(tgt, {}).get("id", str(tgt))
-            # Map WORKED_AT -> ALUMNI for frontend (Expert–Company)
-            link_type = (
-                "ALUMNI"
-                if edge_type == EDGE_WORKED_AT
-                else (edge_type if edge_type == EDGE_HAS_SKILL else "ALUMNI")
-            )
+        for src, tgt, weight, mask in zip(
+            *(column.tolist() for column in self._edges()), strict=True
+        ):
+            if mask not in types:
+                types[mask] = link_type(primary_edge_type(mask))
             links.append(
-                {
-                    "source": src_id,
-                    "target": tgt_id,
-                    "type": link_type,
-                }
+                {"source": ids[src], "target": ids[tgt], "type": types[mask], "weight": weight}
             )
 
         return {"nodes": nodes, "links": links}
 
 
+def match_seed_nodes(
+    candidates: list[tuple[int, str, str]], filters: dict[str, Any]
+) -> tuple[int, ...]:
+    """The node indices among (index, group, lowercased label) `candidates` that seed a
+    project's personalized PageRank (see GraphEngine.seed_nodes)."""
+    terms = [
+        str(filters[k]).strip().lower()
+        for k in SEED_FILTER_KEYS
+        if filters.get(k) and str(filters[k]).strip()
+    ]
+    skills = {str(s).strip().lower() for s in filters.get("skills") or [] if s}
+    brief = " ".join(str(filters.get(k) or "") for k in ("brief", "query")).lower()
+    words = f" {_NON_WORD_RE.sub(' ', brief)} " if brief.strip() else ""
+    seeds = set()
+    for idx, group, label in candidates:
+        if any(t in label for t in terms):
+            seeds.add(idx)
+        elif group == NODE_GROUP_SKILL and (
+            label in skills or (words and f" {_NON_WORD_RE.sub(' ', label)} " in words)
+        ):
+            seeds.add(idx)
+    return tuple(sorted(seeds))
+
+
 def build_knowledge_graph(limit: int = 500) -> GraphEngine:
-    """Convenience: build and return graph engine."""
+    """
+    Convenience: build and return graph engine. Experts are fetched here; with the
+    process pool enabled, they go to a pool process as expert_columns(), and the graph,
+    PageRank, Louvain and layout computed there come back as to_arrays() columns,
+    wrapped by GraphEngine.from_arrays().
+    """
+    experts = fetch_experts_for_graph(limit=limit)
+    if not process_pool.enabled():
+        engine = GraphEngine()
+        engine.build_from_experts(experts)
+        return engine
+    arrays = process_pool.run(
+        "graph_build", _build_graph_arrays, expert_columns(experts), graph_layout.previous()
+    )
+    graph_layout.remember(arrays["node_id"].tolist(), arrays["layout"])
+    metrics.observe_graph(len(arrays["node_id"]), len(arrays["edge_src"]))
+    return GraphEngine.from_arrays(arrays)
+
+
+def _build_graph_arrays(
+    columns: dict[str, np.ndarray], layout: tuple[list[str], np.ndarray] | None
+) -> dict[str, np.ndarray]:
+    """Process pool task: a graph's to_arrays(), its layout warm started from `layout`."""
+    if layout is not None:
+        graph_layout.remember(*layout)
     engine = GraphEngine()
-    engine.build_knowledge_graph(limit=limit)
+    engine.build_from_experts(experts_from_columns(columns))
+    return engine.to_arrays()
+
+
+# fetch_experts_for_graph() fields holding one string, and a list of strings, per expert
+EXPERT_TEXT_FIELDS = ("id", "name", "industry", "sub_industry")
+EXPERT_LIST_FIELDS = ("past_employers", "skills")
+
+
+def expert_columns(experts: list[dict[str, Any]]) -> dict[str, np.ndarray]:
+    """
+    fetch_experts_for_graph() rows as int32 codes into one `strings` vocabulary, so each
+    distinct name, company, skill or industry is sent once rather than per row. List
+    fields are flattened, with `<field>_offsets` marking each expert's slice; missing
+    values become "" (the graph skips both alike).
+    """
+    codes: dict[str, int] = {}
+
+    def encode(values: list[str]) -> np.ndarray:
+        return np.array([codes.setdefault(v, len(codes)) for v in values], dtype=np.int32)
+
+    columns = {
+        name: encode([str(e.get(name) or "") for e in experts]) for name in EXPERT_TEXT_FIELDS
+    }
+    for name in EXPERT_LIST_FIELDS:
+        lists = [e.get(name) or [] for e in experts]
+        columns[name] = encode([str(v or "") for values in lists for v in values])
+        columns[f"{name}_offsets"] = np.cumsum([0] + [len(v) for v in lists], dtype=np.int64)
+    columns["strings"] = np.array(list(codes), dtype=object)
+    return columns
+
+
+def experts_from_columns(columns: dict[str, np.ndarray]) -> list[dict[str, Any]]:
+    """Inverse of expert_columns()."""
+    strings = columns["strings"].tolist()
+
+    def decode(name: str) -> list[str]:
+        return [strings[c] for c in columns[name].tolist()]
+
+    experts: list[dict[str, Any]] = [
+        dict(zip(EXPERT_TEXT_FIELDS, row, strict=True))
+        for row in zip(*(decode(name) for name in EXPERT_TEXT_FIELDS), strict=True)
+    ]
+    for name in EXPERT_LIST_FIELDS:
+        values = decode(name)
+        offsets = columns[f"{name}_offsets"].tolist()
+        for i, expert in enumerate(experts):
+            expert[name] = values[offsets[i] : offsets[i + 1]]
+    return experts
+
+
+# (graph version, seed nodes) -> read-only personalized influence vector, LRU order
+_ppr_cache: OrderedDict[tuple[str, tuple[int, ...]], np.ndarray] = OrderedDict()
+_ppr_lock = threading.Lock()
+
+# limit -> (built_at: epoch seconds its data was read from the database,
+#          shared version or None, engine)
+_snapshots: dict[int, tuple[float, str | None, GraphEngine]] = {}
+_snapshot_lock = threading.Lock()
+# Concurrent requests for a missing or stale snapshot share one build per limit
+_snapshot_flight: SingleFlight[GraphEngine] = SingleFlight("graph_snapshot")
+# Data read before this (epoch seconds) is stale; raised by invalidations, so a build
+# that was in flight when one arrived is not cached or reused
+_stale_before = 0.0
+
+
+def _snapshot_store_name(limit: int) -> str:
+    return f"graph-{limit}"
+
+
+def snapshot_fresh(built_at: float) -> bool:
+    """True for a graph built within the TTL and after the last invalidating change."""
+    return built_at >= _stale_before and time.time() - built_at < GRAPH_SNAPSHOT_TTL_SECONDS
+
+
+def _built_at(shared: shared_store.SharedArrays) -> float:
+    return float(shared.meta.get("built_at", shared.published_at))
+
+
+def _usable(shared: shared_store.SharedArrays) -> bool:
+    """Fresh, and in the current to_arrays() format (older publications lack edge weights)."""
+    return snapshot_fresh(_built_at(shared)) and "edge_weight" in shared.arrays
+
+
+def _load_or_build_snapshot(limit: int) -> tuple[float, str | None, GraphEngine]:
+    """
+    Build a snapshot, or with ML_SHARED_DIR set, attach to the one another worker
+    published (building and publishing it under an inter-process lock if stale).
+    Returns (built_at, shared version or None, engine).
+    """
+    if not shared_store.enabled():
+        built_at = time.time()
+        return built_at, None, build_knowledge_graph(limit=limit)
+    name = _snapshot_store_name(limit)
+    shared = shared_store.attach(name)
+    if shared is None or not _usable(shared):
+        with shared_store.publish_lock(name):
+            shared = shared_store.attach(name)  # another worker may have just published
+            if shared is None or not _usable(shared):
+                built_at = time.time()
+                engine = build_knowledge_graph(limit=limit)
+                meta = {"limit": limit, "built_at": built_at}
+                shared_store.publish(name, engine.to_arrays(), meta)
+                shared = shared_store.attach(name)
+                if shared is None:
+                    return built_at, None, engine
+    return (
+        _built_at(shared),
+        shared.version,
+        GraphEngine.from_arrays(shared.arrays, version=shared.version),
+    )
+
+
+def get_graph_snapshot(limit: int = 500) -> GraphEngine:
+    """
+    Shared GraphEngine for `limit`, rebuilt once GRAPH_SNAPSHOT_TTL_SECONDS have passed.
+    With ML_SHARED_DIR set, all workers map one published copy and swap to newer
+    versions as they appear. Concurrent callers share one build per limit; builds for
+    different limits run in parallel. Callers must treat the returned engine as read-only.
+    """
+    cached = _snapshots.get(limit)
+    if cached is not None and snapshot_fresh(cached[0]) and _is_current(limit, cached[1]):
+        return cached[2]
+    return _snapshot_flight.do(limit, lambda: _refresh_snapshot(limit))
+
+
+def _refresh_snapshot(limit: int) -> GraphEngine:
+    cached = _snapshots.get(limit)  # a build may have finished since the caller looked
+    if cached is not None and snapshot_fresh(cached[0]) and _is_current(limit, cached[1]):
+        return cached[2]
+    built_at, version, engine = _load_or_build_snapshot(limit)
+    with _snapshot_lock:
+        if snapshot_fresh(built_at):
+            if limit not in _snapshots and len(_snapshots) >= GRAPH_SNAPSHOT_MAX_ENTRIES:
+                oldest = min(_snapshots, key=lambda k: _snapshots[k][0])
+                del _snapshots[oldest]
+            _snapshots[limit] = (built_at, version, engine)
     return engine
+
+
+def _is_current(limit: int, version: str | None) -> bool:
+    """True unless another worker has published a newer shared version."""
+    if version is None or not shared_store.enabled():
+        return True
+    return shared_store.current_version(_snapshot_store_name(limit)) == version
+
+
+def invalidate_graph_snapshots(changed_at: float | None = None) -> None:
+    """
+    Drop cached snapshots (in every worker, when shared) built from data read before
+    `changed_at` (all of them by default); the next read rebuilds. Snapshots built after
+    a change, e.g. by another worker that saw it first, are kept.
+    """
+    global _stale_before
+    with _snapshot_lock:
+        _stale_before = max(_stale_before, time.time() if changed_at is None else changed_at)
+        for limit, (built_at, _, _) in list(_snapshots.items()):
+            if changed_at is not None and built_at >= changed_at:
+                continue
+            if shared_store.enabled():
+                name = _snapshot_store_name(limit)
+                with shared_store.publish_lock(name):
+                    meta = shared_store.current_meta(name)
+                    if meta is not None and (
+                        changed_at is None or float(meta.get("built_at", 0)) < changed_at
+                    ):
+                        shared_store.retire(name)
+            del _snapshots[limit]
+
+
+def _on_invalidation(event: invalidation.Invalidation) -> None:
+    # Experts feed every node and edge; other tables do not enter the graph
+    if event.touches(invalidation.TABLE_EXPERTS):
+        invalidate_graph_snapshots(event.changed_at)
+
+
+def graph_snapshot_count() -> int:
+    return len(_snapshots)
+
+
+def personalized_pagerank_count() -> int:
+    return len(_ppr_cache)
+
+
+metrics.register_cache("graph_snapshots", graph_snapshot_count)
+metrics.register_cache("personalized_pagerank", personalized_pagerank_count)
+invalidation.bus.subscribe(_on_invalidation)
@@ -0,0 +1,201 @@
+"""
+Precomputed 3D force-directed layout for knowledge-graph snapshots.
+Positions are computed once per graph version (Fruchterman-Reingold style, vectorized
+over the undirected edge list) and shipped as x/y/z on every exported node, so clients
+render a settled graph immediately instead of running the simulation in the browser.
+A rebuilt snapshot is refined from the previous layout: nodes keep their positions by
+id, new nodes start next to their neighbours, and only a short, cool pass is run.
+"""
+
+import threading
+
+import numpy as np
+
+# Ideal edge length, in the units react-force-graph draws with (its default is 30)
+LINK_DISTANCE = 30.0
+LAYOUT_ITERATIONS = 80
+REFINE_ITERATIONS = 20
+# Nodes each node is repelled from per iteration (all of them on smaller graphs)
+REPULSION_SAMPLES = 256
+# Pull towards the origin, keeping disconnected nodes near the rest of the graph
+GRAVITY = 1.0
+# A previous layout is refined rather than replaced when it places this share of nodes
+WARM_START_MIN_OVERLAP = 0.5
+LAYOUT_SEED = 0
+
+# Most recent layout as (node ids, positions): the warm start for the next snapshot
+_previous: tuple[list[str], np.ndarray] | None = None
+_previous_lock = threading.Lock()
+
+
+def undirected_pairs(
+    src: np.ndarray, dst: np.ndarray, n: int, weight: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Each undirected edge once, as (a, b, weight) with a < b: self-loops are dropped and
+    the weights of duplicates (1 each by default) add up.
+    """
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    w = np.ones(len(src)) if weight is None else np.asarray(weight, dtype=np.float64)
+    keep = src != dst
+    lo = np.minimum(src[keep], dst[keep])
+    hi = np.maximum(src[keep], dst[keep])
+    keys, inverse = np.unique(lo * max(n, 1) + hi, return_inverse=True)
+    return keys // max(n, 1), keys % max(n, 1), np.bincount(inverse, weights=w[keep])
+
+
+def _radius(n: int) -> float:
+    """Radius of a ball giving every node about LINK_DISTANCE^3 of room."""
+    return LINK_DISTANCE * float(np.cbrt(max(n, 1)))
+
+
+def _random_ball(rng: np.random.Generator, count: int, radius: float) -> np.ndarray:
+    direction = rng.normal(size=(count, 3))
+    direction /= np.maximum(np.linalg.norm(direction, axis=1, keepdims=True), 1e-12)
+    return direction * (radius * rng.random((count, 1)) ** (1 / 3))
+
+
+def force_layout(
+    a: np.ndarray,
+    b: np.ndarray,
+    n: int,
+    weight: np.ndarray | None = None,
+    init: np.ndarray | None = None,
+    iterations: int = LAYOUT_ITERATIONS,
+    temperature: float | None = None,
+    seed: int = LAYOUT_SEED,
+) -> np.ndarray:
+    """
+    (n, 3) float32 positions for undirected edges (a, b). Each iteration applies spring
+    attraction along every edge (scaled by `weight`, if given), repulsion from REPULSION_SAMPLES random nodes (scaled
+    to stand in for all n) and gravity, capping moves at a temperature that cools
+    linearly from `temperature` (a fifth of the graph radius by default). `init` warm
+    starts from given positions. The result is centred and scaled to a fixed RMS radius.
+    """
+    if n == 0:
+        return np.zeros((0, 3), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    radius = _radius(n)
+    pos = (
+        _random_ball(rng, n, radius)
+        if init is None
+        else np.array(init, dtype=np.float64, copy=True)
+    )
+    t0 = 0.2 * radius if temperature is None else temperature
+    k = LINK_DISTANCE
+    samples = min(n, REPULSION_SAMPLES)
+    for i in range(iterations):
+        # Repulsion k^2 / d along each node -> anchor direction, as matrix products:
+        # sum_j w_ij (p_i - q_j) = p_i * sum_j w_ij - W @ q
+        anchors = pos[rng.choice(n, samples, replace=False)] if samples < n else pos
+        dist2 = (
+            np.einsum("ij,ij->i", pos, pos)[:, None]
+            + np.einsum("ij,ij->i", anchors, anchors)[None, :]
+            - 2.0 * (pos @ anchors.T)
+        )
+        w = (k * k * n / samples) / np.maximum(dist2, 1e-2)
+        disp = pos * w.sum(axis=1, keepdims=True) - w @ anchors
+        # Attraction d^2 / k along each edge
+        d = pos[b] - pos[a]
+        strength = np.sqrt(np.einsum("ij,ij->i", d, d)) / k
+        pull = d * (strength if weight is None else strength * weight)[:, None]
+        for axis in range(3):
+            disp[:, axis] += np.bincount(a, weights=pull[:, axis], minlength=n)
+            disp[:, axis] -= np.bincount(b, weights=pull[:, axis], minlength=n)
+        disp -= pos * (GRAVITY / k)
+
+        t = t0 * (1.0 - i / iterations)
+        length = np.maximum(np.linalg.norm(disp, axis=1, keepdims=True), 1e-12)
+        pos += disp * (np.minimum(length, t) / length)
+        pos -= pos.mean(axis=0)
+
+    rms = np.sqrt((pos**2).sum(axis=1).mean())
+    if rms > 0:
+        pos *= radius / rms
+    return pos.astype(np.float32)
+
+
+def _warm_start(
+    node_id: list[str], a: np.ndarray, b: np.ndarray, previous: tuple[list[str], np.ndarray]
+) -> tuple[np.ndarray, int]:
+    """
+    Initial positions from a previous layout: known ids keep theirs, new nodes start at
+    the centroid of their placed neighbours (spreading out over a few rounds) plus a
+    little jitter, and nodes with none placed start in the ball. Returns (positions,
+    number of nodes that kept a previous position).
+    """
+    n = len(node_id)
+    prev_ids, prev_pos = previous
+    rows = {nid: i for i, nid in enumerate(prev_ids)}
+    index = np.array([rows.get(nid, -1) for nid in node_id], dtype=np.int64)
+    known = index >= 0
+    pos = np.zeros((n, 3))
+    pos[known] = np.asarray(prev_pos, dtype=np.float64)[index[known]]
+    placed = known.copy()
+    rng = np.random.default_rng(LAYOUT_SEED)
+    src, dst = np.concatenate([a, b]), np.concatenate([b, a])
+    for _ in range(3):
+        # Neighbour sums over edges into unplaced nodes from placed ones
+        use = placed[src] & ~placed[dst]
+        count = np.bincount(dst[use], minlength=n)
+        fresh = count > 0
+        if not fresh.any():
+            break
+        for axis in range(3):
+            total = np.bincount(dst[use], weights=pos[src[use], axis], minlength=n)
+            pos[fresh, axis] = total[fresh] / count[fresh]
+        pos[fresh] += rng.normal(scale=0.1 * LINK_DISTANCE, size=(int(fresh.sum()), 3))
+        placed |= fresh
+    pos[~placed] = _random_ball(rng, int((~placed).sum()), _radius(n))
+    return pos, int(known.sum())
+
+
+def compute_layout(
+    node_id: list[str], src: np.ndarray, dst: np.ndarray, weight: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Layout for a graph given as node ids and a (weighted) edge list; direction does not
+    matter and duplicates add up. Refines the most recent layout when it still places at least
+    WARM_START_MIN_OVERLAP of the nodes; otherwise lays out from scratch.
+    """
+    n = len(node_id)
+    a, b, w = undirected_pairs(src, dst, n, weight)
+    with _previous_lock:
+        previous = _previous
+    pos: np.ndarray | None = None
+    if previous is not None and n:
+        init, reused = _warm_start(node_id, a, b, previous)
+        if reused >= WARM_START_MIN_OVERLAP * n:
+            pos = force_layout(
+                a, b, n, w, init=init, iterations=REFINE_ITERATIONS, temperature=LINK_DISTANCE
+            )
+    if pos is None:
+        pos = force_layout(a, b, n, w)
+    remember(node_id, pos)
+    return pos
+
+
+def remember(node_id: list[str], positions: np.ndarray) -> None:
+    """Keep a layout as the warm start for the next compute_layout()."""
+    global _previous
+    with _previous_lock:
+        _previous = (list(node_id), positions)
+
+
+def previous() -> tuple[list[str], np.ndarray] | None:
+    """The remembered (node ids, positions), e.g. to warm start a layout in another process."""
+    with _previous_lock:
+        return _previous
+
+
+def forget() -> None:
+    """Drop the remembered layout; the next compute_layout() starts from scratch."""
+    global _previous
+    with _previous_lock:
+        _previous = None
+
+
+def coordinates(positions: np.ndarray) -> list[list[float]]:
+    """Positions as nested lists rounded for JSON output."""
+    return list(np.round(np.asarray(positions, dtype=np.float64), 1).tolist())
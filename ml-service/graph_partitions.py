@@ -0,0 +1,721 @@
+"""
+Partitioned knowledge graph, for expert pools too large for one GraphEngine process.
+
+Experts are split across partition processes by industry (whole industries, balanced
+by size); every company, skill and industry node is owned by the partition holding most
+of its experts. A partition builds the graph around the rows it is sent (GraphEngine.
+build_structure) and keeps every edge of the nodes it owns, plus their far endpoints as
+ghosts: its small boundary table is the ghost node ids with the partition owning each.
+Louvain communities and layout need the whole graph and are not computed here.
+
+A coordinator (PartitionedGraph) talks to the partitions over multiprocessing.connection
+sockets, authenticated with ML_GRAPH_PARTITION_AUTHKEY. It routes influence lookups and
+ego-network queries to the owners of the nodes involved, and runs weighted PageRank
+(pagerank.py) as one round trip per power iteration: it sends each partition the current
+mass share of its ghosts and gets back the shares of its boundary nodes. Partitions run
+on one machine with spawn_local(n), or anywhere with `python -m graph_partitions
+--listen host:port` and PartitionedGraph.connect().
+
+With ML_GRAPH_PARTITIONS set, the service keeps one coordinator (get_partitioned_graph)
+and serves /graph/influence and /graph/ego from it instead of a GraphEngine snapshot.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Sequence
+from multiprocessing.connection import Client, Connection, Listener
+from multiprocessing.process import BaseProcess
+from typing import Any, TypeVar
+
+import numpy as np
+from loguru import logger
+
+import admission
+from database import fetch_experts_for_graph
+from graph_engine import (
+    EXPERT_NODE_PREFIX,
+    NODE_GROUP_CODES,
+    NODE_GROUP_EXPERT,
+    NODE_GROUP_INDUSTRY,
+    NODE_GROUP_SKILL,
+    GraphEngine,
+    expert_groups,
+    expert_links,
+    match_seed_nodes,
+    snapshot_fresh,
+)
+from graph_queries import DEFAULT_MAX_EDGES, DEFAULT_MAX_NODES, GraphIndex
+from pagerank import DEFAULT_ALPHA, DEFAULT_MAX_ITER, DEFAULT_TOL
+from singleflight import SingleFlight
+
+T = TypeVar("T")
+
+# A number of partitions to spawn on this machine, or comma-separated host:port addresses
+# of partition servers; unset, the graph endpoints use GraphEngine snapshots
+GRAPH_PARTITIONS = os.getenv("ML_GRAPH_PARTITIONS", "").strip()
+# Experts loaded into the service's partitioned graph
+PARTITION_GRAPH_LIMIT = int(os.getenv("ML_GRAPH_PARTITION_LIMIT") or 100_000)
+PARTITION_AUTHKEY = os.getenv("ML_GRAPH_PARTITION_AUTHKEY", "").encode()
+# How long the coordinator waits for one partition reply (a build is the slowest)
+PARTITION_TIMEOUT_SECONDS = float(os.getenv("ML_GRAPH_PARTITION_TIMEOUT_SECONDS") or 300)
+# Personalized PageRank vectors kept per graph, oldest dropped first
+PARTITION_PPR_CACHE_ENTRIES = 64
+GLOBAL_KEY = "global"
+
+
+class PartitionError(Exception):
+    """A partition failed a request or did not answer in time."""
+
+
+def assign_partitions(experts: list[dict[str, Any]], count: int) -> list[int]:
+    """
+    Partition of each expert: whole industries, largest first, each to the partition
+    with the fewest experts so far.
+    """
+    industries = [str(e.get("industry") or "").strip().lower() for e in experts]
+    load = [0] * count
+    owner: dict[str, int] = {}
+    for industry, size in sorted(Counter(industries).items(), key=lambda kv: (-kv[1], kv[0])):
+        p = min(range(count), key=lambda i: (load[i], i))
+        owner[industry] = p
+        load[p] += size
+    return [owner[industry] for industry in industries]
+
+
+class Partition:
+    """
+    One partition's slice of the graph, in its own process: owned nodes first, then
+    ghosts. Every edge touching an owned node is held, with its global weight.
+    """
+
+    # Requests a coordinator may send once the partition is loaded
+    OPS = frozenset(
+        {"set_boundary", "seed_count", "init_pagerank", "step", "finish_pagerank"}
+        | {"scores", "neighbours", "subgraph"}
+    )
+
+    def __init__(self, index: int, experts: list[dict[str, Any]], owners: dict[str, int]):
+        import scipy.sparse as sp  # deferred, as in pagerank.py
+
+        engine = GraphEngine()
+        engine.build_structure(experts, keep={nid for nid, p in owners.items() if p == index})
+        arrays = engine.structure_arrays()
+        owner = np.array([owners[nid] for nid in arrays["node_id"].tolist()], dtype=np.int64)
+        owned = owner == index
+        src = arrays["edge_src"].astype(np.int64)
+        dst = arrays["edge_dst"].astype(np.int64)
+        keep = owned[src] | owned[dst]
+        used = owned.copy()
+        used[src[keep]] = True
+        used[dst[keep]] = True
+        order = np.concatenate([np.flatnonzero(owned), np.flatnonzero(used & ~owned)])
+        remap = np.full(len(owner), -1, dtype=np.int64)
+        remap[order] = np.arange(len(order))
+
+        self.index = index
+        self.n_owned = int(owned.sum())
+        self.ghost_owner = owner[order[self.n_owned :]]
+        n = len(order)
+        self._arrays = {
+            "node_id": arrays["node_id"][order],
+            "node_label": arrays["node_label"][order],
+            "node_group": arrays["node_group"][order],
+            "edge_src": remap[src[keep]].astype(np.int32),
+            "edge_dst": remap[dst[keep]].astype(np.int32),
+            "edge_weight": arrays["edge_weight"][keep],
+            "edge_mask": arrays["edge_mask"][keep],
+            "community": np.full(n, -1, dtype=np.int32),
+        }
+        self.node_ids: list[str] = self._arrays["node_id"].tolist()
+        self.position = {nid: i for i, nid in enumerate(self.node_ids)}
+
+        # Rows: owned nodes; columns: all local nodes. Symmetric weights, so a row's sum
+        # is the node's total edge weight over the whole graph.
+        s, d = self._arrays["edge_src"], self._arrays["edge_dst"]
+        w = self._arrays["edge_weight"].astype(np.float64)
+        adj = sp.csr_matrix(
+            (np.concatenate([w, w]), (np.concatenate([s, d]), np.concatenate([d, s]))),
+            shape=(n, n),
+        )
+        self._adj = adj[: self.n_owned]
+        out_weight = np.asarray(self._adj.sum(axis=1)).ravel()
+        self._dangling = out_weight == 0
+        self._inv_weight = np.divide(
+            1.0, out_weight, out=np.zeros(self.n_owned), where=~self._dangling
+        )
+        groups = self._arrays["node_group"][: self.n_owned]
+        self._experts = np.flatnonzero(groups == NODE_GROUP_CODES.index(NODE_GROUP_EXPERT))
+        labels = self._arrays["node_label"].tolist()
+        self._seed_candidates = [
+            (i, NODE_GROUP_CODES[g], labels[i].strip().lower())
+            for i, g in enumerate(groups.tolist())
+            if NODE_GROUP_CODES[g] in (NODE_GROUP_INDUSTRY, NODE_GROUP_SKILL) and labels[i].strip()
+        ]
+
+        self._exports = np.zeros(0, dtype=np.int64)
+        self._seeds: tuple[int, ...] = ()
+        self._personalization = np.zeros(self.n_owned)
+        self._x = np.zeros(self.n_owned)
+        self._vectors: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._query_index: GraphIndex | None = None
+
+    def summary(self) -> dict[str, Any]:
+        """Owned node count and the boundary table (ghost ids and their owners)."""
+        return {
+            "nodes": self.n_owned,
+            "experts": len(self._experts),
+            "edges": len(self._arrays["edge_src"]),
+            "ghosts": self.node_ids[self.n_owned :],
+            "ghost_owners": self.ghost_owner.tolist(),
+        }
+
+    def set_boundary(self, exports: list[str]) -> None:
+        """Owned nodes that are ghosts elsewhere, in the order their shares are sent."""
+        self._exports = np.array([self.position[nid] for nid in exports], dtype=np.int64)
+
+    # ---- PageRank, driven by the coordinator ----
+
+    def seed_count(self, filters: dict[str, Any] | None) -> int:
+        """Pick the personalization seeds for `filters` (none: uniform); their count."""
+        self._seeds = () if filters is None else match_seed_nodes(self._seed_candidates, filters)
+        return len(self._seeds)
+
+    def init_pagerank(self, total_seeds: int, total_nodes: int) -> tuple[np.ndarray, float]:
+        if total_seeds:
+            self._personalization = np.zeros(self.n_owned)
+            self._personalization[list(self._seeds)] = 1.0 / total_seeds
+        else:
+            self._personalization = np.full(self.n_owned, 1.0 / max(total_nodes, 1))
+        self._x = self._personalization.copy()
+        return self._exchange()
+
+    def _exchange(self) -> tuple[np.ndarray, float]:
+        """(mass share sent along each edge by each boundary node, dangling mass)."""
+        share = self._x * self._inv_weight
+        return share[self._exports], float(self._x[self._dangling].sum())
+
+    def step(self, ghost_shares: np.ndarray, leaked: float) -> tuple[float, np.ndarray, float]:
+        """One power iteration over the owned nodes; (L1 change, *_exchange())."""
+        share = np.concatenate([self._x * self._inv_weight, ghost_shares])
+        nxt = DEFAULT_ALPHA * (self._adj @ share) + leaked * self._personalization
+        diff = float(np.abs(nxt - self._x).sum())
+        self._x = nxt
+        return (diff, *self._exchange())
+
+    def finish_pagerank(self, key: str) -> tuple[float, float]:
+        """Keep the converged vector under `key`; (max over all nodes, max over experts)."""
+        self._vectors[key] = self._x
+        while len(self._vectors) > PARTITION_PPR_CACHE_ENTRIES + 1:
+            oldest = next(k for k in self._vectors if k != GLOBAL_KEY)
+            del self._vectors[oldest]
+        if key == GLOBAL_KEY:
+            # Built now, during the coordinator's build(), rather than by the first query
+            self._query_index = None
+            self._index()
+        return float(self._x.max(initial=0.0)), float(self._x[self._experts].max(initial=0.0))
+
+    # ---- lookups ----
+
+    def scores(self, key: str, node_ids: list[str] | None) -> dict[str, float]:
+        """Raw PageRank under `key` of owned `node_ids` (all owned nodes if None)."""
+        vector = self._vectors[key]
+        if node_ids is None:
+            return dict(zip(self.node_ids[: self.n_owned], vector.tolist(), strict=True))
+        return {nid: float(vector[self.position[nid]]) for nid in node_ids}
+
+    def _index(self) -> GraphIndex:
+        if self._query_index is None:
+            centrality = np.zeros(len(self.node_ids))
+            centrality[: self.n_owned] = self._vectors.get(GLOBAL_KEY, 0.0)
+            self._query_index = GraphIndex.from_arrays({**self._arrays, "centrality": centrality})
+        return self._query_index
+
+    def neighbours(self, node_ids: list[str]) -> list[str]:
+        index = self._index()
+        rows = [self.position[nid] for nid in node_ids]
+        found = [index.nbr[index.nbr_ptr[r] : index.nbr_ptr[r + 1]] for r in rows]
+        return [self.node_ids[i] for i in np.unique(np.concatenate([[], *found])).astype(int)]
+
+    def subgraph(self, selected: list[str]) -> dict[str, Any]:
+        """
+        Nodes of `selected` owned here, with their raw centrality, and the links among
+        `selected` whose stored source is owned here (so each link comes from one owner).
+        """
+        index = self._index()
+        local = np.array([self.position[n] for n in selected if n in self.position], dtype=int)
+        view = index.subgraph(local, max_edges=len(index.out_dst))
+        owned_ids = set(self.node_ids[: self.n_owned])
+        nodes = [node for node in view["nodes"] if node["id"] in owned_ids]
+        return {
+            "nodes": nodes,
+            "centrality": {n["id"]: float(index.centrality[self.position[n["id"]]]) for n in nodes},
+            "links": [link for link in view["links"] if link["source"] in owned_ids],
+        }
+
+
+def serve(listener: Listener) -> None:
+    """
+    Answer coordinator requests, one connection at a time, until one sends "shutdown".
+    A request is (op, args); the reply is ("ok", result) or ("error", message).
+    """
+    partition: Partition | None = None
+    while True:
+        try:
+            conn = listener.accept()
+        except (OSError, EOFError, multiprocessing.AuthenticationError) as exc:
+            logger.warning("Rejected graph partition connection: {}", exc)
+            continue
+        with conn:
+            while True:
+                try:
+                    op, args = conn.recv()
+                except EOFError:
+                    break
+                if op == "shutdown":
+                    conn.send(("ok", None))
+                    return
+                try:
+                    if op == "load":
+                        partition = Partition(*args)
+                        result = partition.summary()
+                    elif partition is None or op not in Partition.OPS:
+                        raise ValueError(f"Unknown or premature request {op!r}")
+                    else:
+                        result = getattr(partition, op)(*args)
+                except Exception as exc:
+                    conn.send(("error", f"{type(exc).__name__}: {exc}"))
+                else:
+                    conn.send(("ok", result))
+
+
+def _serve_local(reply: Connection, authkey: bytes) -> None:
+    """spawn_local() process entry point: report the listening address, then serve."""
+    with Listener(("127.0.0.1", 0), authkey=authkey) as listener:
+        reply.send(listener.address)
+        reply.close()
+        serve(listener)
+
+
+class PartitionedGraph:
+    """
+    Coordinator of a partitioned knowledge graph. It keeps the owner of every node (the
+    routing table) and the boundary slots; the graph itself lives in the partitions.
+    Calls are serialized; after a PartitionError the graph should be closed.
+    """
+
+    def __init__(
+        self,
+        connections: list[Connection],
+        processes: Sequence[BaseProcess] = (),
+    ) -> None:
+        self._conns = connections
+        self._processes = list(processes)
+        self._lock = threading.RLock()
+        self._owner: dict[str, int] = {}
+        self._ghost_slots: list[np.ndarray] = []
+        self._num_nodes = 0
+        self._boundary_size = 0
+        self._top_centrality = 1.0
+        # Personalized runs: filters key -> max expert score (0: nothing seeded)
+        self._personalized: OrderedDict[str, float] = OrderedDict()
+
+    @classmethod
+    def connect(
+        cls, addresses: list[tuple[str, int]], authkey: bytes | None = None
+    ) -> "PartitionedGraph":
+        """Coordinator for partitions served (see serve()) at `addresses`."""
+        key = authkey or PARTITION_AUTHKEY
+        if not key:
+            raise ValueError("Set ML_GRAPH_PARTITION_AUTHKEY to connect to graph partitions")
+        return cls([Client(address, authkey=key) for address in addresses])
+
+    def __enter__(self) -> "PartitionedGraph":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def num_partitions(self) -> int:
+        return len(self._conns)
+
+    @property
+    def num_nodes(self) -> int:
+        return self._num_nodes
+
+    @property
+    def boundary_size(self) -> int:
+        """Distinct nodes that are ghosts in at least one other partition."""
+        return self._boundary_size
+
+    # ---- transport ----
+
+    def _call_each(self, op: str, args: list[tuple[Any, ...]]) -> list[Any]:
+        """Send op(*args[p]) to every partition, then collect the replies in order."""
+        return self._call(op, dict(enumerate(args)))
+
+    def _call(self, op: str, requests: dict[int, tuple[Any, ...]]) -> list[Any]:
+        # All requests go out before any reply is read, so the partitions work in parallel
+        for p, args in requests.items():
+            self._conns[p].send((op, args))
+        replies = []
+        failures = []
+        for p in requests:
+            conn = self._conns[p]
+            if not conn.poll(PARTITION_TIMEOUT_SECONDS):
+                raise PartitionError(f"Partition {p} did not answer {op!r} in time")
+            try:
+                status, result = conn.recv()
+            except EOFError as exc:
+                raise PartitionError(f"Partition {p} disconnected during {op!r}") from exc
+            if status != "ok":
+                # Read the other replies first, so each connection stays in step
+                failures.append(f"Partition {p} failed {op!r}: {result}")
+            replies.append(result)
+        if failures:
+            raise PartitionError("; ".join(failures))
+        return replies
+
+    def _route(self, op: str, node_ids: list[str], *args: Any) -> list[Any]:
+        """op(*args, owned ids) on each partition owning some of `node_ids`."""
+        by_owner: dict[int, list[str]] = {}
+        for nid in node_ids:
+            if nid in self._owner:
+                by_owner.setdefault(self._owner[nid], []).append(nid)
+        return self._call(op, {p: (*args, ids) for p, ids in sorted(by_owner.items())})
+
+    # ---- build ----
+
+    def build(self, experts: list[dict[str, Any]]) -> None:
+        """Partition fetch_experts_for_graph() rows and load each partition's share."""
+        with self._lock:
+            self._build(experts)
+            self._pagerank(GLOBAL_KEY, None)
+
+    def _build(self, experts: list[dict[str, Any]]) -> None:
+        count = self.num_partitions
+        expert_owner = assign_partitions(experts, count)
+        links = [expert_links(e) for e in experts]
+        # Experts linked to each node, and in each pairwise-linked group
+        members: dict[str, list[int]] = {}
+        group_members: dict[tuple[str, str], list[int]] = {}
+        for i, expert in enumerate(experts):
+            for node_id, *_ in links[i]:
+                members.setdefault(node_id, []).append(i)
+            for group in expert_groups(expert):
+                group_members.setdefault(group, []).append(i)
+
+        owner = {
+            f"{EXPERT_NODE_PREFIX}{e['id']}": p for e, p in zip(experts, expert_owner, strict=True)
+        }
+        owned_nodes: list[list[str]] = [[] for _ in range(count)]
+        for node_id, linked in members.items():
+            votes = np.bincount([expert_owner[i] for i in linked], minlength=count)
+            owner[node_id] = int(votes.argmax())
+            owned_nodes[owner[node_id]].append(node_id)
+
+        # Partition p needs its experts, every expert of the nodes it owns, and every
+        # expert sharing a group with one of its experts: all edges of its nodes
+        requests = []
+        for p in range(count):
+            needed = {i for i, q in enumerate(expert_owner) if q == p}
+            for node_id in owned_nodes[p]:
+                needed.update(members[node_id])
+            for i in [i for i in needed if expert_owner[i] == p]:
+                for group in expert_groups(experts[i]):
+                    needed.update(group_members[group])
+            rows = [experts[i] for i in sorted(needed)]
+            node_ids = {f"{EXPERT_NODE_PREFIX}{e['id']}" for e in rows}
+            node_ids.update(node_id for i in needed for node_id, *_ in links[i])
+            requests.append((p, rows, {nid: owner[nid] for nid in node_ids}))
+        summaries = self._call_each("load", requests)
+
+        # Boundary slots: each partition's exported nodes, concatenated in partition order
+        exports: list[list[str]] = [[] for _ in range(count)]
+        for summary in summaries:
+            for nid, q in zip(summary["ghosts"], summary["ghost_owners"], strict=True):
+                exports[q].append(nid)
+        exports = [sorted(set(ids)) for ids in exports]
+        slot = {nid: k for k, nid in enumerate(nid for ids in exports for nid in ids)}
+        self._call_each("set_boundary", [(ids,) for ids in exports])
+
+        self._owner = owner
+        self._ghost_slots = [
+            np.array([slot[nid] for nid in s["ghosts"]], dtype=np.int64) for s in summaries
+        ]
+        self._num_nodes = sum(s["nodes"] for s in summaries)
+        self._boundary_size = len(slot)
+        self._personalized.clear()
+        logger.info(
+            "Partitioned graph: {} nodes in {} partitions (nodes {}), {} boundary nodes",
+            self._num_nodes,
+            count,
+            [s["nodes"] for s in summaries],
+            self._boundary_size,
+        )
+
+    # ---- PageRank ----
+
+    def _pagerank(self, key: str, filters: dict[str, Any] | None) -> float:
+        """
+        Power iteration across the partitions, stored there under `key` (the same
+        steps and stopping rule as pagerank.pagerank). Returns the top expert score;
+        0 when `filters` seed nothing.
+        """
+        seeds = sum(self._call_each("seed_count", [(filters,)] * self.num_partitions))
+        if filters is not None and not seeds:
+            return 0.0
+        n = self._num_nodes
+        replies = self._call_each("init_pagerank", [(seeds, n)] * self.num_partitions)
+        for _ in range(DEFAULT_MAX_ITER):
+            admission.checkpoint()
+            boundary = np.concatenate([np.asarray(r[-2], dtype=np.float64) for r in replies])
+            leaked = DEFAULT_ALPHA * sum(r[-1] for r in replies) + (1.0 - DEFAULT_ALPHA)
+            replies = self._call_each(
+                "step", [(boundary[slots], leaked) for slots in self._ghost_slots]
+            )
+            if sum(r[0] for r in replies) < n * DEFAULT_TOL:
+                break
+        tops = self._call_each("finish_pagerank", [(key,)] * self.num_partitions)
+        if key == GLOBAL_KEY:
+            self._top_centrality = max((t[0] for t in tops), default=0.0) or 1.0
+        return max((t[1] for t in tops), default=0.0)
+
+    def centrality(self) -> dict[str, float]:
+        """Global PageRank of every node, by node id."""
+        with self._lock:
+            scores: dict[str, float] = {}
+            for part in self._call_each("scores", [(GLOBAL_KEY, None)] * self.num_partitions):
+                scores.update(part)
+            return scores
+
+    def network_influence(
+        self, expert_ids: list[str], filters: dict[str, Any] | None = None
+    ) -> dict[str, float]:
+        """
+        Influence of each expert (0–1, as GraphEngine.get_network_influence; 0 if
+        unknown): global PageRank, or personalized to a project's `filters` when they
+        seed any industry or skill node (see GraphEngine.project_influence).
+        """
+        with self._lock:
+            key, top = GLOBAL_KEY, self._top_centrality
+            if filters is not None:
+                filters_key = json.dumps(filters, sort_keys=True, default=str)
+                if filters_key not in self._personalized:
+                    self._personalized[filters_key] = self._pagerank(filters_key, filters)
+                    while len(self._personalized) > PARTITION_PPR_CACHE_ENTRIES:
+                        self._personalized.popitem(last=False)
+                if self._personalized[filters_key] > 0:
+                    key, top = filters_key, self._personalized[filters_key]
+            node_ids = [f"{EXPERT_NODE_PREFIX}{eid}" for eid in expert_ids]
+            scores: dict[str, float] = {}
+            for part in self._route("scores", node_ids, key):
+                scores.update(part)
+            return {
+                eid: round(scores[nid] / top, 4) if nid in scores else 0.0
+                for eid, nid in zip(expert_ids, node_ids, strict=True)
+            }
+
+    # ---- subgraph queries ----
+
+    def ego_network(
+        self,
+        node_id: str,
+        hops: int,
+        max_nodes: int = DEFAULT_MAX_NODES,
+        max_edges: int = DEFAULT_MAX_EDGES,
+    ) -> dict[str, Any] | None:
+        """
+        k-hop neighbourhood of a node, as GraphIndex.ego_network (without layout or
+        communities); None if unknown. Each ring is one round of neighbour lookups.
+        """
+        with self._lock:
+            if node_id not in self._owner:
+                return None
+            selected, visited = [node_id], {node_id}
+            frontier, truncated = [node_id], False
+            for _ in range(hops):
+                ring = sorted({n for part in self._route("neighbours", frontier) for n in part})
+                ring = [n for n in ring if n not in visited]
+                if not ring:
+                    break
+                if len(selected) + len(ring) > max_nodes:
+                    scores: dict[str, float] = {}
+                    for part in self._route("scores", ring, GLOBAL_KEY):
+                        scores.update(part)
+                    ring = sorted(ring, key=lambda n: -scores[n])[: max_nodes - len(selected)]
+                    truncated = True
+                visited.update(ring)
+                selected += ring
+                frontier = ring
+                if truncated:
+                    break
+
+            nodes: dict[str, dict[str, Any]] = {}
+            centrality: dict[str, float] = {}
+            links: list[dict[str, Any]] = []
+            owners = sorted({self._owner[n] for n in selected})
+            for part in self._call("subgraph", dict.fromkeys(owners, (selected,))):
+                nodes.update((n["id"], n) for n in part["nodes"])
+                centrality.update(part["centrality"])
+                links += part["links"]
+            if len(links) > max_edges:
+                links.sort(key=lambda k: -(centrality[k["source"]] + centrality[k["target"]]))
+                links = links[:max_edges]
+                truncated = True
+            return {"nodes": [nodes[n] for n in selected], "links": links, "truncated": truncated}
+
+    # ---- lifecycle ----
+
+    def close(self) -> None:
+        """Disconnect; partitions started by spawn_local() are also shut down."""
+        with self._lock:
+            for conn in self._conns:
+                try:
+                    if self._processes:
+                        conn.send(("shutdown", ()))
+                        if conn.poll(5):
+                            conn.recv()
+                    conn.close()
+                except (OSError, EOFError):
+                    pass
+            for process in self._processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            self._conns, self._processes = [], []
+
+
+def spawn_local(count: int) -> PartitionedGraph:
+    """A coordinator for `count` partition processes on this machine (empty until build())."""
+    authkey = os.urandom(32)
+    # spawn, not fork, as in process_pool.py
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    addresses = []
+    try:
+        for p in range(count):
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_serve_local,
+                args=(sender, authkey),
+                name=f"graph-partition-{p}",
+                daemon=True,
+            )
+            process.start()
+            processes.append(process)
+            sender.close()
+            if not receiver.poll(PARTITION_TIMEOUT_SECONDS):
+                raise PartitionError(f"Partition {p} did not start")
+            addresses.append(receiver.recv())
+        conns = [Client(address, authkey=authkey) for address in addresses]
+    except BaseException:
+        for process in processes:
+            process.terminate()
+        raise
+    return PartitionedGraph(conns, processes)
+
+
+# The service's coordinator (ML_GRAPH_PARTITIONS) and when its graph was built
+_graph: PartitionedGraph | None = None
+_graph_built_at = 0.0
+_graph_lock = threading.Lock()
+_graph_flight: SingleFlight[PartitionedGraph] = SingleFlight("graph_partitions")
+
+
+def enabled() -> bool:
+    return bool(GRAPH_PARTITIONS)
+
+
+def parse_partitions(spec: str) -> int | list[tuple[str, int]]:
+    """ML_GRAPH_PARTITIONS as a partition count or a list of (host, port) addresses."""
+    if spec.isdigit():
+        if int(spec) < 1:
+            raise ValueError("ML_GRAPH_PARTITIONS must be at least 1")
+        return int(spec)
+    addresses = []
+    for item in spec.split(","):
+        host, _, port = item.strip().rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"ML_GRAPH_PARTITIONS: expected host:port, got {item.strip()!r}")
+        addresses.append((host, int(port)))
+    return addresses
+
+
+def get_partitioned_graph() -> PartitionedGraph:
+    """
+    The service's partitioned graph, started on first use and rebuilt from the database
+    when a GraphEngine snapshot would be (GRAPH_SNAPSHOT_TTL_SECONDS, or a change to
+    experts). Concurrent callers share one build; a failed build discards the coordinator.
+    """
+    graph = _graph
+    if graph is not None and snapshot_fresh(_graph_built_at):
+        return graph
+    return _graph_flight.do("graph", _refresh_graph)
+
+
+def _refresh_graph() -> PartitionedGraph:
+    global _graph, _graph_built_at
+    with _graph_lock:
+        if _graph is not None and snapshot_fresh(_graph_built_at):
+            return _graph
+        partitions = parse_partitions(GRAPH_PARTITIONS)
+        try:
+            if _graph is None:
+                if isinstance(partitions, int):
+                    _graph = spawn_local(partitions)
+                else:
+                    _graph = PartitionedGraph.connect(partitions)
+            built_at = time.time()
+            _graph.build(fetch_experts_for_graph(limit=PARTITION_GRAPH_LIMIT))
+            _graph_built_at = built_at
+        except BaseException:
+            if _graph is not None:
+                _graph.close()
+            _graph = None
+            raise
+        return _graph
+
+
+def query_partitioned(query: Callable[[PartitionedGraph], T]) -> T:
+    """query(graph) on the service's partitioned graph; discarded if a partition fails."""
+    graph = get_partitioned_graph()
+    try:
+        return query(graph)
+    except PartitionError:
+        global _graph
+        with _graph_lock:
+            if _graph is graph:
+                _graph = None
+        graph.close()
+        raise
+
+
+def shutdown() -> None:
+    """Close the service's coordinator, shutting down partitions it spawned."""
+    global _graph
+    with _graph_lock:
+        graph, _graph = _graph, None
+    if graph is not None:
+        graph.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve one knowledge-graph partition.")
+    parser.add_argument("--listen", default="127.0.0.1:7400", help="host:port to listen on")
+    args = parser.parse_args(argv)
+    if not PARTITION_AUTHKEY:
+        parser.error("ML_GRAPH_PARTITION_AUTHKEY must be set")
+    host, port = args.listen.rsplit(":", 1)
+    with Listener((host, int(port)), authkey=PARTITION_AUTHKEY) as listener:
+        logger.info("Graph partition listening on {}", listener.address)
+        serve(listener)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+"""
+Bounded neighbourhood queries over a knowledge-graph snapshot.
+k-hop ego networks, shortest warm-intro paths and subgraphs induced by an industry or a
+Louvain community, each capped by node and edge budgets so the frontend can fetch just
+the part of the graph it displays. Queries run on CSR adjacency arrays built once per
+snapshot from GraphEngine.to_arrays(), so shared-memory snapshots answer them without
+rebuilding the rx graph. Output uses the react-force-graph format of /graph/visualize.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from graph_engine import (
+    NODE_GROUP_CODES,
+    NODE_GROUP_COMPANY,
+    NODE_GROUP_EXPERT,
+    NODE_GROUP_INDUSTRY,
+    NODE_GROUP_SKILL,
+    link_type,
+    primary_edge_type,
+)
+from graph_layout import coordinates
+
+GROUP_EXPERT = NODE_GROUP_CODES.index(NODE_GROUP_EXPERT)
+GROUP_COMPANY = NODE_GROUP_CODES.index(NODE_GROUP_COMPANY)
+GROUP_SKILL = NODE_GROUP_CODES.index(NODE_GROUP_SKILL)
+GROUP_INDUSTRY = NODE_GROUP_CODES.index(NODE_GROUP_INDUSTRY)
+
+DEFAULT_MAX_NODES = 200
+DEFAULT_MAX_EDGES = 2000
+DEFAULT_MAX_HOPS = 6
+
+# Level-of-detail view: one super-node per community, expanded one community at a time.
+COMMUNITY_NODE_PREFIX = "community_"
+NODE_GROUP_COMMUNITY = "community"
+LINK_AGGREGATE = "AGGREGATE"
+# Expansions kept per snapshot, keyed by (community, budgets)
+EXPANSION_CACHE_MAX_ENTRIES = 128
+
+
+def _gather(ptr: np.ndarray, values: np.ndarray, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """CSR rows `rows` concatenated: (values, position of each value's row within `rows`)."""
+    starts, ends = ptr[rows], ptr[rows + 1]
+    counts = ends - starts
+    if counts.sum() == 0:
+        return values[:0], np.zeros(0, dtype=np.int64)
+    owner = np.repeat(np.arange(len(rows)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return values[np.repeat(starts, counts) + offsets], owner
+
+
+def _xyz(position: np.ndarray) -> dict[str, float]:
+    x, y, z = coordinates(np.asarray(position)[None, :])[0]
+    return {"x": x, "y": y, "z": z}
+
+
+@dataclass(frozen=True)
+class GraphIndex:
+    node_id: list[str]
+    position: dict[str, int]  # node id -> index
+    label: list[str]
+    group: np.ndarray  # uint8 codes into NODE_GROUP_CODES
+    centrality: np.ndarray
+    community: np.ndarray  # int32, -1 when unassigned
+    # Edges grouped by their stored source (for link output)
+    out_ptr: np.ndarray
+    out_dst: np.ndarray
+    out_weight: np.ndarray
+    out_mask: np.ndarray  # EDGE_TYPE_BITS
+    # Undirected, de-duplicated neighbours (for traversal)
+    nbr_ptr: np.ndarray
+    nbr: np.ndarray
+    # (n, 3) precomputed positions (graph_layout), or None
+    layout: np.ndarray | None = field(default=None, compare=False, repr=False)
+    # Level-of-detail payloads for this snapshot (read-only once cached)
+    _overview: list[dict[str, Any]] = field(default_factory=list, compare=False, repr=False)
+    _expansions: OrderedDict[tuple[int, int, int], dict[str, Any]] = field(
+        default_factory=OrderedDict, compare=False, repr=False
+    )
+    _lod_lock: threading.Lock = field(default_factory=threading.Lock, compare=False, repr=False)
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray]) -> "GraphIndex":
+        node_id = arrays["node_id"].tolist()
+        n = len(node_id)
+        src = np.asarray(arrays["edge_src"], dtype=np.int64)
+        dst = np.asarray(arrays["edge_dst"], dtype=np.int64)
+        order = np.argsort(src, kind="stable")
+        out_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=out_ptr[1:])
+
+        # Undirected pairs as sorted (a * n + b) keys: 1-D unique is much faster than axis=0
+        keys = np.unique(np.concatenate([src * n + dst, dst * n + src]))
+        nbr_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // max(n, 1), minlength=n), out=nbr_ptr[1:])
+        return cls(
+            node_id=node_id,
+            position={nid: i for i, nid in enumerate(node_id)},
+            label=arrays["node_label"].tolist(),
+            group=np.asarray(arrays["node_group"]),
+            centrality=np.asarray(arrays["centrality"], dtype=np.float64),
+            community=np.asarray(arrays["community"]),
+            out_ptr=out_ptr,
+            out_dst=dst[order],
+            out_weight=np.asarray(arrays["edge_weight"])[order],
+            out_mask=np.asarray(arrays["edge_mask"])[order],
+            nbr_ptr=nbr_ptr,
+            nbr=keys % max(n, 1),
+            layout=arrays.get("layout"),
+        )
+
+    @property
+    def n(self) -> int:
+        return len(self.node_id)
+
+    # ---- selection helpers ----
+
+    def _by_centrality(self, nodes: np.ndarray) -> np.ndarray:
+        return nodes[np.argsort(-self.centrality[nodes], kind="stable")]
+
+    def _neighbours(self, nodes: np.ndarray) -> np.ndarray:
+        return np.unique(_gather(self.nbr_ptr, self.nbr, nodes)[0])
+
+    # ---- output ----
+
+    def _node(self, i: int) -> dict[str, Any]:
+        node = {
+            "id": self.node_id[i],
+            "label": self.label[i],
+            "group": NODE_GROUP_CODES[int(self.group[i])],
+            "val": max(1, int(self.centrality[i] * 50) + 1),
+            "community": int(self.community[i]),
+        }
+        if self.layout is not None:
+            node.update(_xyz(self.layout[i]))
+        return node
+
+    def _link(self, src: int, edge: int) -> dict[str, Any]:
+        return {
+            "source": self.node_id[src],
+            "target": self.node_id[int(self.out_dst[edge])],
+            "type": link_type(primary_edge_type(int(self.out_mask[edge]))),
+            "weight": int(self.out_weight[edge]),
+        }
+
+    def subgraph(
+        self, nodes: np.ndarray, max_edges: int, truncated: bool = False
+    ) -> dict[str, Any]:
+        """Nodes plus the edges among them; the strongest-connected edges fill the budget."""
+        nodes = np.asarray(nodes, dtype=np.int64)
+        inside = np.zeros(self.n, dtype=bool)
+        inside[nodes] = True
+        edge_idx, owner = _gather(self.out_ptr, np.arange(len(self.out_dst), dtype=np.int64), nodes)
+        src = nodes[owner]
+        keep = inside[self.out_dst[edge_idx]]
+        edge_idx, src = edge_idx[keep], src[keep]
+        if len(edge_idx) > max_edges:
+            weight = self.centrality[src] + self.centrality[self.out_dst[edge_idx]]
+            top = np.argsort(-weight, kind="stable")[:max_edges]
+            edge_idx, src = edge_idx[top], src[top]
+            truncated = True
+        return {
+            "nodes": [self._node(int(i)) for i in nodes],
+            "links": [
+                self._link(s, e) for s, e in zip(src.tolist(), edge_idx.tolist(), strict=True)
+            ],
+            "truncated": truncated,
+        }
+
+    # ---- queries ----
+
+    def ego_network(
+        self,
+        center: int,
+        hops: int,
+        max_nodes: int = DEFAULT_MAX_NODES,
+        max_edges: int = DEFAULT_MAX_EDGES,
+    ) -> dict[str, Any]:
+        """
+        Nodes within `hops` of `center`, breadth first. When a ring would overflow
+        `max_nodes`, its most central nodes fill the remaining budget and expansion stops.
+        """
+        visited = np.zeros(self.n, dtype=bool)
+        visited[center] = True
+        selected = [np.array([center], dtype=np.int64)]
+        frontier = selected[0]
+        size, truncated = 1, False
+        for _ in range(hops):
+            ring = self._neighbours(frontier)
+            ring = ring[~visited[ring]]
+            if len(ring) == 0:
+                break
+            if size + len(ring) > max_nodes:
+                ring = self._by_centrality(ring)[: max_nodes - size]
+                truncated = True
+            visited[ring] = True
+            selected.append(ring)
+            size += len(ring)
+            frontier = ring
+            if truncated:
+                break
+        return self.subgraph(np.concatenate(selected), max_edges, truncated)
+
+    def shortest_path(
+        self,
+        source: int,
+        target: int,
+        max_hops: int,
+        passable: np.ndarray | None = None,
+    ) -> list[int] | None:
+        """
+        Node indices of a shortest undirected path, or None beyond `max_hops`. With
+        `passable` (bool per node), other nodes may only appear as the target.
+        """
+        if source == target:
+            return [source]
+        parent = np.full(self.n, -1, dtype=np.int64)
+        parent[source] = source
+        frontier = np.array([source], dtype=np.int64)
+        for _ in range(max_hops):
+            reached, owner = _gather(self.nbr_ptr, self.nbr, frontier)
+            new = parent[reached] == -1
+            reached, owner = reached[new], owner[new]
+            # First discoverer wins for nodes reached from several frontier nodes
+            reached, first = np.unique(reached, return_index=True)
+            if len(reached) == 0:
+                return None
+            parent[reached] = frontier[owner[first]]
+            if parent[target] != -1:
+                path = [target]
+                while path[-1] != source:
+                    path.append(int(parent[path[-1]]))
+                return path[::-1]
+            frontier = reached if passable is None else reached[passable[reached]]
+        return None
+
+    def warm_intro_path(self, source: int, target: int, max_hops: int) -> list[int] | None:
+        """Shortest path through people and employers only (skills and industries are no intro)."""
+        passable = np.isin(self.group, (GROUP_EXPERT, GROUP_COMPANY))
+        return self.shortest_path(source, target, max_hops, passable)
+
+    def path_graph(self, path: list[int]) -> dict[str, Any]:
+        """A path as nodes in order plus one link per step (in the stored edge direction)."""
+        links = []
+        for a, b in zip(path, path[1:], strict=False):
+            src = a
+            hits = np.flatnonzero(self.out_dst[self.out_ptr[a] : self.out_ptr[a + 1]] == b)
+            if len(hits) == 0:
+                src = b
+                hits = np.flatnonzero(self.out_dst[self.out_ptr[b] : self.out_ptr[b + 1]] == a)
+            links.append(self._link(src, int(self.out_ptr[src] + hits[0])))
+        return {"nodes": [self._node(i) for i in path], "links": links, "hops": len(path) - 1}
+
+    def find(self, node_id: str, group: str | None = None) -> int | None:
+        """Index of a node id, else of the `group` node whose label matches case-insensitively."""
+        if node_id in self.position:
+            return self.position[node_id]
+        if group is None:
+            return None
+        code = NODE_GROUP_CODES.index(group)
+        wanted = node_id.strip().lower()
+        return next(
+            (
+                i
+                for i in np.flatnonzero(self.group == code).tolist()
+                if self.label[i].strip().lower() == wanted
+            ),
+            None,
+        )
+
+    def industry_nodes(self, industry: str) -> np.ndarray:
+        wanted = industry.strip().lower()
+        return np.array(
+            [
+                i
+                for i in np.flatnonzero(self.group == GROUP_INDUSTRY).tolist()
+                if self.label[i].strip().lower() == wanted
+            ],
+            dtype=np.int64,
+        )
+
+    def industry_subgraph(
+        self,
+        industry: str,
+        max_nodes: int = DEFAULT_MAX_NODES,
+        max_edges: int = DEFAULT_MAX_EDGES,
+    ) -> dict[str, Any] | None:
+        """
+        The industry node, its experts and their companies and skills. Over budget,
+        experts are kept before their neighbours, most central first in each tier.
+        """
+        hubs = self.industry_nodes(industry)
+        if len(hubs) == 0:
+            return None
+        members = self._neighbours(hubs)
+        experts = self._by_centrality(members[self.group[members] == GROUP_EXPERT])
+        around = self._neighbours(experts) if len(experts) else experts
+        taken = np.zeros(self.n, dtype=bool)
+        taken[hubs] = True
+        taken[experts] = True
+        around = around[~taken[around] & np.isin(self.group[around], (GROUP_COMPANY, GROUP_SKILL))]
+        others = self._by_centrality(around)
+        ordered = np.concatenate([hubs, experts, others])
+        return self.subgraph(ordered[:max_nodes], max_edges, len(ordered) > max_nodes)
+
+    def community_subgraph(
+        self,
+        community: int,
+        max_nodes: int = DEFAULT_MAX_NODES,
+        max_edges: int = DEFAULT_MAX_EDGES,
+    ) -> dict[str, Any] | None:
+        """Members of a Louvain community, most central first when over budget."""
+        members = np.flatnonzero(self.community == community)
+        if len(members) == 0:
+            return None
+        ordered = self._by_centrality(members)
+        return self.subgraph(ordered[:max_nodes], max_edges, len(ordered) > max_nodes)
+
+    # ---- level of detail ----
+
+    def _undirected_pairs(self) -> tuple[np.ndarray, np.ndarray]:
+        """Each undirected edge once, as (a, b) with a < b."""
+        a = np.repeat(np.arange(self.n, dtype=np.int64), np.diff(self.nbr_ptr))
+        once = a < self.nbr
+        return a[once], self.nbr[once]
+
+    def community_overview(self) -> dict[str, Any]:
+        """
+        One super-node per community (`size` members, `groups` counts per node group,
+        `internal_edges`; labelled after its most central industry, else most central
+        node; placed at its members' layout centroid) and one AGGREGATE link per pair of
+        communities, `weight` = edges between them. Computed once per snapshot.
+        """
+        with self._lod_lock:
+            if not self._overview:
+                self._overview.append(self._build_overview())
+            return self._overview[0]
+
+    def _build_overview(self) -> dict[str, Any]:
+        cid = np.asarray(self.community, dtype=np.int64)
+        assigned = np.flatnonzero(cid >= 0)
+        k = int(cid.max(initial=-1)) + 1
+        sizes = np.bincount(cid[assigned], minlength=k)
+        groups = np.bincount(
+            cid[assigned] * len(NODE_GROUP_CODES) + self.group[assigned].astype(np.int64),
+            minlength=k * len(NODE_GROUP_CODES),
+        ).reshape(k, len(NODE_GROUP_CODES))
+        # Representative per community: industries first, then by centrality
+        order = np.lexsort(
+            (-self.centrality[assigned], self.group[assigned] != GROUP_INDUSTRY, cid[assigned])
+        )
+        ranked = assigned[order]
+        first = np.unique(cid[ranked], return_index=True)[1]
+        representative = dict(zip(cid[ranked][first].tolist(), ranked[first].tolist(), strict=True))
+
+        a, b = self._undirected_pairs()
+        ca, cb = cid[a], cid[b]
+        both = (ca >= 0) & (cb >= 0)
+        ca, cb = ca[both], cb[both]
+        internal = np.bincount(ca[ca == cb], minlength=k)
+        crossing = ca != cb
+        lo = np.minimum(ca[crossing], cb[crossing])
+        hi = np.maximum(ca[crossing], cb[crossing])
+        pair_keys, weights = np.unique(lo * max(k, 1) + hi, return_counts=True)
+        centroids = None
+        if self.layout is not None:
+            totals = np.zeros((k, 3))
+            layout = np.asarray(self.layout, dtype=np.float64)
+            for axis in range(3):
+                totals[:, axis] = np.bincount(
+                    cid[assigned], weights=layout[assigned, axis], minlength=k
+                )
+            centroids = totals / np.maximum(sizes, 1)[:, None]
+
+        nodes = [
+            {
+                "id": f"{COMMUNITY_NODE_PREFIX}{c}",
+                "label": self.label[representative[c]],
+                "group": NODE_GROUP_COMMUNITY,
+                "val": int(sizes[c]),
+                "community": c,
+                "size": int(sizes[c]),
+                "groups": {
+                    name: int(count)
+                    for name, count in zip(NODE_GROUP_CODES, groups[c].tolist(), strict=True)
+                    if count
+                },
+                "internal_edges": int(internal[c]),
+                **({} if centroids is None else _xyz(centroids[c])),
+            }
+            for c in np.flatnonzero(sizes).tolist()
+        ]
+        links = [
+            {
+                "source": f"{COMMUNITY_NODE_PREFIX}{key // k}",
+                "target": f"{COMMUNITY_NODE_PREFIX}{key % k}",
+                "type": LINK_AGGREGATE,
+                "weight": int(w),
+            }
+            for key, w in zip(pair_keys.tolist(), weights.tolist(), strict=True)
+        ]
+        return {"nodes": nodes, "links": links, "level": "communities"}
+
+    def expand_community(
+        self,
+        community: int,
+        max_nodes: int = DEFAULT_MAX_NODES,
+        max_edges: int = DEFAULT_MAX_EDGES,
+    ) -> dict[str, Any] | None:
+        """
+        Members of one community (as community_subgraph) plus AGGREGATE links from each
+        member to the super-nodes of the other communities it touches, so a client can
+        swap the super-node for this payload and keep the rest of the overview.
+        Internal edges fill `max_edges` first. Cached per (community, budgets).
+        """
+        key = (community, max_nodes, max_edges)
+        with self._lod_lock:
+            cached = self._expansions.get(key)
+            if cached is not None:
+                self._expansions.move_to_end(key)
+                return cached
+        out = self.community_subgraph(community, max_nodes, max_edges)
+        if out is None:
+            return None
+        members = np.array([self.position[n["id"]] for n in out["nodes"]], dtype=np.int64)
+        reached, owner = _gather(self.nbr_ptr, self.nbr, members)
+        other = np.asarray(self.community, dtype=np.int64)[reached]
+        outside = (other >= 0) & (other != community)
+        k = int(np.asarray(self.community).max(initial=-1)) + 1
+        boundary, weights = np.unique(
+            members[owner[outside]] * max(k, 1) + other[outside], return_counts=True
+        )
+        budget = max(0, max_edges - len(out["links"]))
+        if len(boundary) > budget:
+            top = np.argsort(-weights, kind="stable")[:budget]
+            boundary, weights = boundary[top], weights[top]
+            out["truncated"] = True
+        out["links"] += [
+            {
+                "source": self.node_id[node],
+                "target": f"{COMMUNITY_NODE_PREFIX}{c}",
+                "type": LINK_AGGREGATE,
+                "weight": int(w),
+            }
+            for node, c, w in zip(
+                (boundary // max(k, 1)).tolist(),
+                (boundary % max(k, 1)).tolist(),
+                weights.tolist(),
+                strict=True,
+            )
+        ]
+        out["community"] = community
+        with self._lod_lock:
+            self._expansions[key] = out
+            while len(self._expansions) > EXPANSION_CACHE_MAX_ENTRIES:
+                self._expansions.popitem(last=False)
+        return out
@@ -0,0 +1,281 @@
+"""
+Cache invalidation driven by database changes.
+Statement-level triggers on experts, expert_vectors, engagements and research_projects
+(prisma migration ml_change_notifications) log each write statement to ml_change_log,
+with the experts and projects it touched, and NOTIFY the "ml_changes" channel.
+ChangeListener reads the log when notified (LISTEN, or polling where LISTEN is
+unavailable, e.g. behind a PgBouncer pooler), and InvalidationBus coalesces the changes
+over a short debounce window into one Invalidation per window for the caches that
+subscribe: graph snapshots, rank sessions. Caches can then keep long TTLs, which only
+bound staleness if a change is missed.
+
+Log ids are assigned before commit, so a transaction that commits late shows up below
+ids already read. The listener therefore reads by writing transaction: every row from
+the oldest transaction still running at its previous read (the snapshot xmin) on,
+skipping the rows it has already published. A long-running transaction anywhere in the
+cluster holds that horizon back, and the rows since are read again each time.
+"""
+
+import os
+import select
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from loguru import logger
+
+import metrics
+from database import (
+    CHANGE_CHANNEL,
+    change_log_horizon,
+    fetch_changes_since,
+    open_listen_connection,
+    prune_change_log,
+)
+
+# listen (NOTIFY, with periodic catch-up from the log), poll (log only) or off
+INVALIDATION_MODE = (os.getenv("ML_INVALIDATION") or "listen").lower()
+INVALIDATION_DEBOUNCE_SECONDS = float(os.getenv("ML_INVALIDATION_DEBOUNCE_SECONDS") or 2)
+# Log polling interval in poll mode
+CHANGE_POLL_SECONDS = float(os.getenv("ML_CHANGE_POLL_SECONDS") or 5)
+# In listen mode, how often the log is read for notifications missed while disconnected
+CATCH_UP_SECONDS = 60.0
+# Changes listed per debounce window; beyond this a table counts as wholly changed
+MAX_CHANGES_PER_WINDOW = 10_000
+CHANGE_LOG_BATCH = 1000
+# Rows older than this are pruned from ml_change_log (at most hourly)
+CHANGE_LOG_RETENTION_SECONDS = 24 * 3600.0
+PRUNE_INTERVAL_SECONDS = 3600.0
+MAX_RECONNECT_SECONDS = 60.0
+
+TABLE_EXPERTS = "experts"
+TABLE_EXPERT_VECTORS = "expert_vectors"
+TABLE_ENGAGEMENTS = "engagements"
+TABLE_PROJECTS = "research_projects"
+OP_INSERT = "INSERT"
+
+
+@dataclass(frozen=True)
+class Change:
+    """A change to a table: its operation and the expert / project it touched."""
+
+    table: str
+    op: str
+    expert_id: str | None = None
+    project_id: str | None = None
+
+    @classmethod
+    def from_record(cls, record: dict[str, Any]) -> list["Change"]:
+        """
+        The changes in one fetch_changes_since() row (one write statement): one per expert
+        and per project it touched, or a single one naming neither.
+        """
+        table, op = str(record["table"]), str(record["op"]).upper()
+        changes = [cls(table, op, expert_id=e) for e in record.get("expert_ids") or []]
+        changes += [cls(table, op, project_id=p) for p in record.get("project_ids") or []]
+        return changes or [cls(table, op)]
+
+
+@dataclass(frozen=True)
+class Invalidation:
+    """Changes coalesced over one debounce window."""
+
+    changes: frozenset[Change]
+    # Tables with more than MAX_CHANGES_PER_WINDOW changes: treat them as wholly changed
+    truncated: frozenset[str]
+    # When the window's first change arrived; data read before then may be stale
+    changed_at: float
+
+    @property
+    def tables(self) -> frozenset[str]:
+        return frozenset(c.table for c in self.changes) | self.truncated
+
+    def touches(self, *tables: str) -> bool:
+        return not self.tables.isdisjoint(tables)
+
+    def inserted(self, *tables: str) -> bool:
+        """Rows were added to (or too many changes listed for) any of `tables`."""
+        return not self.truncated.isdisjoint(tables) or any(
+            c.op == OP_INSERT and c.table in tables for c in self.changes
+        )
+
+    def expert_ids(self, *tables: str) -> set[str]:
+        return {c.expert_id for c in self.changes if c.table in tables and c.expert_id}
+
+    def project_ids(self, *tables: str) -> set[str]:
+        return {c.project_id for c in self.changes if c.table in tables and c.project_id}
+
+
+Handler = Callable[[Invalidation], None]
+
+
+class InvalidationBus:
+    """
+    Collects changes and, DEBOUNCE seconds after the first one of a window, hands the
+    whole window to every subscriber as one Invalidation (on a timer thread). A burst
+    of writes therefore costs one invalidation, at most one window late.
+    """
+
+    def __init__(self, debounce_seconds: float = INVALIDATION_DEBOUNCE_SECONDS) -> None:
+        self.debounce_seconds = debounce_seconds
+        self._handlers: list[Handler] = []
+        self._changes: set[Change] = set()
+        self._truncated: set[str] = set()
+        self._first_at: float | None = None
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, handler: Handler) -> None:
+        """Call `handler(invalidation)` for every window (handlers must be thread-safe)."""
+        self._handlers.append(handler)
+
+    def publish(self, changes: Iterable[Change]) -> None:
+        with self._lock:
+            for change in changes:
+                if self._first_at is None:
+                    self._first_at = time.time()
+                if change.table in self._truncated:
+                    continue
+                if len(self._changes) >= MAX_CHANGES_PER_WINDOW:
+                    self._truncated.add(change.table)
+                    continue
+                self._changes.add(change)
+            if self._first_at is not None and self._timer is None:
+                self._timer = threading.Timer(self.debounce_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> Invalidation | None:
+        """Deliver the pending window now; returns it (None when nothing was pending)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._first_at is None:
+                return None
+            event = Invalidation(
+                changes=frozenset(self._changes),
+                truncated=frozenset(self._truncated),
+                changed_at=self._first_at,
+            )
+            self._changes, self._truncated, self._first_at = set(), set(), None
+        metrics.observe_invalidation(event.tables)
+        for handler in self._handlers:
+            try:
+                handler(event)
+            except Exception as exc:
+                logger.warning("Invalidation handler {} failed: {}", handler.__name__, exc)
+        return event
+
+
+class ChangeListener:
+    """
+    Background thread feeding database changes into a bus. In listen mode it reads
+    ml_change_log when notified, on (re)connect and every CATCH_UP_SECONDS, so changes
+    missed while disconnected still arrive; in poll mode it reads the log on a timer. It
+    reconnects with backoff, and stops if the change log does not exist.
+    """
+
+    def __init__(self, bus: InvalidationBus, mode: str = INVALIDATION_MODE) -> None:
+        self.bus = bus
+        self.mode = mode
+        # Rows of transactions from here on may still appear (see fetch_changes_since)
+        self._horizon: int | None = None
+        # txid of each row published from at or past the horizon, so none is sent twice
+        self._seen: dict[int, int] = {}
+        self._last_prune = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.mode == "off" or self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="change-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        import psycopg2.errors
+
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                if self.mode == "poll":
+                    self._poll()
+                else:
+                    self._listen()
+                return
+            except psycopg2.errors.UndefinedTable:
+                logger.warning("ml_change_log missing (migration not applied); caches use TTLs")
+                return
+            except Exception as exc:
+                logger.warning("Change listener error: {}; retrying in {}s", exc, backoff)
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, MAX_RECONNECT_SECONDS)
+
+    def _listen(self) -> None:
+        conn = open_listen_connection(CHANGE_CHANNEL)
+        try:
+            self.catch_up()
+            logger.info("Listening for database changes on {}", CHANGE_CHANNEL)
+            caught_up = time.monotonic()
+            while not self._stop.is_set():
+                if select.select([conn], [], [], 1.0)[0]:
+                    conn.poll()
+                    # Notifications only announce log rows; one read covers them all
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        self.catch_up()
+                        caught_up = time.monotonic()
+                if time.monotonic() - caught_up >= CATCH_UP_SECONDS:
+                    self.catch_up()
+                    caught_up = time.monotonic()
+        finally:
+            conn.close()
+
+    def _poll(self) -> None:
+        while not self._stop.is_set():
+            self.catch_up()
+            self._stop.wait(CHANGE_POLL_SECONDS)
+
+    def catch_up(self) -> None:
+        """Publish every logged change not published yet (none from before the first call)."""
+        if self._horizon is None:
+            self._horizon = change_log_horizon()
+        after_id = 0
+        next_horizon: int | None = None
+        while True:
+            records, horizon = fetch_changes_since(self._horizon, after_id, CHANGE_LOG_BATCH)
+            if next_horizon is None:
+                next_horizon = horizon  # the earliest of the pages' horizons
+            self._receive([r for r in records if r["id"] not in self._seen])
+            if len(records) < CHANGE_LOG_BATCH:
+                break
+            after_id = records[-1]["id"]
+        self._horizon = max(self._horizon, next_horizon)
+        self._seen = {i: txid for i, txid in self._seen.items() if txid >= self._horizon}
+        if time.time() - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+            self._last_prune = time.time()
+            prune_change_log(CHANGE_LOG_RETENTION_SECONDS)
+
+    def _receive(self, records: list[dict[str, Any]]) -> None:
+        if not records:
+            return
+        for record in records:
+            self._seen[int(record["id"])] = int(record["txid"])
+        self.bus.publish(c for r in records for c in Change.from_record(r))
+
+
+bus = InvalidationBus()
+listener = ChangeListener(bus)
@@ -0,0 +1,306 @@
+"""
+In-process background jobs for heavy maintenance work (model training, graph rebuilds).
+Each job type has its own queue and worker thread, so at most one job per type runs at
+a time; an flock per type extends that guarantee across uvicorn workers. Job state is
+persisted as JSON under ML_JOBS_DIR so status survives restarts and is visible from
+any worker; finished jobs are pruned by age and count as new ones are submitted.
+"""
+
+import fcntl
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+import metrics
+
+JOBS_DIR = Path(os.getenv("ML_JOBS_DIR") or Path(__file__).resolve().parent / "models" / "jobs")
+# Finished jobs are kept this long, and at most this many of them (newest first)
+JOB_RETENTION_SECONDS = float(os.getenv("ML_JOB_RETENTION_SECONDS") or 7 * 24 * 3600)
+JOB_RETENTION_COUNT = int(os.getenv("ML_JOB_RETENTION_COUNT") or 200)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+
+def _process_start(pid: int) -> str | None:
+    """
+    Kernel boot id and start time of process `pid`, or None where /proc is unavailable.
+    A restarted container hands out the same small pids again, but not the same start.
+    """
+    try:
+        boot_id = Path("/proc/sys/kernel/random/boot_id").read_text().strip()
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    # starttime is field 22; fields 3 onwards follow the parenthesized command name
+    return f"{boot_id}:{stat.rsplit(')', 1)[1].split()[19]}"
+
+
+PROCESS_START = _process_start(os.getpid())
+
+ProgressFn = Callable[[float, str], None]
+JobFn = Callable[[dict[str, Any], ProgressFn], dict[str, Any]]
+
+
+@dataclass
+class Job:
+    id: str
+    type: str
+    params: dict[str, Any]
+    status: str = STATUS_QUEUED
+    progress: float = 0.0
+    message: str = ""
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    worker_pid: int = field(default_factory=os.getpid)
+    # Tells the worker apart from a later process given the same pid (see _process_start)
+    worker_start: str | None = field(default_factory=lambda: PROCESS_START)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class JobRunner:
+    """Registry of job types, each served by one worker thread draining its own queue."""
+
+    def __init__(self, jobs_dir: Path = JOBS_DIR) -> None:
+        self.jobs_dir = jobs_dir
+        self._handlers: dict[str, JobFn] = {}
+        self._queues: dict[str, queue.Queue[str]] = {}
+        self._workers: dict[str, threading.Thread] = {}
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._recovered = False
+
+    def register(self, job_type: str, fn: JobFn) -> None:
+        self._handlers[job_type] = fn
+
+    @property
+    def job_types(self) -> list[str]:
+        return list(self._handlers)
+
+    def submit(self, job_type: str, params: dict[str, Any] | None = None) -> Job:
+        """
+        Queue a job and return it immediately. An identical job (same type and params)
+        that is still queued or running is returned instead of queueing a duplicate.
+        """
+        if job_type not in self._handlers:
+            raise KeyError(f"Unknown job type: {job_type}")
+        params = params or {}
+        with self._lock:
+            self._recover()
+            for job in self._jobs.values():
+                if job.type == job_type and job.params == params and job.status in ACTIVE_STATUSES:
+                    return job
+            job = Job(id=uuid.uuid4().hex, type=job_type, params=params)
+            self._jobs[job.id] = job
+            self._persist(job)
+            self._queue_for(job_type).put(job.id)
+            self._prune()
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """Job by id: from memory, else from disk (jobs submitted by other workers)."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        return self._load(self._path(job_id))
+
+    def recent(self, job_type: str | None = None, limit: int = 20) -> list[Job]:
+        """Most recent jobs first, optionally of one type (includes other workers' jobs)."""
+        jobs: dict[str, Job] = {}
+        if self.jobs_dir.exists():
+            for path in self.jobs_dir.glob("*.json"):
+                job = self._load(path)
+                if job is not None:
+                    jobs[job.id] = job
+        jobs.update(self._jobs)
+        selected = [j for j in jobs.values() if job_type is None or j.type == job_type]
+        return sorted(selected, key=lambda j: j.created_at, reverse=True)[:limit]
+
+    def active_count(self) -> int:
+        return sum(1 for j in self._jobs.values() if j.status in ACTIVE_STATUSES)
+
+    def wait(self, job_id: str, timeout: float = 30.0) -> Job | None:
+        """Block until the job finishes or `timeout` elapses (tests and CLI use)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = self.get(job_id)
+            if job is None or job.status not in ACTIVE_STATUSES:
+                return job
+            time.sleep(0.01)
+        return self.get(job_id)
+
+    # ---- internals ----
+
+    def _queue_for(self, job_type: str) -> "queue.Queue[str]":
+        q = self._queues.get(job_type)
+        if q is None:
+            q = queue.Queue()
+            self._queues[job_type] = q
+            worker = threading.Thread(
+                target=self._work, args=(job_type, q), name=f"job-{job_type}", daemon=True
+            )
+            self._workers[job_type] = worker
+            worker.start()
+        return q
+
+    def _work(self, job_type: str, q: "queue.Queue[str]") -> None:
+        while True:
+            job = self._jobs.get(q.get())
+            if job is None:
+                continue
+            # Nothing may end this thread, or later jobs of the type would never run
+            try:
+                with self._type_lock(job_type):
+                    self._run(job)
+            except Exception as exc:
+                logger.exception("Job {} ({}) could not run", job.id, job.type)
+                job.status = STATUS_FAILED
+                job.error = str(exc) or type(exc).__name__
+                job.finished_at = time.time()
+                self._save(job)
+
+    def _run(self, job: Job) -> None:
+        handler = self._handlers[job.type]
+
+        def progress(fraction: float, message: str = "") -> None:
+            job.progress = round(max(0.0, min(1.0, fraction)), 3)
+            job.message = message
+            self._save(job)
+
+        job.status = STATUS_RUNNING
+        job.started_at = time.time()
+        self._save(job)
+        logger.info("Job {} ({}) started", job.id, job.type)
+        try:
+            job.result = handler(job.params, progress)
+            job.status = STATUS_SUCCEEDED
+            job.progress = 1.0
+        except Exception as exc:
+            job.status = STATUS_FAILED
+            job.error = str(exc) or type(exc).__name__
+            logger.exception("Job {} ({}) failed", job.id, job.type)
+        job.finished_at = time.time()
+        self._save(job)
+        logger.info(
+            "Job {} ({}) {} in {:.1f}s",
+            job.id,
+            job.type,
+            job.status,
+            job.finished_at - job.started_at,
+        )
+
+    @contextmanager
+    def _type_lock(self, job_type: str) -> Generator[None, None, None]:
+        """flock per job type so a second uvicorn worker cannot run the same type concurrently."""
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.jobs_dir / f".lock-{job_type}", "a+") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _path(self, job_id: str) -> Path:
+        safe = "".join(c for c in job_id if c.isalnum())
+        return self.jobs_dir / f"{safe}.json"
+
+    def _persist(self, job: Job) -> None:
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(job.id)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(job.to_dict(), f, default=str)
+        os.replace(tmp, path)
+
+    def _save(self, job: Job) -> None:
+        """_persist() for worker threads: a failed write (disk full, permissions) is logged."""
+        try:
+            self._persist(job)
+        except OSError:
+            logger.exception("Could not save the state of job {} ({})", job.id, job.type)
+
+    def _load(self, path: Path) -> Job | None:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            # Files written before worker_start was recorded cannot name their process
+            data.setdefault("worker_start", None)
+            return Job(**data)
+        except (FileNotFoundError, json.JSONDecodeError, TypeError, AttributeError):
+            return None
+
+    def _prune(self) -> None:
+        """
+        Delete finished jobs older than JOB_RETENTION_SECONDS or beyond the newest
+        JOB_RETENTION_COUNT, on disk (any worker's) and in memory. Active jobs are kept.
+        """
+        if not self.jobs_dir.exists():
+            return
+        finished: list[tuple[float, Path, str]] = []
+        for path in self.jobs_dir.glob("*.json"):
+            # This worker's jobs are current in memory before their file is rewritten
+            job = self._jobs.get(path.stem) or self._load(path)
+            if job is not None and job.status not in ACTIVE_STATUSES:
+                finished.append((job.finished_at or job.created_at, path, job.id))
+        finished.sort(reverse=True)
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for rank, (ended, path, job_id) in enumerate(finished):
+            if rank >= JOB_RETENTION_COUNT or ended < cutoff:
+                path.unlink(missing_ok=True)
+                self._jobs.pop(job_id, None)
+
+    def _recover(self) -> None:
+        """On first use, mark jobs left queued/running by a process that has exited as failed."""
+        if self._recovered:
+            return
+        self._recovered = True
+        if not self.jobs_dir.exists():
+            return
+        for path in self.jobs_dir.glob("*.json"):
+            job = self._load(path)
+            if job is None or job.status not in ACTIVE_STATUSES or _worker_alive(job):
+                continue
+            job.status = STATUS_FAILED
+            job.error = "Interrupted by service restart"
+            job.finished_at = time.time()
+            self._save(job)
+
+
+def _worker_alive(job: Job) -> bool:
+    """Whether the process that ran `job` is still the one running under its pid."""
+    if not _pid_alive(job.worker_pid):
+        return False
+    start = _process_start(job.worker_pid)
+    return start is None or start == job.worker_start
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+runner = JobRunner()
+metrics.register_cache("active_jobs", runner.active_count)
@@ -0,0 +1,281 @@
+"""
+BM25 keyword index over experts, for hybrid (keyword plus vector) recall in /rank.
+Each expert is one document: name, industry, sub-industry, past employers and skills,
+read with fetch_experts_for_graph. Posting lists are CSR integer arrays: the documents
+containing term t are postings[indptr[t]:indptr[t + 1]], stored with their BM25 term
+weights, and the vocabulary is a sorted array searched by bisection. A query is a few
+vectorized slice-adds into one score array, so it stays in the low milliseconds over
+100k+ experts.
+
+The index is rebuilt once LEXICAL_INDEX_TTL_SECONDS have passed or the experts table
+changes. The previous index keeps serving while the rebuild runs in the background:
+callers re-read hits from the database, which drops experts hidden or changed since.
+With ML_SHARED_DIR set, all workers map one published copy.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+import invalidation
+import process_pool
+import shared_store
+from database import fetch_experts_for_graph
+from singleflight import SingleFlight
+
+LEXICAL_INDEX_LIMIT = int(os.getenv("LEXICAL_INDEX_LIMIT") or 200_000)
+LEXICAL_INDEX_TTL_SECONDS = float(os.getenv("LEXICAL_INDEX_TTL_SECONDS") or 300)
+# BM25 term-frequency saturation and document-length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Longer tokens are truncated, bounding the width of the vocabulary array
+MAX_TERM_LENGTH = 32
+STORE_NAME = "lexical-index"
+
+# Keeps "m&a", "c++" and "c#" whole; "ex-pfizer" becomes "ex", "pfizer"
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9&+#]*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by ex for former from in into is of on or the to with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in _TOKEN_RE.findall(text.lower())
+        if len(token) > 1 and token not in _STOPWORDS
+    ]
+
+
+def document_text(expert: dict[str, Any]) -> str:
+    """The searchable text of a fetch_experts_for_graph() row."""
+    parts = [expert.get("name"), expert.get("industry"), expert.get("sub_industry")]
+    parts += expert.get("past_employers") or []
+    parts += expert.get("skills") or []
+    return " ".join(str(p) for p in parts if p)
+
+
+def build_arrays(experts: list[dict[str, Any]]) -> dict[str, np.ndarray]:
+    """Index arrays for `experts` (see LexicalIndex); a process pool task for large pools."""
+    vocab: dict[str, int] = {}
+    term_col: list[int] = []
+    doc_col: list[int] = []
+    tf_col: list[int] = []
+    lengths = np.zeros(len(experts), dtype=np.float32)
+    for doc, expert in enumerate(experts):
+        if doc % 10_000 == 0:
+            process_pool.checkpoint()
+        counts = Counter(tokenize(document_text(expert)))
+        lengths[doc] = sum(counts.values())
+        for term, count in counts.items():
+            term_col.append(vocab.setdefault(term, len(vocab)))
+            doc_col.append(doc)
+            tf_col.append(count)
+
+    # Renumber terms in sorted order, then group postings by term (documents ascending)
+    terms = np.array(list(vocab), dtype=str)
+    order = np.argsort(terms, kind="stable")
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    term_ids = rank[np.asarray(term_col, dtype=np.int64)]
+    by_term = np.argsort(term_ids, kind="stable")
+    postings = np.asarray(doc_col, dtype=np.int32)[by_term]
+    tf = np.asarray(tf_col, dtype=np.float32)[by_term]
+    df = np.bincount(term_ids, minlength=len(terms))
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(df, out=indptr[1:])
+
+    n = len(experts)
+    avg_length = float(lengths.mean()) if n and lengths.any() else 1.0
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[postings] / avg_length)
+    return {
+        "expert_ids": np.array([str(e["id"]) for e in experts], dtype=str),
+        "terms": terms[order],
+        "indptr": indptr,
+        "postings": postings,
+        "weights": (tf * (BM25_K1 + 1) / (tf + norm)).astype(np.float32),
+        "idf": np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32),
+    }
+
+
+class LexicalIndex:
+    """
+    Read-only BM25 index over build_arrays() columns (possibly memory-mapped from the
+    shared store). weights holds each posting's saturated, length-normalized term
+    frequency, so a document's score is the sum of idf[t] * weight over query terms.
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray]) -> None:
+        self._arrays = arrays
+        self.expert_ids = arrays["expert_ids"]
+        self.terms = arrays["terms"]
+        self.indptr = arrays["indptr"]
+        self.postings = arrays["postings"]
+        self.weights = arrays["weights"]
+        self.idf = arrays["idf"]
+
+    @classmethod
+    def build(cls, experts: list[dict[str, Any]]) -> "LexicalIndex":
+        return cls(build_arrays(experts))
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        return dict(self._arrays)
+
+    def __len__(self) -> int:
+        return len(self.expert_ids)
+
+    def _term_ids(self, tokens: list[str]) -> list[int]:
+        unique = sorted(set(tokens))
+        if not unique or not len(self.terms):
+            return []
+        positions = np.searchsorted(self.terms, unique).tolist()
+        return [
+            p
+            for p, term in zip(positions, unique, strict=True)
+            if p < len(self.terms) and self.terms[p] == term
+        ]
+
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        """Up to `k` (expert id, BM25 score) pairs matching any query term, best first."""
+        term_ids = self._term_ids(tokenize(query))
+        if not term_ids or k <= 0:
+            return []
+        scores = np.zeros(len(self.expert_ids), dtype=np.float32)
+        for t in term_ids:
+            start, end = self.indptr[t], self.indptr[t + 1]
+            # A term lists each document once, so the fancy-indexed add is exact
+            scores[self.postings[start:end]] += self.idf[t] * self.weights[start:end]
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.lexsort((hits, -scores[hits]))]
+        return [(str(self.expert_ids[i]), float(scores[i])) for i in hits]
+
+
+def fuse_scores(
+    expert_ids: list[str],
+    similarity: dict[str, float],
+    lexical: dict[str, float],
+    weight: float,
+) -> dict[str, float]:
+    """
+    Hybrid score per expert: (1 - weight) * vector similarity + weight * BM25 score
+    relative to the best hit. Experts without a vector count as 0.5 similarity (as in
+    ExpertRanker), experts without a keyword hit as 0.
+    """
+    best = max(lexical.values(), default=0.0)
+    return {
+        eid: (1 - weight) * similarity.get(eid, 0.5)
+        + (weight * lexical.get(eid, 0.0) / best if best > 0 else 0.0)
+        for eid in expert_ids
+    }
+
+
+# (built_at: epoch seconds its data was read, shared version or None, index)
+_cached: tuple[float, str | None, LexicalIndex] | None = None
+_lock = threading.Lock()
+_flight: SingleFlight[LexicalIndex] = SingleFlight("lexical_index")
+_refreshing = False
+# Data read before this (epoch seconds) is stale; raised by invalidations
+_stale_before = 0.0
+
+
+def _fresh(built_at: float) -> bool:
+    return built_at >= _stale_before and time.time() - built_at < LEXICAL_INDEX_TTL_SECONDS
+
+
+def _build() -> LexicalIndex:
+    experts = fetch_experts_for_graph(limit=LEXICAL_INDEX_LIMIT)
+    return LexicalIndex(process_pool.run("lexical_index_build", build_arrays, experts))
+
+
+def _load_or_build() -> tuple[float, str | None, LexicalIndex]:
+    """Build the index or, with ML_SHARED_DIR set, attach to (or publish) the shared one."""
+    if not shared_store.enabled():
+        built_at = time.time()
+        return built_at, None, _build()
+    shared = shared_store.attach(STORE_NAME)
+    if shared is None or not _fresh(float(shared.meta.get("built_at", 0))):
+        with shared_store.publish_lock(STORE_NAME):
+            shared = shared_store.attach(STORE_NAME)
+            if shared is None or not _fresh(float(shared.meta.get("built_at", 0))):
+                built_at = time.time()
+                index = _build()
+                shared_store.publish(STORE_NAME, index.to_arrays(), {"built_at": built_at})
+                shared = shared_store.attach(STORE_NAME)
+                if shared is None:
+                    return built_at, None, index
+    return float(shared.meta["built_at"]), shared.version, LexicalIndex(shared.arrays)
+
+
+def _refresh() -> LexicalIndex:
+    global _cached
+    built_at, version, index = _load_or_build()
+    with _lock:
+        if _fresh(built_at):
+            _cached = (built_at, version, index)
+    return index
+
+
+def _refresh_in_background() -> None:
+    global _refreshing
+    with _lock:
+        if _refreshing:
+            return
+        _refreshing = True
+
+    def run() -> None:
+        global _refreshing
+        try:
+            _flight.do(STORE_NAME, _refresh)
+        except Exception as exc:
+            logger.warning("Lexical index refresh failed: {}", exc)
+        finally:
+            _refreshing = False
+
+    threading.Thread(target=run, name="lexical-index-refresh", daemon=True).start()
+
+
+def get_index() -> LexicalIndex:
+    """
+    The current index. The first call builds it (concurrent callers share the build);
+    after that a stale index is returned as is while a background rebuild replaces it.
+    """
+    cached = _cached
+    if cached is None:
+        return _flight.do(STORE_NAME, _refresh)
+    built_at, version, index = cached
+    current = version is None or shared_store.current_version(STORE_NAME) == version
+    if not (_fresh(built_at) and current):
+        _refresh_in_background()
+    return index
+
+
+def search(query: str, k: int) -> list[tuple[str, float]]:
+    return get_index().search(query, k)
+
+
+def invalidate_index(changed_at: float | None = None) -> None:
+    """Mark indexes built from data read before `changed_at` (default: now) stale."""
+    global _stale_before
+    with _lock:
+        _stale_before = max(_stale_before, time.time() if changed_at is None else changed_at)
+    if shared_store.enabled():
+        with shared_store.publish_lock(STORE_NAME):
+            meta = shared_store.current_meta(STORE_NAME)
+            if meta is not None and float(meta.get("built_at", 0)) < _stale_before:
+                shared_store.retire(STORE_NAME)
+
+
+def _on_invalidation(event: invalidation.Invalidation) -> None:
+    if event.touches(invalidation.TABLE_EXPERTS):
+        invalidate_index(event.changed_at)
+
+
+invalidation.bus.subscribe(_on_invalidation)
@@ -0,0 +1 @@
+"""End-to-end load tests against local stand-ins for Postgres and the embedding API."""
@@ -0,0 +1,136 @@
+"""
+In-memory stand-in for the database functions the load-tested endpoints call, seeded
+with benchmarks.synthetic data. Recall mirrors fetch_recall_pool: the same filters
+(case-insensitive substring, like ILIKE) and exact cosine ordering over the fake
+expert vectors, so the service does realistic work per request.
+"""
+
+from contextlib import ExitStack
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+
+from benchmarks.synthetic import make_embeddings, make_experts, make_project_filters
+from database import EXPERT_FILTER_KEYS
+
+# Module-level names each fake replaces (the modules import them from database)
+PATCH_TARGETS = {
+    "fetch_project": ("rank_sessions.fetch_project",),
+    "fetch_recall_pool": ("rank_sessions.fetch_recall_pool",),
+    "fetch_recall_experts": ("rank_sessions.fetch_recall_experts",),
+    "fetch_experts_for_graph": (
+        "graph_engine.fetch_experts_for_graph",
+        "lexical_index.fetch_experts_for_graph",
+    ),
+}
+RECALL_COLUMNS = (
+    "id",
+    "name",
+    "industry",
+    "sub_industry",
+    "country",
+    "region",
+    "seniority_score",
+    "years_experience",
+    "predicted_rate",
+)
+GRAPH_COLUMNS = ("id", "name", "industry", "sub_industry", "past_employers", "skills")
+
+
+def project_ids(n: int) -> list[str]:
+    """Ids of the n synthetic projects (the same in FakeDatabase and seed_postgres)."""
+    return [f"lt-proj{i:04d}" for i in range(n)]
+
+
+def make_projects(n: int, seed: int = 42) -> list[dict[str, Any]]:
+    """
+    Synthetic research_projects rows. Every other project filters on industry alone,
+    giving a mix of small and large recall pools.
+    """
+    projects = []
+    for i, project_id in enumerate(project_ids(n)):
+        filters = make_project_filters(seed + i)
+        if i % 2 == 0:
+            filters = {"industry": filters["industry"], "brief": filters["brief"]}
+        projects.append(
+            {
+                "id": project_id,
+                "creator_id": "lt-user",
+                "title": f"Load test project {i}",
+                "status": "RUNNING",
+                "filter_criteria": filters,
+                "deadline": None,
+            }
+        )
+    return projects
+
+
+class FakeDatabase:
+    def __init__(self, n_experts: int = 1000, n_projects: int = 20, seed: int = 42) -> None:
+        self.experts = make_experts(n_experts, seed=seed)
+        self.vectors = make_embeddings(n_experts, seed=seed)
+        self.projects = {p["id"]: p for p in make_projects(n_projects, seed=seed)}
+        self._rows = {e["id"]: r for r, e in enumerate(self.experts)}
+        self._columns = {
+            key: np.array([str(e[key]).lower() for e in self.experts]) for key in EXPERT_FILTER_KEYS
+        }
+
+    def install(self, stack: ExitStack) -> None:
+        """Patch the fakes in for as long as `stack` stays open."""
+        for name, targets in PATCH_TARGETS.items():
+            for target in targets:
+                stack.enter_context(patch(target, getattr(self, name)))
+
+    def fetch_project(self, project_id: str) -> dict[str, Any] | None:
+        return self.projects.get(project_id)
+
+    def fetch_recall_pool(
+        self,
+        filter_criteria: dict[str, Any] | None,
+        query_embedding: list[float] | None,
+        limit: int = 5000,
+    ) -> tuple[list[dict[str, Any]], dict[str, float]]:
+        filters = filter_criteria or {}
+        mask = np.ones(len(self.experts), dtype=bool)
+        for key in EXPERT_FILTER_KEYS:
+            if filters.get(key):
+                needle = str(filters[key]).lower()
+                mask &= np.char.find(self._columns[key], needle) >= 0
+        rows = np.flatnonzero(mask)
+        similarity: dict[str, float] = {}
+        if query_embedding is not None and len(rows):
+            # Unit vectors: the dot product is 1 - cosine distance
+            sims = self.vectors[rows] @ np.asarray(query_embedding, dtype=np.float32)
+            order = np.argsort(-sims, kind="stable")[:limit]
+            rows = rows[order]
+            similarity = {
+                self.experts[r]["id"]: float(s) for r, s in zip(rows, sims[order], strict=True)
+            }
+        pool = [{k: self.experts[r][k] for k in RECALL_COLUMNS} for r in rows[:limit]]
+        return pool, similarity
+
+    def fetch_recall_experts(
+        self,
+        expert_ids: list[str],
+        filter_criteria: dict[str, Any] | None,
+        query_embedding: list[float] | None,
+    ) -> tuple[list[dict[str, Any]], dict[str, float]]:
+        filters = filter_criteria or {}
+        rows = [
+            r
+            for r in (self._rows[eid] for eid in expert_ids if eid in self._rows)
+            if all(
+                str(filters[key]).lower() in self._columns[key][r]
+                for key in EXPERT_FILTER_KEYS
+                if filters.get(key)
+            )
+        ]
+        similarity: dict[str, float] = {}
+        if query_embedding is not None and rows:
+            sims = self.vectors[rows] @ np.asarray(query_embedding, dtype=np.float32)
+            similarity = {self.experts[r]["id"]: float(s) for r, s in zip(rows, sims, strict=True)}
+        return [{k: self.experts[r][k] for k in RECALL_COLUMNS} for r in rows], similarity
+
+    def fetch_experts_for_graph(self, limit: int = 500) -> list[dict[str, Any]]:
+        return [{k: e[k] for k in GRAPH_COLUMNS} for e in self.experts[:limit]]
@@ -0,0 +1,181 @@
+"""
+OpenAI-compatible embedding server for load tests: POST /v1/embeddings answers with
+deterministic unit vectors (seeded by the text) after a configurable delay, stalls and
+fails configurable shares of requests. Point the service at it with EMBEDDING_BASE_URL.
+
+Usage (from ml-service/):
+    python -m loadtest.fake_embeddings --port 8900 --latency-ms 80 --jitter-ms 40
+    python -m loadtest.fake_embeddings --tail-rate 0.02 --tail-ms 2000   # 2% stall 2s
+"""
+
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import numpy as np
+
+from embeddings import EMBEDDING_DIM
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Unit float32 vector determined by `text`: equal texts embed identically."""
+    rng = np.random.default_rng(zlib.crc32(text.encode()))
+    vec = rng.standard_normal(dim, dtype=np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+class FakeEmbeddingServer:
+    """
+    Threaded HTTP server on 127.0.0.1. Each request sleeps latency_ms plus up to
+    jitter_ms (uniform), plus tail_ms with probability tail_rate, then answers 500 with
+    probability error_rate.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        port: int = 0,
+        seed: int = 0,
+        tail_rate: float = 0.0,
+        tail_ms: float = 0.0,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.tail_rate = tail_rate
+        self.tail_ms = tail_ms
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """Base URL for EMBEDDING_BASE_URL / the OpenAI client."""
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self) -> "FakeEmbeddingServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-embeddings", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeEmbeddingServer":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def _delay_and_fail(self) -> tuple[float, bool]:
+        with self._lock:
+            self.requests += 1
+            delay = self.latency_ms + self._rng.uniform(0, self.jitter_ms)
+            if self._rng.random() < self.tail_rate:
+                delay += self.tail_ms
+            return delay / 1000.0, self._rng.random() < self.error_rate
+
+    def respond(self, body: dict[str, Any]) -> dict[str, Any]:
+        """The /v1/embeddings response for a request body."""
+        texts = body.get("input")
+        if isinstance(texts, str):
+            texts = [texts]
+        dim = int(body.get("dimensions") or EMBEDDING_DIM)
+        as_base64 = body.get("encoding_format") == "base64"
+        data = []
+        for i, text in enumerate(texts or []):
+            vec = fake_embedding(str(text), dim)
+            embedding: Any = (
+                base64.b64encode(vec.astype("<f4").tobytes()).decode()
+                if as_base64
+                else vec.tolist()
+            )
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        tokens = sum(len(str(t).split()) for t in texts or [])
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model") or "fake-embedding",
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:  # noqa: N802 - http.server naming
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length)
+                if self.path.rstrip("/") != "/v1/embeddings":
+                    self._send(404, {"error": {"message": "not found"}})
+                    return
+                delay, fail = server._delay_and_fail()
+                time.sleep(delay)
+                if fail:
+                    self._send(500, {"error": {"message": "injected failure"}})
+                    return
+                try:
+                    body = json.loads(raw or b"{}")
+                except json.JSONDecodeError:
+                    self._send(400, {"error": {"message": "invalid JSON"}})
+                    return
+                self._send(200, server.respond(body))
+
+            def _send(self, status: int, payload: dict[str, Any]) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    server = FakeEmbeddingServer(
+        args.latency_ms,
+        args.jitter_ms,
+        args.error_rate,
+        args.port,
+        tail_rate=args.tail_rate,
+        tail_ms=args.tail_ms,
+    )
+    print(f"Fake embeddings at {server.url} (Ctrl-C to stop)")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Load test: start the service against local stand-ins, drive a weighted mix of endpoints
+at fixed concurrency and report throughput and p50/p95/p99 latency per endpoint.
+
+Usage (from ml-service/):
+    python -m loadtest.run                                   # fake DB, 1000 experts
+    python -m loadtest.run --concurrency 32 --duration 60 --workers 4 --experts 10000
+    python -m loadtest.run --mix rank=1 --embedding-latency-ms 300 --json out.json
+    python -m loadtest.run --database-url postgresql://...   # seeded local Postgres
+    python -m loadtest.run --url http://staging:8000         # an already running service
+
+The service runs as `uvicorn loadtest.serve:app` in a subprocess, so the driver does not
+compete with it for the GIL. Embeddings come from a FakeEmbeddingServer in this process
+(pointed at through EMBEDDING_BASE_URL). Each endpoint is called once before measuring,
+so cold caches (graph snapshot build, first embedding) are reported separately.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess  # nosec B404 - starts uvicorn with fixed arguments
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+import numpy as np
+
+from benchmarks.synthetic import INDUSTRIES, REGIONS
+from loadtest.fake_db import project_ids
+from loadtest.fake_embeddings import FakeEmbeddingServer
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_MIX: dict[str, float] = {"rank": 4, "embeddings": 2, "graph": 1, "rate": 3}
+STARTUP_TIMEOUT_SECONDS = 60.0
+REQUEST_TIMEOUT_SECONDS = 60.0
+
+RequestBuilder = Callable[[random.Random, list[str]], dict[str, Any]]
+
+
+def _rank_body(rng: random.Random, projects: list[str]) -> dict[str, Any]:
+    return {"project_id": rng.choice(projects)}
+
+
+def _embedding_body(rng: random.Random, _projects: list[str]) -> dict[str, Any]:
+    industry = rng.choice(list(INDUSTRIES))
+    topic = rng.choice(INDUSTRIES[industry])
+    return {"text": f"{industry} {topic} expert for a due diligence call #{rng.randrange(10**6)}"}
+
+
+def _graph_body(_rng: random.Random, _projects: list[str]) -> dict[str, Any]:
+    return {}
+
+
+def _rate_body(rng: random.Random, _projects: list[str]) -> dict[str, Any]:
+    region = rng.choice(list(REGIONS))
+    return {
+        "seniority_score": rng.randint(20, 100),
+        "years_experience": rng.randint(1, 35),
+        "region": region,
+        "country": rng.choice(REGIONS[region]),
+        "industry": rng.choice(list(INDUSTRIES)),
+    }
+
+
+# endpoint name -> (path, request body builder)
+ENDPOINTS: dict[str, tuple[str, RequestBuilder]] = {
+    "rank": ("/rank", _rank_body),
+    "embeddings": ("/embeddings", _embedding_body),
+    "graph": ("/graph/visualize", _graph_body),
+    "rate": ("/insights/suggested-rate", _rate_body),
+}
+
+
+@dataclass
+class Samples:
+    latencies: list[float] = field(default_factory=list)
+    errors: dict[str, int] = field(default_factory=dict)
+
+    def record(self, seconds: float, error: str | None) -> None:
+        if error is None:
+            self.latencies.append(seconds)
+        else:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+
+def summarize(samples: Samples, elapsed: float) -> dict[str, Any]:
+    """Throughput and latency percentiles (ms) of successful requests."""
+    lat = np.array(samples.latencies) * 1000.0
+    ok = len(lat)
+    out: dict[str, Any] = {
+        "requests": ok + sum(samples.errors.values()),
+        "errors": dict(samples.errors),
+        "rps": round(ok / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    for name, q in (("p50_ms", 50), ("p95_ms", 95), ("p99_ms", 99), ("max_ms", 100)):
+        out[name] = round(float(np.percentile(lat, q)), 1) if ok else None
+    return out
+
+
+async def _call(
+    client: httpx.AsyncClient, endpoint: str, rng: random.Random, projects: list[str]
+) -> tuple[float, str | None]:
+    path, body = ENDPOINTS[endpoint]
+    start = time.perf_counter()
+    try:
+        r = await client.post(path, json=body(rng, projects))
+        error = None if r.status_code < 400 else str(r.status_code)
+    except httpx.HTTPError as exc:
+        error = type(exc).__name__
+    return time.perf_counter() - start, error
+
+
+async def drive(
+    base_url: str,
+    mix: dict[str, float],
+    concurrency: int,
+    duration: float,
+    projects: list[str],
+    seed: int = 0,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> dict[str, Any]:
+    """
+    Prime every endpoint in `mix` once, then run `concurrency` closed-loop clients for
+    `duration` seconds, each picking endpoints at random weighted by `mix`. Returns
+    {"cold_ms": {...}, "endpoints": {name: summary}, "total": summary}.
+    """
+    names = [n for n, w in mix.items() if w > 0]
+    weights = [mix[n] for n in names]
+    samples = {n: Samples() for n in names}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=REQUEST_TIMEOUT_SECONDS, limits=limits, transport=transport
+    ) as client:
+        cold: dict[str, float | None] = {}
+        rng = random.Random(seed)
+        for name in names:
+            seconds, error = await _call(client, name, rng, projects)
+            cold[name] = None if error else round(seconds * 1000.0, 1)
+
+        deadline = time.perf_counter() + duration
+
+        async def worker(i: int) -> None:
+            rng = random.Random(seed * 1_000_003 + i)
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                samples[name].record(*await _call(client, name, rng, projects))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    total = Samples()
+    for s in samples.values():
+        total.latencies.extend(s.latencies)
+        for error, count in s.errors.items():
+            total.errors[error] = total.errors.get(error, 0) + count
+    return {
+        "cold_ms": cold,
+        "endpoints": {n: summarize(s, elapsed) for n, s in samples.items()},
+        "total": summarize(total, elapsed),
+        "elapsed_seconds": round(elapsed, 2),
+    }
+
+
+def format_report(result: dict[str, Any]) -> str:
+    header = f"{'endpoint':<12}{'requests':>9}{'errors':>8}{'rps':>9}"
+    header += "".join(f"{c:>10}" for c in ("p50 ms", "p95 ms", "p99 ms", "max ms", "cold ms"))
+    lines = [header]
+    rows = [*result["endpoints"].items(), ("total", result["total"])]
+    for name, s in rows:
+        cells = [s["p50_ms"], s["p95_ms"], s["p99_ms"], s["max_ms"], result["cold_ms"].get(name)]
+        line = f"{name:<12}{s['requests']:>9}{sum(s['errors'].values()):>8}{s['rps']:>9}"
+        line += "".join(f"{'-' if c is None else c:>10}" for c in cells)
+        lines.append(line)
+    errors = {n: s["errors"] for n, s in result["endpoints"].items() if s["errors"]}
+    if errors:
+        lines.append(f"errors: {errors}")
+    return "\n".join(lines)
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    """'rank=4,rate=1' -> {"rank": 4.0, "rate": 1.0}; names must be in ENDPOINTS."""
+    mix: dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r}; use {list(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    if not any(w > 0 for w in mix.values()):
+        raise argparse.ArgumentTypeError("mix needs at least one positive weight")
+    return mix
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+def start_service(port: int, workers: int, env: dict[str, str]) -> subprocess.Popen[bytes]:
+    """Run loadtest.serve under uvicorn and wait for /health."""
+    cmd = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "loadtest.serve:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--log-level",
+        "warning",
+    ]
+    proc = subprocess.Popen(cmd, cwd=SERVICE_DIR, env={**os.environ, **env})  # nosec B603
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"service exited with status {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    proc.terminate()
+    raise RuntimeError(f"service did not start within {STARTUP_TIMEOUT_SECONDS:.0f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="e.g. rank=4,rate=1")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds measured")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--experts", type=int, default=1000, help="fake DB size")
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--embedding-latency-ms", type=float, default=50.0)
+    parser.add_argument("--embedding-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--embedding-error-rate", type=float, default=0.0)
+    parser.add_argument("--embedding-tail-rate", type=float, default=0.0, help="share stalled")
+    parser.add_argument("--embedding-tail-ms", type=float, default=1000.0)
+    parser.add_argument("--database-url", help="use this (seeded) Postgres instead of the fake")
+    parser.add_argument("--url", help="drive a running service instead of starting one")
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    args = parser.parse_args()
+
+    projects = project_ids(args.projects)
+    config = {k: v for k, v in vars(args).items() if k not in ("json", "database_url")}
+    config["database"] = "postgres" if args.database_url else "fake"
+    proc = None
+    fake = FakeEmbeddingServer(
+        args.embedding_latency_ms,
+        args.embedding_jitter_ms,
+        args.embedding_error_rate,
+        tail_rate=args.embedding_tail_rate,
+        tail_ms=args.embedding_tail_ms,
+    )
+    with fake:
+        base_url = args.url
+        if base_url is None:
+            env = {
+                "EMBEDDING_PROVIDER": "openai",
+                "OPENAI_API_KEY": "loadtest",
+                "EMBEDDING_BASE_URL": fake.url,
+                "LOADTEST_EXPERTS": str(args.experts),
+                "LOADTEST_PROJECTS": str(args.projects),
+                "LOADTEST_SEED": str(args.seed),
+            }
+            if args.database_url:
+                env.update(LOADTEST_FAKE_DB="0", DATABASE_URL=args.database_url)
+            port = _free_port()
+            print(f"Starting service on port {port} ({args.workers} worker(s))...")
+            proc = start_service(port, args.workers, env)
+            base_url = f"http://127.0.0.1:{port}"
+        try:
+            print(f"Driving {base_url}: {args.concurrency} clients for {args.duration:.0f}s")
+            result = asyncio.run(
+                drive(base_url, args.mix, args.concurrency, args.duration, projects, args.seed)
+            )
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=30)
+    result["config"] = {**config, "embedding_requests": fake.requests}
+    print(format_report(result))
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Seed a local Postgres (with pgvector and the prisma migrations applied) with the same
+synthetic experts, vectors and projects FakeDatabase serves. Rows use an "lt-" id
+prefix and are replaced on every run; nothing else is touched.
+
+Usage (from ml-service/):
+    docker run -d -p 5433:5432 -e POSTGRES_PASSWORD=lt pgvector/pgvector:pg16
+    DATABASE_URL=postgresql://postgres:lt@localhost:5433/postgres npx prisma migrate deploy
+    python -m loadtest.seed_postgres --database-url postgresql://postgres:lt@localhost:5433/postgres
+"""
+
+import argparse
+import json
+
+from benchmarks.synthetic import make_embeddings, make_experts
+from loadtest.fake_db import make_projects
+
+USER_ID = "lt-user"
+BATCH = 500
+
+
+def seed(database_url: str, n_experts: int, n_projects: int, seed: int = 42) -> None:
+    import psycopg2
+    from psycopg2.extras import execute_values
+
+    experts = make_experts(n_experts, seed=seed)
+    vectors = make_embeddings(n_experts, seed=seed)
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn, conn.cursor() as cur:
+            # Cascades to the experts, vectors and projects owned by the load-test user
+            cur.execute("DELETE FROM users WHERE id = %s", (USER_ID,))
+            cur.execute(
+                "INSERT INTO users (id, email, role) VALUES (%s, %s, 'ADMIN')",
+                (USER_ID, "loadtest@example.invalid"),
+            )
+            for start in range(0, n_experts, BATCH):
+                chunk = experts[start : start + BATCH]
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO experts (
+                        id, name, industry, sub_industry, country, region, seniority_score,
+                        years_experience, predicted_rate, owner_id, visibility_status,
+                        past_employers, skills, updated_at
+                    ) VALUES %s
+                    """,
+                    [
+                        (
+                            "lt-" + e["id"],
+                            e["name"],
+                            e["industry"],
+                            e["sub_industry"],
+                            e["country"],
+                            e["region"],
+                            e["seniority_score"],
+                            e["years_experience"],
+                            e["predicted_rate"],
+                            USER_ID,
+                            "GLOBAL_POOL",
+                            json.dumps(e["past_employers"]),
+                            json.dumps(e["skills"]),
+                        )
+                        for e in chunk
+                    ],
+                    template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, now())",
+                )
+                execute_values(
+                    cur,
+                    "INSERT INTO expert_vectors (id, expert_id, embedding) VALUES %s",
+                    [
+                        (
+                            "lt-vec-" + e["id"],
+                            "lt-" + e["id"],
+                            "[" + ",".join(f"{x:.6f}" for x in vec) + "]",
+                        )
+                        for e, vec in zip(chunk, vectors[start : start + BATCH], strict=True)
+                    ],
+                    template="(%s, %s, %s::vector)",
+                )
+            execute_values(
+                cur,
+                "INSERT INTO research_projects (id, creator_id, title, filter_criteria) VALUES %s",
+                [
+                    (p["id"], USER_ID, p["title"], json.dumps(p["filter_criteria"]))
+                    for p in make_projects(n_projects, seed=seed)
+                ],
+            )
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--experts", type=int, default=10_000)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    seed(args.database_url, args.experts, args.projects, args.seed)
+    print(f"Seeded {args.experts} experts and {args.projects} projects")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,28 +2,211 @@
 FastAPI ML microservice for expert ranking and rate prediction.
 """
 
-import re
-from typing import Any
+import itertools
+import json
+import math
+import os
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import asynccontextmanager
+from importlib.metadata import version as package_version
+from typing import Any, Literal
 
 from dotenv import load_dotenv
-from fastapi import Body, FastAPI, HTTPException
+from fastapi import Body, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from loguru import logger
 from pydantic import BaseModel, Field
 
-from database import fetch_experts_for_project, fetch_project, fetch_semantic_similarities
-from embeddings import get_embedding
-from graph_engine import GraphEngine
+import admission
+import graph_partitions
+import invalidation
+import jobs
+import lexical_index
+import metrics
+import process_pool
+import profiling
+from batch_rank import rank_projects
+from cv_signals import extract_signals as extract_cv_signals
+from database import warm_pool
+from embeddings import EmbeddingUnavailableError, get_embedding
+from graph_engine import get_graph_snapshot, invalidate_graph_snapshots
+from graph_queries import DEFAULT_MAX_EDGES, DEFAULT_MAX_HOPS, DEFAULT_MAX_NODES
+from rank_sessions import MAX_PAGE_SIZE as MAX_RANK_PAGE_SIZE
+from rank_sessions import (
+    SCORING_SLICE,
+    CursorExpiredError,
+    InvalidCursorError,
+    ProjectNotFoundError,
+    rank_page,
+)
+from rate_estimator import TRAIN_MODES as RATE_TRAIN_MODES
+from rate_estimator import get_model as get_rate_model
+from rate_estimator import (
+    model_version as rate_model_version,
+)
 from rate_estimator import (
     predict_rate as rate_estimator_predict,
 )
 from rate_estimator import (
     train_and_save as rate_estimator_train,
 )
-from scoring import ExpertRanker, run_xgboost_ranker
+from readiness import Readiness
+from singleflight import SingleFlight
 
 load_dotenv()
 
-app = FastAPI(title="ExperTone ML Service", version="1.0.0")
+# Graph size used for Network Influence in /rank (also the snapshot warmed at startup)
+RANK_GRAPH_LIMIT = 500
+# Projects per /rank/batch call
+MAX_RANK_BATCH = 1000
+# Items per /predict-rate/batch call
+MAX_PREDICT_RATE_BATCH = 1000
+# Experts per /graph/influence call
+MAX_INFLUENCE_EXPERTS = 1000
+# Node / edge budgets accepted by the graph query endpoints
+MAX_QUERY_NODES = 2000
+MAX_QUERY_EDGES = 20000
+# Admission class of each limited route (see admission.py); other routes are not limited
+ENDPOINT_CLASSES = {
+    "/embeddings": "fast",
+    "/predict-rate": "fast",
+    "/predict-rate/batch": "fast",
+    "/insights/suggested-rate": "fast",
+    "/jobs/train-rate-model": "fast",
+    "/jobs/rebuild-graph": "fast",
+    "/rank": "rank",
+    "/rank/batch": "batch",
+    "/graph/visualize": "graph",
+    "/insights/graph": "graph",
+    # Cheap on a warm snapshot, but a cold or stale one is built on the request
+    "/graph/ego": "graph",
+    "/graph/influence": "graph",
+    "/graph/path": "graph",
+    "/graph/subgraph": "graph",
+    "/insights/train-rate-model": "training",
+}
+# Concurrent identical graph views share one export (nodes and links of the whole graph)
+_graph_view_flight: SingleFlight[dict[str, Any]] = SingleFlight("graph_view")
+
+readiness = Readiness(
+    {
+        "database": warm_pool,
+        "rate_model": get_rate_model,
+        "graph": lambda: get_graph_snapshot(limit=RANK_GRAPH_LIMIT),
+        "lexical_index": lexical_index.get_index,
+        **(
+            {"graph_partitions": graph_partitions.get_partitioned_graph}
+            if graph_partitions.enabled()
+            else {}
+        ),
+    }
+)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """
+    Kick off warm-up in the background so the port opens immediately, and listen for
+    database changes that invalidate cached graphs and rank sessions. On shutdown, cancel
+    work left in the process pool.
+    """
+    if (os.getenv("ML_WARM_ON_STARTUP") or "true").lower() != "false":
+        readiness.start()
+    invalidation.listener.start()
+    yield
+    invalidation.listener.stop()
+    process_pool.shutdown()
+    graph_partitions.shutdown()
+
+
+app = FastAPI(title="ExperTone ML Service", version="1.0.0", lifespan=lifespan)
+
+# Innermost middleware, so the metrics and profiling middleware also see shed requests
+app.add_middleware(admission.AdmissionMiddleware, classes=ENDPOINT_CLASSES)
+
+metrics.register_model_version("rate_estimator", rate_model_version)
+metrics.register_model_version("xgboost_ranker", lambda: f"xgboost-{package_version('xgboost')}")
+
+
+@app.exception_handler(admission.RequestCancelledError)
+async def request_cancelled(_request: Request, _exc: Exception) -> Response:
+    """The client hung up; nothing reads this, it only labels the request in metrics."""
+    return Response(status_code=admission.CLIENT_CLOSED_REQUEST)
+
+
+@app.exception_handler(admission.DeadlineExceededError)
+async def deadline_exceeded(_request: Request, exc: Exception) -> Response:
+    return JSONResponse({"detail": str(exc)}, status_code=503)
+
+
+@app.exception_handler(graph_partitions.PartitionError)
+async def graph_partition_failed(_request: Request, exc: Exception) -> Response:
+    return JSONResponse({"detail": str(exc)}, status_code=503)
+
+
+@app.exception_handler(EmbeddingUnavailableError)
+async def embedding_unavailable(_request: Request, exc: Exception) -> Response:
+    retry_after = getattr(exc, "retry_after", 1.0)
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=503,
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
+
+
+@app.middleware("http")
+async def record_request_metrics(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """Count and time every request, labelled by route template (not raw path)."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", None) or "unmatched"
+        metrics.observe_request(endpoint, request.method, status, time.perf_counter() - start)
+
+
+@app.middleware("http")
+async def profile_request(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """
+    Opt-in per-request profiling (see profiling.py). Off unless the admin header pair
+    matches ML_PROFILE_TOKEN or ML_PROFILE_SAMPLE_RATE selects the request.
+    """
+    profile = profiling.profile_for_request(request.headers)
+    if profile is None:
+        return await call_next(request)
+
+    start = time.perf_counter()
+    with profiling.activate(profile):
+        response = await call_next(request)
+    duration_ms = f"{(time.perf_counter() - start) * 1000:.1f}"
+    route = request.scope.get("route")
+    label = getattr(route, "path", None) or request.url.path
+
+    if profile.mode == profiling.PROFILE_MODE_INLINE:
+        async for _ in response.body_iterator:  # type: ignore[attr-defined]
+            pass
+        return PlainTextResponse(
+            profile.folded(),
+            headers={
+                "X-Profile-Status": str(response.status_code),
+                "X-Profile-Duration-Ms": duration_ms,
+            },
+        )
+
+    path = profile.save(f"{request.method}{label}")
+    logger.info("Profiled {} {} in {} ms -> {}", request.method, label, duration_ms, path)
+    response.headers["X-Profile-File"] = path.name
+    response.headers["X-Profile-Duration-Ms"] = duration_ms
+    return response
 
 
 # ============== Request/Response Models ==============
@@ -31,11 +214,19 @@ app = FastAPI(title="ExperTone ML Service", version="1.0.0")
 
 class RankRequest(BaseModel):
     project_id: str
+    cursor: str | None = None  # next_cursor of the previous page
+    page_size: int | None = Field(default=None, ge=1, le=MAX_RANK_PAGE_SIZE)
+
+
+class RankBatchRequest(BaseModel):
+    project_ids: list[str] = Field(min_length=1, max_length=MAX_RANK_BATCH)
 
 
 class RankResponse(BaseModel):
     project_id: str
     ranked_experts: list[dict[str, Any]]
+    next_cursor: str | None = None
+    total: int = 0
 
 
 class PredictRateRequest(BaseModel):
@@ -48,8 +239,64 @@ class PredictRateResponse(BaseModel):
     reasoning: str
 
 
+class PredictRateBatchItem(BaseModel):
+    id: str | None = None  # echoed back so callers can match results
+    text: str
+
+
+class PredictRateBatchRequest(BaseModel):
+    items: list[PredictRateBatchItem] = Field(min_length=1, max_length=MAX_PREDICT_RATE_BATCH)
+
+
+class PredictRateBatchResult(BaseModel):
+    id: str | None = None
+    predicted_rate: float | None = None
+    confidence: float | None = None
+    reasoning: str | None = None
+    error: str | None = None
+
+
+class PredictRateBatchResponse(BaseModel):
+    results: list[PredictRateBatchResult]
+
+
 class GraphVisualizeRequest(BaseModel):
     limit: int = Field(default=500, ge=1, le=2000)
+    # "communities": one super-node per community; `expand` returns one community's members
+    level: Literal["full", "communities"] = "full"
+    expand: int | None = None
+    max_nodes: int = Field(default=DEFAULT_MAX_NODES, ge=1, le=MAX_QUERY_NODES)
+    max_edges: int = Field(default=DEFAULT_MAX_EDGES, ge=0, le=MAX_QUERY_EDGES)
+
+
+class GraphEgoRequest(BaseModel):
+    node_id: str  # e.g. "expert_<id>" or "company_<name>"
+    hops: int = Field(default=2, ge=1, le=4)
+    max_nodes: int = Field(default=DEFAULT_MAX_NODES, ge=1, le=MAX_QUERY_NODES)
+    max_edges: int = Field(default=DEFAULT_MAX_EDGES, ge=0, le=MAX_QUERY_EDGES)
+    limit: int = Field(default=RANK_GRAPH_LIMIT, ge=1, le=2000)
+
+
+class GraphInfluenceRequest(BaseModel):
+    expert_ids: list[str] = Field(min_length=1, max_length=MAX_INFLUENCE_EXPERTS)
+    # A project's filter_criteria personalize the influence, as in /rank
+    filters: dict[str, Any] | None = None
+    limit: int = Field(default=RANK_GRAPH_LIMIT, ge=1, le=2000)
+
+
+class GraphPathRequest(BaseModel):
+    expert_id: str
+    company: str  # company name or "company_<name>" node id
+    max_hops: int = Field(default=DEFAULT_MAX_HOPS, ge=1, le=12)
+    limit: int = Field(default=RANK_GRAPH_LIMIT, ge=1, le=2000)
+
+
+class GraphSubgraphRequest(BaseModel):
+    industry: str | None = None
+    community: int | None = None
+    max_nodes: int = Field(default=DEFAULT_MAX_NODES, ge=1, le=MAX_QUERY_NODES)
+    max_edges: int = Field(default=DEFAULT_MAX_EDGES, ge=0, le=MAX_QUERY_EDGES)
+    limit: int = Field(default=RANK_GRAPH_LIMIT, ge=1, le=2000)
 
 
 class EmbeddingRequest(BaseModel):
@@ -61,6 +308,16 @@ class EmbeddingResponse(BaseModel):
     dimensions: int = 1536
 
 
+class TrainRateModelJobRequest(BaseModel):
+    use_engagements: bool = False
+    # auto: incremental on rows since the last train, with periodic full retrains
+    mode: Literal["auto", "full", "incremental"] = "auto"
+
+
+class RebuildGraphJobRequest(BaseModel):
+    limits: list[int] = Field(default_factory=lambda: [RANK_GRAPH_LIMIT], max_length=8)
+
+
 class SuggestedRateRequest(BaseModel):
     seniority_score: int = Field(default=50, ge=0, le=100)
     years_experience: int = Field(default=5, ge=0, le=50)
@@ -87,117 +344,102 @@ def create_embedding(req: EmbeddingRequest) -> EmbeddingResponse:
 
 
 @app.post("/rank", response_model=RankResponse)
+@profiling.profiled
 def rank_experts(req: RankRequest) -> RankResponse:
     """
-    Rank experts for a project.
-    1. Fetches project filters and potential experts
-    2. Computes semantic similarity + composite scores
-    3. Re-ranks with XGBoost
-    4. Returns ranked list with Confidence Score and Reasoning
+    Rank experts for a project, one page at a time.
+    1. Recalls up to RANK_RECALL_POOL filtered experts, nearest to the brief first
+    2. Scores the pool in slices (semantic similarity + composite score, XGBoost re-rank)
+       as pages reach them
+    3. Returns the page with Confidence Score and Reasoning, plus `next_cursor` for the
+       following page (null on the last) and `total` candidates recalled
+    Without `page_size` the page holds SCORING_SLICE experts.
     """
-    project = fetch_project(req.project_id)
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-
-    filters = project.get("filter_criteria") or {}
-    experts = fetch_experts_for_project(filters, limit=100)
-
-    if not experts:
-        return RankResponse(
-            project_id=req.project_id,
-            ranked_experts=[],
+    try:
+        page = rank_page(
+            req.project_id,
+            cursor=req.cursor,
+            page_size=req.page_size or SCORING_SLICE,
+            graph_limit=RANK_GRAPH_LIMIT,
         )
+    except ProjectNotFoundError:
+        raise HTTPException(status_code=404, detail="Project not found") from None
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from None
+    except CursorExpiredError as exc:
+        raise HTTPException(status_code=410, detail=str(exc)) from None
+    return RankResponse(
+        project_id=page.project_id,
+        ranked_experts=page.ranked_experts,
+        next_cursor=page.next_cursor,
+        total=page.total,
+    )
 
-    # Build query text for semantic embedding
-    query_parts = [
-        filters.get("industry", ""),
-        filters.get("sub_industry", ""),
-        filters.get("region", ""),
-        filters.get("brief", filters.get("query", "")),
-    ]
-    query_text = " ".join(str(p) for p in query_parts if p).strip() or project.get("title", "")
-
-    # Get semantic similarities (optional - may fail if no embeddings API)
-    semantic_map: dict[str, float] = {}
-    try:
-        embedding = get_embedding(query_text)
-        expert_ids = [e["id"] for e in experts]
-        semantic_map = fetch_semantic_similarities(expert_ids, embedding, limit=len(expert_ids))
-    except Exception as exc:
-        logger.warning("Semantic similarity fallback: {}", exc)
-        semantic_map = {e["id"]: 0.5 for e in experts}
-
-    # Build graph for Network Influence Score (optional; may fail if graph columns missing)
-    graph_engine = None
-    try:
-        graph_engine = GraphEngine()
-        graph_engine.build_knowledge_graph(limit=500)
-    except Exception as exc:
-        logger.debug("Graph engine unavailable: {}", exc)
 
-    # Score and rank
-    ranker = ExpertRanker(filters, graph_engine=graph_engine)
-    scored = ranker.rank_experts(experts, semantic_map)
-    ranked = run_xgboost_ranker(scored)
+@app.post("/rank/batch")
+def rank_batch(req: RankBatchRequest) -> StreamingResponse:
+    """
+    Rank many projects in one call (admin / cron re-ranks). Streams NDJSON, one line per
+    requested project in request order: {"project_id", "ranked_experts"} or
+    {"project_id", "error"}. Candidate fetches, embeddings and the graph are shared.
+    """
+    results = rank_projects(req.project_ids, graph_limit=RANK_GRAPH_LIMIT)
+    # Run the shared fetch phase before the response starts, so failures surface as 5xx
+    first = next(results, None)
 
-    # Format response
-    return RankResponse(
-        project_id=req.project_id,
-        ranked_experts=[
-            {
-                "expert_id": e["id"],
-                "name": e["name"],
-                "industry": e["industry"],
-                "confidence_score": e["confidence_score"],
-                "reasoning": e["reasoning"],
-            }
-            for e in ranked
-        ],
-    )
+    def lines() -> Iterator[str]:
+        try:
+            for result in itertools.chain([first] if first else [], results):
+                yield json.dumps(result, default=str) + "\n"
+        except admission.DeadlineExceededError as exc:
+            # Headers are sent: end the stream with an error line instead of a 503
+            yield json.dumps({"error": str(exc)}) + "\n"
+        except admission.RequestCancelledError:
+            logger.info("Batch ranking abandoned: client disconnected")
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @app.post("/predict-rate", response_model=PredictRateResponse)
 def predict_rate(req: PredictRateRequest) -> PredictRateResponse:
     """
     Predict 60-min rate from LinkedIn/CV text.
-    Uses seniority keywords and geography heuristics.
+    Uses seniority keywords and geography heuristics (cv_signals.py).
+    """
+    return _predict_rate_from_text(req.text or "")
+
+
+@app.post("/predict-rate/batch", response_model=PredictRateBatchResponse)
+def predict_rate_batch(req: PredictRateBatchRequest) -> PredictRateBatchResponse:
+    """
+    Predict rates for many CVs in one call (n8n ingestion). Results keep request order;
+    an item whose text is too short gets an error instead of failing the batch.
     """
-    text = (req.text or "").lower()
+    results: list[PredictRateBatchResult] = []
+    for item in req.items:
+        try:
+            out = _predict_rate_from_text(item.text or "")
+        except HTTPException as exc:
+            results.append(PredictRateBatchResult(id=item.id, error=str(exc.detail)))
+            continue
+        results.append(PredictRateBatchResult(id=item.id, **out.model_dump()))
+    return PredictRateBatchResponse(results=results)
+
+
+def _predict_rate_from_text(raw_text: str) -> PredictRateResponse:
+    text = raw_text.lower()
     if len(text) < 20:
         raise HTTPException(status_code=400, detail="Text too short for prediction")
 
-    # Extract years of experience
-    years_match = re.search(
-        r"(\d+)\s*(?:years?|yrs?|y\.?)\s*(?:of\s+)?(?:experience|exp\.?)", text, re.I
-    )
-    years = int(years_match.group(1)) if years_match else 5
-
-    # Seniority keywords
-    seniority = 50
-    if any(w in text for w in ["c-level", "ceo", "cto", "cfo", "chief", "vp", "vice president"]):
-        seniority = 90
-    elif any(w in text for w in ["director", "head of", "senior director"]):
-        seniority = 75
-    elif any(w in text for w in ["senior", "lead", "principal", "manager"]):
-        seniority = 65
-    elif any(w in text for w in ["junior", "associate", "analyst"]):
-        seniority = 35
-
-    # Geography multiplier (rough)
-    geo_mult = 1.0
-    if any(
-        w in text for w in ["usa", "united states", "san francisco", "new york", "london", "uk"]
-    ):
-        geo_mult = 1.2
-    elif any(w in text for w in ["india", "pakistan", "philippines"]):
-        geo_mult = 0.6
+    signals = extract_cv_signals(text)
+    years = signals.years
 
     # Base rate formula
-    base = 100 + (years * 15) + (seniority * 0.8)
-    rate = base * geo_mult
+    base = 100 + (years * 15) + (signals.seniority * 0.8)
+    rate = base * signals.geo_multiplier
     rate = max(80, min(600, rate))
 
-    confidence = 0.7 if years_match else 0.5
+    confidence = 0.7 if signals.years_found else 0.5
     reasoning = f"Based on {years} years experience, seniority level, and geography indicators."
 
     return PredictRateResponse(
@@ -208,36 +450,131 @@ def predict_rate(req: PredictRateRequest) -> PredictRateResponse:
 
 
 @app.post("/graph/visualize")
+@profiling.profiled
 def graph_visualize(
     req: GraphVisualizeRequest = Body(default_factory=GraphVisualizeRequest),  # noqa: B008
 ) -> dict[str, Any]:
     """
     Build knowledge graph and return JSON for react-force-graph 3D.
-    Nodes: id, label, group, val (size from centrality), community
-    Links: source, target, type (ALUMNI, HAS_SKILL, SHARED_EMPLOYER, SAME_SUBINDUSTRY)
+    Nodes: id, label, group, val (size from centrality), community, x/y/z (layout)
+    Links: source, target, type (ALUMNI, HAS_SKILL), weight; one link per related pair
+    With level="communities", returns community super-nodes and AGGREGATE links instead;
+    `expand` returns one community's members (see _graph_view).
     """
-    opts = req or GraphVisualizeRequest()
-    engine = GraphEngine()
-    engine.build_knowledge_graph(limit=opts.limit)
-    return engine.to_react_force_graph_format()
+    return _graph_view(req or GraphVisualizeRequest())
 
 
 @app.post("/insights/graph")
+@profiling.profiled
 def insights_graph(
     req: GraphVisualizeRequest = Body(default_factory=GraphVisualizeRequest),  # noqa: B008
 ) -> dict[str, Any]:
     """
     Expert relationship graph: experts + companies/industries as nodes;
     edges = shared employer, same sub-industry. Louvain clusters for 'Industry Influence Hubs'.
-    Same output format as /graph/visualize for D3/React-Force-Graph.
+    Same output format (and level-of-detail options) as /graph/visualize.
     """
-    opts = req or GraphVisualizeRequest()
-    engine = GraphEngine()
-    engine.build_knowledge_graph(limit=opts.limit)
+    return _graph_view(req or GraphVisualizeRequest())
+
+
+def _graph_view(opts: GraphVisualizeRequest) -> dict[str, Any]:
+    """
+    Full graph, community overview, or one expanded community. An expansion lists the
+    community's members and links them to the other super-nodes by AGGREGATE links, so
+    the client replaces super-node `community_<id>` with it. Both views are cached per
+    snapshot. Identical concurrent requests share one computation.
+    """
+    key = (opts.limit, opts.level, opts.expand, opts.max_nodes, opts.max_edges)
+    return _graph_view_flight.do(key, lambda: _compute_graph_view(opts))
+
+
+def _compute_graph_view(opts: GraphVisualizeRequest) -> dict[str, Any]:
+    engine = get_graph_snapshot(limit=opts.limit)
+    if opts.expand is not None:
+        out = engine.expand_community(opts.expand, opts.max_nodes, opts.max_edges)
+        if out is None:
+            raise HTTPException(status_code=404, detail="Community not found")
+        return out
+    if opts.level == "communities":
+        return engine.community_overview()
     return engine.to_react_force_graph_format()
 
 
+@app.post("/graph/ego")
+@profiling.profiled
+def graph_ego(req: GraphEgoRequest) -> dict[str, Any]:
+    """
+    k-hop neighbourhood of an expert, company, skill or industry node, within node and
+    edge budgets (most central nodes kept first). Same node/link format as
+    /graph/visualize, plus `truncated`.
+    """
+    if graph_partitions.enabled():
+        # Partitions keep no layout or communities, so nodes come without x/y/z or community
+        out = graph_partitions.query_partitioned(
+            lambda graph: graph.ego_network(req.node_id, req.hops, req.max_nodes, req.max_edges)
+        )
+    else:
+        out = get_graph_snapshot(limit=req.limit).ego_network(
+            req.node_id, req.hops, req.max_nodes, req.max_edges
+        )
+    if out is None:
+        raise HTTPException(status_code=404, detail="Node not found")
+    return out
+
+
+@app.post("/graph/influence")
+@profiling.profiled
+def graph_influence(req: GraphInfluenceRequest) -> dict[str, Any]:
+    """
+    Network Influence Score (0–1) of each expert, as used by /rank: global PageRank, or
+    personalized to `filters` when they name an industry or skill in the graph. Unknown
+    experts score 0.
+    """
+    if graph_partitions.enabled():
+        influence = graph_partitions.query_partitioned(
+            lambda graph: graph.network_influence(req.expert_ids, req.filters)
+        )
+    else:
+        engine = get_graph_snapshot(limit=req.limit)
+        personalized = engine.project_influence(req.filters) if req.filters is not None else None
+        influence = {eid: engine.get_network_influence(eid, personalized) for eid in req.expert_ids}
+    return {"influence": influence}
+
+
+@app.post("/graph/path")
+@profiling.profiled
+def graph_path(req: GraphPathRequest) -> dict[str, Any]:
+    """
+    Warm-intro path: the shortest chain of colleagues and employers from an expert to a
+    company. `hops` is null (and nodes/links empty) when no path within `max_hops` exists.
+    """
+    out = get_graph_snapshot(limit=req.limit).warm_intro_path(
+        req.expert_id, req.company, req.max_hops
+    )
+    if out is None:
+        raise HTTPException(status_code=404, detail="Expert or company not found")
+    return out
+
+
+@app.post("/graph/subgraph")
+@profiling.profiled
+def graph_subgraph(req: GraphSubgraphRequest) -> dict[str, Any]:
+    """Subgraph of one industry (its experts, their companies and skills) or one community."""
+    if req.industry is not None and req.community is None:
+        engine = get_graph_snapshot(limit=req.limit)
+        out = engine.industry_subgraph(req.industry, req.max_nodes, req.max_edges)
+    elif req.community is not None and req.industry is None:
+        engine = get_graph_snapshot(limit=req.limit)
+        out = engine.community_subgraph(req.community, req.max_nodes, req.max_edges)
+    else:
+        raise HTTPException(status_code=422, detail="Pass exactly one of industry, community")
+    if out is None:
+        raise HTTPException(status_code=404, detail="Industry or community not found")
+    return out
+
+
 @app.post("/insights/suggested-rate")
+@profiling.profiled
 def suggested_rate(req: SuggestedRateRequest) -> dict[str, Any]:
     """
     Smart Rate Estimator: returns suggested market rate range (min/max) and point estimate.
@@ -254,18 +591,106 @@ def suggested_rate(req: SuggestedRateRequest) -> dict[str, Any]:
 
 
 @app.post("/insights/train-rate-model")
+@profiling.profiled
 def train_rate_model(body: dict[str, Any] | None = Body(None)) -> dict[str, Any]:  # noqa: B008
-    """Train the rate estimator. If body has use_engagements=True (e.g. from optimize_iq), train on engagement actual_cost."""
-    use_engagements = isinstance(body, dict) and body.get("use_engagements") is True
-    result = rate_estimator_train(use_engagements=use_engagements)
+    """
+    Train the rate estimator synchronously. If body has use_engagements=True, train on
+    engagement actual_cost; body.mode is auto (default), full or incremental.
+    Prefer POST /jobs/train-rate-model, which does not hold the request.
+    """
+    body = body if isinstance(body, dict) else {}
+    mode = body.get("mode") or "auto"
+    if mode not in RATE_TRAIN_MODES:
+        raise HTTPException(status_code=422, detail=f"mode must be one of {RATE_TRAIN_MODES}")
+    result = rate_estimator_train(use_engagements=body.get("use_engagements") is True, mode=mode)
     return result
 
 
+# ============== Background jobs ==============
+
+
+def _train_rate_model_job(params: dict[str, Any], progress: jobs.ProgressFn) -> dict[str, Any]:
+    return rate_estimator_train(
+        use_engagements=bool(params.get("use_engagements")),
+        progress=progress,
+        mode=str(params.get("mode") or "auto"),
+    )
+
+
+def _rebuild_graph_job(params: dict[str, Any], progress: jobs.ProgressFn) -> dict[str, Any]:
+    limits = [int(n) for n in params.get("limits") or [RANK_GRAPH_LIMIT]]
+    invalidate_graph_snapshots()
+    built: dict[str, int] = {}
+    for i, limit in enumerate(limits):
+        progress(i / len(limits), f"building graph (limit={limit})")
+        nodes = get_graph_snapshot(limit=limit).to_react_force_graph_format()["nodes"]
+        built[str(limit)] = len(nodes)
+    return {"ok": True, "nodes": built}
+
+
+jobs.runner.register("train-rate-model", _train_rate_model_job)
+jobs.runner.register("rebuild-graph", _rebuild_graph_job)
+
+
+@app.post("/jobs/train-rate-model", status_code=202)
+def submit_train_rate_model(
+    req: TrainRateModelJobRequest = Body(default_factory=TrainRateModelJobRequest),  # noqa: B008
+) -> dict[str, Any]:
+    """Queue a rate-model retrain; returns the job immediately (poll GET /jobs/{id})."""
+    return jobs.runner.submit("train-rate-model", req.model_dump()).to_dict()
+
+
+@app.post("/jobs/rebuild-graph", status_code=202)
+def submit_rebuild_graph(
+    req: RebuildGraphJobRequest = Body(default_factory=RebuildGraphJobRequest),  # noqa: B008
+) -> dict[str, Any]:
+    """Queue a graph snapshot rebuild for the given limits; returns the job immediately."""
+    limits = sorted({max(1, min(2000, n)) for n in req.limits})
+    return jobs.runner.submit("rebuild-graph", {"limits": limits}).to_dict()
+
+
+@app.get("/jobs")
+def list_jobs(
+    job_type: str | None = Query(default=None, alias="type"),
+    limit: int = Query(default=20, ge=1, le=100),
+) -> dict[str, Any]:
+    """Recent jobs (newest first), optionally filtered by type."""
+    recent = jobs.runner.recent(job_type=job_type, limit=limit)
+    return {"jobs": [j.to_dict() for j in recent]}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str) -> dict[str, Any]:
+    """Status, progress and (when finished) result or error of one job."""
+    job = jobs.runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
 @app.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready() -> JSONResponse:
+    """
+    Readiness probe: 200 once the DB pool, rate model and graph snapshot are warm,
+    503 (with per-component status) until then. Starts or retries warm-up if needed.
+    """
+    readiness.start()
+    status = readiness.status()
+    return JSONResponse(status, status_code=200 if readiness.ready else 503)
+
+
+@app.get("/metrics")
+def prometheus_metrics() -> Response:
+    """Prometheus scrape endpoint: request counters/latency, /rank stage latency, gauges."""
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,294 @@
+"""
+Prometheus metrics for the ML service.
+Request counters and latency histograms per endpoint, per-stage /rank latency, cache
+invalidations, single-flight coalescing, admission control, the embedding provider
+client, process pool tasks, and gauges for cache sizes, graph size and model versions
+(served at /metrics).
+"""
+
+import os
+import time
+from collections.abc import Callable, Generator, Iterable
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+# Latency buckets (seconds): sub-ms lookups up to multi-second graph builds.
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+# /rank pipeline stages, in execution order.
+RANK_STAGES = (
+    "project_fetch",
+    "candidate_fetch",
+    "lexical_recall",
+    "embedding",
+    "graph",
+    "scoring",
+    "rerank",
+)
+
+REQUEST_COUNT = Counter(
+    "ml_requests_total",
+    "HTTP requests handled, by endpoint route, method and status code.",
+    ["endpoint", "method", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "ml_request_duration_seconds",
+    "HTTP request latency by endpoint route and method.",
+    ["endpoint", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+RANK_STAGE_LATENCY = Histogram(
+    "ml_rank_stage_duration_seconds",
+    "Latency of each /rank pipeline stage.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_ENTRIES = Gauge(
+    "ml_cache_entries",
+    "Entries held by each in-process cache.",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+GRAPH_NODES = Gauge(
+    "ml_graph_nodes",
+    "Nodes in the most recently built knowledge graph.",
+    multiprocess_mode="livemax",
+)
+GRAPH_EDGES = Gauge(
+    "ml_graph_edges",
+    "Edges in the most recently built knowledge graph.",
+    multiprocess_mode="livemax",
+)
+INVALIDATIONS = Counter(
+    "ml_cache_invalidations_total",
+    "Debounced database-change invalidations delivered to caches, by changed table.",
+    ["table"],
+)
+SINGLEFLIGHT_CALLS = Counter(
+    "ml_singleflight_calls_total",
+    "Calls into a single-flight group, by whether they ran the computation (leader) or "
+    "joined one already in flight (follower).",
+    ["group", "role"],
+)
+SINGLEFLIGHT_WAIT = Histogram(
+    "ml_singleflight_wait_seconds",
+    "Time followers waited for the in-flight computation they joined.",
+    ["group"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "ml_admission_in_flight",
+    "Requests holding an admission slot, by endpoint class.",
+    ["cls"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUED = Gauge(
+    "ml_admission_queued",
+    "Requests waiting for an admission slot, by endpoint class.",
+    ["cls"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_WAIT = Histogram(
+    "ml_admission_wait_seconds",
+    "Time admitted requests spent queued, by endpoint class.",
+    ["cls"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "ml_admission_rejected_total",
+    "Requests shed before running, by endpoint class and reason (queue_full, deadline, "
+    "expired, disconnected).",
+    ["cls", "reason"],
+)
+EMBEDDING_CALLS = Counter(
+    "ml_embedding_calls_total",
+    "Embedding client calls by outcome (ok, error, rejected, timeout, circuit_open).",
+    ["outcome"],
+)
+EMBEDDING_ATTEMPT_LATENCY = Histogram(
+    "ml_embedding_attempt_duration_seconds",
+    "Latency of each HTTP request to the embedding provider, by result (ok, error).",
+    ["result"],
+    buckets=LATENCY_BUCKETS,
+)
+EMBEDDING_EXTRA_ATTEMPTS = Counter(
+    "ml_embedding_extra_attempts_total",
+    "Second requests sent for one call: hedge (first outlived the p95) or retry (first failed).",
+    ["reason"],
+)
+EMBEDDING_HEDGE_WINS = Counter(
+    "ml_embedding_hedge_wins_total",
+    "Calls answered by the second request rather than the first.",
+)
+EMBEDDING_HEDGE_DELAY = Gauge(
+    "ml_embedding_hedge_delay_seconds",
+    "Current hedge delay: recent p95 attempt latency (0 until enough samples).",
+    multiprocess_mode="livemax",
+)
+EMBEDDING_CIRCUIT_STATE = Gauge(
+    "ml_embedding_circuit_state",
+    "Embedding provider circuit breaker: 0 closed, 1 half-open, 2 open.",
+    multiprocess_mode="livemax",
+)
+PROCESS_TASKS = Counter(
+    "ml_process_tasks_total",
+    "CPU-bound tasks run through the process pool, by task and outcome (ok, error, cancelled).",
+    ["task", "outcome"],
+)
+PROCESS_TASK_LATENCY = Histogram(
+    "ml_process_task_duration_seconds",
+    "Time from submitting a process pool task to its result, queueing included.",
+    ["task"],
+    buckets=LATENCY_BUCKETS,
+)
+MODEL_INFO = Gauge(
+    "ml_model_info",
+    "Loaded model versions (value is always 1; the version is in the label).",
+    ["model", "version"],
+    multiprocess_mode="livemax",
+)
+
+_cache_size_fns: dict[str, Callable[[], int]] = {}
+_model_version_fns: dict[str, Callable[[], str]] = {}
+_model_versions: dict[str, str] = {}
+
+
+def register_cache(name: str, size_fn: Callable[[], int]) -> None:
+    """Report `size_fn()` as ml_cache_entries{cache=name} on every scrape."""
+    _cache_size_fns[name] = size_fn
+
+
+def register_model_version(name: str, version_fn: Callable[[], str]) -> None:
+    """Report `version_fn()` as ml_model_info{model=name, version=...} on every scrape."""
+    _model_version_fns[name] = version_fn
+
+
+def observe_graph(num_nodes: int, num_edges: int) -> None:
+    GRAPH_NODES.set(num_nodes)
+    GRAPH_EDGES.set(num_edges)
+
+
+def observe_invalidation(tables: Iterable[str]) -> None:
+    for table in tables:
+        INVALIDATIONS.labels(table=table).inc()
+
+
+def observe_singleflight_call(group: str, joined: bool) -> None:
+    SINGLEFLIGHT_CALLS.labels(group=group, role="follower" if joined else "leader").inc()
+
+
+def observe_singleflight_wait(group: str, seconds: float) -> None:
+    SINGLEFLIGHT_WAIT.labels(group=group).observe(seconds)
+
+
+def observe_admission(cls: str, in_flight: int, queued: int) -> None:
+    ADMISSION_IN_FLIGHT.labels(cls=cls).set(in_flight)
+    ADMISSION_QUEUED.labels(cls=cls).set(queued)
+
+
+def observe_admission_wait(cls: str, seconds: float) -> None:
+    ADMISSION_WAIT.labels(cls=cls).observe(seconds)
+
+
+def observe_admission_rejected(cls: str, reason: str) -> None:
+    ADMISSION_REJECTED.labels(cls=cls, reason=reason).inc()
+
+
+def observe_embedding_call(outcome: str) -> None:
+    EMBEDDING_CALLS.labels(outcome=outcome).inc()
+
+
+def observe_embedding_attempt(ok: bool, seconds: float) -> None:
+    EMBEDDING_ATTEMPT_LATENCY.labels(result="ok" if ok else "error").observe(seconds)
+
+
+def observe_embedding_extra_attempt(reason: str) -> None:
+    EMBEDDING_EXTRA_ATTEMPTS.labels(reason=reason).inc()
+
+
+def observe_embedding_hedge_win() -> None:
+    EMBEDDING_HEDGE_WINS.inc()
+
+
+def observe_embedding_hedge_delay(seconds: float) -> None:
+    EMBEDDING_HEDGE_DELAY.set(seconds)
+
+
+def observe_embedding_circuit(state: int) -> None:
+    EMBEDDING_CIRCUIT_STATE.set(state)
+
+
+def observe_process_task(task: str, outcome: str, seconds: float) -> None:
+    PROCESS_TASKS.labels(task=task, outcome=outcome).inc()
+    PROCESS_TASK_LATENCY.labels(task=task).observe(seconds)
+
+
+def observe_request(endpoint: str, method: str, status: int, seconds: float) -> None:
+    REQUEST_COUNT.labels(endpoint=endpoint, method=method, status=str(status)).inc()
+    REQUEST_LATENCY.labels(endpoint=endpoint, method=method).observe(seconds)
+
+
+@contextmanager
+def rank_stage(stage: str) -> Generator[None, None, None]:
+    """Time one /rank stage into ml_rank_stage_duration_seconds{stage=...}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        RANK_STAGE_LATENCY.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def _refresh_gauges() -> None:
+    for name, size_fn in _cache_size_fns.items():
+        try:
+            CACHE_ENTRIES.labels(cache=name).set(size_fn())
+        except Exception:  # nosec B112 - a broken size probe must not fail the scrape
+            continue
+    for name, version_fn in _model_version_fns.items():
+        try:
+            version = version_fn()
+        except Exception:  # nosec B112
+            continue
+        previous = _model_versions.get(name)
+        if previous is not None and previous != version:
+            MODEL_INFO.remove(name, previous)
+        _model_versions[name] = version
+        MODEL_INFO.labels(model=name, version=version).set(1)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """
+    Serialize all metrics in Prometheus text format. Returns (body, content_type).
+    With PROMETHEUS_MULTIPROC_DIR set (uvicorn --workers N), aggregates across workers.
+    """
+    _refresh_gauges()
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
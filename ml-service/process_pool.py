@@ -0,0 +1,168 @@
+"""
+CPU-bound work (graph builds with Louvain and layout, rate model fitting) in a pool of
+spawned worker processes, so it does not hold the GIL of the uvicorn worker that serves
+light requests. Tasks take and return numpy arrays (pickled as raw buffers) rather than
+lists of dicts. ML_PROCESS_POOL_SIZE sets the number of processes (0 runs tasks inline).
+
+A task is cancelled when the request waiting for it disconnects or passes its deadline,
+and at shutdown: a queued task is dropped, a running one is flagged in an array shared
+with the workers and stops at its next checkpoint().
+"""
+
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, TypeVar
+
+from loguru import logger
+
+import admission
+import metrics
+
+T = TypeVar("T")
+
+POOL_SIZE = int(os.getenv("ML_PROCESS_POOL_SIZE") or min(2, os.cpu_count() or 1))
+# How often a caller waiting on a task checks its request for cancellation
+CANCEL_POLL_SECONDS = 0.05
+# Cancelled task ids are written at id % CANCEL_SLOTS; far more than can be in flight
+CANCEL_SLOTS = 4096
+
+
+class TaskCancelledError(Exception):
+    """Raised inside a pool task whose caller cancelled it."""
+
+
+_executor: ProcessPoolExecutor | None = None
+_flags: Any = None  # multiprocessing.Array("q"), shared with the workers
+_lock = threading.Lock()
+_task_ids = itertools.count(1)
+_running: dict[int, Future[Any]] = {}
+
+# Set in pool workers: the shared flags and the id of the task being run
+_worker_flags: Any = None
+_worker_task = 0
+
+
+def enabled() -> bool:
+    return POOL_SIZE > 0
+
+
+def checkpoint() -> None:
+    """
+    Raise if the current work was cancelled: in a pool worker, when the parent flagged
+    the running task; elsewhere, per the current request (admission.checkpoint()).
+    """
+    if _worker_flags is not None:
+        if _worker_task and _worker_flags[_worker_task % CANCEL_SLOTS] == _worker_task:
+            raise TaskCancelledError(f"Task {_worker_task} cancelled")
+        return
+    admission.checkpoint()
+
+
+def _init_worker(flags: Any) -> None:
+    global _worker_flags
+    _worker_flags = flags
+
+
+def _run_task(task_id: int, fn: Callable[..., T], args: tuple[Any, ...]) -> T:
+    global _worker_task
+    _worker_task = task_id
+    try:
+        return fn(*args)
+    finally:
+        _worker_task = 0
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor, _flags
+    with _lock:
+        if _executor is None:
+            # spawn, not fork: forking a process with live threads and DB connections is unsafe
+            context = multiprocessing.get_context("spawn")
+            _flags = context.Array("q", CANCEL_SLOTS, lock=False)
+            _executor = ProcessPoolExecutor(
+                POOL_SIZE, mp_context=context, initializer=_init_worker, initargs=(_flags,)
+            )
+        return _executor
+
+
+def _cancel(task_id: int, future: Future[Any]) -> None:
+    if not future.cancel() and _flags is not None:
+        _flags[task_id % CANCEL_SLOTS] = task_id
+
+
+def run(name: str, fn: Callable[..., T], *args: Any) -> T:
+    """
+    fn(*args) in a pool process (inline if the pool is disabled); `fn` must be a module-
+    level function, and its arguments and result must pickle. Blocks until it finishes;
+    if the current request is cancelled or out of time meanwhile, the task is cancelled
+    and the request's exception raised. `name` labels the ml_process_task_* metrics.
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        if not enabled():
+            result = fn(*args)
+        else:
+            result = _run_in_pool(fn, args)
+        outcome = "ok"
+        return result
+    except (TaskCancelledError, admission.RequestCancelledError, admission.DeadlineExceededError):
+        outcome = "cancelled"
+        raise
+    finally:
+        metrics.observe_process_task(name, outcome, time.perf_counter() - start)
+
+
+def _run_in_pool(fn: Callable[..., T], args: tuple[Any, ...]) -> T:
+    executor = _get_executor()
+    task_id = next(_task_ids)
+    try:
+        future = executor.submit(_run_task, task_id, fn, args)
+    except BrokenProcessPool:
+        _reset(executor)
+        raise
+    _running[task_id] = future
+    try:
+        while True:
+            try:
+                return future.result(timeout=CANCEL_POLL_SECONDS)
+            except FutureTimeoutError:
+                try:
+                    admission.checkpoint()
+                except Exception:
+                    _cancel(task_id, future)
+                    raise
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory); the next task starts a fresh pool
+        _reset(executor)
+        raise
+    finally:
+        del _running[task_id]
+
+
+def _reset(broken: ProcessPoolExecutor) -> None:
+    global _executor
+    with _lock:
+        if _executor is broken:
+            logger.warning("Process pool broken; restarting it on the next task")
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown() -> None:
+    """Cancel every queued and running task and stop the workers."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is None:
+        return
+    for task_id, future in list(_running.items()):
+        _cancel(task_id, future)
+    executor.shutdown(wait=False, cancel_futures=True)
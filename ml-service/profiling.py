@@ -0,0 +1,154 @@
+"""
+On-demand request profiling.
+A stack-sampling profiler that is off by default and enabled per request, either by an
+admin-only header pair (X-Profile + X-Profile-Token == ML_PROFILE_TOKEN) or by a
+sampling rate (ML_PROFILE_SAMPLE_RATE). Output is in collapsed-stack ("folded") format,
+readable by flamegraph.pl, speedscope and inferno.
+"""
+
+import functools
+import hmac
+import os
+import random
+import sys
+import threading
+import uuid
+from collections import Counter
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from pathlib import Path
+from types import FrameType
+from typing import Any, ParamSpec, TypeVar
+
+PROFILE_HEADER = "x-profile"
+PROFILE_TOKEN_HEADER = "x-profile-token"
+PROFILE_MODE_FILE = "file"
+PROFILE_MODE_INLINE = "inline"
+
+PROFILE_DIR = Path(os.getenv("ML_PROFILE_DIR") or Path(__file__).resolve().parent / "profiles")
+DEFAULT_INTERVAL_MS = 5.0
+MAX_STACK_DEPTH = 128
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class RequestProfile:
+    """Collects stack samples for one request; threads attach via sample_current_thread()."""
+
+    def __init__(self, mode: str, interval_ms: float = DEFAULT_INTERVAL_MS) -> None:
+        self.mode = mode
+        self.interval = max(0.5, interval_ms) / 1000.0
+        self.samples: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def sample_current_thread(self) -> Generator[None, None, None]:
+        """Sample the calling thread's stack every `interval` seconds until the block exits."""
+        target = threading.get_ident()
+        stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(self.interval):
+                frame = sys._current_frames().get(target)
+                if frame is not None:
+                    self._record(frame)
+
+        sampler = threading.Thread(target=run, name="request-profiler", daemon=True)
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            sampler.join()
+
+    def _record(self, frame: FrameType) -> None:
+        stack: list[str] = []
+        current: FrameType | None = frame
+        while current is not None and len(stack) < MAX_STACK_DEPTH:
+            code = current.f_code
+            stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+            current = current.f_back
+        key = ";".join(reversed(stack))
+        with self._lock:
+            self.samples[key] += 1
+
+    def folded(self) -> str:
+        """Collapsed stacks, one 'frame;frame;frame count' line per distinct stack."""
+        with self._lock:
+            items = sorted(self.samples.items(), key=lambda kv: kv[1], reverse=True)
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def save(self, label: str) -> Path:
+        """Write the folded profile under PROFILE_DIR and return its path."""
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(tz=UTC).strftime("%Y%m%dT%H%M%S")
+        safe_label = "".join(c if c.isalnum() else "_" for c in label).strip("_") or "request"
+        path = PROFILE_DIR / f"{stamp}-{safe_label}-{uuid.uuid4().hex[:8]}.folded"
+        path.write_text(self.folded())
+        return path
+
+
+_current: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+
+def _sample_rate() -> float:
+    try:
+        return float(os.getenv("ML_PROFILE_SAMPLE_RATE") or 0.0)
+    except ValueError:
+        return 0.0
+
+
+def _interval_ms() -> float:
+    try:
+        return float(os.getenv("ML_PROFILE_INTERVAL_MS") or DEFAULT_INTERVAL_MS)
+    except ValueError:
+        return DEFAULT_INTERVAL_MS
+
+
+def profile_for_request(headers: Any) -> RequestProfile | None:
+    """
+    Decide whether to profile a request. `headers` is any case-insensitive mapping.
+    Header-triggered profiling requires ML_PROFILE_TOKEN to be set and matched.
+    """
+    requested = (headers.get(PROFILE_HEADER) or "").strip().lower()
+    if requested:
+        token = os.getenv("ML_PROFILE_TOKEN") or ""
+        supplied = headers.get(PROFILE_TOKEN_HEADER) or ""
+        if token and hmac.compare_digest(token, supplied):
+            mode = PROFILE_MODE_INLINE if requested == PROFILE_MODE_INLINE else PROFILE_MODE_FILE
+            return RequestProfile(mode, _interval_ms())
+    rate = _sample_rate()
+    if rate > 0 and random.random() < rate:  # nosec B311 - sampling, not security
+        return RequestProfile(PROFILE_MODE_FILE, _interval_ms())
+    return None
+
+
+@contextmanager
+def activate(profile: RequestProfile) -> Generator[None, None, None]:
+    """Make `profile` visible to @profiled functions running in this request's context."""
+    token = _current.set(profile)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def profiled(fn: Callable[P, R]) -> Callable[P, R]:
+    """
+    Sample `fn` while it runs if the current request is being profiled.
+    Sync FastAPI endpoints run in a threadpool that inherits the request's context,
+    so the sampler targets the worker thread actually doing the work.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        profile = _current.get()
+        if profile is None:
+            return fn(*args, **kwargs)
+        with profile.sample_current_thread():
+            return fn(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,335 @@
+"""
+Two-stage /rank with cursor pagination.
+Stage one recalls a large pool (RANK_RECALL_POOL experts) in a single query ordered by
+pgvector similarity to the project brief. In hybrid mode (RANK_RECALL_MODE, the default)
+BM25 keyword hits on the brief (lexical_index.py) join the pool, which is then ordered by
+a fused keyword and vector score that ExpertRanker uses as the similarity. Stage two, the
+full ExpertRanker plus XGBoost re-rank, runs on consecutive slices of SCORING_SLICE
+candidates in recall order, and only when a page reaches a slice that has not been
+scored yet.
+
+The pool and the slices scored so far are kept as a session for RANK_SESSION_TTL_SECONDS.
+Cursors name a session and an offset, so scrolling serves later pages from the session
+instead of recomputing the ranking. A cursor whose session has expired (or lives in
+another uvicorn worker) is refused with CursorExpiredError: a rebuilt ranking need not
+match the one the earlier pages came from, so its offset would skip or repeat experts.
+Concurrent requests that need a new session for the same project share one build.
+"""
+
+import base64
+import binascii
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+from loguru import logger
+
+import admission
+import invalidation
+import lexical_index
+import metrics
+from database import fetch_project, fetch_recall_experts, fetch_recall_pool
+from embeddings import get_embedding
+from graph_engine import GraphEngine, get_graph_snapshot
+from scoring import ExpertRanker, run_xgboost_ranker
+from singleflight import SingleFlight
+
+RANK_RECALL_POOL = int(os.getenv("RANK_RECALL_POOL") or 5000)
+# "hybrid" fuses BM25 keyword recall with vector recall; "vector" uses pgvector alone
+RANK_RECALL_MODE = (os.getenv("RANK_RECALL_MODE") or "hybrid").lower()
+# Keyword hits merged into the pool, and the keyword share of the fused score
+LEXICAL_RECALL_K = int(os.getenv("LEXICAL_RECALL_K") or 500)
+RANK_LEXICAL_WEIGHT = float(os.getenv("RANK_LEXICAL_WEIGHT") or 0.3)
+# Candidates per stage-two batch; also the page size when a request does not ask for one
+SCORING_SLICE = 100
+MAX_PAGE_SIZE = 200
+RANK_SESSION_TTL_SECONDS = float(os.getenv("RANK_SESSION_TTL_SECONDS") or 900)
+RANK_SESSION_MAX_ENTRIES = 256
+
+
+class ProjectNotFoundError(LookupError):
+    pass
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+class CursorExpiredError(LookupError):
+    pass
+
+
+def project_query_text(project: dict[str, Any]) -> str:
+    """Text embedded for a project's semantic match: filters plus brief, else the title."""
+    filters = project.get("filter_criteria") or {}
+    query_parts = [
+        filters.get("industry", ""),
+        filters.get("sub_industry", ""),
+        filters.get("region", ""),
+        filters.get("brief", filters.get("query", "")),
+    ]
+    return " ".join(str(p) for p in query_parts if p).strip() or project.get("title", "")
+
+
+def format_ranked_experts(ranked: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [
+        {
+            "expert_id": e["id"],
+            "name": e["name"],
+            "industry": e["industry"],
+            "confidence_score": e["confidence_score"],
+            "reasoning": e["reasoning"],
+        }
+        for e in ranked
+    ]
+
+
+@dataclass
+class RankSession:
+    id: str
+    project_id: str
+    filters: dict[str, Any]
+    pool: list[dict[str, Any]]
+    semantic_map: dict[str, float]
+    graph_engine: GraphEngine | None
+    ranked: list[dict[str, Any]] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    expert_ids: frozenset[str] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.expert_ids = frozenset(str(e["id"]) for e in self.pool)
+
+    @property
+    def total(self) -> int:
+        return len(self.pool)
+
+    def ensure_scored(self, end: int) -> None:
+        """Score slices in recall order until the first `end` candidates are ranked."""
+        end = min(end, self.total)
+        with self.lock:
+            while len(self.ranked) < end:
+                admission.checkpoint()
+                start = len(self.ranked)
+                chunk = self.pool[start : start + SCORING_SLICE]
+                with metrics.rank_stage("scoring"):
+                    ranker = ExpertRanker(self.filters, graph_engine=self.graph_engine)
+                    scored = ranker.rank_experts(chunk, self.semantic_map)
+                with metrics.rank_stage("rerank"):
+                    ranked = run_xgboost_ranker(scored)
+                self.ranked.extend(format_ranked_experts(ranked))
+
+
+@dataclass(frozen=True)
+class RankPage:
+    project_id: str
+    ranked_experts: list[dict[str, Any]]
+    next_cursor: str | None
+    total: int
+
+
+_sessions: dict[str, RankSession] = {}
+_sessions_lock = threading.Lock()
+# Identical first-page requests (several tabs or users on one project) share one session
+_session_flight: SingleFlight[RankSession] = SingleFlight("rank_session")
+
+
+def encode_cursor(session_id: str, offset: int) -> str:
+    raw = json.dumps({"s": session_id, "o": offset}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    """(session id, offset); raises InvalidCursorError for anything encode_cursor did not produce."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        session_id, offset = data["s"], data["o"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError) as exc:
+        raise InvalidCursorError("Invalid cursor") from exc
+    if not isinstance(session_id, str) or not isinstance(offset, int) or offset < 0:
+        raise InvalidCursorError("Invalid cursor")
+    return session_id, offset
+
+
+def _get_session(session_id: str) -> RankSession | None:
+    session = _sessions.get(session_id)
+    if session is None or time.time() - session.created_at >= RANK_SESSION_TTL_SECONDS:
+        return None
+    return session
+
+
+def _store_session(session: RankSession) -> None:
+    with _sessions_lock:
+        now = time.time()
+        for sid in [
+            s for s, v in _sessions.items() if now - v.created_at >= RANK_SESSION_TTL_SECONDS
+        ]:
+            del _sessions[sid]
+        if len(_sessions) >= RANK_SESSION_MAX_ENTRIES:
+            oldest = min(_sessions, key=lambda s: _sessions[s].created_at)
+            del _sessions[oldest]
+        _sessions[session.id] = session
+
+
+def recall(
+    filters: dict[str, Any], query: str, embedding: list[float] | None
+) -> tuple[list[dict[str, Any]], dict[str, float]]:
+    """
+    Stage one: the candidate pool in recall order and its similarity map. Without an
+    embedding the pool is the newest matching experts, each with similarity 0.5.
+    """
+    with metrics.rank_stage("candidate_fetch"):
+        pool, semantic_map = fetch_recall_pool(filters, embedding, limit=RANK_RECALL_POOL)
+    if embedding is None:
+        semantic_map = {e["id"]: 0.5 for e in pool}
+    if RANK_RECALL_MODE == "hybrid" and query:
+        try:
+            with metrics.rank_stage("lexical_recall"):
+                pool, semantic_map = hybrid_recall(query, filters, embedding, pool, semantic_map)
+        except Exception as exc:
+            logger.warning("Keyword recall skipped: {}", exc)
+    return pool, semantic_map
+
+
+def build_session(project_id: str, graph_limit: int) -> RankSession:
+    """Run stage one for a project: recall the candidate pool and pin the graph snapshot."""
+    with metrics.rank_stage("project_fetch"):
+        project = fetch_project(project_id)
+    if not project:
+        raise ProjectNotFoundError(project_id)
+    filters = project.get("filter_criteria") or {}
+
+    # Semantic recall is optional: without embeddings the pool falls back to recency
+    query = project_query_text(project)
+    embedding: list[float] | None = None
+    try:
+        with metrics.rank_stage("embedding"):
+            embedding = get_embedding(query)
+    except Exception as exc:
+        logger.warning("Semantic similarity fallback: {}", exc)
+    pool, semantic_map = recall(filters, query, embedding)
+
+    # Network Influence Score is optional; may fail if graph columns are missing
+    graph_engine = None
+    if pool:
+        try:
+            with metrics.rank_stage("graph"):
+                graph_engine = get_graph_snapshot(limit=graph_limit)
+        except Exception as exc:
+            logger.debug("Graph engine unavailable: {}", exc)
+
+    session = RankSession(
+        id=uuid.uuid4().hex,
+        project_id=project_id,
+        filters=filters,
+        pool=pool,
+        semantic_map=semantic_map,
+        graph_engine=graph_engine,
+    )
+    _store_session(session)
+    return session
+
+
+def hybrid_recall(
+    query: str,
+    filters: dict[str, Any],
+    embedding: list[float] | None,
+    pool: list[dict[str, Any]],
+    semantic_map: dict[str, float],
+) -> tuple[list[dict[str, Any]], dict[str, float]]:
+    """
+    Merge BM25 hits for `query` into a vector recall pool and order it by the fused
+    score, returned in place of the similarity map. Hits outside the pool are read from
+    the database, which applies visibility and the filters (the index may lag behind).
+    """
+    hits = dict(lexical_index.search(query, LEXICAL_RECALL_K))
+    if not hits:
+        return pool, semantic_map
+    in_pool = {e["id"] for e in pool}
+    missing = [eid for eid in hits if eid not in in_pool]
+    if missing:
+        extra, similarity = fetch_recall_experts(missing, filters, embedding)
+        pool = pool + extra
+        semantic_map = {**semantic_map, **similarity}
+    fused = lexical_index.fuse_scores(
+        [e["id"] for e in pool], semantic_map, hits, RANK_LEXICAL_WEIGHT
+    )
+    ranked = sorted(pool, key=lambda e: -fused[e["id"]])
+    return ranked[:RANK_RECALL_POOL], fused
+
+
+def rank_page(
+    project_id: str,
+    cursor: str | None,
+    page_size: int,
+    graph_limit: int,
+) -> RankPage:
+    """
+    One page of a project's ranking. Without a cursor a new session is built; with one,
+    the page starts at the cursor's offset of the session it names, which must still be
+    live (CursorExpiredError otherwise).
+    """
+    offset = 0
+    session = None
+    if cursor is not None:
+        session_id, offset = decode_cursor(cursor)
+        session = _get_session(session_id)
+        if session is None:
+            raise CursorExpiredError("Cursor expired; request the first page again")
+        if session.project_id != project_id:
+            raise InvalidCursorError("Cursor belongs to another project")
+    if session is None:
+        session = _session_flight.do(
+            (project_id, graph_limit), lambda: build_session(project_id, graph_limit)
+        )
+
+    end = offset + page_size
+    session.ensure_scored(end)
+    return RankPage(
+        project_id=project_id,
+        ranked_experts=session.ranked[offset:end],
+        next_cursor=encode_cursor(session.id, end) if end < session.total else None,
+        total=session.total,
+    )
+
+
+def invalidate_rank_sessions(
+    project_ids: set[str] | None = None, expert_ids: set[str] | None = None
+) -> None:
+    """
+    Drop sessions for any of `project_ids` or whose pool holds any of `expert_ids`;
+    all sessions when neither is given.
+    """
+    with _sessions_lock:
+        if project_ids is None and expert_ids is None:
+            _sessions.clear()
+            return
+        for session_id, session in list(_sessions.items()):
+            if session.project_id in (project_ids or ()) or not session.expert_ids.isdisjoint(
+                expert_ids or ()
+            ):
+                del _sessions[session_id]
+
+
+def _on_invalidation(event: invalidation.Invalidation) -> None:
+    experts = (invalidation.TABLE_EXPERTS, invalidation.TABLE_EXPERT_VECTORS)
+    if event.inserted(*experts):
+        # A new expert or embedding may belong in any session's recall pool
+        invalidate_rank_sessions()
+        return
+    project_ids = event.project_ids(invalidation.TABLE_PROJECTS)
+    expert_ids = event.expert_ids(*experts)
+    if project_ids or expert_ids:
+        invalidate_rank_sessions(project_ids, expert_ids)
+
+
+def rank_session_count() -> int:
+    return len(_sessions)
+
+
+metrics.register_cache("rank_sessions", rank_session_count)
+invalidation.bus.subscribe(_on_invalidation)
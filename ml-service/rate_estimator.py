@@ -1,29 +1,42 @@
 """
 Smart Rate Estimator: XGBoost/scikit-learn regression for suggested market rate.
 Features: seniority, geography tier, years of experience, industry (encoded).
+Retraining is incremental by default: boosting continues on rows newer than the last
+trained watermark, with periodic full retrains on the complete dataset.
 """
 
+import functools
+import importlib.util
 import json
+import os
+import threading
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
 import numpy as np
+from loguru import logger
 
+import admission
+import process_pool
+import tree_predictor
 from database import get_connection
 
-# Try XGBoost first, fallback to sklearn
-try:
-    import xgboost as xgb
-
-    HAS_XGB = True
-except ImportError:
-    HAS_XGB = False
-from sklearn.linear_model import Ridge
-from sklearn.preprocessing import LabelEncoder
+# Try XGBoost first, fallback to sklearn. Both are imported on first use: together they
+# account for most of the service's import time.
+HAS_XGB = importlib.util.find_spec("xgboost") is not None
 
 MODEL_DIR = Path(__file__).resolve().parent / "models"
 MODEL_PATH = MODEL_DIR / "rate_model.json"
 ENCODER_INDUSTRY_PATH = MODEL_DIR / "industry_encoder.json"
+MODEL_META_PATH = MODEL_DIR / "rate_model_meta.json"
+# Insert-ordered column each training source's watermark is read from
+WATERMARK_COLUMNS = {"experts": "updated_at", "engagements": "created_at"}
+# Up to this many rows are scored by the compiled tree evaluator (tree_predictor.py);
+# larger batches go through XGBoost, which is faster there.
+COMPILED_MAX_ROWS = 64
 
 # Geography tier: 1 = high (NA, UK, CH, etc.), 2 = mid (EU, AU), 3 = lower cost
 GEO_TIER_1 = {
@@ -53,163 +66,429 @@ def _geo_tier(region: str, country: str) -> int:
     return 3
 
 
-def _load_training_data(limit: int = 2000) -> tuple[list[dict[str, Any]], list[float]]:
-    """Fetch experts with predicted_rate as target for training."""
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT seniority_score, years_experience, region, country, industry, predicted_rate
-                FROM experts
-                WHERE predicted_rate > 0 AND predicted_rate < 2000
-                ORDER BY updated_at DESC
-                LIMIT %s
-                """,
-                (limit,),
+# A watermark is the (timestamp, id) of the newest row a model has been trained on.
+Watermark = tuple[str, str]
+# Rows fetched per round trip when streaming training data.
+TRAINING_CHUNK_ROWS = 50_000
+
+TRAIN_MODES = ("auto", "full", "incremental")
+# Boosting rounds added per incremental run, on top of the existing trees.
+INCREMENTAL_ESTIMATORS = 20
+# Incremental runs between full retrains ("auto" mode); bounds ensemble growth and drift.
+FULL_RETRAIN_EVERY = 10
+MIN_TRAIN_SAMPLES = 10
+
+
+OTHER_INDUSTRY = "Other"
+
+
+def _industry_name(value: Any) -> str:
+    """Training and serving name of an industry: NULL and blank both become "Other"."""
+    return str(value or "").strip() or OTHER_INDUSTRY
+
+
+class IndustryVocabulary:
+    """
+    Append-only industry -> code mapping. Codes never change once assigned, so trees from
+    earlier runs stay valid when later runs see new industries. Unknown industries map to
+    NaN, which XGBoost (and tree_predictor) treat as missing rather than as a real code.
+    """
+
+    def __init__(self, classes: list[str] | None = None) -> None:
+        self.classes: list[str] = []
+        self._index: dict[str, int] = {}
+        self.extend(classes or [])
+
+    def extend(self, industries: list[str]) -> None:
+        for industry in industries:
+            if industry not in self._index:
+                self._index[industry] = len(self.classes)
+                self.classes.append(industry)
+
+    def code(self, industry: str) -> float:
+        return float(self._index.get(industry, np.nan))
+
+    def transform(self, industries: list[str]) -> np.ndarray:
+        return np.array([self._index.get(i, np.nan) for i in industries], dtype=np.float64)
+
+
+@dataclass
+class TrainingFrame:
+    """
+    Columnar training data. Distinct industry names are stored once and rows hold an
+    index into them, so a million-row frame is a few tens of MB.
+    """
+
+    seniority: np.ndarray  # float32, 0-100
+    years: np.ndarray  # float32, clipped to 0-50
+    geo_tier: np.ndarray  # int8, 1-3
+    industry_idx: np.ndarray  # int32 index into `industries`
+    industries: list[str]
+    target: np.ndarray  # float32
+    watermark: Watermark | None = None
+
+    def __len__(self) -> int:
+        return len(self.target)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple[Any, ...]]) -> "TrainingFrame":
+        return cls.from_chunks([rows])
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[Sequence[tuple[Any, ...]]]) -> "TrainingFrame":
+        """
+        Build from chunks of (seniority, years, region, country, industry, target[, ts, id])
+        rows. Each chunk is encoded column-wise; strings are resolved once per distinct value.
+        """
+        parts: list[tuple[np.ndarray, ...]] = []
+        industries: dict[str, int] = {}
+        last: tuple[Any, ...] | None = None
+        for rows in chunks:
+            if not rows:
+                continue
+            cols = list(zip(*rows, strict=True))
+            names, inverse = _factorize(cols[4])
+            remap = np.array(
+                [industries.setdefault(_industry_name(name), len(industries)) for name in names],
+                dtype=np.int32,
+            )
+            parts.append(
+                (
+                    _numeric_column(cols[0], default=50.0),
+                    np.clip(_numeric_column(cols[1], default=5.0), 0, 50),
+                    _geo_tier_column(cols[2], cols[3]),
+                    remap[inverse],
+                    np.asarray(cols[5], dtype=np.float32),
+                )
             )
-            rows = cur.fetchall()
-    if not rows:
-        return [], []
-    x_list: list[dict[str, Any]] = []
-    y_list: list[float] = []
-    for r in rows:
-        seniority, years, region, country, industry, rate = r
-        geo = _geo_tier(region or "", country or "")
-        x_list.append(
-            {
-                "seniority_score": seniority or 50,
-                "years_experience": min(50, max(0, years or 5)),
-                "geo_tier": geo,
-                "industry": (industry or "Other").strip(),
-            }
+            last = rows[-1]
+        if not parts:
+            empty = np.empty(0, dtype=np.float32)
+            return cls(empty, empty, empty.astype(np.int8), empty.astype(np.int32), [], empty)
+        seniority, years, geo, industry_idx, target = (
+            np.concatenate(column) for column in zip(*parts, strict=True)
         )
-        y_list.append(float(rate))
-    return x_list, y_list
+        watermark = None
+        if last is not None and len(last) >= 8:
+            ts = last[6].isoformat() if isinstance(last[6], datetime) else str(last[6])
+            watermark = (ts, str(last[7]))
+        return cls(seniority, years, geo, industry_idx, list(industries), target, watermark)
 
 
-def _load_training_data_from_engagements(
-    limit: int = 2000,
-) -> tuple[list[dict[str, Any]], list[float]]:
-    """Fetch (expert features, actual_cost) from engagements for Feedback Loop retraining."""
+def _numeric_column(values: Sequence[Any], default: float) -> np.ndarray:
+    """Float32 column where NULL and 0 become `default` (the row-wise `value or default`)."""
+    arr = np.array(values, dtype=np.float64)
+    return np.where(np.isnan(arr) | (arr == 0), default, arr).astype(np.float32)
+
+
+def _factorize(values: Sequence[Any], missing: str = "") -> tuple[list[str], np.ndarray]:
+    """Distinct values in first-seen order (NULL -> `missing`) and each row's index into them."""
+    index: dict[Any, int] = {}
+    codes = np.fromiter(
+        (index.setdefault(v, len(index)) for v in values), dtype=np.int32, count=len(values)
+    )
+    return [missing if v is None else v for v in index], codes
+
+
+_geo_tier_cached = functools.lru_cache(maxsize=8192)(_geo_tier)
+
+
+def _geo_tier_column(regions: Sequence[Any], countries: Sequence[Any]) -> np.ndarray:
+    """Vectorized _geo_tier: the substring rules run once per distinct (region, country)."""
+    region_names, region_idx = _factorize(regions)
+    country_names, country_idx = _factorize(countries)
+    n_countries = len(country_names)
+    pair_codes = region_idx.astype(np.int64) * n_countries + country_idx
+    pairs, pair_idx = np.unique(pair_codes, return_inverse=True)
+    tiers = np.array(
+        [
+            _geo_tier_cached(region_names[p // n_countries], country_names[p % n_countries])
+            for p in pairs.tolist()
+        ],
+        dtype=np.int8,
+    )
+    return tiers[pair_idx.reshape(-1)]
+
+
+def _iter_training_chunks(query: str, params: tuple[Any, ...]) -> Iterator[list[tuple[Any, ...]]]:
+    """Stream query results in TRAINING_CHUNK_ROWS chunks through a server-side cursor."""
     with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT e.seniority_score, e.years_experience, e.region, e.country, e.industry, eng.actual_cost
-                FROM engagements eng
-                JOIN experts e ON e.id = eng.expert_id
-                WHERE eng.actual_cost > 0 AND eng.actual_cost < 2000
-                ORDER BY eng.date DESC
-                LIMIT %s
-                """,
-                (limit,),
-            )
-            rows = cur.fetchall()
-    if not rows:
-        return [], []
-    x_list: list[dict[str, Any]] = []
-    y_list: list[float] = []
-    for r in rows:
-        seniority, years, region, country, industry, actual_cost = r
-        geo = _geo_tier(region or "", country or "")
-        x_list.append(
-            {
-                "seniority_score": seniority or 50,
-                "years_experience": min(50, max(0, years or 5)),
-                "geo_tier": geo,
-                "industry": (industry or "Other").strip(),
-            }
-        )
-        y_list.append(float(actual_cost))
-    return x_list, y_list
+        with conn.cursor(name="rate_training") as cur:
+            cur.itersize = TRAINING_CHUNK_ROWS
+            cur.execute(query, params)
+            while rows := cur.fetchmany(TRAINING_CHUNK_ROWS):
+                admission.checkpoint()
+                yield rows
+
+
+def _load_training_data(since: Watermark | None = None, limit: int | None = None) -> TrainingFrame:
+    """Fetch experts with predicted_rate as target, oldest first, after the `since` watermark."""
+    after = "AND (updated_at, id) > (%s::timestamp, %s)" if since else ""
+    query = f"""
+        SELECT seniority_score, years_experience, region, country, industry, predicted_rate,
+               updated_at, id
+        FROM experts
+        WHERE predicted_rate > 0 AND predicted_rate < 2000 {after}
+        ORDER BY updated_at, id
+        LIMIT %s
+    """  # nosec B608 - only a fixed clause is interpolated
+    return TrainingFrame.from_chunks(_iter_training_chunks(query, (*(since or ()), limit)))
+
+
+def _load_training_data_from_engagements(
+    since: Watermark | None = None, limit: int | None = None
+) -> TrainingFrame:
+    """
+    Fetch (expert features, actual_cost) from engagements for Feedback Loop retraining, in
+    insert order (created_at): engagements are often recorded after their business date.
+    """
+    after = "AND (eng.created_at, eng.id) > (%s::timestamp, %s)" if since else ""
+    query = f"""
+        SELECT e.seniority_score, e.years_experience, e.region, e.country, e.industry,
+               eng.actual_cost, eng.created_at, eng.id
+        FROM engagements eng
+        JOIN experts e ON e.id = eng.expert_id
+        WHERE eng.actual_cost > 0 AND eng.actual_cost < 2000 {after}
+        ORDER BY eng.created_at, eng.id
+        LIMIT %s
+    """  # nosec B608 - only a fixed clause is interpolated
+    return TrainingFrame.from_chunks(_iter_training_chunks(query, (*(since or ()), limit)))
 
 
 def _encode_features(
-    x_list: list[dict[str, Any]],
-    industry_encoder: LabelEncoder | None = None,
+    frame: TrainingFrame,
+    vocabulary: IndustryVocabulary | None = None,
     fit: bool = False,
-) -> tuple[Any, LabelEncoder | None]:
-    """Convert dict list to numpy array. industry is label-encoded."""
-    industries = [x["industry"] for x in x_list]
-    if fit and industry_encoder is None:
-        industry_encoder = LabelEncoder()
-        industry_encoder.fit(industries)
-    if industry_encoder is not None:
-        try:
-            ind_encoded = industry_encoder.transform(industries)
-        except ValueError:
-            ind_encoded = np.zeros(len(industries), dtype=int)
-    else:
-        ind_encoded = np.zeros(len(industries), dtype=int)
+) -> tuple[np.ndarray, IndustryVocabulary]:
+    """Feature matrix for a frame. With fit=True, new industries are appended to the vocabulary."""
+    vocabulary = vocabulary if vocabulary is not None else IndustryVocabulary()
+    if fit:
+        vocabulary.extend(frame.industries)
+    arr = np.empty((len(frame), 4), dtype=np.float32)
+    # Scale in float64 like predict_rate does, so train and serve see identical inputs.
+    arr[:, 0] = frame.seniority.astype(np.float64) / 100.0
+    arr[:, 1] = frame.years.astype(np.float64) / 50.0
+    arr[:, 2] = frame.geo_tier.astype(np.float64) / 3.0
+    arr[:, 3] = vocabulary.transform(frame.industries)[frame.industry_idx]
+    return arr, vocabulary
 
-    arr = np.array(
-        [
-            [
-                x["seniority_score"] / 100.0,
-                x["years_experience"] / 50.0,
-                x["geo_tier"] / 3.0,
-                ind_encoded[i],
-            ]
-            for i, x in enumerate(x_list)
-        ],
-        dtype=np.float32,
+
+def _load_vocabulary() -> IndustryVocabulary:
+    if ENCODER_INDUSTRY_PATH.exists():
+        with open(ENCODER_INDUSTRY_PATH) as f:
+            return IndustryVocabulary(json.load(f))
+    return IndustryVocabulary()
+
+
+def load_training_meta() -> dict[str, Any] | None:
+    """Metadata of the last training run (mode, source, watermarks, tree count), if any."""
+    try:
+        with open(MODEL_META_PATH) as f:
+            meta: dict[str, Any] = json.load(f)
+            return meta
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _resolve_mode(mode: str, source: str, meta: dict[str, Any] | None) -> str:
+    """Pick full or incremental. Incremental needs XGBoost and a model trained on `source`."""
+    if mode not in TRAIN_MODES:
+        raise ValueError(f"mode must be one of {TRAIN_MODES}")
+    can_continue = (
+        HAS_XGB
+        and MODEL_PATH.exists()
+        and meta is not None
+        and meta.get("source") == source
+        and meta.get("watermark") is not None
+        # Watermarks read from another column (older runs) do not order the rows
+        and meta.get("watermark_column") == WATERMARK_COLUMNS[source]
     )
-    return arr, industry_encoder
+    if mode == "full" or not can_continue:
+        return "full"
+    if mode == "auto" and meta and int(meta.get("incremental_runs", 0)) >= FULL_RETRAIN_EVERY:
+        return "full"
+    return "incremental"
 
 
-def train_and_save(use_engagements: bool = False) -> dict[str, Any]:
-    """Train model on DB experts or engagement actuals (Feedback Loop). Saves to disk. Returns metrics."""
-    if use_engagements:
-        x_list, y_list = _load_training_data_from_engagements()
-    else:
-        x_list, y_list = _load_training_data()
-    if len(x_list) < 10:
-        return {
-            "ok": False,
-            "reason": "Not enough data (need at least 10 samples)",
-            "source": "engagements" if use_engagements else "experts",
+def train_and_save(
+    use_engagements: bool = False,
+    progress: Callable[[float, str], None] | None = None,
+    mode: str = "auto",
+) -> dict[str, Any]:
+    """
+    Train model on DB experts or engagement actuals (Feedback Loop). Saves to disk. Returns metrics.
+    mode="full" retrains from scratch on the complete dataset; "incremental" continues boosting
+    the saved model on rows newer than its watermark; "auto" runs incremental, with a full
+    retrain every FULL_RETRAIN_EVERY runs or when no compatible model exists.
+    `progress(fraction, message)` is called between phases when run as a background job.
+    """
+    report = progress or (lambda _fraction, _message: None)
+    source = "engagements" if use_engagements else "experts"
+    meta = load_training_meta()
+    mode = _resolve_mode(mode, source, meta)
+    since: Watermark | None = None
+    if mode == "incremental" and meta is not None:
+        since = (meta["watermark"][0], meta["watermark"][1])
+
+    report(0.05, f"loading training data ({mode})")
+    loader = _load_training_data_from_engagements if use_engagements else _load_training_data
+    frame = loader(since=since)
+    if len(frame) < MIN_TRAIN_SAMPLES:
+        # New rows stay behind the watermark and are picked up by the next run.
+        reason = "Not enough data (need at least 10 samples)"
+        if mode == "incremental":
+            reason = "Not enough new data since last train (need at least 10 samples)"
+        return {"ok": False, "reason": reason, "source": source, "mode": mode}
+
+    report(0.3, f"encoding {len(frame)} samples")
+    vocabulary = _load_vocabulary()
+    features, vocabulary = _encode_features(frame, vocabulary, fit=True)
+    y = frame.target
+
+    report(0.4, "fitting model")
+    # Fitting runs in the process pool; it writes the model files and returns their stats
+    fitted = process_pool.run(
+        "rate_model_fit", _fit_and_save, features, y, mode == "incremental", MODEL_PATH
+    )
+    mae, mae_before, trees = fitted["mae"], fitted["mae_before"], fitted["trees"]
+
+    with open(ENCODER_INDUSTRY_PATH, "w") as f:
+        json.dump(vocabulary.classes, f)
+
+    report(0.9, "evaluating")
+    incremental_runs = int((meta or {}).get("incremental_runs", 0)) + 1 if since else 0
+    _save_training_meta(
+        {
+            "mode": mode,
+            "source": source,
+            "watermark": list(frame.watermark) if frame.watermark else None,
+            "watermark_column": WATERMARK_COLUMNS[source],
+            "incremental_runs": incremental_runs,
+            "trees": trees,
+            "samples": len(frame),
+            "mae": mae,
+            "trained_at": datetime.now(tz=UTC).isoformat(),
         }
-    features, industry_encoder = _encode_features(x_list, fit=True)
-    if industry_encoder is None:
-        raise ValueError("Encoder required when fit=True")
-    y = np.array(y_list, dtype=np.float32)
+    )
+    result: dict[str, Any] = {
+        "ok": True,
+        "mode": mode,
+        "source": source,
+        "samples": len(frame),
+        "mae": mae,
+    }
+    if mae_before is not None:
+        result["mae_before"] = mae_before
+    if trees is not None:
+        result["trees"] = trees
+    return result
 
-    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+
+def _fit_and_save(
+    features: np.ndarray, y: np.ndarray, incremental: bool, model_path: Path
+) -> dict[str, Any]:
+    """
+    Fit on encoded features (continuing the saved XGBoost model when `incremental`), save
+    the model files at `model_path` (and beside it) and return {"mae", "mae_before",
+    "trees"}. Run as a process pool task, so paths come in as arguments: a spawned worker
+    does not see the caller's module globals. XGBoost checks for cancellation after every
+    boosting round.
+    """
+    model_dir = model_path.parent
+    model_dir.mkdir(parents=True, exist_ok=True)
+    mae_before: float | None = None
+    trees: int | None = None
     if HAS_XGB:
-        model = xgb.XGBRegressor(n_estimators=100, max_depth=4, learning_rate=0.1, random_state=42)
-        model.fit(features, y)
-        model.save_model(str(MODEL_PATH))
+        import xgboost as xgb
+
+        class Checkpoint(xgb.callback.TrainingCallback):
+            def after_iteration(self, model: Any, epoch: int, evals_log: Any) -> bool:
+                process_pool.checkpoint()
+                return False
+
+        previous = None
+        if incremental:
+            previous = xgb.XGBRegressor()
+            previous.load_model(str(model_path))
+            mae_before = round(float(np.mean(np.abs(previous.predict(features) - y))), 2)
+        model = xgb.XGBRegressor(
+            n_estimators=INCREMENTAL_ESTIMATORS if previous is not None else 100,
+            max_depth=4,
+            learning_rate=0.1,
+            random_state=42,
+            callbacks=[Checkpoint()],
+        )
+        model.fit(features, y, xgb_model=previous.get_booster() if previous is not None else None)
+        model.save_model(str(model_path))
+        _save_compiled(model, _compiled_path(model_path))
+        trees = int(model.get_booster().num_boosted_rounds())
     else:
+        from sklearn.linear_model import Ridge
+
         model = Ridge(alpha=1.0)
         model.fit(features, y)
-        np.save(MODEL_PATH.with_suffix(".npy"), model.coef_)
-        np.save(
-            MODEL_PATH.with_suffix(".npy").with_name("rate_intercept.npy"),
-            np.array([model.intercept_]),
-        )
+        np.save(model_dir / "rate_coef.npy", model.coef_)
+        np.save(model_dir / "rate_intercept.npy", np.array([model.intercept_]))
+        np.save(model_dir / "rate_n_features.npy", np.array([features.shape[1]]))
 
-    with open(ENCODER_INDUSTRY_PATH, "w") as f:
-        json.dump(industry_encoder.classes_.tolist(), f)
+    mae = round(float(np.mean(np.abs(model.predict(features) - y))), 2)
+    return {"mae": mae, "mae_before": mae_before, "trees": trees}
 
-    pred = model.predict(features)
-    mae = float(np.mean(np.abs(pred - y)))
-    return {"ok": True, "samples": len(y_list), "mae": round(mae, 2)}
 
+def _save_training_meta(meta: dict[str, Any]) -> None:
+    tmp = MODEL_META_PATH.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, MODEL_META_PATH)
 
-def load_model() -> tuple[Any | None, LabelEncoder]:
-    """Load trained model and encoder from disk."""
-    industry_classes = []
-    if ENCODER_INDUSTRY_PATH.exists():
-        with open(ENCODER_INDUSTRY_PATH) as f:
-            industry_classes = json.load(f)
-    encoder = LabelEncoder()
-    encoder.classes_ = np.array(industry_classes) if industry_classes else np.array(["Other"])
+
+def _compiled_path(model_path: Path | None = None) -> Path:
+    return (model_path or MODEL_PATH).with_name("rate_model_trees.npz")
+
+
+def _save_compiled(model: Any, path: Path) -> None:
+    """Export the flattened tree arrays to `path`; drop stale ones if unsupported."""
+    try:
+        compiled = tree_predictor.compile_booster(model)
+    except ValueError as exc:
+        logger.warning("Rate model not compiled, XGBoost will serve all predictions: {}", exc)
+        path.unlink(missing_ok=True)
+        return
+    tmp = path.with_name("rate_model_trees.tmp.npz")
+    compiled.save(tmp)
+    os.replace(tmp, path)
+
+
+def _load_compiled(model: Any) -> "tree_predictor.CompiledEnsemble | None":
+    """Compiled arrays saved with the model, or compiled now for models saved before them."""
+    path = _compiled_path()
+    if path.exists() and path.stat().st_mtime_ns >= MODEL_PATH.stat().st_mtime_ns:
+        return tree_predictor.CompiledEnsemble.load(path)
+    try:
+        return tree_predictor.compile_booster(model)
+    except ValueError:
+        return None
+
+
+def load_model() -> tuple[Any | None, IndustryVocabulary]:
+    """
+    Load trained model and industry vocabulary from disk. XGBoost models are wrapped so
+    small batches (single suggested-rate calls) use the compiled tree evaluator.
+    """
+    vocabulary = _load_vocabulary()
 
     if HAS_XGB and MODEL_PATH.exists():
+        import xgboost as xgb
+
         model = xgb.XGBRegressor()
         model.load_model(str(MODEL_PATH))
-        return model, encoder
+        compiled = _load_compiled(model)
+        if compiled is not None:
+            return tree_predictor.HybridPredictor(compiled, model, COMPILED_MAX_ROWS), vocabulary
+        return model, vocabulary
     if not HAS_XGB and (MODEL_DIR / "rate_coef.npy").exists():
+        from sklearn.linear_model import Ridge
+
         coef = np.load(MODEL_DIR / "rate_coef.npy")
         intercept = np.load(MODEL_DIR / "rate_intercept.npy")[0]
         n_f = int(np.load(MODEL_DIR / "rate_n_features.npy")[0])
@@ -217,8 +496,41 @@ def load_model() -> tuple[Any | None, LabelEncoder]:
         model.coef_ = coef
         model.intercept_ = intercept
         model.n_features_in_ = n_f
-        return model, encoder
-    return None, encoder
+        return model, vocabulary
+    return None, vocabulary
+
+
+_model_cache: tuple[tuple[Any, ...], Any | None, IndustryVocabulary] | None = None
+_model_lock = threading.Lock()
+
+
+def _model_stamp() -> tuple[Any, ...]:
+    """Identity of the on-disk model files: paths plus modification times."""
+    paths = (MODEL_PATH, _compiled_path(), ENCODER_INDUSTRY_PATH, MODEL_DIR / "rate_coef.npy")
+    return tuple((str(p), p.stat().st_mtime_ns if p.exists() else 0) for p in paths)
+
+
+def get_model() -> tuple[Any | None, IndustryVocabulary]:
+    """load_model(), cached in-process until the model files change on disk."""
+    global _model_cache
+    stamp = _model_stamp()
+    cached = _model_cache
+    if cached is not None and cached[0] == stamp:
+        return cached[1], cached[2]
+    with _model_lock:
+        if _model_cache is None or _model_cache[0] != stamp:
+            model, encoder = load_model()
+            _model_cache = (stamp, model, encoder)
+        return _model_cache[1], _model_cache[2]
+
+
+def model_version() -> str:
+    """Version label of the persisted rate model (save time, UTC), or 'untrained'."""
+    path = MODEL_PATH if HAS_XGB else MODEL_DIR / "rate_coef.npy"
+    if not path.exists():
+        return "untrained"
+    mtime = datetime.fromtimestamp(path.stat().st_mtime, tz=UTC)
+    return mtime.strftime("%Y%m%dT%H%M%SZ")
 
 
 def predict_rate(
@@ -228,13 +540,12 @@ def predict_rate(
     Return suggested market rate (point estimate and range).
     Range is ±20% around prediction (or MAE-based if we had it stored).
     """
-    model, encoder = load_model()
+    model, encoder = get_model()
     geo = _geo_tier(region or "", country or "")
-    ind = (industry or "Other").strip()
-    try:
-        ind_encoded = encoder.transform([ind])[0]
-    except ValueError:
-        ind_encoded = 0
+    ind_encoded = encoder.code(_industry_name(industry))
+    if np.isnan(ind_encoded) and model is not None and not HAS_XGB:
+        # A linear model has no missing-value branch: use the middle code
+        ind_encoded = (len(encoder.classes) - 1) / 2
     input_row = np.array(
         [
             [
@@ -0,0 +1,69 @@
+"""
+Readiness tracking and warm-up.
+Runs named warm-up steps (DB pool, rate model, graph snapshot, keyword index) once in a
+background thread; /ready reports ready only after every step has succeeded.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from loguru import logger
+
+
+class Readiness:
+    """Runs warm-up steps in order in a background thread and records their outcome."""
+
+    def __init__(self, steps: dict[str, Callable[[], Any]]) -> None:
+        self._steps = steps
+        self._done: dict[str, float] = {}
+        self._errors: dict[str, str] = {}
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return len(self._done) == len(self._steps)
+
+    def start(self) -> None:
+        """Start (or retry) warm-up unless it is already running or complete."""
+        with self._lock:
+            if self.ready or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name="warm-up", daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.ready
+
+    def _run(self) -> None:
+        for name, step in self._steps.items():
+            if name in self._done:
+                continue
+            start = time.perf_counter()
+            try:
+                step()
+            except Exception as exc:
+                self._errors[name] = str(exc) or type(exc).__name__
+                logger.warning("Warm-up step {} failed: {}", name, exc)
+                continue
+            self._done[name] = round((time.perf_counter() - start) * 1000, 1)
+            self._errors.pop(name, None)
+            logger.info("Warm-up step {} done in {} ms", name, self._done[name])
+
+    def status(self) -> dict[str, Any]:
+        running = self._thread is not None and self._thread.is_alive()
+        components: dict[str, Any] = {}
+        for name in self._steps:
+            if name in self._done:
+                components[name] = {"ready": True, "warm_ms": self._done[name]}
+            else:
+                components[name] = {"ready": False, "error": self._errors.get(name)}
+        return {
+            "status": "ready" if self.ready else ("warming" if running else "not_ready"),
+            "components": components,
+        }
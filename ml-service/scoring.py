@@ -5,10 +5,9 @@ Combines semantic similarity with weighted features and XGBoost re-ranking.
 
 from typing import TYPE_CHECKING, Any
 
-import pandas as pd
-import xgboost as xgb
-
 if TYPE_CHECKING:
+    import numpy as np
+
     from graph_engine import GraphEngine
 
 
@@ -16,7 +15,9 @@ class ExpertRanker:
     """
     Computes composite scores for experts against a client brief.
     Weights: Seniority 0.25, Industry 0.35, Rate 0.2, Network Influence 0.2.
-    Semantic similarity is combined as a multiplier.
+    Semantic similarity is combined as a multiplier. Network Influence is PageRank
+    personalized to the brief's industry and skill nodes, or global PageRank when the
+    brief matches none.
     """
 
     WEIGHT_SENIORITY = 0.25
@@ -30,6 +31,9 @@ class ExpertRanker:
         self.target_industry = (self.client_brief.get("industry") or "").lower()
         self.target_sub_industry = (self.client_brief.get("sub_industry") or "").lower()
         self.target_region = (self.client_brief.get("region") or "").lower()
+        self._influence: np.ndarray | None = (
+            graph_engine.project_influence(self.client_brief) if graph_engine else None
+        )
 
     def _normalize(self, value: float, min_val: float, max_val: float) -> float:
         """Normalize value to [0, 1] range."""
@@ -73,7 +77,9 @@ class ExpertRanker:
         if self.graph_engine:
             expert_id = expert.get("id")
             if expert_id is not None:
-                network_norm = self.graph_engine.get_network_influence(str(expert_id))
+                network_norm = self.graph_engine.get_network_influence(
+                    str(expert_id), self._influence
+                )
 
         # Weighted composite (before semantic)
         weighted = (
@@ -141,6 +147,10 @@ def run_xgboost_ranker(experts: list[dict[str, Any]]) -> list[dict[str, Any]]:
         ex.setdefault("confidence_score", ex.get("confidence_score", 0.5))
         return [ex]
 
+    # Heavy imports deferred to first use to keep service startup fast
+    import pandas as pd
+    import xgboost as xgb
+
     df = pd.DataFrame(
         [
             {
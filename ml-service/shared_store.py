@@ -0,0 +1,192 @@
+"""
+Cross-worker shared array store.
+Large read-only structures (graph snapshot, centrality, expert columns, embedding
+matrices) are published once as .npy files under ML_SHARED_DIR (ideally on /dev/shm)
+and memory-mapped read-only by every uvicorn worker, so N workers share one copy.
+
+Layout per store name:
+    <ML_SHARED_DIR>/<name>/<version>/<array>.npy   immutable once published
+    <ML_SHARED_DIR>/<name>/current.json            manifest, swapped atomically
+    <ML_SHARED_DIR>/<name>/.lock                   flock so only one worker rebuilds
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+import metrics
+
+MANIFEST = "current.json"
+# Versions kept on disk besides the current one (workers may still map them).
+KEEP_OLD_VERSIONS = 2
+
+
+def shared_dir() -> Path | None:
+    """Root directory of the store, or None when sharing is disabled (ML_SHARED_DIR unset)."""
+    root = os.getenv("ML_SHARED_DIR")
+    return Path(root) if root else None
+
+
+def enabled() -> bool:
+    return shared_dir() is not None
+
+
+@dataclass
+class SharedArrays:
+    """One published version: read-only memory-mapped arrays plus its manifest metadata."""
+
+    name: str
+    version: str
+    published_at: float
+    meta: dict[str, Any]
+    arrays: dict[str, np.ndarray] = field(repr=False)
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.published_at
+
+
+_attached: dict[str, SharedArrays] = {}
+_attach_lock = threading.Lock()
+
+
+def _store_dir(name: str) -> Path:
+    root = shared_dir()
+    if root is None:
+        raise RuntimeError("Shared store disabled: set ML_SHARED_DIR")
+    return root / name
+
+
+def _read_manifest(name: str) -> dict[str, Any] | None:
+    try:
+        with open(_store_dir(name) / MANIFEST) as f:
+            data: dict[str, Any] = json.load(f)
+            return data
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def current_version(name: str) -> str | None:
+    """Version id of the current publication (one small file read), or None."""
+    manifest = _read_manifest(name)
+    return str(manifest["version"]) if manifest else None
+
+
+def current_meta(name: str) -> dict[str, Any] | None:
+    """Metadata of the current publication (without mapping its arrays), or None."""
+    manifest = _read_manifest(name)
+    return dict(manifest.get("meta") or {}) if manifest else None
+
+
+def publish(name: str, arrays: dict[str, np.ndarray], meta: dict[str, Any] | None = None) -> str:
+    """
+    Write `arrays` as a new immutable version and atomically make it current.
+    Returns the new version id. Older versions beyond KEEP_OLD_VERSIONS are removed;
+    on POSIX, workers that still map them keep valid mappings until they re-attach.
+    """
+    base = _store_dir(name)
+    base.mkdir(parents=True, exist_ok=True)
+    version = f"{time.time_ns():x}-{uuid.uuid4().hex[:6]}"
+    staging = base / f".staging-{version}"
+    staging.mkdir()
+    for key, arr in arrays.items():
+        np.save(staging / f"{key}.npy", np.ascontiguousarray(arr), allow_pickle=False)
+    os.rename(staging, base / version)
+
+    manifest = {
+        "version": version,
+        "published_at": time.time(),
+        "arrays": sorted(arrays),
+        "meta": meta or {},
+    }
+    tmp = base / f".{MANIFEST}.{version}"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, base / MANIFEST)
+    _prune(base, keep=version)
+    return version
+
+
+def _prune(base: Path, keep: str) -> None:
+    versions = sorted(
+        (p for p in base.iterdir() if p.is_dir() and not p.name.startswith(".")),
+        key=lambda p: p.stat().st_mtime,
+    )
+    stale = [p for p in versions if p.name != keep][: -KEEP_OLD_VERSIONS or None]
+    for path in stale:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def attach(name: str) -> SharedArrays | None:
+    """
+    Memory-map the current version of `name` read-only. Re-attaches when another worker
+    has published a newer version; returns None if nothing is published.
+    """
+    manifest = _read_manifest(name)
+    if manifest is None:
+        return None
+    version = str(manifest["version"])
+    cached = _attached.get(name)
+    if cached is not None and cached.version == version:
+        return cached
+    with _attach_lock:
+        cached = _attached.get(name)
+        if cached is not None and cached.version == version:
+            return cached
+        vdir = _store_dir(name) / version
+        try:
+            arrays = {
+                key: np.load(vdir / f"{key}.npy", mmap_mode="r", allow_pickle=False)
+                for key in manifest["arrays"]
+            }
+        except FileNotFoundError:
+            return None  # pruned between manifest read and open; caller rebuilds
+        shared = SharedArrays(
+            name=name,
+            version=version,
+            published_at=float(manifest["published_at"]),
+            meta=dict(manifest.get("meta") or {}),
+            arrays=arrays,
+        )
+        _attached[name] = shared
+        return shared
+
+
+def retire(name: str) -> None:
+    """Withdraw the current version so the next reader in any worker rebuilds."""
+    try:
+        os.remove(_store_dir(name) / MANIFEST)
+    except FileNotFoundError:
+        pass
+    _attached.pop(name, None)
+
+
+@contextmanager
+def publish_lock(name: str) -> Generator[None, None, None]:
+    """Inter-process exclusive lock: one worker rebuilds while the others wait, then attach."""
+    base = _store_dir(name)
+    base.mkdir(parents=True, exist_ok=True)
+    with open(base / ".lock", "a+") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def attached_count() -> int:
+    return len(_attached)
+
+
+metrics.register_cache("shared_arrays", attached_count)
@@ -0,0 +1,117 @@
+"""
+Single-flight request coalescing. Concurrent calls with the same key share one in-flight
+computation: the first caller starts it, every caller blocks until it finishes and gets
+the same result (or exception). Nothing is kept once the call completes; the caches
+behind the computation decide what is reused afterwards.
+
+The computation runs on a thread of its own, under a request context without a deadline
+(see admission.attached()). Each caller waits no longer than its own request allows,
+and raises its DeadlineExceededError or RequestCancelledError; the computation carries
+on for the others. Once every caller has gone, that context is cancelled, so the
+computation stops at its next checkpoint (a process pool task is cancelled with it).
+"""
+
+import contextvars
+import math
+import threading
+import time
+from collections.abc import Callable, Hashable
+from typing import Generic, TypeVar, cast
+
+import admission
+import metrics
+import profiling
+
+T = TypeVar("T")
+
+# How often a waiting caller checks whether its request was cancelled
+WAIT_POLL_SECONDS = 0.05
+
+
+class _Call(Generic[T]):
+    __slots__ = ("done", "result", "error", "waiters", "context")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: T | None = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+        self.context = admission.RequestContext(math.inf)
+
+
+class SingleFlight(Generic[T]):
+    """
+    One group of coalesced calls, named for ml_singleflight_* metrics. Results are shared
+    between callers, so they must be treated as read-only.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: dict[Hashable, _Call[T]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """fn() for `key`, or the result of the identical call already in flight."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+                # The leader's context (logging, profiling) carries over to the computation
+                context = contextvars.copy_context()
+                threading.Thread(
+                    target=context.run,
+                    args=(self._run, key, call, fn),
+                    name=f"singleflight-{self.name}",
+                    daemon=True,
+                ).start()
+            call.waiters += 1
+        metrics.observe_singleflight_call(self.name, joined=not leader)
+        start = time.perf_counter()
+        try:
+            _wait(call.done)
+        except BaseException:
+            self._leave(key, call)
+            raise
+        finally:
+            if not leader:
+                metrics.observe_singleflight_wait(self.name, time.perf_counter() - start)
+        if call.error is not None:
+            raise call.error
+        return cast(T, call.result)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _run(self, key: Hashable, call: _Call[T], fn: Callable[[], T]) -> None:
+        try:
+            with admission.attached(call.context):
+                call.result = profiling.profiled(fn)()
+        except BaseException as exc:
+            call.error = exc
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def _leave(self, key: Hashable, call: _Call[T]) -> None:
+        """A caller gave up; with nobody left, cancel the computation."""
+        with self._lock:
+            call.waiters -= 1
+            if call.waiters > 0 or call.done.is_set():
+                return
+            # Later callers start afresh rather than join a computation that is stopping
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.context.cancelled.set()
+
+
+def _wait(done: threading.Event) -> None:
+    """Block until `done` is set, raising if the current request is cancelled or out of time."""
+    ctx = admission.current()
+    if ctx is None:
+        done.wait()
+        return
+    while not done.wait(max(0.0, min(ctx.remaining(), WAIT_POLL_SECONDS))):
+        ctx.check()
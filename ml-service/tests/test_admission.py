@@ -0,0 +1,208 @@
+"""Tests for admission control, request deadlines and cancellation (admission.py)."""
+
+import asyncio
+import math
+import threading
+import time
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import admission
+from admission import (
+    AdmissionMiddleware,
+    ClassLimits,
+    Limiter,
+    RejectedError,
+    RequestCancelledError,
+    RequestContext,
+)
+from main import app as ml_app
+from singleflight import SingleFlight
+
+
+def _ctx(seconds: float = 10.0) -> RequestContext:
+    return RequestContext(time.monotonic() + seconds)
+
+
+def test_limiter_queues_in_order_and_sheds_when_full() -> None:
+    async def scenario() -> list[Any]:
+        limiter = Limiter("test", ClassLimits(concurrency=1, queue=2, timeout_seconds=10))
+        gone = asyncio.Event()
+        assert await limiter.acquire(_ctx(), gone) == 0.0
+        order: list[int] = []
+
+        async def queued(i: int) -> None:
+            await limiter.acquire(_ctx(), gone)
+            order.append(i)
+
+        waiters = [asyncio.ensure_future(queued(i)) for i in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(RejectedError) as full:
+            await limiter.acquire(_ctx(), gone)
+        assert (full.value.status, full.value.reason) == (429, "queue_full")
+
+        limiter.release(0.01)
+        await waiters[0]
+        limiter.release(0.01)
+        await waiters[1]
+        limiter.release(0.01)
+        return [order, limiter.active, limiter.queued]
+
+    assert asyncio.run(scenario()) == [[0, 1], 0, 0]
+
+
+def test_limiter_rejects_requests_that_cannot_meet_their_deadline() -> None:
+    async def scenario() -> None:
+        limiter = Limiter("test", ClassLimits(concurrency=1, queue=8, timeout_seconds=10))
+        limiter._service_seconds = 1.0
+        gone = asyncio.Event()
+        with pytest.raises(RejectedError) as early:
+            await limiter.acquire(_ctx(0.5), gone)
+        assert (early.value.status, early.value.reason) == (503, "deadline")
+
+        await limiter.acquire(_ctx(), gone)
+        limiter._service_seconds = 0.01  # the estimate says it fits; the holder disagrees
+        with pytest.raises(RejectedError) as expired:
+            await limiter.acquire(_ctx(0.1), gone)
+        assert expired.value.reason == "expired" and limiter.queued == 0
+
+        waiter = asyncio.ensure_future(limiter.acquire(_ctx(), gone))
+        await asyncio.sleep(0.01)
+        gone.set()
+        with pytest.raises(RequestCancelledError):
+            await waiter
+        assert limiter.queued == 0 and limiter.active == 1
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def work_app(
+    monkeypatch: pytest.MonkeyPatch,
+) -> Generator[tuple[FastAPI, threading.Event], None, None]:
+    monkeypatch.setenv("ML_ADMISSION_FAST_CONCURRENCY", "1")
+    monkeypatch.setenv("ML_ADMISSION_FAST_QUEUE", "0")
+    app = FastAPI()
+    release = threading.Event()
+
+    @app.post("/work")
+    def work(block: bool = False) -> dict[str, Any]:
+        if block:
+            release.wait(5)
+        return {"remaining": admission.remaining_seconds()}
+
+    @app.post("/open")
+    def open_route() -> dict[str, Any]:
+        return {"remaining": admission.remaining_seconds()}
+
+    app.add_middleware(AdmissionMiddleware, classes={"/work": "fast"})
+    yield app, release
+    release.set()
+
+
+def test_middleware_applies_deadline_header_capped_at_class_timeout(
+    work_app: tuple[FastAPI, threading.Event],
+) -> None:
+    client = TestClient(work_app[0])
+    default = admission.DEFAULT_LIMITS["fast"].timeout_seconds
+
+    def remaining(headers: dict[str, str] | None = None, path: str = "/work") -> Any:
+        return client.post(path, headers=headers).json()["remaining"]
+
+    assert 1.5 < remaining({"X-Request-Timeout-Ms": "2000"}) <= 2.0
+    assert default - 1 < remaining({"X-Request-Timeout-Ms": "999999"}) <= default
+    assert default - 1 < remaining({"X-Request-Timeout-Ms": "soon"}) <= default
+    assert remaining(path="/open") is None  # unlisted routes are not limited
+
+
+def test_middleware_sheds_with_retry_after_when_saturated(
+    work_app: tuple[FastAPI, threading.Event],
+) -> None:
+    app, release = work_app
+    with TestClient(app) as client, ThreadPoolExecutor(1) as pool:
+        busy = pool.submit(client.post, "/work", params={"block": True})
+        limiter = next(iter(_middleware(app).limiters.values()))
+        while limiter.active == 0:
+            time.sleep(0.01)
+        shed = client.post("/work")
+        release.set()
+        assert busy.result(5).status_code == 200
+    assert shed.status_code == 429 and int(shed.headers["Retry-After"]) >= 1
+
+
+def _middleware(app: FastAPI) -> AdmissionMiddleware:
+    handler: Any = app.middleware_stack
+    while not isinstance(handler, AdmissionMiddleware):
+        handler = handler.app
+    return handler
+
+
+def test_disconnect_cancels_the_running_request() -> None:
+    seen: list[bool] = []
+    routes = FastAPI()
+    routes.post("/work")(lambda: None)
+
+    async def inner(scope: Any, receive: Any, send: Any) -> None:
+        ctx = admission.current()
+        assert ctx is not None
+        for _ in range(100):
+            if ctx.cancelled.is_set():
+                break
+            await asyncio.sleep(0.01)
+        seen.append(ctx.cancelled.is_set())
+        with pytest.raises(RequestCancelledError):
+            admission.checkpoint()
+
+    async def scenario() -> None:
+        messages: list[dict[str, Any]] = [
+            {"type": "http.request", "body": b"{}", "more_body": False},
+            {"type": "http.disconnect"},
+        ]
+
+        async def receive() -> dict[str, Any]:
+            if len(messages) == 1:
+                await asyncio.sleep(0.05)
+            return messages.pop(0)
+
+        async def send(_message: Any) -> None:
+            pass
+
+        scope = {"type": "http", "method": "POST", "path": "/work", "headers": [], "app": routes}
+        await AdmissionMiddleware(inner, {"/work": "fast"})(scope, receive, send)
+
+    asyncio.run(scenario())
+    assert seen == [True]
+
+
+def test_checkpoint_and_detached_work() -> None:
+    admission.checkpoint()  # outside a request: no-op
+    ctx = _ctx(-1.0)
+    token = admission._current.set(ctx)
+    try:
+        with pytest.raises(admission.DeadlineExceededError):
+            admission.checkpoint()
+        with admission.detached():
+            admission.checkpoint()
+            assert admission.remaining_seconds() is None
+        # A shared computation is not bound by the caller's deadline
+        flight: SingleFlight[float | None] = SingleFlight("test_detached")
+        with admission.detached():
+            assert flight.do("k", admission.remaining_seconds) == math.inf
+    finally:
+        admission._current.reset(token)
+
+
+def test_abandoned_work_maps_to_status_codes() -> None:
+    client = TestClient(ml_app)
+    for error, status in (
+        (admission.DeadlineExceededError("Request deadline exceeded"), 503),
+        (RequestCancelledError("Client disconnected"), admission.CLIENT_CLOSED_REQUEST),
+    ):
+        with patch("main.rank_page", side_effect=error):
+            assert client.post("/rank", json={"project_id": "p1"}).status_code == status
@@ -0,0 +1,96 @@
+"""Tests for multi-project ranking (/rank/batch)."""
+
+import json
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.synthetic import make_embeddings, make_experts
+
+PROJECTS = {
+    "p1": {"id": "p1", "title": "A", "filter_criteria": {"industry": "Finance", "brief": "M&A"}},
+    "p2": {"id": "p2", "title": "B", "filter_criteria": {"industry": "Finance", "brief": "M&A"}},
+    "p3": {"id": "p3", "title": "C", "filter_criteria": {"industry": "Energy"}},
+}
+EXPERTS = make_experts(40, seed=3)
+VECTORS = make_embeddings(40, dim=8, seed=3)
+
+
+QUERY = VECTORS[0] / np.linalg.norm(VECTORS[0])
+
+
+def _recall_pool(
+    filters: dict[str, Any], embedding: Any, limit: int = 5000
+) -> tuple[list[dict[str, Any]], dict[str, float]]:
+    pool = [e for e in EXPERTS if e["industry"] == filters.get("industry")]
+    if embedding is None:
+        return pool[:limit], {}
+    sims = {e["id"]: float(VECTORS[EXPERTS.index(e)] @ QUERY) for e in pool}
+    return sorted(pool, key=lambda e: -sims[e["id"]])[:limit], sims
+
+
+@pytest.fixture
+def fakes() -> Generator[dict[str, MagicMock], None, None]:
+    with (
+        patch(
+            "batch_rank.fetch_projects",
+            side_effect=lambda ids: {i: PROJECTS[i] for i in ids if i in PROJECTS},
+        ) as projects,
+        patch("rank_sessions.fetch_recall_pool", side_effect=_recall_pool) as recall,
+        patch(
+            "batch_rank.get_embeddings",
+            side_effect=lambda texts: [VECTORS[0].tolist() for _ in texts],
+        ) as embed,
+        patch("batch_rank.get_graph_snapshot", side_effect=RuntimeError("no graph")),
+    ):
+        yield {"projects": projects, "recall": recall, "embed": embed}
+
+
+def _post(ids: list[str]) -> list[dict[str, Any]]:
+    from main import app
+
+    r = TestClient(app).post("/rank/batch", json={"project_ids": ids})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in r.text.splitlines()]
+
+
+def test_batch_shares_fetches_and_streams_in_order(fakes: dict[str, MagicMock]) -> None:
+    results = _post(["p3", "missing", "p1", "p2"])
+    assert [r["project_id"] for r in results] == ["p3", "missing", "p1", "p2"]
+    assert results[1] == {"project_id": "missing", "error": "Project not found"}
+    assert results[2]["ranked_experts"] == results[3]["ranked_experts"]
+    assert results[0]["ranked_experts"] and results[2]["ranked_experts"]
+
+    fakes["projects"].assert_called_once()
+    assert fakes["embed"].call_count == 1
+    assert fakes["embed"].call_args.args[0] == ["Energy", "Finance M&A"]
+    # p1 and p2 share one recall; every recall goes through the /rank pool query
+    assert fakes["recall"].call_count == 2
+    assert all(c.args[1] == VECTORS[0].tolist() for c in fakes["recall"].call_args_list)
+
+
+def test_batch_matches_single_rank(fakes: dict[str, MagicMock]) -> None:
+    from main import app
+
+    with (
+        patch("rank_sessions.fetch_project", side_effect=PROJECTS.get),
+        patch("rank_sessions.get_embedding", return_value=VECTORS[0].tolist()),
+        patch("rank_sessions.get_graph_snapshot", side_effect=RuntimeError("no graph")),
+    ):
+        single = TestClient(app).post("/rank", json={"project_id": "p1"}).json()
+    batch = _post(["p1"])[0]
+    assert [e["expert_id"] for e in batch["ranked_experts"]] == [
+        e["expert_id"] for e in single["ranked_experts"]
+    ]
+
+
+def test_batch_falls_back_without_embeddings(fakes: dict[str, MagicMock]) -> None:
+    fakes["embed"].side_effect = ValueError("no API key")
+    results = _post(["p1"])
+    assert results[0]["ranked_experts"]
+    assert fakes["recall"].call_args.args[1] is None
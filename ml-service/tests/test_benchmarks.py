@@ -0,0 +1,59 @@
+"""Tests for the benchmark harness and synthetic data generators."""
+
+from benchmarks.run import find_regressions, run_benchmarks
+from benchmarks.synthetic import make_embeddings, make_experts, make_rate_training_rows
+
+
+def test_make_experts_is_seeded() -> None:
+    a = make_experts(50, seed=1)
+    b = make_experts(50, seed=1)
+    c = make_experts(50, seed=2)
+    assert a == b
+    assert a != c
+    assert len({e["id"] for e in a}) == 50
+    for e in a:
+        assert isinstance(e["past_employers"], list)
+        assert isinstance(e["skills"], list)
+        assert 0 <= e["seniority_score"] <= 100
+
+
+def test_make_embeddings_unit_norm() -> None:
+    mat = make_embeddings(8, dim=16, seed=3)
+    assert mat.shape == (8, 16)
+    norms = (mat**2).sum(axis=1)
+    assert all(abs(n - 1.0) < 1e-5 for n in norms)
+
+
+def test_make_rate_training_rows_shape() -> None:
+    rows = make_rate_training_rows(20)
+    assert len(rows) == 20
+    assert all(len(r) == 6 and 0 < r[5] < 2000 for r in rows)
+
+
+def test_find_regressions_respects_threshold_and_noise_floor() -> None:
+    baselines = {
+        "graph_build@1000": {"seconds": 1.0, "peak_mb": 20.0},
+        "rank_experts@1000": {"seconds": 0.001, "peak_mb": 0.5},
+    }
+    results = {
+        "graph_build@1000": {"seconds": 1.8, "peak_mb": 21.0},
+        "rank_experts@1000": {"seconds": 0.003, "peak_mb": 0.9},
+        "new_bench@1000": {"seconds": 5.0, "peak_mb": 5.0},
+    }
+    regressions = find_regressions(results, baselines, threshold=0.5)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("graph_build@1000 seconds")
+
+
+def test_run_benchmarks_small_sizes() -> None:
+    results = run_benchmarks(
+        ["rank_experts", "graph_build"],
+        [30, 2500],
+        repeat=1,
+        log=lambda _msg: None,
+    )
+    # graph_build is capped at 2000 by default
+    assert set(results) == {"rank_experts@30", "rank_experts@2500", "graph_build@30"}
+    for res in results.values():
+        assert res["seconds"] >= 0
+        assert res["peak_mb"] >= 0
@@ -0,0 +1,83 @@
+"""Tests for single-pass CV signal extraction against the original per-keyword checks."""
+
+import random
+import re
+from collections.abc import Generator
+
+import pytest
+
+import cv_signals
+from cv_signals import extract_signals
+
+
+def _reference(text: str) -> tuple[int, bool, int, float]:
+    """The original /predict-rate handler logic, one `in` scan per keyword."""
+    m = re.search(r"(\d+)\s*(?:years?|yrs?|y\.?)\s*(?:of\s+)?(?:experience|exp\.?)", text, re.I)
+    seniority = 50
+    if any(w in text for w in ["c-level", "ceo", "cto", "cfo", "chief", "vp", "vice president"]):
+        seniority = 90
+    elif any(w in text for w in ["director", "head of", "senior director"]):
+        seniority = 75
+    elif any(w in text for w in ["senior", "lead", "principal", "manager"]):
+        seniority = 65
+    elif any(w in text for w in ["junior", "associate", "analyst"]):
+        seniority = 35
+    geo = 1.0
+    if any(
+        w in text for w in ["usa", "united states", "san francisco", "new york", "london", "uk"]
+    ):
+        geo = 1.2
+    elif any(w in text for w in ["india", "pakistan", "philippines"]):
+        geo = 0.6
+    return (int(m.group(1)) if m else 5), m is not None, seniority, geo
+
+
+WORDS = (
+    "ceo vp director head of senior lead principal manager junior associate analyst usa uk "
+    "london india philippines nalyst ssociate the of worked at 12 years experience 3 yrs exp "
+    "7y experience consulting strategy"
+).split()
+
+
+@pytest.fixture(params=["automaton", "substring"])
+def matcher(request: pytest.FixtureRequest) -> Generator[None, None, None]:
+    if request.param == "automaton":
+        pytest.importorskip("ahocorasick")
+    saved = cv_signals._automaton
+    if request.param == "substring":
+        cv_signals._automaton = None
+    yield
+    cv_signals._automaton = saved
+
+
+def test_matches_reference_on_random_texts(matcher: None) -> None:
+    rng = random.Random(7)
+    for _ in range(2000):
+        sep = rng.choice([" ", ""])  # no separator exercises overlapping keywords
+        text = sep.join(rng.choice(WORDS) for _ in range(rng.randint(0, 30)))
+        s = extract_signals(text)
+        assert (s.years, s.years_found, s.seniority, s.geo_multiplier) == _reference(text), text
+
+
+def test_overlapping_keywords_are_all_found(matcher: None) -> None:
+    # "usa" and "analyst" overlap on the shared "a"
+    s = extract_signals("worked in usanalyst roles")
+    assert (s.seniority, s.geo_multiplier) == (35, 1.2)
+
+
+def test_automaton_agrees_with_substring_fallback() -> None:
+    pytest.importorskip("ahocorasick")
+    assert cv_signals._automaton is not None
+    rng = random.Random(11)
+    texts = [
+        rng.choice([" ", ""]).join(rng.choice(WORDS) for _ in range(rng.randint(0, 40)))
+        for _ in range(2000)
+    ]
+    with_automaton = [extract_signals(t) for t in texts]
+    saved = cv_signals._automaton
+    cv_signals._automaton = None
+    try:
+        fallback = [extract_signals(t) for t in texts]
+    finally:
+        cv_signals._automaton = saved
+    assert with_automaton == fallback
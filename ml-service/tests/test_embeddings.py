@@ -0,0 +1,154 @@
+"""Tests for the resilient embedding client (embeddings.py)."""
+
+import threading
+import time
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+import admission
+import embeddings
+from embeddings import (
+    CircuitBreaker,
+    EmbeddingClient,
+    EmbeddingTimeoutError,
+    EmbeddingUnavailableError,
+)
+from loadtest.fake_embeddings import FakeEmbeddingServer, fake_embedding
+from main import app
+
+
+class FakeSend:
+    """Scripted provider: each attempt takes the next (delay, error) step, then the last."""
+
+    def __init__(self, *steps: tuple[float, Exception | None]) -> None:
+        self.steps = list(steps)
+        self.calls = 0
+        self.timeouts: list[float] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, inputs: embeddings.Inputs, timeout: float) -> list[list[float]]:
+        with self._lock:
+            delay, error = self.steps[min(self.calls, len(self.steps) - 1)]
+            self.calls += 1
+            self.timeouts.append(timeout)
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return [[0.1, 0.2]]
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _hedge_wins() -> float:
+    return REGISTRY.get_sample_value("ml_embedding_hedge_wins_total") or 0.0
+
+
+def _timed(fn: Any) -> tuple[Any, float]:
+    start = time.monotonic()
+    return fn(), time.monotonic() - start
+
+
+def test_slow_first_attempt_is_hedged_at_p95() -> None:
+    send = FakeSend((1.0, None), (0.01, None))
+    client = EmbeddingClient(send, timeout_seconds=5)
+    for _ in range(embeddings.LATENCY_MIN_SAMPLES):
+        client.latency.add(0.02)
+    wins = _hedge_wins()
+
+    result, seconds = _timed(lambda: client.embed("brief"))
+    assert result == [[0.1, 0.2]] and seconds < 0.5
+    assert send.calls == 2 and _hedge_wins() == wins + 1
+
+
+def test_failed_attempt_is_retried_once_within_budget() -> None:
+    send = FakeSend((0.0, RuntimeError("reset")), (0.0, None))
+    assert EmbeddingClient(send).embed("brief") == [[0.1, 0.2]]
+    assert send.calls == 2
+
+    send = FakeSend((0.0, RuntimeError("reset")))
+    client = EmbeddingClient(send)
+    with pytest.raises(EmbeddingUnavailableError):
+        client.embed("brief")
+    with pytest.raises(EmbeddingUnavailableError):
+        client.embed("brief")  # the one-retry burst is spent: a single attempt
+    assert send.calls == 3
+
+
+def test_client_errors_are_not_retried_or_counted_against_the_provider() -> None:
+    send = FakeSend((0.0, StatusError(400)))
+    client = EmbeddingClient(send, breaker=CircuitBreaker(failures=1))
+    for _ in range(3):
+        with pytest.raises(StatusError):
+            client.embed("x" * 10_000)
+    assert send.calls == 3 and client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_calls_stop_waiting_at_their_deadline() -> None:
+    send = FakeSend((1.0, None))
+    with pytest.raises(EmbeddingTimeoutError):
+        EmbeddingClient(send, timeout_seconds=0.1).embed("a")
+    assert send.timeouts[0] <= 0.1
+
+    token = admission._current.set(admission.RequestContext(time.monotonic() + 0.1))
+    try:
+        start = time.monotonic()
+        with pytest.raises(EmbeddingTimeoutError):
+            EmbeddingClient(send, timeout_seconds=5).embed("b")
+        assert time.monotonic() - start < 0.5
+    finally:
+        admission._current.reset(token)
+
+
+def test_circuit_opens_fails_fast_and_recovers_through_a_probe() -> None:
+    send = FakeSend((0.0, RuntimeError("down")))
+    breaker = CircuitBreaker(failures=2, cooldown_seconds=0.2)
+    client = EmbeddingClient(send, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(EmbeddingUnavailableError):
+            client.embed("a")
+    assert breaker.state == CircuitBreaker.OPEN
+    calls = send.calls
+    with pytest.raises(EmbeddingUnavailableError, match="circuit open") as fast:
+        client.embed("a")
+    assert send.calls == calls and fast.value.retry_after >= 1
+
+    time.sleep(0.25)
+    send.steps = [(0.0, None)]
+    assert client.embed("a") == [[0.1, 0.2]]
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.fixture
+def fake_provider() -> Generator[FakeEmbeddingServer, None, None]:
+    with FakeEmbeddingServer(latency_ms=5) as server:
+        with (
+            patch("embeddings._api_key", "test"),
+            patch("embeddings._base_url", server.url),
+            patch("embeddings._client", None),
+        ):
+            yield server
+
+
+def test_openai_client_against_a_provider(fake_provider: FakeEmbeddingServer) -> None:
+    one = embeddings.get_embedding("a brief")
+    many = embeddings.get_embeddings(["a brief", "another"])
+    assert np.allclose(one, fake_embedding("a brief"), atol=1e-6)
+    assert np.allclose(many, [fake_embedding("a brief"), fake_embedding("another")], atol=1e-6)
+    assert fake_provider.requests == 2
+
+
+def test_embeddings_endpoint_reports_unavailability() -> None:
+    error = EmbeddingUnavailableError("Embedding provider circuit open", retry_after=12.5)
+    with patch("main.get_embedding", side_effect=error):
+        r = TestClient(app).post("/embeddings", json={"text": "a brief"})
+    assert r.status_code == 503 and r.headers["Retry-After"] == "13"
@@ -1,18 +1,26 @@
 """Tests for GraphEngine."""
 
+import threading
 from typing import Any
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 
+from benchmarks.synthetic import make_experts
+
 # Import after patching database to avoid DB connection at import
 from graph_engine import (
+    EDGE_SAME_SUBINDUSTRY,
+    EDGE_SHARED_EMPLOYER,
+    EDGE_TYPE_BITS,
     NODE_GROUP_COMPANY,
     NODE_GROUP_EXPERT,
     NODE_GROUP_INDUSTRY,
     NODE_GROUP_SKILL,
     GraphEngine,
 )
+from graph_queries import GraphIndex
 
 
 @pytest.fixture
@@ -111,3 +119,150 @@ def test_get_network_influence_known_expert(
     # exp1 has more connections (2 companies, 2 skills) than exp2
     score = engine.get_network_influence("exp1")
     assert 0 <= score <= 1.0
+
+
+@patch("graph_engine.fetch_experts_for_graph")
+def test_personalized_influence_follows_project_seeds(mock_fetch: Any) -> None:
+    experts = [
+        {"id": f"fin{i}", "name": f"F{i}", "industry": "Finance", "sub_industry": "Banking"}
+        for i in range(3)
+    ] + [
+        {"id": f"nrg{i}", "name": f"E{i}", "industry": "Energy", "sub_industry": "Renewables"}
+        for i in range(3)
+    ]
+    mock_fetch.return_value = experts
+    engine = GraphEngine()
+    engine.build_knowledge_graph(limit=10)
+
+    finance = engine.project_influence({"industry": "finance"})
+    energy = engine.project_influence({"industry": "Energy"})
+    assert finance is not None and energy is not None
+    assert engine.get_network_influence("fin0", finance) == 1.0
+    assert engine.get_network_influence("nrg0", finance) < 0.1
+    assert engine.get_network_influence("nrg0", energy) == 1.0
+    assert engine.project_influence({"industry": "Healthcare"}) is None
+    # Cached per (graph version, seeds)
+    assert engine.project_influence({"industry": "Finance"}) is finance
+
+
+@patch("graph_engine.fetch_experts_for_graph")
+def test_seed_nodes_match_filters_skills_and_brief(
+    mock_fetch: Any, mock_experts: list[dict[str, Any]]
+) -> None:
+    mock_fetch.return_value = mock_experts
+    engine = GraphEngine()
+    engine.build_knowledge_graph(limit=10)
+    labels = {i: d["label"] for i, d in engine._index_to_node.items()}
+
+    def seeded(filters: dict[str, Any]) -> set[str]:
+        return {labels[i] for i in engine.seed_nodes(filters)}
+
+    assert seeded({"industry": "Consult"}) == {"Consulting"}
+    assert seeded({"skills": ["strategy"]}) == {"Strategy"}
+    assert seeded({"brief": "Need M&A diligence help"}) == {"M&A"}
+    assert seeded({"brief": "strategic review"}) == set()
+
+
+@patch("graph_engine.fetch_experts_for_graph")
+def test_personalized_influence_matches_after_array_roundtrip(
+    mock_fetch: Any, mock_experts: list[dict[str, Any]]
+) -> None:
+    mock_fetch.return_value = mock_experts
+    built = GraphEngine()
+    built.build_knowledge_graph(limit=10)
+    restored = GraphEngine.from_arrays(built.to_arrays(), version="v1")
+
+    filters = {"industry": "Finance", "brief": "M&A"}
+    assert restored.seed_nodes(filters) == built.seed_nodes(filters)
+    expected = built.project_influence(filters)
+    actual = restored.project_influence(filters)
+    assert expected is not None and actual is not None
+    assert actual.tolist() == pytest.approx(expected.tolist())
+
+
+def test_shared_engine_materializes_once_across_threads() -> None:
+    built = GraphEngine()
+    built.build_from_experts(make_experts(300, seed=5))
+    expected = built.to_react_force_graph_format()
+    shared = GraphEngine.from_arrays(built.to_arrays())
+
+    barrier = threading.Barrier(8)
+    exports: list[dict[str, Any]] = []
+    indexes: list[Any] = []
+
+    def read() -> None:
+        barrier.wait()
+        indexes.append(shared.query_index())
+        exports.append(shared.to_react_force_graph_format())
+
+    with patch("graph_queries.GraphIndex.from_arrays", wraps=GraphIndex.from_arrays) as index:
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert index.call_count == 1 and all(i is indexes[0] for i in indexes)
+    assert len(exports) == 8 and all(e == expected for e in exports)
+    assert shared.graph.num_nodes() == built.graph.num_nodes()
+    assert shared.graph.num_edges() == built.graph.num_edges()
+
+
+@patch("graph_engine.fetch_experts_for_graph")
+def test_one_weighted_edge_per_pair(mock_fetch: Any) -> None:
+    mock_fetch.return_value = [
+        {
+            "id": "a",
+            "name": "Ann",
+            "industry": "Finance",
+            "sub_industry": "M&A",
+            "past_employers": ["Goldman Sachs", "McKinsey", "Goldman Sachs"],
+            "skills": ["Strategy", "Strategy"],
+        },
+        {
+            "id": "b",
+            "name": "Bob",
+            "industry": "Finance",
+            "sub_industry": "m&a ",
+            "past_employers": ["goldman sachs", "McKinsey"],
+            "skills": [],
+        },
+    ]
+    engine = GraphEngine()
+    engine.build_knowledge_graph(limit=10)
+    links = engine.to_react_force_graph_format()["links"]
+
+    pairs = [frozenset((link["source"], link["target"])) for link in links]
+    assert len(pairs) == len(set(pairs)) == engine.graph.num_edges()
+    by_pair = dict(zip(pairs, links, strict=True))
+    # Duplicate list entries are one membership edge
+    assert by_pair[frozenset(("expert_a", "company_Goldman_Sachs"))]["weight"] == 1
+    assert by_pair[frozenset(("expert_a", "skill_Strategy"))]["weight"] == 1
+    # Two shared employers plus the shared sub-industry
+    ab = by_pair[frozenset(("expert_a", "expert_b"))]
+    assert ab["weight"] == 3 and ab["type"] == "ALUMNI"
+    mask = int(engine._edge_mask[np.flatnonzero(engine._edge_weight == 3)[0]])
+    assert mask == EDGE_TYPE_BITS[EDGE_SHARED_EMPLOYER] | EDGE_TYPE_BITS[EDGE_SAME_SUBINDUSTRY]
+
+
+@patch("graph_engine.fetch_experts_for_graph")
+def test_centrality_is_weighted_pagerank(mock_fetch: Any) -> None:
+    import networkx as nx
+
+    mock_fetch.return_value = make_experts(60, seed=3)
+    engine = GraphEngine()
+    engine.build_knowledge_graph(limit=60)
+
+    graph = nx.Graph()
+    graph.add_nodes_from(range(engine.graph.num_nodes()))
+    graph.add_weighted_edges_from(
+        zip(
+            engine._edge_src.tolist(),
+            engine._edge_dst.tolist(),
+            engine._edge_weight.tolist(),
+            strict=True,
+        )
+    )
+    expected = nx.pagerank(graph, alpha=0.85, weight="weight", tol=1e-10)
+    assert [engine._centrality[i] for i in range(len(expected))] == pytest.approx(
+        [expected[i] for i in range(len(expected))], abs=1e-5
+    )
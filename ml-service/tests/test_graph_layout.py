@@ -0,0 +1,104 @@
+"""Tests for the precomputed force-directed layout (graph_layout.py)."""
+
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import graph_layout
+from benchmarks.synthetic import make_experts
+from graph_engine import GraphEngine
+
+
+@pytest.fixture(autouse=True)
+def fresh_layout() -> Generator[None, None, None]:
+    graph_layout.forget()
+    yield
+    graph_layout.forget()
+
+
+def _engine(experts: list[dict[str, Any]]) -> GraphEngine:
+    with patch("graph_engine.fetch_experts_for_graph", return_value=experts):
+        engine = GraphEngine()
+        engine.build_knowledge_graph(limit=len(experts))
+    return engine
+
+
+def _two_cliques(size: int) -> tuple[np.ndarray, np.ndarray]:
+    src, dst = [], []
+    for offset in (0, size):
+        for i in range(size):
+            for j in range(i + 1, size):
+                src.append(offset + i)
+                dst.append(offset + j)
+    src.append(0)
+    dst.append(size)  # one bridge
+    return np.array(src), np.array(dst)
+
+
+def test_force_layout_pulls_linked_nodes_together() -> None:
+    src, dst = _two_cliques(12)
+    a, b, w = graph_layout.undirected_pairs(
+        np.concatenate([src, dst]), np.concatenate([dst, src]), 24
+    )
+    assert len(a) == len(src) and (a < b).all() and (w == 2).all()  # both directions add up
+
+    pos = graph_layout.force_layout(a, b, 24)
+    assert pos.shape == (24, 3) and pos.dtype == np.float32
+    assert np.isfinite(pos).all()
+    assert np.array_equal(pos, graph_layout.force_layout(a, b, 24))  # deterministic
+
+    centres = pos[:12].mean(axis=0), pos[12:].mean(axis=0)
+    within = np.linalg.norm(pos[:12] - centres[0], axis=1).mean()
+    assert np.linalg.norm(centres[0] - centres[1]) > 2 * within
+
+
+def test_new_nodes_refine_previous_layout() -> None:
+    experts = make_experts(150, seed=8)
+    first = _engine(experts)
+    before = dict(zip(first.query_index().node_id, first.layout(), strict=True))
+
+    newcomer = {**experts[0], "id": "newcomer", "name": "New Expert"}
+    second = _engine([*experts, newcomer])
+    after = dict(zip(second.query_index().node_id, second.layout(), strict=True))
+
+    kept = [nid for nid in before if nid in after]
+    moved = np.median([np.linalg.norm(before[nid] - after[nid]) for nid in kept])
+    arrays = second.to_arrays()
+    n = len(after)
+    a, b, w = graph_layout.undirected_pairs(
+        arrays["edge_src"], arrays["edge_dst"], n, arrays["edge_weight"]
+    )
+    scratch = graph_layout.force_layout(a, b, n, w)
+    order = second.query_index().position
+    redone = np.median([np.linalg.norm(before[nid] - scratch[order[nid]]) for nid in kept])
+    assert moved < redone / 3
+    # The newcomer shares every edge of experts[0] and lands next to it
+    gap = np.linalg.norm(after["expert_newcomer"] - after["expert_" + experts[0]["id"]])
+    assert gap < np.median(np.linalg.norm(np.array(list(after.values())), axis=1))
+
+
+def test_exports_ship_positions() -> None:
+    engine = _engine(make_experts(60, seed=9))
+    full = engine.to_react_force_graph_format()
+    assert all({"x", "y", "z"} <= node.keys() for node in full["nodes"])
+
+    # Shared arrays carry the layout: a restored engine reuses it as-is
+    with patch("graph_layout.compute_layout") as compute:
+        restored = GraphEngine.from_arrays(engine.to_arrays())
+        assert restored.to_react_force_graph_format()["nodes"] == full["nodes"]
+        node_id = full["nodes"][0]["id"]
+        ego = restored.ego_network(node_id, 1, 10, 10)
+        assert ego is not None and ego["nodes"][0]["x"] == full["nodes"][0]["x"]
+        compute.assert_not_called()
+
+    overview = engine.community_overview()
+    positions = {n["id"]: np.array([n["x"], n["y"], n["z"]]) for n in full["nodes"]}
+    for super_node in overview["nodes"]:
+        members = [
+            positions[n["id"]] for n in full["nodes"] if n["community"] == super_node["community"]
+        ]
+        centroid = np.mean(members, axis=0)
+        assert np.allclose([super_node["x"], super_node["y"], super_node["z"]], centroid, atol=0.2)
@@ -0,0 +1,143 @@
+"""Tests for the partitioned knowledge graph (graph_partitions.py), run over 3 processes."""
+
+from collections.abc import Generator
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import graph_partitions
+from benchmarks.synthetic import make_experts
+from graph_engine import GraphEngine
+from graph_partitions import (
+    PartitionedGraph,
+    PartitionError,
+    assign_partitions,
+    parse_partitions,
+    spawn_local,
+)
+
+EXPERTS = make_experts(400, seed=3)
+
+
+@pytest.fixture(scope="module")
+def reference() -> GraphEngine:
+    engine = GraphEngine()
+    engine.build_from_experts(EXPERTS)
+    return engine
+
+
+@pytest.fixture(scope="module")
+def partitioned() -> Generator[PartitionedGraph, None, None]:
+    with spawn_local(3) as graph:
+        graph.build(EXPERTS)
+        yield graph
+
+
+def test_industries_are_kept_whole_and_balanced() -> None:
+    owners = assign_partitions(EXPERTS, 3)
+    by_industry: dict[str, set[int]] = {}
+    for expert, p in zip(EXPERTS, owners, strict=True):
+        by_industry.setdefault(expert["industry"], set()).add(p)
+    assert all(len(parts) == 1 for parts in by_industry.values())
+    sizes = np.bincount(owners, minlength=3)
+    assert sizes.min() > 0 and sizes.max() < 0.5 * len(EXPERTS)
+
+
+def test_distributed_pagerank_matches_one_process(
+    partitioned: PartitionedGraph, reference: GraphEngine
+) -> None:
+    assert partitioned.num_nodes == reference.graph.num_nodes()
+    assert 0 < partitioned.boundary_size < partitioned.num_nodes
+    centrality = partitioned.centrality()
+    expected = {
+        reference._index_to_node[i]["id"]: score for i, score in reference._centrality.items()
+    }
+    assert centrality.keys() == expected.keys()
+    ids = sorted(expected)
+    assert np.allclose([centrality[i] for i in ids], [expected[i] for i in ids], rtol=1e-9)
+
+
+def test_influence_lookups_match_one_process(
+    partitioned: PartitionedGraph, reference: GraphEngine
+) -> None:
+    ids = [e["id"] for e in EXPERTS[:60]] + ["nobody"]
+    influence = partitioned.network_influence(ids)
+    assert influence == {eid: reference.get_network_influence(eid) for eid in ids}
+
+    filters = {"industry": EXPERTS[0]["industry"], "brief": "pricing strategy"}
+    personalized = reference.project_influence(filters)
+    assert personalized is not None
+    expected = {eid: reference.get_network_influence(eid, personalized) for eid in ids}
+    assert partitioned.network_influence(ids, filters) == pytest.approx(expected, abs=1e-4)
+    # Filters seeding nothing fall back to the global influence
+    assert partitioned.network_influence(ids, {"industry": "Basket weaving"}) == influence
+
+
+def test_ego_network_matches_one_process(
+    partitioned: PartitionedGraph, reference: GraphEngine
+) -> None:
+    center = f"expert_{EXPERTS[5]['id']}"
+    ego = partitioned.ego_network(center, hops=2, max_nodes=10_000, max_edges=100_000)
+    expected = reference.ego_network(center, hops=2, max_nodes=10_000, max_edges=100_000)
+    assert ego is not None and expected is not None
+    assert {n["id"] for n in ego["nodes"]} == {n["id"] for n in expected["nodes"]}
+    assert sorted((k["source"], k["target"], k["type"], k["weight"]) for k in ego["links"]) == (
+        sorted((k["source"], k["target"], k["type"], k["weight"]) for k in expected["links"])
+    )
+    assert {n["id"]: n["val"] for n in ego["nodes"]} == {
+        n["id"]: n["val"] for n in expected["nodes"]
+    }
+
+    small = partitioned.ego_network(center, hops=2, max_nodes=25, max_edges=30)
+    assert small is not None and small["truncated"]
+    assert len(small["nodes"]) == 25 and len(small["links"]) == 30
+    assert small["nodes"][0]["id"] == center
+    assert partitioned.ego_network("expert_nobody", hops=1) is None
+
+
+def test_failed_requests_raise_and_partitions_keep_serving(
+    partitioned: PartitionedGraph,
+) -> None:
+    with pytest.raises(PartitionError, match="Unknown or premature request"):
+        partitioned._call_each("drop_tables", [()] * partitioned.num_partitions)
+    assert partitioned.network_influence([EXPERTS[0]["id"]])[EXPERTS[0]["id"]] > 0
+    with pytest.raises(ValueError, match="ML_GRAPH_PARTITION_AUTHKEY"):
+        PartitionedGraph.connect([("127.0.0.1", 1)], authkey=b"")
+
+
+def test_partition_setting_parses_counts_and_addresses() -> None:
+    assert parse_partitions("4") == 4
+    assert parse_partitions("a:7400, 10.0.0.2:7401") == [("a", 7400), ("10.0.0.2", 7401)]
+    with pytest.raises(ValueError, match="host:port"):
+        parse_partitions("a:7400,b")
+    with pytest.raises(ValueError, match="at least 1"):
+        parse_partitions("0")
+
+
+def test_graph_endpoints_use_partitions_when_configured(reference: GraphEngine) -> None:
+    from main import app
+
+    client = TestClient(app)
+    ids = [e["id"] for e in EXPERTS[:20]]
+    body = {"expert_ids": ids, "filters": {"industry": EXPERTS[0]["industry"]}}
+    ego = {"node_id": f"expert_{EXPERTS[5]['id']}", "hops": 1, "max_nodes": 2000}
+    with patch("main.get_graph_snapshot", return_value=reference):
+        single = client.post("/graph/influence", json=body).json()["influence"]
+        single_ego = client.post("/graph/ego", json=ego).json()
+
+    with (
+        patch.object(graph_partitions, "GRAPH_PARTITIONS", "2"),
+        patch("graph_partitions.fetch_experts_for_graph", return_value=EXPERTS) as fetch,
+        patch("main.get_graph_snapshot", side_effect=AssertionError("snapshot used")),
+    ):
+        try:
+            influence = client.post("/graph/influence", json=body).json()["influence"]
+            partitioned_ego = client.post("/graph/ego", json=ego).json()
+            assert client.post("/graph/ego", json={"node_id": "expert_nobody"}).status_code == 404
+        finally:
+            graph_partitions.shutdown()
+    assert fetch.call_count == 1
+    assert influence == pytest.approx(single, abs=1e-4)
+    assert {n["id"] for n in partitioned_ego["nodes"]} == {n["id"] for n in single_ego["nodes"]}
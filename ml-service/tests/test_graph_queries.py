@@ -0,0 +1,195 @@
+"""Tests for bounded graph queries (ego network, warm-intro path, subgraphs)."""
+
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.synthetic import make_experts
+from graph_engine import GraphEngine
+
+EXPERTS = [
+    {
+        "id": "a",
+        "name": "Ann",
+        "industry": "Finance",
+        "sub_industry": "Banking",
+        "past_employers": ["Goldman Sachs"],
+        "skills": ["Strategy"],
+    },
+    {
+        "id": "b",
+        "name": "Bob",
+        "industry": "Finance",
+        "sub_industry": "M&A",
+        "past_employers": ["Goldman Sachs", "McKinsey"],
+        "skills": ["Valuation"],
+    },
+    {
+        "id": "c",
+        "name": "Cat",
+        "industry": "Energy",
+        "sub_industry": "Renewables",
+        "past_employers": ["Shell"],
+        "skills": ["Strategy"],
+    },
+]
+
+
+def _engine(experts: list[dict[str, Any]]) -> GraphEngine:
+    with patch("graph_engine.fetch_experts_for_graph", return_value=experts):
+        engine = GraphEngine()
+        engine.build_knowledge_graph(limit=len(experts))
+    return engine
+
+
+@pytest.fixture
+def engine() -> GraphEngine:
+    return _engine(EXPERTS)
+
+
+def _ids(out: dict[str, Any]) -> set[str]:
+    return {n["id"] for n in out["nodes"]}
+
+
+def _links_inside(out: dict[str, Any]) -> bool:
+    ids = _ids(out)
+    return all(link["source"] in ids and link["target"] in ids for link in out["links"])
+
+
+def test_one_hop_ego_network_is_direct_neighbourhood(engine: GraphEngine) -> None:
+    out = engine.ego_network("expert_a", hops=1, max_nodes=100, max_edges=100)
+    assert out is not None
+    assert _ids(out) == {
+        "expert_a",
+        "expert_b",  # shared employer
+        "company_Goldman_Sachs",
+        "skill_Strategy",
+        "industry_Finance",
+        "industry_Banking",
+    }
+    assert not out["truncated"] and _links_inside(out)
+    assert engine.ego_network("expert_missing", 1, 10, 10) is None
+
+
+def test_ego_network_respects_budgets() -> None:
+    engine = _engine(make_experts(80, seed=4))
+    center = "expert_" + make_experts(80, seed=4)[0]["id"]
+    out = engine.ego_network(center, hops=3, max_nodes=12, max_edges=15)
+    assert out is not None
+    assert len(out["nodes"]) == 12 and len(out["links"]) <= 15
+    assert out["truncated"] and _links_inside(out)
+    assert out["nodes"][0]["id"] == center
+
+
+def test_warm_intro_path_uses_people_and_employers(engine: GraphEngine) -> None:
+    out = engine.warm_intro_path("a", "McKinsey", max_hops=4)
+    assert out is not None
+    assert [n["id"] for n in out["nodes"]] == ["expert_a", "expert_b", "company_McKinsey"]
+    assert out["hops"] == 2 and len(out["links"]) == 2
+    # Ann and Cat only share a skill: not a warm intro
+    assert engine.warm_intro_path("a", "company_Shell", max_hops=6) == {
+        "nodes": [],
+        "links": [],
+        "hops": None,
+    }
+    assert engine.warm_intro_path("a", "Unknown Co", max_hops=4) is None
+
+
+def test_industry_and_community_subgraphs(engine: GraphEngine) -> None:
+    finance = engine.industry_subgraph("finance", max_nodes=100, max_edges=100)
+    assert finance is not None
+    ids = _ids(finance)
+    assert {"industry_Finance", "expert_a", "expert_b", "company_McKinsey"} <= ids
+    assert "expert_c" not in ids and _links_inside(finance)
+    assert engine.industry_subgraph("Healthcare", 100, 100) is None
+
+    community = engine.ego_network("expert_a", 0, 1, 0)
+    assert community is not None
+    cid = community["nodes"][0]["community"]
+    members = engine.community_subgraph(cid, max_nodes=3, max_edges=100)
+    assert members is not None
+    assert len(members["nodes"]) <= 3
+    assert all(n["community"] == cid for n in members["nodes"])
+
+
+def test_queries_match_on_shared_arrays(engine: GraphEngine) -> None:
+    restored = GraphEngine.from_arrays(engine.to_arrays())
+    assert restored.ego_network("company_Goldman_Sachs", 2, 50, 50) == engine.ego_network(
+        "company_Goldman_Sachs", 2, 50, 50
+    )
+    assert restored.warm_intro_path("a", "McKinsey", 4) == engine.warm_intro_path(
+        "a", "McKinsey", 4
+    )
+
+
+def test_graph_query_endpoints(engine: GraphEngine) -> None:
+    from main import app
+
+    client = TestClient(app)
+    with patch("main.get_graph_snapshot", return_value=engine):
+        r = client.post("/graph/ego", json={"node_id": "expert_a", "hops": 1})
+        assert r.status_code == 200 and r.json()["nodes"]
+        assert client.post("/graph/ego", json={"node_id": "nope"}).status_code == 404
+        r = client.post("/graph/path", json={"expert_id": "a", "company": "McKinsey"})
+        assert r.status_code == 200 and r.json()["hops"] == 2
+        r = client.post("/graph/subgraph", json={"industry": "Finance", "max_nodes": 3})
+        assert r.status_code == 200 and len(r.json()["nodes"]) == 3
+        assert client.post("/graph/subgraph", json={}).status_code == 422
+        r = client.post("/graph/subgraph", json={"industry": "Finance", "community": 0})
+        assert r.status_code == 422
+
+
+def test_community_overview_aggregates_every_edge_once() -> None:
+    engine = _engine(make_experts(120, seed=6))
+    index = engine.query_index()
+    overview = engine.community_overview()
+    assert overview is engine.community_overview()  # cached per snapshot
+
+    assert sum(n["size"] for n in overview["nodes"]) == int((index.community >= 0).sum())
+    assert all(sum(n["groups"].values()) == n["size"] for n in overview["nodes"])
+    undirected = len(index.nbr) // 2
+    internal = sum(n["internal_edges"] for n in overview["nodes"])
+    assert internal + sum(link["weight"] for link in overview["links"]) == undirected
+    assert all(link["source"] != link["target"] for link in overview["links"])
+
+
+def test_expand_community_links_members_to_other_super_nodes() -> None:
+    engine = _engine(make_experts(120, seed=6))
+    overview = engine.community_overview()
+    biggest = max(overview["nodes"], key=lambda n: n["size"])
+    cid = biggest["community"]
+
+    out = engine.expand_community(cid, max_nodes=500, max_edges=100_000)
+    assert out is not None and out["community"] == cid
+    assert len(out["nodes"]) == biggest["size"]
+    assert all(n["community"] == cid for n in out["nodes"])
+    super_nodes = {n["id"] for n in overview["nodes"]} - {biggest["id"]}
+    boundary = [link for link in out["links"] if link["type"] == "AGGREGATE"]
+    assert boundary and {link["target"] for link in boundary} <= super_nodes
+    # Boundary weights add up to the overview's links touching this community
+    touching = sum(
+        link["weight"]
+        for link in overview["links"]
+        if biggest["id"] in (link["source"], link["target"])
+    )
+    assert sum(link["weight"] for link in boundary) == touching
+    assert engine.expand_community(cid, 500, 100_000) is out
+    assert engine.expand_community(10_000, 500, 100) is None
+
+
+def test_graph_visualize_levels_of_detail(engine: GraphEngine) -> None:
+    from main import app
+
+    client = TestClient(app)
+    with patch("main.get_graph_snapshot", return_value=engine):
+        top = client.post("/graph/visualize", json={"level": "communities"}).json()
+        assert top["level"] == "communities"
+        assert {n["group"] for n in top["nodes"]} == {"community"}
+        cid = top["nodes"][0]["community"]
+        r = client.post("/insights/graph", json={"expand": cid})
+        assert r.status_code == 200 and r.json()["community"] == cid
+        assert client.post("/graph/visualize", json={"expand": 999}).status_code == 404
+        full = client.post("/graph/visualize", json={}).json()
+        assert "level" not in full and len(full["nodes"]) == engine.graph.num_nodes()
@@ -0,0 +1,184 @@
+"""Tests for the database-change invalidation bus (invalidation.py) and its subscribers."""
+
+import time
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import psycopg2.errors
+import pytest
+
+import graph_engine
+import rank_sessions
+from invalidation import Change, ChangeListener, Invalidation, InvalidationBus
+
+
+@pytest.fixture
+def clean_caches() -> Generator[None, None, None]:
+    graph_engine.invalidate_graph_snapshots()
+    rank_sessions.invalidate_rank_sessions()
+    yield
+    graph_engine.invalidate_graph_snapshots()
+    rank_sessions.invalidate_rank_sessions()
+
+
+def _event(*changes: Change, truncated: tuple[str, ...] = ()) -> Invalidation:
+    return Invalidation(frozenset(changes), frozenset(truncated), changed_at=time.time())
+
+
+def test_bus_coalesces_a_burst_into_one_invalidation() -> None:
+    bus = InvalidationBus(debounce_seconds=0.05)
+    received: list[Invalidation] = []
+    bus.subscribe(received.append)
+    started = time.time()
+    bus.publish([Change("experts", "UPDATE", expert_id="e1")] * 3)
+    bus.publish([Change("research_projects", "DELETE", project_id="p1")])
+    time.sleep(0.3)
+
+    assert len(received) == 1
+    event = received[0]
+    assert len(event.changes) == 2 and started <= event.changed_at <= started + 0.05
+    assert event.expert_ids("experts") == {"e1"} and event.project_ids("experts") == set()
+    assert event.touches("research_projects") and not event.inserted("experts")
+    assert bus.flush() is None
+
+
+def test_bus_truncates_oversized_windows() -> None:
+    bus = InvalidationBus(debounce_seconds=60)
+    with patch("invalidation.MAX_CHANGES_PER_WINDOW", 3):
+        bus.publish(Change("expert_vectors", "UPDATE", expert_id=str(i)) for i in range(10))
+    event = bus.flush()
+    assert event is not None
+    assert event.truncated == {"expert_vectors"} and len(event.changes) == 3
+    assert event.inserted("expert_vectors")  # treated as wholly changed
+
+
+def test_graph_snapshots_built_after_a_change_survive(clean_caches: None) -> None:
+    now = time.time()
+    old, new = MagicMock(), MagicMock()
+    graph_engine._snapshots.update({100: (now - 10, None, old), 200: (now + 1, None, new)})
+
+    graph_engine._on_invalidation(_event(Change("engagements", "INSERT", "e1", "p1")))
+    assert graph_engine.graph_snapshot_count() == 2  # engagements are not in the graph
+
+    graph_engine._on_invalidation(_event(Change("experts", "UPDATE", expert_id="e1")))
+    assert graph_engine._snapshots == {200: (now + 1, None, new)}
+
+
+def _session(project_id: str, expert_ids: list[str]) -> rank_sessions.RankSession:
+    session = rank_sessions.RankSession(
+        id=f"{project_id}-{len(expert_ids)}",
+        project_id=project_id,
+        filters={},
+        pool=[{"id": e} for e in expert_ids],
+        semantic_map={},
+        graph_engine=None,
+    )
+    rank_sessions._store_session(session)
+    return session
+
+
+def _session_ids() -> set[str]:
+    return set(rank_sessions._sessions)
+
+
+def test_rank_sessions_are_dropped_selectively(clean_caches: None) -> None:
+    a = _session("p1", ["e1", "e2"])
+    b = _session("p2", ["e3"])
+    c = _session("p3", ["e4", "e5", "e6"])
+
+    rank_sessions._on_invalidation(_event(Change("engagements", "UPDATE", "e1", "p1")))
+    assert _session_ids() == {a.id, b.id, c.id}
+
+    rank_sessions._on_invalidation(
+        _event(
+            Change("expert_vectors", "UPDATE", expert_id="e2"),
+            Change("research_projects", "UPDATE", project_id="p2"),
+        )
+    )
+    assert _session_ids() == {c.id}
+
+    rank_sessions._on_invalidation(_event(Change("experts", "INSERT", expert_id="new")))
+    assert _session_ids() == set()
+
+
+def _record(change_id: int, txid: int, op: str = "UPDATE") -> dict[str, Any]:
+    return {
+        "id": change_id,
+        "txid": txid,
+        "table": "experts",
+        "op": op,
+        "expert_ids": [f"e{change_id}"],
+        "project_ids": [],
+    }
+
+
+def test_statement_records_expand_to_one_change_per_id() -> None:
+    record = {
+        "table": "engagements",
+        "op": "insert",
+        "expert_ids": ["e1", "e2"],
+        "project_ids": ["p1"],
+    }
+    assert set(Change.from_record(record)) == {
+        Change("engagements", "INSERT", expert_id="e1"),
+        Change("engagements", "INSERT", expert_id="e2"),
+        Change("engagements", "INSERT", project_id="p1"),
+    }
+    assert Change.from_record({"table": "experts", "op": "DELETE"}) == [Change("experts", "DELETE")]
+
+
+def test_listener_catches_up_from_the_change_log() -> None:
+    bus = InvalidationBus(debounce_seconds=60)
+    listener = ChangeListener(bus, mode="poll")
+    # Committed log rows, and the xmin: transaction 99, which took id 5, is still running
+    log = [_record(1, txid=90), _record(6, txid=100), _record(7, txid=101)]
+    xmin = [99]
+
+    def fetch(horizon: int, after_id: int, limit: int) -> tuple[list[dict[str, Any]], int]:
+        rows = sorted(
+            (r for r in log if r["txid"] >= horizon and r["id"] > after_id), key=lambda r: r["id"]
+        )
+        return rows[:limit], xmin[0]
+
+    with (
+        patch("invalidation.change_log_horizon", return_value=99),
+        patch("invalidation.fetch_changes_since", side_effect=fetch),
+        patch("invalidation.prune_change_log") as prune,
+        patch("invalidation.CHANGE_LOG_BATCH", 1),
+    ):
+        listener.catch_up()  # from the horizon on: changes 6 and 7 only
+        assert prune.call_count == 1
+        # Transaction 99 commits below ids already read; 102 is now the oldest running
+        log.append(_record(5, txid=99, op="delete"))
+        xmin[0] = 102
+        listener.catch_up()
+        log.append(_record(8, txid=102))
+        listener.catch_up()
+        assert prune.call_count == 1  # at most hourly
+    event = bus.flush()
+    assert event is not None
+    assert event.expert_ids("experts") == {"e5", "e6", "e7", "e8"}
+    assert Change("experts", "DELETE", expert_id="e5") in event.changes
+    assert listener._horizon == 102 and set(listener._seen) == {8}
+
+
+def test_listener_stops_without_the_change_log() -> None:
+    listener = ChangeListener(InvalidationBus(), mode="listen")
+    with (
+        patch("invalidation.open_listen_connection") as connect,
+        patch(
+            "invalidation.change_log_horizon",
+            side_effect=psycopg2.errors.UndefinedTable("ml_change_log"),
+        ) as latest,
+    ):
+        listener.start()
+        assert listener._thread is not None
+        listener._thread.join(5)
+        assert not listener.running
+        assert latest.call_count == 1  # no retries
+        connect.return_value.close.assert_called_once()
+
+    off = ChangeListener(InvalidationBus(), mode="off")
+    off.start()
+    assert off._thread is None
@@ -0,0 +1,169 @@
+"""Tests for the background job runner and /jobs endpoints."""
+
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import jobs
+from jobs import STATUS_FAILED, STATUS_QUEUED, STATUS_SUCCEEDED, Job, JobRunner
+
+
+@pytest.fixture
+def runner(tmp_path: Path) -> JobRunner:
+    return JobRunner(jobs_dir=tmp_path)
+
+
+def test_submit_returns_immediately_and_completes(runner: JobRunner) -> None:
+    release = threading.Event()
+
+    def slow(params: dict[str, Any], progress: jobs.ProgressFn) -> dict[str, Any]:
+        progress(0.5, "halfway")
+        release.wait(5)
+        return {"echo": params["x"]}
+
+    runner.register("slow", slow)
+    job = runner.submit("slow", {"x": 1})
+    assert job.status in (STATUS_QUEUED, jobs.STATUS_RUNNING)
+    release.set()
+    done = runner.wait(job.id, timeout=5)
+    assert done is not None
+    assert done.status == STATUS_SUCCEEDED
+    assert done.result == {"echo": 1}
+    assert done.progress == 1.0
+
+
+def test_finished_jobs_are_pruned_by_age_and_count(runner: JobRunner) -> None:
+    runner.register("t", lambda p, _progress: {})
+    old = Job(id="old", type="t", params={}, status=STATUS_SUCCEEDED, finished_at=1.0)
+    stuck = Job(id="stuck", type="t", params={}, status=jobs.STATUS_RUNNING, created_at=1.0)
+    runner._persist(old)
+    runner._persist(stuck)
+    with patch("jobs.JOB_RETENTION_COUNT", 2):
+        ids = []
+        for k in range(4):
+            ids.append(runner.submit("t", {"k": k}).id)
+            runner.wait(ids[-1], timeout=5)
+        runner.submit("t", {"k": 4})
+    kept = {path.stem for path in runner.jobs_dir.glob("*.json")}
+    # The newest finished jobs, the one just submitted and the active one survive
+    assert "old" not in kept and "stuck" in kept
+    assert ids[0] not in kept and ids[1] not in kept
+    assert runner.get(ids[0]) is None and runner.get(ids[3]) is not None
+
+
+def test_identical_active_job_is_deduplicated(runner: JobRunner) -> None:
+    release = threading.Event()
+    runner.register("t", lambda p, _progress: {"ok": release.wait(5)})
+    a = runner.submit("t", {"k": 1})
+    b = runner.submit("t", {"k": 1})
+    c = runner.submit("t", {"k": 2})
+    assert a.id == b.id
+    assert c.id != a.id
+    release.set()
+    assert runner.wait(c.id, timeout=5).status == STATUS_SUCCEEDED  # type: ignore[union-attr]
+
+
+def test_at_most_one_job_per_type_runs_at_once(runner: JobRunner) -> None:
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work(params: dict[str, Any], _progress: jobs.ProgressFn) -> dict[str, Any]:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return {}
+
+    runner.register("exclusive", work)
+    ids = [runner.submit("exclusive", {"n": i}).id for i in range(4)]
+    for job_id in ids:
+        runner.wait(job_id, timeout=5)
+    assert peak == 1
+
+
+def test_failure_is_recorded(runner: JobRunner) -> None:
+    def boom(_params: dict[str, Any], _progress: jobs.ProgressFn) -> dict[str, Any]:
+        raise RuntimeError("no data")
+
+    runner.register("boom", boom)
+    job = runner.wait(runner.submit("boom").id, timeout=5)
+    assert job is not None
+    assert job.status == STATUS_FAILED
+    assert job.error == "no data"
+
+
+def test_state_persists_and_dead_jobs_are_recovered(tmp_path: Path) -> None:
+    first = JobRunner(jobs_dir=tmp_path)
+    first.register("t", lambda _p, _progress: {"v": 42})
+    done = first.wait(first.submit("t").id, timeout=5)
+    assert done is not None
+
+    # A job left "running" by a process that no longer exists, and one whose pid was
+    # handed to another process since (as after a container restart)
+    orphan = Job(id="orphan1", type="t", params={}, status=jobs.STATUS_RUNNING, worker_pid=2**22)
+    first._persist(orphan)
+    reused = Job(id="reused", type="t", params={}, status=jobs.STATUS_RUNNING)
+    reused.worker_start = "previous-boot:1"
+    first._persist(reused)
+    alive = Job(id="alive", type="t", params={}, status=jobs.STATUS_RUNNING)
+    first._persist(alive)
+
+    second = JobRunner(jobs_dir=tmp_path)
+    second.register("t", lambda _p, _progress: {})
+    assert second.get(done.id).result == {"v": 42}  # type: ignore[union-attr]
+    second.submit("t", {"fresh": True})
+    recovered = second.get("orphan1")
+    assert recovered is not None
+    assert recovered.status == STATUS_FAILED
+    if jobs.PROCESS_START is not None:
+        assert second.get("reused").status == STATUS_FAILED  # type: ignore[union-attr]
+    assert second.get("alive").status == jobs.STATUS_RUNNING  # type: ignore[union-attr]
+    assert {j.id for j in second.recent(job_type="t")} >= {done.id, "orphan1"}
+
+
+def test_failed_state_writes_do_not_stop_the_worker(runner: JobRunner) -> None:
+    runner.register("t", lambda p, _progress: {"k": p["k"]})
+    persist = runner._persist
+
+    def disk_full_while_running(job: Job) -> None:
+        if job.params["k"] == 1 and job.status != STATUS_QUEUED:
+            raise OSError(28, "No space left on device")
+        persist(job)
+
+    with patch.object(runner, "_persist", side_effect=disk_full_while_running):
+        first = runner.submit("t", {"k": 1})
+        assert runner.wait(first.id, timeout=5).status == STATUS_SUCCEEDED  # type: ignore[union-attr]
+        second = runner.submit("t", {"k": 2})
+        assert runner.wait(second.id, timeout=5).result == {"k": 2}  # type: ignore[union-attr]
+
+
+def test_jobs_endpoints(tmp_path: Path) -> None:
+    import main
+
+    runner = JobRunner(jobs_dir=tmp_path)
+    runner.register("train-rate-model", main._train_rate_model_job)
+    with (
+        patch.object(jobs, "runner", runner),
+        patch("main.rate_estimator_train", return_value={"ok": True, "samples": 12}) as train,
+    ):
+        client = TestClient(main.app)
+        r = client.post("/jobs/train-rate-model", json={"use_engagements": True})
+        assert r.status_code == 202
+        job_id = r.json()["id"]
+        runner.wait(job_id, timeout=5)
+        status = client.get(f"/jobs/{job_id}").json()
+        assert status["status"] == STATUS_SUCCEEDED
+        assert status["result"] == {"ok": True, "samples": 12}
+        assert train.call_args.kwargs["use_engagements"] is True
+        listed = client.get("/jobs", params={"type": "train-rate-model"}).json()["jobs"]
+        assert [j["id"] for j in listed] == [job_id]
+        assert client.get("/jobs/doesnotexist").status_code == 404
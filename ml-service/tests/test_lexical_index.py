@@ -0,0 +1,134 @@
+"""Tests for the BM25 keyword index (lexical_index.py) and hybrid recall in /rank."""
+
+import math
+import time
+from collections import Counter
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import lexical_index
+import rank_sessions
+from benchmarks.synthetic import make_experts
+from lexical_index import LexicalIndex, document_text, tokenize
+
+EXPERTS = make_experts(300, seed=11)
+OUTSIDER = {
+    "id": "outsider",
+    "name": "Ada Quill",
+    "industry": "Healthcare",
+    "sub_industry": "Oncology",
+    "country": "USA",
+    "region": "North America",
+    "seniority_score": 80,
+    "years_experience": 20,
+    "predicted_rate": 400.0,
+    "past_employers": ["Pfizer"],
+    "skills": ["Pricing", "Zymurgy"],
+}
+
+
+def _reference_bm25(experts: list[dict[str, Any]], query: str) -> dict[str, float]:
+    docs = [Counter(tokenize(document_text(e))) for e in experts]
+    avg = sum(sum(d.values()) for d in docs) / len(docs)
+    k1, b = lexical_index.BM25_K1, lexical_index.BM25_B
+    scores: dict[str, float] = {}
+    for term in set(tokenize(query)):
+        df = sum(1 for d in docs if term in d)
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        for expert, d in zip(experts, docs, strict=True):
+            if term in d:
+                norm = k1 * (1 - b + b * sum(d.values()) / avg)
+                tf = d[term] * (k1 + 1) / (d[term] + norm)
+                scores[expert["id"]] = scores.get(expert["id"], 0.0) + idf * tf
+    return scores
+
+
+def test_search_matches_reference_bm25() -> None:
+    index = LexicalIndex.build(EXPERTS)
+    query = "ex-Pfizer oncology pricing"
+    hits = index.search(query, k=len(EXPERTS))
+    expected = _reference_bm25(EXPERTS, query)
+    assert {eid for eid, _ in hits} == set(expected)
+    for eid, score in hits:
+        assert score == pytest.approx(expected[eid], rel=1e-5)
+    assert [s for _, s in hits] == sorted((s for _, s in hits), reverse=True)
+
+    top = index.search(query, k=5)
+    assert top == hits[:5]
+    assert index.search("no such words", k=5) == []
+    assert index.search("the and of", k=5) == []
+
+
+def test_index_round_trips_through_arrays() -> None:
+    index = LexicalIndex.build(EXPERTS)
+    copy = LexicalIndex(index.to_arrays())
+    assert copy.search("M&A due diligence", 20) == index.search("M&A due diligence", 20)
+    assert tokenize("M&A, C++ and ex-Pfizer") == ["m&a", "c++", "pfizer"]
+    assert LexicalIndex.build([]).search("pricing", 5) == []
+
+
+def test_hybrid_recall_merges_keyword_hits_and_refilters_them() -> None:
+    pool = EXPERTS[:200]
+    similarity = {e["id"]: 0.8 for e in pool}
+    index = LexicalIndex.build([*EXPERTS, OUTSIDER])
+    with (
+        patch("lexical_index.get_index", return_value=index),
+        patch("rank_sessions.fetch_recall_experts", return_value=([OUTSIDER], {})) as refetch,
+    ):
+        ranked, fused = rank_sessions.hybrid_recall(
+            "zymurgy", {"industry": "Healthcare"}, None, pool, similarity
+        )
+    # Only the keyword hit outside the pool is re-read, with the project's filters
+    assert refetch.call_args.args[:2] == (["outsider"], {"industry": "Healthcare"})
+    assert ranked[0]["id"] == "outsider" and len(ranked) == 201
+    weight = rank_sessions.RANK_LEXICAL_WEIGHT
+    assert fused["outsider"] == pytest.approx((1 - weight) * 0.5 + weight)
+    assert fused[pool[0]["id"]] == pytest.approx((1 - weight) * 0.8)
+
+    with (
+        patch("lexical_index.get_index", return_value=index),
+        patch("rank_sessions.fetch_recall_experts", return_value=([], {})),
+    ):
+        ranked, _ = rank_sessions.hybrid_recall("zymurgy", {}, None, pool, similarity)
+    assert "outsider" not in {e["id"] for e in ranked}  # hidden or filtered out in the DB
+
+
+def test_rank_recalls_experts_by_keyword() -> None:
+    project = {"id": "p1", "title": "A", "filter_criteria": {"brief": "Zymurgy pricing"}}
+    rank_sessions.invalidate_rank_sessions()
+    with (
+        patch("rank_sessions.fetch_project", return_value=project),
+        patch("rank_sessions.fetch_recall_pool", return_value=(EXPERTS[:150], {})),
+        patch("rank_sessions.get_embedding", side_effect=RuntimeError("no embeddings")),
+        patch("rank_sessions.get_graph_snapshot", side_effect=RuntimeError("no graph")),
+        patch("lexical_index.get_index", return_value=LexicalIndex.build([*EXPERTS, OUTSIDER])),
+        patch("rank_sessions.fetch_recall_experts", return_value=([OUTSIDER], {})),
+    ):
+        from main import app
+
+        r = TestClient(app).post("/rank", json={"project_id": "p1", "page_size": 10})
+        with patch("rank_sessions.RANK_RECALL_MODE", "vector"):
+            vector_only = TestClient(app).post("/rank", json={"project_id": "p1"})
+    rank_sessions.invalidate_rank_sessions()
+    assert r.status_code == 200 and r.json()["total"] == 151
+    assert "outsider" in {e["expert_id"] for e in r.json()["ranked_experts"]}
+    assert vector_only.json()["total"] == 150
+
+
+def test_stale_index_keeps_serving_while_it_rebuilds() -> None:
+    batches = [EXPERTS[:50], [*EXPERTS[:50], OUTSIDER]]
+    with (
+        patch("lexical_index.fetch_experts_for_graph", side_effect=lambda limit: batches.pop(0)),
+        patch("lexical_index._cached", None),
+    ):
+        first = lexical_index.get_index()
+        assert lexical_index.search("zymurgy", 5) == []
+        lexical_index.invalidate_index()
+        assert lexical_index.get_index() is first  # served while the rebuild runs
+        deadline = time.monotonic() + 5
+        while lexical_index.get_index() is first and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [eid for eid, _ in lexical_index.search("zymurgy", 5)] == ["outsider"]
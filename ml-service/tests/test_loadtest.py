@@ -0,0 +1,78 @@
+"""Tests for the load-test harness (loadtest/)."""
+
+import asyncio
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+import pytest
+from openai import InternalServerError, OpenAI
+
+from loadtest.fake_db import FakeDatabase, project_ids
+from loadtest.fake_embeddings import FakeEmbeddingServer, fake_embedding
+from loadtest.run import drive, format_report, parse_mix
+
+
+def test_fake_embedding_server_speaks_the_openai_api() -> None:
+    with FakeEmbeddingServer(latency_ms=20) as server:
+        client = OpenAI(api_key="test", base_url=server.url, max_retries=0)
+        r = client.embeddings.create(model="m", input=["a brief", "another"], dimensions=1536)
+        vectors = np.array([d.embedding for d in r.data])
+        assert vectors.shape == (2, 1536)
+        assert np.allclose(vectors[0], fake_embedding("a brief"), atol=1e-6)
+        assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+        assert server.requests == 1
+
+    with FakeEmbeddingServer(latency_ms=0, error_rate=1.0) as failing:
+        client = OpenAI(api_key="test", base_url=failing.url, max_retries=0)
+        with pytest.raises(InternalServerError):
+            client.embeddings.create(model="m", input="x")
+
+
+def test_fake_recall_filters_and_orders_by_similarity() -> None:
+    db = FakeDatabase(n_experts=300, n_projects=4, seed=3)
+    project = db.fetch_project(project_ids(4)[1])
+    assert project is not None and db.fetch_project("missing") is None
+    filters = project["filter_criteria"]
+
+    query = fake_embedding(filters["brief"]).tolist()
+    pool, similarity = db.fetch_recall_pool(filters, query, limit=50)
+    assert pool and len(pool) <= 50
+    for expert in pool:
+        assert filters["industry"].lower() in expert["industry"].lower()
+        assert filters["sub_industry"].lower() in expert["sub_industry"].lower()
+    sims = [similarity[e["id"]] for e in pool]
+    assert sims == sorted(sims, reverse=True)
+    assert db.fetch_recall_pool({}, None, limit=10)[1] == {}
+
+
+def test_drive_reports_every_endpoint() -> None:
+    from main import app
+
+    with ExitStack() as stack:
+        FakeDatabase(n_experts=150, n_projects=4).install(stack)
+        stack.enter_context(
+            patch("main.get_embedding", side_effect=lambda t: fake_embedding(t).tolist())
+        )
+        stack.enter_context(
+            patch("rank_sessions.get_embedding", side_effect=lambda t: fake_embedding(t).tolist())
+        )
+        result = asyncio.run(
+            drive(
+                "http://loadtest",
+                parse_mix("rank=2,embeddings,graph,rate"),
+                concurrency=4,
+                duration=1.0,
+                projects=project_ids(4),
+                transport=httpx.ASGITransport(app=app),
+            )
+        )
+
+    assert set(result["endpoints"]) == {"rank", "embeddings", "graph", "rate"}
+    assert all(v is not None for v in result["cold_ms"].values())
+    for summary in result["endpoints"].values():
+        assert summary["requests"] > 0 and summary["errors"] == {}
+        assert summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"] <= summary["max_ms"]
+    assert result["total"]["requests"] == sum(s["requests"] for s in result["endpoints"].values())
+    assert "total" in format_report(result)
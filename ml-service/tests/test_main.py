@@ -39,8 +39,24 @@ def test_predict_rate_too_short(client: TestClient) -> None:
     assert r.status_code == 400
 
 
+def test_predict_rate_batch_keeps_order_and_per_item_errors(client: TestClient) -> None:
+    cv = "Senior Director at McKinsey with 15 years of experience in M&A. Based in New York."
+    single = client.post("/predict-rate", json={"text": cv}).json()
+    r = client.post(
+        "/predict-rate/batch",
+        json={"items": [{"id": "a", "text": cv}, {"id": "b", "text": "short"}, {"text": cv}]},
+    )
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert [item["id"] for item in results] == ["a", "b", None]
+    assert results[0]["predicted_rate"] == single["predicted_rate"]
+    assert results[1]["error"] == "Text too short for prediction"
+    assert results[1]["predicted_rate"] is None
+    assert client.post("/predict-rate/batch", json={"items": []}).status_code == 422
+
+
 def test_rank_project_not_found(client: TestClient) -> None:
-    with patch("main.fetch_project", return_value=None):
+    with patch("rank_sessions.fetch_project", return_value=None):
         r = client.post("/rank", json={"project_id": "nonexistent"})
         assert r.status_code == 404
 
@@ -58,3 +74,18 @@ def test_graph_visualize(client: TestClient) -> None:
 def test_graph_visualize_empty_body(client: TestClient) -> None:
     r = client.post("/graph/visualize", json={})
     assert r.status_code == 200
+
+
+def test_metrics_exposes_request_and_rank_stage_series(client: TestClient) -> None:
+    client.get("/health")
+    with patch("rank_sessions.fetch_project", return_value=None):
+        client.post("/rank", json={"project_id": "nonexistent"})
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    body = r.text
+    assert 'ml_requests_total{endpoint="/health",method="GET",status="200"}' in body
+    assert 'ml_request_duration_seconds_bucket{endpoint="/rank"' in body
+    assert 'ml_rank_stage_duration_seconds_count{stage="project_fetch"}' in body
+    assert 'ml_model_info{model="rate_estimator"' in body
@@ -0,0 +1,49 @@
+"""Tests for the sparse PageRank solver."""
+
+import networkx as nx
+import numpy as np
+import pytest
+import rustworkx as rx
+
+from pagerank import TransitionMatrix, pagerank
+
+
+def _random_edges(n: int, m: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    src = rng.integers(0, n, m)
+    dst = rng.integers(0, n, m)
+    keep = src != dst
+    return src[keep], dst[keep]
+
+
+def test_global_pagerank_matches_rustworkx_on_directed_graph() -> None:
+    src, dst = _random_edges(60, 200, seed=1)
+    graph = rx.PyDiGraph()
+    graph.add_nodes_from(range(60))
+    graph.add_edges_from_no_data(list({(int(s), int(d)) for s, d in zip(src, dst, strict=True)}))
+    edges = np.array(graph.edge_list())
+
+    ours = pagerank(TransitionMatrix.from_edges(edges[:, 0], edges[:, 1], 60, symmetric=False))
+    expected = rx.pagerank(graph, alpha=0.85, tol=1e-10)
+    assert ours.tolist() == pytest.approx([expected[i] for i in range(60)], abs=1e-6)
+
+
+def test_personalized_pagerank_matches_networkx_on_undirected_graph() -> None:
+    src, dst = _random_edges(40, 90, seed=2)
+    graph = nx.Graph()
+    graph.add_nodes_from(range(40))  # includes isolated (dangling) nodes
+    graph.add_edges_from(zip(src.tolist(), dst.tolist(), strict=True))
+    edges = np.array(graph.edges())
+    seeds = {3: 1.0, 7: 1.0}
+
+    personalization = np.zeros(40)
+    personalization[list(seeds)] = 1.0
+    ours = pagerank(TransitionMatrix.from_edges(edges[:, 0], edges[:, 1], 40), personalization)
+    expected = nx.pagerank(graph, alpha=0.85, personalization=seeds, tol=1e-10)
+    assert ours.tolist() == pytest.approx([expected[i] for i in range(40)], abs=1e-6)
+    assert ours.sum() == pytest.approx(1.0)
+
+
+def test_empty_graph() -> None:
+    empty = np.array([], dtype=np.int64)
+    assert pagerank(TransitionMatrix.from_edges(empty, empty, 0)).size == 0
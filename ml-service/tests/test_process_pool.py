@@ -0,0 +1,120 @@
+"""Tests for the CPU process pool (process_pool.py) and the work offloaded to it."""
+
+import os
+import time
+from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import admission
+import graph_engine
+import graph_layout
+import process_pool
+import rate_estimator
+from benchmarks.synthetic import make_experts, make_rate_training_rows
+
+
+def spin(seconds: float) -> str:
+    """Pool task: busy for `seconds`, checking for cancellation."""
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        process_pool.checkpoint()
+        time.sleep(0.01)
+    return "finished"
+
+
+@pytest.fixture
+def pool() -> Generator[None, None, None]:
+    with patch("process_pool.POOL_SIZE", 1):
+        yield
+        process_pool.shutdown()
+
+
+def test_tasks_run_in_another_process(pool: None) -> None:
+    assert process_pool.run("test", os.getpid) != os.getpid()
+    with pytest.raises(ZeroDivisionError):
+        process_pool.run("test", divmod, 1, 0)
+
+
+def test_cancelled_request_stops_its_task(pool: None) -> None:
+    process_pool.run("test", os.getpid)  # start the worker
+    token = admission._current.set(admission.RequestContext(time.monotonic() + 0.3))
+    try:
+        start = time.monotonic()
+        with pytest.raises(admission.DeadlineExceededError):
+            process_pool.run("test", spin, 30.0)
+        assert time.monotonic() - start < 2
+    finally:
+        admission._current.reset(token)
+    # The single worker is free again: the spinning task stopped at its checkpoint
+    start = time.monotonic()
+    process_pool.run("test", os.getpid)
+    assert time.monotonic() - start < 2
+
+
+def test_abandoned_snapshot_build_cancels_its_task(pool: None) -> None:
+    process_pool.run("test", os.getpid)  # start the worker
+    graph_engine.invalidate_graph_snapshots()
+
+    def build(limit: int) -> str:
+        return process_pool.run("test", spin, 30.0)
+
+    token = admission._current.set(admission.RequestContext(time.monotonic() + 0.3))
+    try:
+        with patch("graph_engine._refresh_snapshot", build):
+            with pytest.raises(admission.DeadlineExceededError):
+                graph_engine.get_graph_snapshot(100)
+    finally:
+        admission._current.reset(token)
+    # Nobody waits on the shared build any more, so its task stopped and freed the worker
+    start = time.monotonic()
+    process_pool.run("test", os.getpid)
+    assert time.monotonic() - start < 2
+
+
+def test_graph_built_in_the_pool_matches_an_inline_build(pool: None) -> None:
+    experts = make_experts(150, seed=5)
+    with patch("graph_engine.fetch_experts_for_graph", return_value=experts):
+        graph_layout.forget()
+        pooled = graph_engine.build_knowledge_graph(limit=150).to_arrays()
+        assert graph_layout.previous() is not None  # next build warm starts from it
+        graph_layout.forget()
+        with patch("process_pool.POOL_SIZE", 0):
+            inline = graph_engine.build_knowledge_graph(limit=150).to_arrays()
+    graph_layout.forget()
+
+    assert pooled.keys() == inline.keys()
+    for name in ("node_id", "edge_src", "edge_dst", "edge_weight", "community", "influence_ids"):
+        assert np.array_equal(pooled[name], inline[name]), name
+    assert np.allclose(pooled["centrality"], inline["centrality"])
+    assert np.allclose(pooled["layout"], inline["layout"], atol=1e-4)
+
+
+def test_expert_columns_round_trip() -> None:
+    experts = make_experts(50, seed=7)
+    experts[0] = {**experts[0], "sub_industry": None, "skills": [], "past_employers": None}
+    decoded = graph_engine.experts_from_columns(graph_engine.expert_columns(experts))
+    assert decoded[0]["sub_industry"] == "" and decoded[0]["past_employers"] == []
+    for before, after in zip(experts[1:], decoded[1:], strict=True):
+        assert after == {k: before[k] for k in after}
+
+
+def test_pooled_training_writes_to_the_callers_model_dir(pool: None, tmp_path: Path) -> None:
+    frame = rate_estimator.TrainingFrame.from_rows(make_rate_training_rows(200))
+    model_path = tmp_path / "rate_model.json"
+    with (
+        patch("rate_estimator.MODEL_DIR", tmp_path),
+        patch("rate_estimator.MODEL_PATH", model_path),
+        patch("rate_estimator.ENCODER_INDUSTRY_PATH", tmp_path / "industry_encoder.json"),
+        patch("rate_estimator.MODEL_META_PATH", tmp_path / "rate_model_meta.json"),
+        patch("rate_estimator._load_training_data", return_value=frame),
+    ):
+        before = rate_estimator._model_stamp()
+        assert rate_estimator.train_and_save(mode="full")["ok"]
+        # The spawned worker does not see the patched globals; it must use the paths passed
+        written = model_path if rate_estimator.HAS_XGB else tmp_path / "rate_coef.npy"
+        assert written.exists()
+        assert rate_estimator._model_stamp() != before
@@ -0,0 +1,86 @@
+"""Tests for on-demand request profiling."""
+
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import profiling
+
+
+@pytest.fixture
+def client() -> TestClient:
+    from main import app
+
+    return TestClient(app)
+
+
+def _slow_missing_project(_project_id: str) -> None:
+    time.sleep(0.05)
+    return None
+
+
+def test_profile_header_ignored_without_token(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.delenv("ML_PROFILE_TOKEN", raising=False)
+    r = client.get("/health", headers={"X-Profile": "inline"})
+    assert r.status_code == 200
+    assert r.json() == {"status": "ok"}
+    assert "x-profile-file" not in r.headers
+
+
+def test_profile_header_wrong_token(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("ML_PROFILE_TOKEN", "secret")
+    r = client.get("/health", headers={"X-Profile": "inline", "X-Profile-Token": "nope"})
+    assert r.json() == {"status": "ok"}
+
+
+def test_profile_inline_returns_folded_stacks(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("ML_PROFILE_TOKEN", "secret")
+    monkeypatch.setenv("ML_PROFILE_INTERVAL_MS", "1")
+    with patch("rank_sessions.fetch_project", side_effect=_slow_missing_project):
+        r = client.post(
+            "/rank",
+            json={"project_id": "p1"},
+            headers={"X-Profile": "inline", "X-Profile-Token": "secret"},
+        )
+    assert r.status_code == 200
+    assert r.headers["x-profile-status"] == "404"
+    lines = r.text.strip().splitlines()
+    assert lines
+    _, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("rank_experts (main.py" in line for line in lines)
+    assert any("_slow_missing_project" in line for line in lines)
+
+
+def test_profile_sample_rate_writes_file(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setenv("ML_PROFILE_SAMPLE_RATE", "1.0")
+    monkeypatch.setenv("ML_PROFILE_INTERVAL_MS", "1")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    with patch("rank_sessions.fetch_project", side_effect=_slow_missing_project):
+        r = client.post("/rank", json={"project_id": "p1"})
+    assert r.status_code == 404
+    saved = tmp_path / r.headers["x-profile-file"]
+    assert saved.exists()
+    assert "rank_experts" in saved.read_text()
+
+
+def test_profiled_is_passthrough_when_inactive() -> None:
+    calls: list[Any] = []
+
+    @profiling.profiled
+    def fn(x: int) -> int:
+        calls.append(x)
+        return x * 2
+
+    assert fn(3) == 6
+    assert calls == [3]
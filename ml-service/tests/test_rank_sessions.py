@@ -0,0 +1,108 @@
+"""Tests for two-stage /rank pagination (rank_sessions.py)."""
+
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import rank_sessions
+from benchmarks.synthetic import make_experts
+from scoring import run_xgboost_ranker
+
+POOL = make_experts(250, seed=5)
+SIMILARITY = {e["id"]: 1.0 - i / len(POOL) for i, e in enumerate(POOL)}
+PROJECTS = {
+    "p1": {"id": "p1", "title": "A", "filter_criteria": {"brief": "M&A"}},
+    "p2": {"id": "p2", "title": "B", "filter_criteria": {}},
+}
+
+
+@pytest.fixture
+def fakes() -> Generator[dict[str, MagicMock], None, None]:
+    rank_sessions.invalidate_rank_sessions()
+    with (
+        patch("rank_sessions.fetch_project", side_effect=PROJECTS.get),
+        patch(
+            "rank_sessions.fetch_recall_pool",
+            side_effect=lambda f, emb, limit: (POOL[:limit], dict(SIMILARITY)),
+        ) as recall,
+        patch("rank_sessions.get_embedding", return_value=[0.1, 0.2]),
+        patch("rank_sessions.get_graph_snapshot", side_effect=RuntimeError("no graph")),
+        patch("rank_sessions.run_xgboost_ranker", side_effect=run_xgboost_ranker) as rerank,
+        # Pages follow vector recall order; keyword recall is covered in test_lexical_index
+        patch("rank_sessions.RANK_RECALL_MODE", "vector"),
+    ):
+        yield {"recall": recall, "rerank": rerank}
+    rank_sessions.invalidate_rank_sessions()
+
+
+def _rank(**body: Any) -> dict[str, Any]:
+    from main import app
+
+    r = TestClient(app).post("/rank", json={"project_id": "p1", **body})
+    assert r.status_code == 200, r.text
+    data: dict[str, Any] = r.json()
+    return data
+
+
+def test_default_page_is_first_scoring_slice(fakes: dict[str, MagicMock]) -> None:
+    data = _rank()
+    assert len(data["ranked_experts"]) == rank_sessions.SCORING_SLICE
+    assert data["total"] == len(POOL)
+    assert data["next_cursor"]
+    assert fakes["rerank"].call_count == 1
+    assert {e["expert_id"] for e in data["ranked_experts"]} == {
+        e["id"] for e in POOL[: rank_sessions.SCORING_SLICE]
+    }
+
+
+def test_cursor_pages_cover_pool_once_without_recomputing(fakes: dict[str, MagicMock]) -> None:
+    seen: list[str] = []
+    cursor = None
+    pages = 0
+    while True:
+        data = _rank(page_size=60, **({"cursor": cursor} if cursor else {}))
+        seen.extend(e["expert_id"] for e in data["ranked_experts"])
+        pages += 1
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == 5
+    assert sorted(seen) == sorted(e["id"] for e in POOL)
+    # One recall; each slice scored once, only as pages reached it
+    assert fakes["recall"].call_count == 1
+    assert fakes["rerank"].call_count == 3
+
+
+def test_expired_cursor_is_gone_instead_of_reslicing(fakes: dict[str, MagicMock]) -> None:
+    from main import app
+
+    first = _rank(page_size=50)
+    rank_sessions.invalidate_rank_sessions()
+    r = TestClient(app).post(
+        "/rank", json={"project_id": "p1", "page_size": 50, "cursor": first["next_cursor"]}
+    )
+    assert r.status_code == 410
+    assert fakes["recall"].call_count == 1
+    assert _rank(page_size=50)["ranked_experts"] == first["ranked_experts"]
+
+
+def test_invalid_and_foreign_cursors_rejected(fakes: dict[str, MagicMock]) -> None:
+    from main import app
+
+    client = TestClient(app)
+    r = client.post("/rank", json={"project_id": "p1", "cursor": "not-a-cursor"})
+    assert r.status_code == 400
+    cursor = _rank()["next_cursor"]
+    r = client.post("/rank", json={"project_id": "p2", "cursor": cursor})
+    assert r.status_code == 400
+    assert client.post("/rank", json={"project_id": "p1", "page_size": 0}).status_code == 422
+
+
+def test_cursor_round_trip() -> None:
+    cursor = rank_sessions.encode_cursor("abc123", 300)
+    assert rank_sessions.decode_cursor(cursor) == ("abc123", 300)
+    with pytest.raises(rank_sessions.InvalidCursorError):
+        rank_sessions.decode_cursor(rank_sessions.encode_cursor("abc123", -1))
@@ -0,0 +1,182 @@
+"""Tests for rate estimator training: full vs incremental runs and the industry vocabulary."""
+
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import rate_estimator
+from benchmarks.synthetic import make_rate_training_rows
+from rate_estimator import IndustryVocabulary, TrainingFrame, _encode_features, train_and_save
+
+
+@pytest.fixture
+def model_dir(tmp_path: Path) -> Generator[Path, None, None]:
+    with (
+        patch("rate_estimator.MODEL_DIR", tmp_path),
+        patch("rate_estimator.MODEL_PATH", tmp_path / "rate_model.json"),
+        patch("rate_estimator.ENCODER_INDUSTRY_PATH", tmp_path / "industry_encoder.json"),
+        patch("rate_estimator.MODEL_META_PATH", tmp_path / "rate_model_meta.json"),
+    ):
+        yield tmp_path
+
+
+def _batch(n: int, seed: int, tag: str) -> TrainingFrame:
+    stamp = f"2025-01-01T00:00:0{seed}"
+    rows = [(*row, stamp, tag) for row in make_rate_training_rows(n, seed)]
+    return TrainingFrame.from_rows(rows)
+
+
+def test_vocabulary_is_append_only_and_maps_unknown_to_missing() -> None:
+    vocab = IndustryVocabulary(["Finance", "Energy"])
+    vocab.extend(["Healthcare", "Finance"])
+    assert vocab.classes == ["Finance", "Energy", "Healthcare"]
+    codes = vocab.transform(["Healthcare", "Unknown", "Energy"])
+    # Not 0: that is Finance's code, and an unseen industry must not be scored as Finance
+    assert codes[[0, 2]].tolist() == [2, 1] and np.isnan(codes[1])
+    assert np.isnan(vocab.code("Unknown")) and vocab.code("Finance") == 0
+
+
+@pytest.mark.skipif(not rate_estimator.HAS_XGB, reason="incremental training needs xgboost")
+def test_incremental_continues_from_watermark(model_dir: Path) -> None:
+    loads: list[Any] = []
+
+    def loader(since: Any = None, limit: Any = None) -> TrainingFrame:
+        loads.append(since)
+        return _batch(300, len(loads), f"row{len(loads)}")
+
+    with patch("rate_estimator._load_training_data", side_effect=loader):
+        first = train_and_save()
+        second = train_and_save()
+        full = train_and_save(mode="full")
+
+    assert first["mode"] == "full" and first["trees"] == 100
+    assert second["mode"] == "incremental"
+    assert second["trees"] == 100 + rate_estimator.INCREMENTAL_ESTIMATORS
+    assert "mae_before" in second
+    assert loads == [None, ("2025-01-01T00:00:01", "row1"), None]
+    assert full["trees"] == 100
+    meta = rate_estimator.load_training_meta()
+    assert meta is not None and meta["watermark"] == ["2025-01-01T00:00:03", "row3"]
+
+
+@pytest.mark.skipif(not rate_estimator.HAS_XGB, reason="incremental training needs xgboost")
+def test_auto_mode_schedules_full_retrain(model_dir: Path) -> None:
+    with (
+        patch("rate_estimator._load_training_data", return_value=_batch(100, 1, "a")),
+        patch("rate_estimator.FULL_RETRAIN_EVERY", 2),
+    ):
+        modes = [train_and_save()["mode"] for _ in range(5)]
+    assert modes == ["full", "incremental", "incremental", "full", "incremental"]
+
+
+@pytest.mark.skipif(not rate_estimator.HAS_XGB, reason="incremental training needs xgboost")
+def test_too_few_new_rows_keeps_model_and_watermark(model_dir: Path) -> None:
+    with patch("rate_estimator._load_training_data", return_value=_batch(100, 1, "a")):
+        train_and_save()
+    with patch("rate_estimator._load_training_data", return_value=_batch(3, 2, "b")):
+        result = train_and_save()
+    assert result["ok"] is False and result["mode"] == "incremental"
+    meta = rate_estimator.load_training_meta()
+    assert meta is not None and meta["watermark"][1] == "a"
+
+
+def test_switching_source_forces_full_retrain(model_dir: Path) -> None:
+    with patch("rate_estimator._load_training_data", return_value=_batch(100, 1, "a")):
+        train_and_save()
+    with patch(
+        "rate_estimator._load_training_data_from_engagements", return_value=_batch(100, 2, "e")
+    ) as load:
+        result = train_and_save(use_engagements=True, mode="incremental")
+    assert result["mode"] == "full"
+    assert load.call_args.kwargs["since"] is None
+
+
+@pytest.mark.skipif(not rate_estimator.HAS_XGB, reason="incremental training needs xgboost")
+def test_engagements_continue_from_their_insert_order(model_dir: Path) -> None:
+    queries: list[tuple[str, tuple[Any, ...]]] = []
+
+    def chunks(query: str, params: tuple[Any, ...]) -> Any:
+        queries.append((query, params))
+        return iter([[(*row, "2025-01-01T00:00:01", f"e{i}") for i, row in enumerate(rows)]])
+
+    rows = make_rate_training_rows(100, 1)
+    with patch("rate_estimator._iter_training_chunks", side_effect=chunks):
+        train_and_save(use_engagements=True)
+        result = train_and_save(use_engagements=True)
+    assert result["mode"] == "incremental"
+    # Late-recorded engagements carry an old business date, so "date" cannot order them
+    query, params = queries[1]
+    assert "(eng.created_at, eng.id) >" in query and "ORDER BY eng.created_at, eng.id" in query
+    assert params[:2] == ("2025-01-01T00:00:01", "e99")
+
+    # A model whose watermark came from another column starts over with a full retrain
+    meta = rate_estimator.load_training_meta()
+    assert meta is not None and meta["watermark_column"] == "created_at"
+    rate_estimator._save_training_meta({**meta, "watermark_column": "date"})
+    with patch("rate_estimator._iter_training_chunks", side_effect=chunks):
+        assert train_and_save(use_engagements=True)["mode"] == "full"
+
+
+def test_predict_rate_uses_stable_industry_codes(model_dir: Path) -> None:
+    with patch("rate_estimator._load_training_data", return_value=_batch(200, 1, "a")):
+        train_and_save()
+    out = rate_estimator.predict_rate(70, 12, "USA", "NA", "Industry that was never seen")
+    assert 80 <= out["predicted_rate"] <= 800
+    blank = [rate_estimator.predict_rate(70, 12, "USA", "NA", ind) for ind in ("", "  ")]
+    assert blank[0] == blank[1] == rate_estimator.predict_rate(70, 12, "USA", "NA", "Other")
+
+
+def test_frame_matches_row_wise_encoding() -> None:
+    rows: list[tuple[Any, ...]] = [
+        (80, 12, "North America", "USA", "Finance", 400.0),
+        (None, None, None, None, None, 150.0),
+        (0, 70, "EMEA", "Germany", " Energy ", 250.0),
+        (55, -3, "APAC", "Japan", "Finance", 300.0),
+        (60, 8, "LATAM", "Singapore", "Healthcare", 320.0),
+        (60, 8, "LATAM", "Singapore", "  ", 320.0),
+    ]
+    frame = TrainingFrame.from_chunks([rows[:2], [], rows[2:]])
+    assert frame.seniority.tolist() == [80, 50, 50, 55, 60, 60]
+    assert frame.years.tolist() == [12, 5, 50, 0, 8, 8]
+    expected_geo = [rate_estimator._geo_tier(r[2] or "", r[3] or "") for r in rows]
+    assert frame.geo_tier.tolist() == expected_geo == [1, 3, 2, 3, 1, 1]
+    # NULL and blank industries are both "Other", as predict_rate sees them
+    assert [frame.industries[i] for i in frame.industry_idx] == [
+        "Finance",
+        "Other",
+        "Energy",
+        "Finance",
+        "Healthcare",
+        "Other",
+    ]
+    assert frame.watermark is None
+
+
+def test_unknown_industry_only_affects_its_row() -> None:
+    vocab = IndustryVocabulary(["Finance", "Energy"])
+    frame = TrainingFrame.from_rows(
+        [(50, 5, "", "", "Energy", 1.0), (50, 5, "", "", "Brand new", 1.0)]
+    )
+    features, _ = _encode_features(frame, vocab)
+    assert features[0, 3] == 1.0 and np.isnan(features[1, 3])
+
+
+@pytest.mark.skipif(not rate_estimator.HAS_XGB, reason="compiled trees come from xgboost")
+def test_saved_model_serves_single_rows_from_compiled_trees(model_dir: Path) -> None:
+    import xgboost as xgb
+
+    from tree_predictor import HybridPredictor
+
+    with patch("rate_estimator._load_training_data", return_value=_batch(300, 1, "a")):
+        train_and_save()
+    assert (model_dir / "rate_model_trees.npz").exists()
+    model, vocab = rate_estimator.get_model()
+    assert isinstance(model, HybridPredictor)
+    reference = xgb.XGBRegressor()
+    reference.load_model(str(model_dir / "rate_model.json"))
+    features, _ = _encode_features(_batch(20, 2, "b"), vocab)
+    np.testing.assert_allclose(model.predict(features), reference.predict(features), atol=1e-2)
@@ -0,0 +1,126 @@
+"""Tests for the cross-worker shared array store and shared graph snapshots."""
+
+import multiprocessing as mp
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import graph_engine
+import shared_store
+from benchmarks.synthetic import make_experts
+from graph_engine import GraphEngine, get_graph_snapshot
+
+
+@pytest.fixture
+def shared_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Generator[Path, None, None]:
+    monkeypatch.setenv("ML_SHARED_DIR", str(tmp_path))
+    shared_store._attached.clear()
+    graph_engine._snapshots.clear()
+    yield tmp_path
+    shared_store._attached.clear()
+    graph_engine._snapshots.clear()
+
+
+def test_publish_attach_roundtrip_is_read_only(shared_dir: Path) -> None:
+    version = shared_store.publish(
+        "demo", {"a": np.arange(5, dtype=np.int32), "s": np.array(["x", "yy"])}, {"k": 1}
+    )
+    shared = shared_store.attach("demo")
+    assert shared is not None
+    assert shared.version == version
+    assert shared.meta == {"k": 1}
+    assert shared.arrays["a"].tolist() == [0, 1, 2, 3, 4]
+    assert shared.arrays["s"].tolist() == ["x", "yy"]
+    with pytest.raises(ValueError):
+        shared.arrays["a"][0] = 9
+
+
+def test_publish_swaps_version_and_prunes(shared_dir: Path) -> None:
+    versions = [shared_store.publish("demo", {"a": np.full(3, i)}) for i in range(5)]
+    assert shared_store.current_version("demo") == versions[-1]
+    shared = shared_store.attach("demo")
+    assert shared is not None and shared.arrays["a"].tolist() == [4, 4, 4]
+    on_disk = [p for p in (shared_dir / "demo").iterdir() if p.is_dir()]
+    assert len(on_disk) == 1 + shared_store.KEEP_OLD_VERSIONS
+
+    shared_store.retire("demo")
+    assert shared_store.attach("demo") is None
+
+
+def test_graph_engine_array_roundtrip() -> None:
+    experts = make_experts(40, seed=5)
+    with patch("graph_engine.fetch_experts_for_graph", return_value=experts):
+        built = GraphEngine()
+        built.build_knowledge_graph(limit=40)
+    restored = GraphEngine.from_arrays(built.to_arrays())
+
+    for ex in experts:
+        assert restored.get_network_influence(ex["id"]) == built.get_network_influence(ex["id"])
+    assert restored.get_network_influence("missing") == 0.0
+    assert restored.to_react_force_graph_format() == built.to_react_force_graph_format()
+
+
+def test_snapshot_attaches_instead_of_rebuilding(shared_dir: Path) -> None:
+    experts = make_experts(30, seed=9)
+    with patch("graph_engine.fetch_experts_for_graph", return_value=experts) as fetch:
+        first = get_graph_snapshot(limit=30)
+        graph_engine._snapshots.clear()  # simulate a second worker
+        second = get_graph_snapshot(limit=30)
+    assert fetch.call_count == 1
+    assert second is not first
+    assert second.get_network_influence(experts[0]["id"]) == first.get_network_influence(
+        experts[0]["id"]
+    )
+
+
+def test_snapshot_picks_up_newer_shared_version(shared_dir: Path) -> None:
+    with patch("graph_engine.fetch_experts_for_graph", return_value=make_experts(10, seed=1)):
+        old = get_graph_snapshot(limit=10)
+    with patch("graph_engine.fetch_experts_for_graph", return_value=make_experts(20, seed=2)):
+        engine = graph_engine.build_knowledge_graph(limit=20)
+    shared_store.publish("graph-10", engine.to_arrays(), {"limit": 10})
+    new = get_graph_snapshot(limit=10)
+    assert new is not old
+    assert len(new.to_react_force_graph_format()["nodes"]) == len(
+        engine.to_react_force_graph_format()["nodes"]
+    )
+
+
+def _worker_snapshot(shared_root: str, marker_dir: str, queue: Any) -> None:
+    import os
+
+    os.environ["ML_SHARED_DIR"] = shared_root
+    graph_engine._snapshots.clear()
+    shared_store._attached.clear()
+
+    def fetch(limit: int = 500) -> list[dict[str, Any]]:
+        Path(marker_dir, f"build-{os.getpid()}").touch()
+        return make_experts(50, seed=3)
+
+    with patch("graph_engine.fetch_experts_for_graph", side_effect=fetch):
+        engine = get_graph_snapshot(limit=50)
+    queue.put(engine.get_network_influence(make_experts(50, seed=3)[0]["id"]))
+
+
+def test_workers_build_once_and_share(tmp_path: Path) -> None:
+    ctx = mp.get_context("fork")
+    queue = ctx.Queue()
+    shared_root = tmp_path / "shm"
+    markers = tmp_path / "markers"
+    markers.mkdir()
+    procs = [
+        ctx.Process(target=_worker_snapshot, args=(str(shared_root), str(markers), queue))
+        for _ in range(3)
+    ]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+    results = [queue.get(timeout=5) for _ in procs]
+    assert len(set(results)) == 1
+    assert len(list(markers.iterdir())) == 1
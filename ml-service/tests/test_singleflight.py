@@ -0,0 +1,204 @@
+"""Tests for single-flight request coalescing (singleflight.py) and where it is applied."""
+
+import threading
+import time
+from collections.abc import Callable, Generator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+import admission
+import graph_engine
+import rank_sessions
+from benchmarks.synthetic import make_experts
+from singleflight import SingleFlight
+
+
+def _calls(group: str, role: str) -> float:
+    return (
+        REGISTRY.get_sample_value("ml_singleflight_calls_total", {"group": group, "role": role})
+        or 0.0
+    )
+
+
+def _concurrently(n: int, fn: Callable[[], Any]) -> list[Any]:
+    with ThreadPoolExecutor(n) as pool:
+        return list(pool.map(lambda _: fn(), range(n)))
+
+
+def test_concurrent_calls_share_one_computation() -> None:
+    flight: SingleFlight[object] = SingleFlight("test_share")
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def compute() -> object:
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return object()
+
+    with ThreadPoolExecutor(6) as pool:
+        leader = pool.submit(flight.do, "k", compute)
+        started.wait(5)
+        followers = [pool.submit(flight.do, "k", compute) for _ in range(4)]
+        other = pool.submit(flight.do, "other", lambda: "independent")
+        assert other.result(5) == "independent"  # other keys do not wait
+        while _calls("test_share", "follower") < 4:
+            time.sleep(0.01)
+        release.set()
+        results = [leader.result(5)] + [f.result(5) for f in followers]
+
+    assert len(runs) == 1 and all(r is results[0] for r in results)
+    assert flight.in_flight() == 0
+    assert REGISTRY.get_sample_value(
+        "ml_singleflight_wait_seconds_count", {"group": "test_share"}
+    ) == pytest.approx(4)
+    flight.do("k", compute)  # nothing is kept after completion
+    assert len(runs) == 2
+
+
+def test_errors_reach_every_caller() -> None:
+    flight: SingleFlight[None] = SingleFlight("test_error")
+    runs = []
+
+    def fail() -> None:
+        runs.append(1)
+        time.sleep(0.2)
+        raise ValueError("boom")
+
+    def call() -> str:
+        try:
+            flight.do("k", fail)
+        except ValueError as exc:
+            return str(exc)
+        return "no error"
+
+    assert _concurrently(4, call) == ["boom"] * 4
+    assert len(runs) == 1
+
+
+def test_followers_give_up_at_their_own_deadline() -> None:
+    flight: SingleFlight[str] = SingleFlight("test_deadline")
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute() -> str:
+        started.set()
+        release.wait(5)
+        return "done"
+
+    def follow(seconds: float) -> float:
+        token = admission._current.set(admission.RequestContext(time.monotonic() + seconds))
+        start = time.monotonic()
+        try:
+            with pytest.raises(admission.DeadlineExceededError):
+                flight.do("k", compute)
+        finally:
+            admission._current.reset(token)
+        return time.monotonic() - start
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "k", compute)
+        started.wait(5)
+        assert follow(0.2) < 1
+        assert flight.in_flight() == 1  # the computation carries on for the leader
+        release.set()
+        assert leader.result(5) == "done"
+
+
+def test_computation_is_cancelled_once_every_caller_has_left() -> None:
+    flight: SingleFlight[str] = SingleFlight("test_abandon")
+    started = threading.Event()
+    stopped = threading.Event()
+
+    def compute() -> str:
+        started.set()
+        try:
+            while True:
+                admission.checkpoint()
+                time.sleep(0.01)
+        finally:
+            stopped.set()
+
+    def call(seconds: float) -> None:
+        token = admission._current.set(admission.RequestContext(time.monotonic() + seconds))
+        try:
+            with pytest.raises(admission.DeadlineExceededError):
+                flight.do("k", compute)
+        finally:
+            admission._current.reset(token)
+
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(call, 0.2)
+        started.wait(5)
+        second = pool.submit(call, 0.6)
+        first.result(5)
+        assert not stopped.is_set()  # still wanted by the second caller
+        second.result(5)
+    assert stopped.wait(1)
+    assert flight.in_flight() == 0
+
+
+@pytest.fixture
+def no_snapshots() -> Generator[None, None, None]:
+    graph_engine.invalidate_graph_snapshots()
+    yield
+    graph_engine.invalidate_graph_snapshots()
+
+
+def _slow_build(seconds: float) -> MagicMock:
+    def build(limit: int) -> graph_engine.GraphEngine:
+        time.sleep(seconds)
+        return MagicMock(spec=graph_engine.GraphEngine, limit=limit)
+
+    return MagicMock(side_effect=build)
+
+
+def test_snapshot_builds_coalesce_per_limit(no_snapshots: None) -> None:
+    build = _slow_build(0.3)
+    with patch("graph_engine.build_knowledge_graph", build):
+        limits = [100, 100, 100, 200, 200]
+        with ThreadPoolExecutor(len(limits)) as pool:
+            engines = list(pool.map(lambda n: graph_engine.get_graph_snapshot(n), limits))
+    assert build.call_count == 2  # one build per limit, the two limits in parallel
+    assert engines[0] is engines[1] is engines[2] and engines[3] is engines[4]
+    assert graph_engine.graph_snapshot_count() == 2
+
+
+def test_build_overtaken_by_an_invalidation_is_not_cached(no_snapshots: None) -> None:
+    build = _slow_build(0.3)
+    with patch("graph_engine.build_knowledge_graph", build):
+        with ThreadPoolExecutor(1) as pool:
+            pending = pool.submit(graph_engine.get_graph_snapshot, 100)
+            time.sleep(0.1)
+            graph_engine.invalidate_graph_snapshots(time.time())
+            stale = pending.result(5)
+        assert graph_engine.graph_snapshot_count() == 0
+        assert graph_engine.get_graph_snapshot(100) is not stale
+    assert build.call_count == 2
+
+
+def test_concurrent_first_pages_share_one_rank_session() -> None:
+    pool = make_experts(120, seed=11)
+
+    def recall(*_: Any, **__: Any) -> tuple[list[dict[str, Any]], dict[str, float]]:
+        time.sleep(0.3)
+        return pool, {e["id"]: 0.5 for e in pool}
+
+    rank_sessions.invalidate_rank_sessions()
+    with (
+        patch("rank_sessions.fetch_project", return_value={"id": "p1", "filter_criteria": {}}),
+        patch("rank_sessions.fetch_recall_pool", side_effect=recall) as fetch,
+        patch("rank_sessions.get_embedding", return_value=[0.1]),
+        patch("rank_sessions.get_graph_snapshot", side_effect=RuntimeError("no graph")),
+    ):
+        pages = _concurrently(4, lambda: rank_sessions.rank_page("p1", None, 10, 500))
+    rank_sessions.invalidate_rank_sessions()
+
+    assert fetch.call_count == 1
+    assert len({p.next_cursor for p in pages}) == 1
+    assert all(p.ranked_experts == pages[0].ranked_experts for p in pages)
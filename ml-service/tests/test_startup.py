@@ -0,0 +1,102 @@
+"""Tests for import-time budget and the /ready warm-up endpoint."""
+
+import os
+import subprocess  # nosec B404
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from readiness import Readiness
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+# Importing main.py must stay cheap: measured ~0.45s locally, budget leaves CI headroom.
+IMPORT_TIME_BUDGET_SECONDS = 1.5
+HEAVY_MODULES = ("pandas", "xgboost", "networkx", "sklearn", "scipy", "openai")
+
+_IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(f"{{elapsed:.4f}} {{','.join(heavy)}}")
+"""
+
+
+def test_import_main_is_lazy_and_within_budget() -> None:
+    env = {k: v for k, v in os.environ.items() if k != "DATABASE_URL"}
+    out = subprocess.run(  # nosec B603
+        [sys.executable, "-c", _IMPORT_PROBE.format(heavy=HEAVY_MODULES)],
+        cwd=SERVICE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    elapsed = float(out[0])
+    heavy_loaded = out[1] if len(out) > 1 else ""
+    assert heavy_loaded == "", f"heavy modules imported eagerly: {heavy_loaded}"
+    assert elapsed < IMPORT_TIME_BUDGET_SECONDS
+
+
+def test_readiness_reports_ready_after_all_steps() -> None:
+    calls: list[str] = []
+    r = Readiness({"a": lambda: calls.append("a"), "b": lambda: calls.append("b")})
+    assert not r.ready
+    assert r.status()["status"] == "not_ready"
+    r.start()
+    assert r.wait(timeout=5)
+    assert calls == ["a", "b"]
+    assert r.status()["status"] == "ready"
+    r.start()  # idempotent once ready
+    r.wait(timeout=5)
+    assert calls == ["a", "b"]
+
+
+def test_readiness_retries_failed_steps_only() -> None:
+    attempts = {"db": 0, "graph": 0}
+
+    def flaky_db() -> None:
+        attempts["db"] += 1
+        if attempts["db"] == 1:
+            raise ConnectionError("db down")
+
+    def graph() -> None:
+        attempts["graph"] += 1
+
+    r = Readiness({"db": flaky_db, "graph": graph})
+    r.start()
+    assert not r.wait(timeout=5)
+    status = r.status()
+    assert status["components"]["db"] == {"ready": False, "error": "db down"}
+    assert status["components"]["graph"]["ready"] is True
+
+    r.start()
+    assert r.wait(timeout=5)
+    assert attempts == {"db": 2, "graph": 1}
+
+
+def test_ready_endpoint_503_until_warm() -> None:
+    import main
+
+    gate = {"open": False}
+
+    def step() -> None:
+        if not gate["open"]:
+            time.sleep(0.01)
+            raise RuntimeError("still cold")
+
+    with patch.object(main, "readiness", Readiness({"graph": step})):
+        client = TestClient(main.app)
+        r = client.get("/ready")
+        assert r.status_code == 503
+        main.readiness.wait(timeout=5)
+        gate["open"] = True
+        client.get("/ready")  # retries the failed step
+        main.readiness.wait(timeout=5)
+        r = client.get("/ready")
+        assert r.status_code == 200
+        assert r.json()["status"] == "ready"
@@ -0,0 +1,67 @@
+"""Tests for the compiled tree-ensemble evaluator: parity with XGBoost's own predict."""
+
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from tree_predictor import CompiledEnsemble, HybridPredictor, compile_booster
+
+xgb = pytest.importorskip("xgboost")
+
+
+def _data(n: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    x = rng.random((n, 4)).astype(np.float32)
+    y = x @ np.array([300.0, 120.0, -80.0, 15.0]) + rng.normal(0, 5, n)
+    return x, y
+
+
+def _model(**params: Any) -> Any:
+    x, y = _data(2000)
+    x[::13, 1] = np.nan  # teach the trees default directions for missing values
+    return xgb.XGBRegressor(random_state=42, **params).fit(x, y)
+
+
+@pytest.mark.parametrize("params", [{"n_estimators": 100, "max_depth": 4}, {"max_depth": 7}])
+def test_matches_xgboost_predict(params: dict[str, Any]) -> None:
+    model = _model(**params)
+    compiled = compile_booster(model)
+    x, _ = _data(500, seed=1)
+    x[::7, 1] = np.nan
+    x[::11, 3] = np.nan
+    for batch in (x[:1], x[:10], x):
+        np.testing.assert_allclose(compiled.predict(batch), model.predict(batch), atol=1e-3)
+
+
+def test_single_row_and_roundtrip(tmp_path: Path) -> None:
+    model = _model(n_estimators=50, max_depth=3)
+    compiled = compile_booster(model)
+    compiled.save(tmp_path / "trees.npz")
+    loaded = CompiledEnsemble.load(tmp_path / "trees.npz")
+    row = np.array([0.8, 0.3, 0.5, 0.1], dtype=np.float32)
+    assert loaded.predict(row).shape == (1,)
+    np.testing.assert_allclose(loaded.predict(row), model.predict(row.reshape(1, -1)), atol=1e-3)
+    assert loaded.n_trees == 50 and loaded.max_depth <= 3
+
+
+def test_rejects_models_it_cannot_reproduce() -> None:
+    x, y = _data(200)
+    classifier = xgb.XGBClassifier(n_estimators=3).fit(x, (y > y.mean()).astype(int))
+    with pytest.raises(ValueError, match="objective"):
+        compile_booster(classifier)
+    with pytest.raises(ValueError, match="features"):
+        compile_booster(_model(n_estimators=2)).predict(np.zeros((1, 3)))
+
+
+def test_hybrid_routes_large_batches_to_model() -> None:
+    compiled = compile_booster(_model(n_estimators=5))
+    fallback = MagicMock()
+    fallback.predict.return_value = np.zeros(100)
+    hybrid = HybridPredictor(compiled, fallback, max_rows=64)
+    hybrid.predict(np.zeros((64, 4)))
+    fallback.predict.assert_not_called()
+    hybrid.predict(np.zeros((100, 4)))
+    fallback.predict.assert_called_once()
@@ -0,0 +1,216 @@
+"""
+Compiled tree-ensemble predictor.
+Flattens a trained XGBoost regressor into node arrays and evaluates it with plain numpy,
+avoiding XGBoost's per-call DMatrix construction, validation and thread-pool start-up,
+which dominate the cost of scoring one row (suggested-rate on every profile edit) or a
+few hundred (ranker).
+
+All trees are walked together: each step gathers one node per (row, tree) and moves to a
+child. Nodes are renumbered so a node's right child directly follows its left child
+(next = left + went_right). Leaves point at themselves and test a constant zero column
+against +inf, so they always "go left" and stay put; `max_depth` steps reach every leaf.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+# Objectives whose prediction is base_score + sum of leaf values (identity link).
+SUPPORTED_OBJECTIVES = {
+    "reg:squarederror",
+    "reg:squaredlogerror",
+    "reg:absoluteerror",
+    "reg:pseudohubererror",
+    "reg:quantileerror",
+}
+
+
+@dataclass(frozen=True)
+class CompiledEnsemble:
+    """Node arrays of all trees, concatenated; `roots` holds each tree's first node."""
+
+    left: np.ndarray  # int32; right child is left + 1; leaves point at themselves
+    feature: np.ndarray  # int32; n_features (the zero column) for leaves
+    threshold: np.ndarray  # float32; go left when x < threshold; +inf for leaves
+    default_left: np.ndarray  # bool; direction for missing (NaN) values
+    value: np.ndarray  # float32; leaf values, 0 for inner nodes
+    roots: np.ndarray  # int32
+    base_score: float
+    max_depth: int
+    n_features: int
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def predict(self, features: Any) -> np.ndarray:
+        """Predict for a (n_rows, n_features) matrix; NaN follows each split's default branch."""
+        x = np.asarray(features, dtype=np.float32)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        if x.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {x.shape[1]}")
+        has_missing = bool(np.isnan(x).any())
+        width = self.n_features + 1
+        padded = np.zeros((len(x), width), dtype=np.float32)
+        padded[:, : self.n_features] = x
+        flat = padded.ravel()
+        row_base = (np.arange(len(x), dtype=np.int64) * width)[:, None]
+        node = np.broadcast_to(self.roots, (len(x), self.n_trees))
+        for _ in range(self.max_depth):
+            values = flat.take(row_base + self.feature.take(node))
+            threshold = self.threshold.take(node)
+            if has_missing:
+                went_right = np.where(
+                    np.isnan(values), ~self.default_left.take(node), values >= threshold
+                )
+            else:
+                went_right = values >= threshold
+            node = self.left.take(node) + went_right
+        out: np.ndarray = self.value.take(node).sum(axis=1, dtype=np.float32)
+        return out + np.float32(self.base_score)
+
+    def save(self, path: Path) -> None:
+        np.savez(
+            path,
+            left=self.left,
+            feature=self.feature,
+            threshold=self.threshold,
+            default_left=self.default_left,
+            value=self.value,
+            roots=self.roots,
+            params=np.array([self.base_score, self.max_depth, self.n_features], dtype=np.float64),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "CompiledEnsemble":
+        with np.load(path, allow_pickle=False) as data:
+            base_score, max_depth, n_features = data["params"].tolist()
+            return cls(
+                left=data["left"],
+                feature=data["feature"],
+                threshold=data["threshold"],
+                default_left=data["default_left"],
+                value=data["value"],
+                roots=data["roots"],
+                base_score=float(base_score),
+                max_depth=int(max_depth),
+                n_features=int(n_features),
+            )
+
+
+def compile_booster(booster: Any) -> CompiledEnsemble:
+    """Compile an xgboost Booster (or anything with get_booster()) from its JSON dump."""
+    if hasattr(booster, "get_booster"):
+        booster = booster.get_booster()
+    return compile_model_json(json.loads(booster.save_raw(raw_format="json")))
+
+
+def compile_model_json(model: dict[str, Any]) -> CompiledEnsemble:
+    """
+    Compile XGBoost's JSON model format. Raises ValueError for models this evaluator does
+    not reproduce exactly (non-tree boosters, multi-output, categorical splits, non-identity
+    objectives); callers then keep using XGBoost.
+    """
+    learner = model["learner"]
+    objective = learner["objective"]["name"]
+    if objective not in SUPPORTED_OBJECTIVES:
+        raise ValueError(f"Unsupported objective: {objective}")
+    booster = learner["gradient_booster"]
+    if booster.get("name") != "gbtree":
+        raise ValueError(f"Unsupported booster: {booster.get('name')}")
+    params = learner["learner_model_param"]
+    if int(params.get("num_class", 0)) > 1 or int(params.get("num_target", 1)) > 1:
+        raise ValueError("Multi-output models are not supported")
+
+    left: list[np.ndarray] = []
+    feature: list[np.ndarray] = []
+    threshold: list[np.ndarray] = []
+    default_left: list[np.ndarray] = []
+    value: list[np.ndarray] = []
+    roots: list[int] = []
+    offset = 0
+    max_depth = 0
+    n_features = int(params["num_feature"])
+    for tree in booster["model"]["trees"]:
+        if any(tree.get("split_type") or []):
+            raise ValueError("Categorical splits are not supported")
+        lc = np.asarray(tree["left_children"], dtype=np.int32)
+        rc = np.asarray(tree["right_children"], dtype=np.int32)
+        order, depth = _sibling_order(lc, rc)
+        new_id = np.empty(len(lc), dtype=np.int32)
+        new_id[order] = np.arange(len(order), dtype=np.int32)
+        lc, rc = lc[order], rc[order]
+        cond = np.asarray(tree["split_conditions"], dtype=np.float32)[order]
+        is_leaf = lc == -1
+        own = np.arange(len(lc), dtype=np.int32)
+        left.append(np.where(is_leaf, own, new_id[lc]) + offset)
+        split_on = np.asarray(tree["split_indices"], dtype=np.int32)[order]
+        feature.append(np.where(is_leaf, n_features, split_on))
+        threshold.append(np.where(is_leaf, np.float32(np.inf), cond))
+        default_left.append(np.asarray(tree["default_left"], dtype=bool)[order])
+        value.append(np.where(is_leaf, cond, np.float32(0)))
+        roots.append(offset)
+        offset += len(lc)
+        max_depth = max(max_depth, depth)
+
+    return CompiledEnsemble(
+        left=_concat(left, np.int32),
+        feature=_concat(feature, np.int32),
+        threshold=_concat(threshold, np.float32),
+        default_left=_concat(default_left, bool),
+        value=_concat(value, np.float32),
+        roots=np.asarray(roots, dtype=np.int32),
+        base_score=_parse_base_score(params["base_score"]),
+        max_depth=max_depth,
+        n_features=n_features,
+    )
+
+
+def _concat(parts: list[np.ndarray], dtype: Any) -> np.ndarray:
+    return np.concatenate(parts).astype(dtype) if parts else np.empty(0, dtype=dtype)
+
+
+def _sibling_order(left: np.ndarray, right: np.ndarray) -> tuple[np.ndarray, int]:
+    """
+    Breadth-first node order in which every right child directly follows its left sibling,
+    plus the tree depth (edges on the longest root-to-leaf path).
+    """
+    order = [0]
+    level = [0]
+    depth = 0
+    while True:
+        children = [c for n in level if left[n] != -1 for c in (left[n], right[n])]
+        if not children:
+            return np.asarray(order, dtype=np.int32), depth
+        order.extend(children)
+        depth += 1
+        level = children
+
+
+def _parse_base_score(raw: Any) -> float:
+    """base_score is a string such as '5E-1' or, in XGBoost 3, a one-element list '[5E-1]'."""
+    text = str(raw).strip().strip("[]")
+    return float(text.split(",")[0])
+
+
+class HybridPredictor:
+    """
+    Uses the compiled evaluator for small batches and the original model above `max_rows`,
+    where XGBoost's multithreaded predict overtakes the per-(row, tree) numpy walk.
+    """
+
+    def __init__(self, compiled: CompiledEnsemble, model: Any, max_rows: int) -> None:
+        self.compiled = compiled
+        self.model = model
+        self.max_rows = max_rows
+
+    def predict(self, features: Any) -> np.ndarray:
+        x = np.asarray(features, dtype=np.float32)
+        if len(x) <= self.max_rows:
+            return self.compiled.predict(x)
+        out: np.ndarray = self.model.predict(x)
+        return out
@@ -0,0 +1,110 @@
+-- ML service cache invalidation: log every write statement to the tables its caches are
+-- built from, and NOTIFY the "ml_changes" channel so the service can drop stale graph
+-- snapshots and rank sessions right away. The log lets a listener catch up on
+-- notifications it missed while disconnected (or poll where LISTEN is unavailable);
+-- the service prunes rows older than a day.
+--
+-- The triggers are statement-level: a bulk insert or update writes one log row listing
+-- the experts and projects it touched, and sends one notification, however many rows
+-- it changes. Each row records the writing transaction, so a reader can tell which rows
+-- may still appear (see invalidation.py): ids are handed out before commit, not in
+-- commit order.
+
+CREATE TABLE IF NOT EXISTS "ml_change_log" (
+    "id" BIGSERIAL NOT NULL,
+    "txid" BIGINT NOT NULL DEFAULT (pg_current_xact_id()::TEXT::BIGINT),
+    "table_name" TEXT NOT NULL,
+    "op" TEXT NOT NULL,
+    "row_count" INTEGER NOT NULL,
+    "expert_ids" TEXT[] NOT NULL DEFAULT '{}',
+    "project_ids" TEXT[] NOT NULL DEFAULT '{}',
+    "changed_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "ml_change_log_pkey" PRIMARY KEY ("id")
+);
+CREATE INDEX IF NOT EXISTS "ml_change_log_txid_idx" ON "ml_change_log"("txid");
+CREATE INDEX IF NOT EXISTS "ml_change_log_changed_at_idx" ON "ml_change_log"("changed_at");
+
+-- Runs once per statement, with the statement's rows in the new_rows / old_rows
+-- transition tables (whichever the trigger declares)
+CREATE OR REPLACE FUNCTION ml_log_change() RETURNS trigger AS $$
+DECLARE
+    expert_col TEXT;
+    project_col TEXT;
+    changed TEXT;
+    change_id BIGINT;
+BEGIN
+    -- The columns naming the expert and the project a row belongs to
+    expert_col := CASE TG_TABLE_NAME
+        WHEN 'experts' THEN 'id'
+        WHEN 'expert_vectors' THEN 'expert_id'
+        WHEN 'engagements' THEN 'expert_id'
+    END;
+    project_col := CASE TG_TABLE_NAME
+        WHEN 'research_projects' THEN 'id'
+        WHEN 'engagements' THEN 'project_id'
+    END;
+
+    IF TG_OP = 'INSERT' THEN
+        changed := 'SELECT * FROM new_rows';
+    ELSIF TG_OP = 'DELETE' THEN
+        changed := 'SELECT * FROM old_rows';
+    ELSE
+        -- Rows an update left as they were (e.g. upserts of identical rows) invalidate nothing
+        changed := 'SELECT n.* FROM new_rows n LEFT JOIN old_rows o ON o."id" = n."id"'
+            ' WHERE o IS DISTINCT FROM n';
+    END IF;
+
+    EXECUTE format(
+        'INSERT INTO "ml_change_log" ("table_name", "op", "row_count", "expert_ids", "project_ids")'
+        ' SELECT %L, %L, count(*), %s, %s FROM (%s) c HAVING count(*) > 0'
+        ' RETURNING "id"',
+        TG_TABLE_NAME,
+        TG_OP,
+        CASE WHEN expert_col IS NULL THEN '''{}'''
+            ELSE format('array_remove(array_agg(DISTINCT c.%I), NULL)', expert_col) END,
+        CASE WHEN project_col IS NULL THEN '''{}'''
+            ELSE format('array_remove(array_agg(DISTINCT c.%I), NULL)', project_col) END,
+        changed
+    ) INTO change_id;
+
+    -- The log row holds the ids; the notification only says there is one to read
+    IF change_id IS NOT NULL THEN
+        PERFORM pg_notify(
+            'ml_changes',
+            json_build_object('id', change_id, 'table', TG_TABLE_NAME, 'op', TG_OP)::text
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- One trigger per operation and table: transition tables are declared per event
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['experts', 'expert_vectors', 'engagements', 'research_projects']
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t || '_ml_insert', t);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows'
+            ' FOR EACH STATEMENT EXECUTE FUNCTION ml_log_change()',
+            t || '_ml_insert', t
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t || '_ml_update', t);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER UPDATE ON %I'
+            ' REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows'
+            ' FOR EACH STATEMENT EXECUTE FUNCTION ml_log_change()',
+            t || '_ml_update', t
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t || '_ml_delete', t);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows'
+            ' FOR EACH STATEMENT EXECUTE FUNCTION ml_log_change()',
+            t || '_ml_delete', t
+        );
+    END LOOP;
+END;
+$$;
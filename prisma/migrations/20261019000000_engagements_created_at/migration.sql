@@ -0,0 +1,6 @@
+-- Insert order of engagements, the ML rate model's incremental training watermark.
+-- "date" is the engagement's business date: rows inserted later can carry an older one.
+-- Existing rows get the migration time; the model's next run is a full retrain anyway.
+ALTER TABLE "engagements" ADD COLUMN IF NOT EXISTS "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS "engagements_created_at_id_idx" ON "engagements"("created_at", "id");